@@ -5,6 +5,12 @@ Analyzer Module
 提供新聞分析相關功能
 """
 
-from .engine import get_analyzer, analyze_news_article, InsuranceNewsAnalyzer
+__all__ = ['get_analyzer', 'analyze_news_article', 'analyze_news_batch', 'InsuranceNewsAnalyzer']
 
-__all__ = ['get_analyzer', 'analyze_news_article', 'InsuranceNewsAnalyzer']
+
+def __getattr__(name):
+    """延遲匯入分析引擎，只使用子模組 (例如爬蟲去重器使用的 jieba_loader) 時不必載入整個引擎"""
+    if name in __all__:
+        from . import engine
+        return getattr(engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,19 +8,132 @@ Analysis Result Cache System
 import json
 import hashlib
 import logging
+import atexit
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from functools import wraps
+import inspect
 import pickle
 import os
 from pathlib import Path
 
+from analyzer.cache_store import CacheStore, create_cache_store
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 logger = logging.getLogger('analyzer.cache')
 
+
+def fast_hash(data: bytes) -> str:
+    """
+    計算快取鍵值用的快速雜湊 (優先使用 xxhash，否則使用 blake2b)
+    
+    Args:
+        data: 要雜湊的位元組
+        
+    Returns:
+        32 字元十六進位雜湊值
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def article_identity(article_data: Dict[str, Any]) -> Tuple[Any, str]:
+    """
+    文章的快取識別：新聞 ID 加上影響分析結果的欄位雜湊
+    
+    Args:
+        article_data: 新聞文章數據
+        
+    Returns:
+        (新聞ID, 內容雜湊)
+    """
+    parts = [
+        article_data.get('title'), article_data.get('content'), article_data.get('summary'),
+        article_data.get('published_date'), article_data.get('source')
+    ]
+    content = '\x1f'.join('' if p is None else str(p) for p in parts)
+    return article_data.get('id'), fast_hash(content.encode('utf-8'))
+
+
+def _canonical(value: Any) -> Any:
+    """將字典與集合轉為排序後的元組 (遞迴處理)，內容相同的參數不因欄位或元素順序產生不同鍵值"""
+    if isinstance(value, dict):
+        return ('__dict__', tuple(sorted(((repr(k), _canonical(v)) for k, v in value.items()),
+                                         key=lambda item: item[0])))
+    if isinstance(value, (set, frozenset)):
+        return ('__set__', tuple(sorted((_canonical(v) for v in value), key=repr)))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_canonical(v) for v in value))
+    return value
+
+
+def _code_fingerprint(code) -> bytes:
+    """函數位元組碼與常數 (遞迴處理巢狀函數，避免記憶體位址影響結果)"""
+    parts = [code.co_code]
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            parts.append(_code_fingerprint(const))
+        else:
+            parts.append(repr(const).encode('utf-8'))
+    return b'\x00'.join(parts)
+
+
+def function_version(func: Callable, version: str = None) -> str:
+    """
+    計算函數的快取版本：所在模組原始碼的雜湊 (無法取得時使用位元組碼)，再加上手動版本號
+    
+    模組內任何程式碼變更都會產生新版本，舊的快取項目即不再命中。
+    
+    Args:
+        func: 被快取的函數
+        version: 手動指定的版本號 (例如詞典或模型更新時)
+        
+    Returns:
+        12 字元版本字串
+    """
+    try:
+        with open(inspect.getsourcefile(func), 'rb') as f:
+            source = f.read()
+    except (TypeError, OSError):
+        source = _code_fingerprint(func.__code__)
+    return fast_hash(source + str(version or '').encode('utf-8'))[:12]
+
+def files_version(paths: List[str], version: str = None) -> str:
+    """
+    計算多個檔案 (原始碼、詞典、配置) 的合併版本，任一檔案內容變更即產生新版本
+    
+    Args:
+        paths: 檔案路徑 (依序雜湊，不存在的檔案以路徑代替)
+        version: 手動指定的版本號
+        
+    Returns:
+        12 字元版本字串
+    """
+    parts = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                parts.append(f.read())
+        except OSError:
+            parts.append(f"missing:{os.path.basename(path)}".encode('utf-8'))
+    parts.append(str(version or '').encode('utf-8'))
+    return fast_hash(b'\x00'.join(parts))[:12]
+
 class AnalysisCache:
     """分析結果快取管理器"""
     
-    def __init__(self, cache_dir: str = "cache", ttl_hours: int = 24, memory_cache_size: int = 500):
+    def __init__(self, cache_dir: str = "cache", ttl_hours: int = 24, memory_cache_size: int = 500,
+                 memory_cache_max_bytes: int = 64 * 1024 * 1024, write_behind: bool = True,
+                 write_behind_interval: float = 1.0, backend: str = 'file', store: CacheStore = None,
+                 refresh_workers: int = 2):
         """
         初始化快取系統
         
@@ -28,25 +141,49 @@ class AnalysisCache:
             cache_dir: 快取檔案目錄
             ttl_hours: 快取生存時間（小時）
             memory_cache_size: 記憶體快取大小（項目數）
+            memory_cache_max_bytes: 記憶體快取大小上限（序列化後的位元組數）
+            write_behind: 是否由背景執行緒批次寫入檔案快取
+            write_behind_interval: 背景寫入的批次間隔（秒）
+            backend: 持久化儲存後端 ('file' 每鍵值一個檔案 / 'sqlite' 單一資料庫檔案)
+            store: 自訂儲存後端實例 (提供時忽略 backend)
+            refresh_workers: 背景更新過期資料的執行緒數量
         """
         # 檔案快取設定
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         self.ttl = timedelta(hours=ttl_hours)
+        self.store = store or create_cache_store(backend, self.cache_dir, self.ttl)
         
-        # 記憶體快取設定
+        # 記憶體快取設定 (LRU：最近使用的項目在尾端)
         self.memory_cache_size = memory_cache_size
-        self.memory_cache = {}  # 格式: {(category, key): (data, timestamp)}
+        self.memory_cache_max_bytes = memory_cache_max_bytes
+        self.memory_cache = OrderedDict()  # 格式: {(category, key): (data, timestamp)}
+        self._memory_sizes = {}            # 格式: {(category, key): 位元組數}
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
         self.memory_cache_hits = 0
         self.memory_cache_misses = 0
+        self.memory_cache_evictions = 0
         self.file_cache_hits = 0
         self.file_cache_misses = 0
         
-        # 建立子目錄
-        for category in ['analysis', 'importance', 'keywords', 'sentiment', 'trends', 'recommendations']:
-            (self.cache_dir / category).mkdir(exist_ok=True)
+        # 背景批次寫入設定
+        self.write_behind = write_behind
+        self.write_behind_interval = write_behind_interval
+        self._pending_writes = {}  # 格式: {(category, key): 序列化後資料}
+        self._write_condition = threading.Condition(self._lock)
+        self._writer_stop = threading.Event()
+        self._writer_thread = None
+        
+        # 進行中的計算 (合併同一鍵值的並行請求) 與背景更新設定
+        self._inflight = {}  # 格式: {(category, key): Future}
+        self._inflight_lock = threading.Lock()
+        self.refresh_workers = refresh_workers
+        self._refresh_executor = None
+        if write_behind:
+            atexit.register(self.flush)
         
-        logger.info(f"✅ 分析快取系統初始化完成，目錄: {self.cache_dir}，記憶體快取大小: {memory_cache_size}")
+        logger.info(f"✅ 分析快取系統初始化完成，目錄: {self.cache_dir}，儲存後端: {type(self.store).__name__}，記憶體快取大小: {memory_cache_size}")
     
     def _get_cache_key(self, data: Any) -> str:
         """
@@ -91,19 +228,6 @@ class AnalysisCache:
             # 其他類型直接返回
             return data
     
-    def _get_cache_path(self, category: str, key: str) -> Path:
-        """取得快取檔案路徑"""
-        return self.cache_dir / category / f"{key}.cache"
-    
-    def _is_cache_valid(self, cache_path: Path) -> bool:
-        """檢查快取是否仍然有效"""
-        if not cache_path.exists():
-            return False
-        
-        # 檢查檔案修改時間
-        file_time = datetime.fromtimestamp(cache_path.stat().st_mtime)
-        return datetime.now() - file_time < self.ttl
-    
     def get(self, category: str, key: str) -> Optional[Dict[str, Any]]:
         """
         從快取中取得資料
@@ -115,54 +239,256 @@ class AnalysisCache:
         Returns:
             快取的資料，如果不存在或過期則返回 None
         """
+        return self.get_entry(category, key)[0]
+    
+    def get_entry(self, category: str, key: str, stale_seconds: float = 0) -> Tuple[Optional[Any], bool]:
+        """
+        從快取中取得資料，並可接受過期不久的資料
+        
+        Args:
+            category: 快取分類
+            key: 快取鍵值
+            stale_seconds: 過期後仍可返回的秒數 (0 表示不接受過期資料)
+            
+        Returns:
+            (快取資料, 是否為過期資料)，不存在時資料為 None
+        """
         try:
             # 1. 先檢查記憶體快取
             cache_key = (category, key)
-            if cache_key in self.memory_cache:
-                data, timestamp = self.memory_cache[cache_key]
-                if datetime.now() - timestamp < self.ttl:
-                    self.memory_cache_hits += 1
-                    logger.debug(f"✅ 記憶體快取命中: {category}/{key}")
-                    return data
-                else:
-                    # 過期項目從記憶體中移除
-                    del self.memory_cache[cache_key]
-            
-            self.memory_cache_misses += 1
+            stale_data = None
+            with self._lock:
+                if cache_key in self.memory_cache:
+                    data, timestamp = self.memory_cache[cache_key]
+                    age = datetime.now() - timestamp
+                    if age < self.ttl:
+                        self.memory_cache.move_to_end(cache_key)
+                        self.memory_cache_hits += 1
+                        logger.debug(f"✅ 記憶體快取命中: {category}/{key}")
+                        return data, False
+                    elif age < self.ttl + timedelta(seconds=stale_seconds):
+                        stale_data = data
+                    else:
+                        # 過期項目從記憶體中移除
+                        self._remove_from_memory_cache(cache_key)
+                
+                self.memory_cache_misses += 1
+                
+                # 尚未寫入檔案的資料 (已被擠出記憶體快取)
+                payload = self._pending_writes.get(cache_key)
             
             # 2. 檢查檔案快取
-            cache_path = self._get_cache_path(category, key)
-            
-            if not self._is_cache_valid(cache_path):
-                self.file_cache_misses += 1
-                return None
-            
-            with open(cache_path, 'rb') as f:
-                cached_data = pickle.load(f)
+            if payload is None:
+                payload = self.store.get(category, key)
+                
+                if payload is None:
+                    self.file_cache_misses += 1
+                    if stale_data is not None:
+                        return stale_data, True
+                    if stale_seconds > 0:
+                        stale_payload = self.store.get_stale(category, key, stale_seconds)
+                        if stale_payload is not None:
+                            return pickle.loads(stale_payload), True
+                    return None, False
+            
+            cached_data = pickle.loads(payload)
             
             # 加入記憶體快取
-            self._add_to_memory_cache(category, key, cached_data)
+            self._add_to_memory_cache(category, key, cached_data, len(payload))
             
             self.file_cache_hits += 1
             logger.debug(f"✅ 檔案快取命中: {category}/{key}")
-            return cached_data
+            return cached_data, False
             
         except Exception as e:
             logger.debug(f"❌ 讀取快取失敗: {category}/{key} - {e}")
-            return None
+            return None, False
+    
+    def get_or_compute(self, category: str, key: str, compute: Callable[[], Any],
+                       stale_seconds: float = 0, single_flight: bool = True) -> Any:
+        """
+        取得快取資料，未命中時計算並存入快取
+        
+        single_flight 開啟時，同一鍵值同時只有一個呼叫者執行計算，其他呼叫者等待同一結果；
+        stale_seconds 大於 0 時，過期不久的資料會直接返回，並在背景重新計算一次。
+        
+        Args:
+            category: 快取分類
+            key: 快取鍵值
+            compute: 計算結果的函數
+            stale_seconds: 過期後仍可返回的秒數
+            single_flight: 是否合併同一鍵值的並行計算
+            
+        Returns:
+            快取或計算的結果
+        """
+        data, is_stale = self.get_entry(category, key, stale_seconds)
+        if data is not None:
+            if is_stale:
+                self._refresh_in_background(category, key, compute)
+            return data
+        
+        if not single_flight:
+            result = compute()
+            self.set(category, key, result)
+            return result
+        
+        future, is_leader = self._claim_flight(category, key)
+        if not is_leader:
+            logger.debug(f"✅ 等待進行中的計算: {category}/{key}")
+            return future.result()
+        return self._run_flight(category, key, compute, future)
+    
+    def _claim_flight(self, category: str, key: str) -> Tuple[Future, bool]:
+        """取得鍵值的進行中計算，沒有時建立並成為負責計算的呼叫者"""
+        with self._inflight_lock:
+            future = self._inflight.get((category, key))
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[(category, key)] = future
+            return future, True
     
-    def _add_to_memory_cache(self, category: str, key: str, data: Dict[str, Any]) -> None:
-        """將資料加入記憶體快取"""
+    def _run_flight(self, category: str, key: str, compute: Callable[[], Any], future: Future) -> Any:
+        """執行計算、存入快取並通知等待中的呼叫者"""
+        try:
+            result = compute()
+            self.set(category, key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop((category, key), None)
+    
+    def _refresh_in_background(self, category: str, key: str, compute: Callable[[], Any]) -> None:
+        """於背景重新計算過期資料 (同一鍵值同時只有一個背景計算)"""
+        future, is_leader = self._claim_flight(category, key)
+        if not is_leader:
+            return
+        
+        with self._inflight_lock:
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers, thread_name_prefix='analysis-cache-refresh'
+                )
+        
+        def refresh():
+            try:
+                self._run_flight(category, key, compute, future)
+                logger.debug(f"✅ 背景更新快取完成: {category}/{key}")
+            except Exception as e:
+                logger.warning(f"❌ 背景更新快取失敗: {category}/{key} - {e}")
+        
+        self._refresh_executor.submit(refresh)
+    
+    def _remove_from_memory_cache(self, cache_key: Tuple[str, str]) -> None:
+        """從記憶體快取移除項目並更新位元組統計 (呼叫前需持有鎖)"""
+        if cache_key in self.memory_cache:
+            del self.memory_cache[cache_key]
+            self._memory_bytes -= self._memory_sizes.pop(cache_key, 0)
+    
+    def _add_to_memory_cache(self, category: str, key: str, data: Dict[str, Any], size: int = None) -> None:
+        """
+        將資料加入記憶體快取，超過項目數或位元組上限時淘汰最久未使用的項目
+        
+        Args:
+            category: 快取分類
+            key: 快取鍵值
+            data: 要快取的資料
+            size: 資料序列化後的位元組數 (未提供時自行計算)
+        """
         cache_key = (category, key)
         
-        # 如果記憶體快取已滿，移除最舊的項目
-        if len(self.memory_cache) >= self.memory_cache_size:
-            # 簡單的 LRU 策略：移除第一個項目
-            oldest_key = next(iter(self.memory_cache))
-            del self.memory_cache[oldest_key]
+        if size is None:
+            try:
+                size = len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+            except Exception:
+                size = 0
         
-        # 加入新項目
-        self.memory_cache[cache_key] = (data, datetime.now())
+        with self._lock:
+            self._remove_from_memory_cache(cache_key)
+            
+            # 單一項目超過上限時不放入記憶體快取
+            if self.memory_cache_size <= 0 or size > self.memory_cache_max_bytes:
+                return
+            
+            # 淘汰最久未使用的項目
+            while self.memory_cache and (
+                len(self.memory_cache) >= self.memory_cache_size or
+                self._memory_bytes + size > self.memory_cache_max_bytes
+            ):
+                oldest_key = next(iter(self.memory_cache))
+                self._remove_from_memory_cache(oldest_key)
+                self.memory_cache_evictions += 1
+            
+            # 加入新項目
+            self.memory_cache[cache_key] = (data, datetime.now())
+            self._memory_sizes[cache_key] = size
+            self._memory_bytes += size
+    
+    def _ensure_writer(self) -> None:
+        """啟動背景寫入執行緒 (呼叫前需持有鎖)"""
+        if self._writer_thread is None or not self._writer_thread.is_alive():
+            self._writer_stop.clear()
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop, name='analysis-cache-writer', daemon=True
+            )
+            self._writer_thread.start()
+    
+    def _writer_loop(self) -> None:
+        """背景寫入迴圈：每隔一段時間批次寫入累積的快取資料"""
+        while not self._writer_stop.is_set():
+            with self._write_condition:
+                while not self._pending_writes and not self._writer_stop.is_set():
+                    self._write_condition.wait()
+            
+            # 等待更多寫入累積成一個批次 (停止時立即寫入)
+            self._writer_stop.wait(self.write_behind_interval)
+            self.flush()
+    
+    def flush(self) -> int:
+        """
+        立即寫入所有尚未寫入檔案的快取資料
+        
+        Returns:
+            寫入的項目數量
+        """
+        with self._lock:
+            batch = list(self._pending_writes.items())
+        
+        if not batch:
+            return 0
+        
+        written = self.store.set_many([(category, key, payload) for (category, key), payload in batch])
+        
+        with self._lock:
+            for cache_key, payload in batch:
+                # 寫入期間若有新值則保留，等待下一批次
+                if self._pending_writes.get(cache_key) is payload:
+                    del self._pending_writes[cache_key]
+        
+        if written:
+            logger.debug(f"✅ 批次寫入 {written} 個快取檔案")
+        return written
+    
+    def close(self) -> None:
+        """停止背景寫入執行緒、寫入剩餘資料並關閉儲存後端"""
+        with self._write_condition:
+            self._writer_stop.set()
+            self._write_condition.notify_all()
+        if self._writer_thread is not None:
+            self._writer_thread.join(timeout=10)
+            self._writer_thread = None
+        if self._refresh_executor is not None:
+            self._refresh_executor.shutdown(wait=True)
+            self._refresh_executor = None
+        self.flush()
+        if self.write_behind:
+            atexit.unregister(self.flush)
+        self.store.close()
     
     def set(self, category: str, key: str, data: Dict[str, Any]) -> bool:
         """
@@ -177,14 +503,19 @@ class AnalysisCache:
             是否成功存入
         """
         try:
-            # 1. 存入記憶體快取
-            self._add_to_memory_cache(category, key, data)
+            payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
             
-            # 2. 存入檔案快取
-            cache_path = self._get_cache_path(category, key)
+            # 1. 存入記憶體快取
+            self._add_to_memory_cache(category, key, data, len(payload))
             
-            with open(cache_path, 'wb') as f:
-                pickle.dump(data, f)
+            # 2. 存入檔案快取 (背景批次寫入或同步寫入)
+            if self.write_behind:
+                with self._write_condition:
+                    self._pending_writes[(category, key)] = payload
+                    self._ensure_writer()
+                    self._write_condition.notify()
+            elif not self.store.set_many([(category, key, payload)]):
+                return False
             
             logger.debug(f"✅ 資料已快取: {category}/{key}")
             return True
@@ -205,18 +536,17 @@ class AnalysisCache:
             是否成功刪除
         """
         try:
-            # 1. 從記憶體快取中刪除
+            # 1. 從記憶體快取與待寫入資料中刪除
             cache_key = (category, key)
-            if cache_key in self.memory_cache:
-                del self.memory_cache[cache_key]
+            with self._lock:
+                self._remove_from_memory_cache(cache_key)
+                pending = self._pending_writes.pop(cache_key, None) is not None
             
             # 2. 從檔案快取中刪除
-            cache_path = self._get_cache_path(category, key)
-            if cache_path.exists():
-                cache_path.unlink()
+            if self.store.delete(category, key):
                 logger.debug(f"✅ 快取已刪除: {category}/{key}")
                 return True
-            return False
+            return pending
             
         except Exception as e:
             logger.error(f"❌ 快取刪除失敗: {category}/{key} - {e}")
@@ -233,20 +563,16 @@ class AnalysisCache:
             刪除的檔案數量
         """
         try:
-            # 1. 清空記憶體快取中的該分類項目
-            keys_to_remove = [k for k in self.memory_cache.keys() if k[0] == category]
-            for key in keys_to_remove:
-                del self.memory_cache[key]
+            # 1. 清空記憶體快取與待寫入資料中的該分類項目
+            with self._lock:
+                keys_to_remove = [k for k in self.memory_cache.keys() if k[0] == category]
+                for key in keys_to_remove:
+                    self._remove_from_memory_cache(key)
+                for key in [k for k in self._pending_writes if k[0] == category]:
+                    del self._pending_writes[key]
             
             # 2. 清空檔案快取
-            category_dir = self.cache_dir / category
-            if not category_dir.exists():
-                return 0
-            
-            count = 0
-            for cache_file in category_dir.glob("*.cache"):
-                cache_file.unlink()
-                count += 1
+            count = self.store.clear_category(category)
             
             logger.info(f"✅ 已清空 {category} 快取，刪除 {count} 個檔案")
             return count
@@ -265,23 +591,20 @@ class AnalysisCache:
         try:
             # 1. 清理記憶體快取
             now = datetime.now()
-            keys_to_remove = []
-            for k, (_, timestamp) in self.memory_cache.items():
-                if now - timestamp >= self.ttl:
-                    keys_to_remove.append(k)
-            
-            for key in keys_to_remove:
-                del self.memory_cache[key]
+            with self._lock:
+                keys_to_remove = []
+                for k, (_, timestamp) in self.memory_cache.items():
+                    if now - timestamp >= self.ttl:
+                        keys_to_remove.append(k)
+                
+                for key in keys_to_remove:
+                    self._remove_from_memory_cache(key)
             
             memory_count = len(keys_to_remove)
             logger.debug(f"✅ 已清理 {memory_count} 個過期記憶體快取項目")
             
             # 2. 清理檔案快取
-            file_count = 0
-            for cache_file in self.cache_dir.rglob("*.cache"):
-                if not self._is_cache_valid(cache_file):
-                    cache_file.unlink()
-                    file_count += 1
+            file_count = self.store.clear_expired()
             
             logger.info(f"✅ 已清理 {memory_count} 個記憶體快取項目和 {file_count} 個過期快取檔案")
             return file_count + memory_count
@@ -311,12 +634,16 @@ class AnalysisCache:
                     'hits': self.memory_cache_hits,
                     'misses': self.memory_cache_misses,
                     'hit_ratio': self.memory_cache_hits / (self.memory_cache_hits + self.memory_cache_misses) * 100 if (self.memory_cache_hits + self.memory_cache_misses) > 0 else 0,
+                    'size_bytes': self._memory_bytes,
+                    'max_bytes': self.memory_cache_max_bytes,
+                    'evictions': self.memory_cache_evictions,
                     'categories': {}
                 },
                 'file_cache': {
                     'hits': self.file_cache_hits,
                     'misses': self.file_cache_misses,
-                    'hit_ratio': self.file_cache_hits / (self.file_cache_hits + self.file_cache_misses) * 100 if (self.file_cache_hits + self.file_cache_misses) > 0 else 0
+                    'hit_ratio': self.file_cache_hits / (self.file_cache_hits + self.file_cache_misses) * 100 if (self.file_cache_hits + self.file_cache_misses) > 0 else 0,
+                    'pending_writes': len(self._pending_writes)
                 }
             }
             
@@ -325,7 +652,10 @@ class AnalysisCache:
             valid_memory_items = 0
             expired_memory_items = 0
             
-            for (cat, _), (_, timestamp) in self.memory_cache.items():
+            with self._lock:
+                memory_items = list(self.memory_cache.items())
+            
+            for (cat, _), (_, timestamp) in memory_items:
                 if cat not in memory_categories:
                     memory_categories[cat] = {'count': 0, 'expired': 0}
                 
@@ -342,35 +672,16 @@ class AnalysisCache:
             stats['memory_cache']['expired_items'] = expired_memory_items
             
             # 檔案快取統計
-            for category_dir in self.cache_dir.iterdir():
-                if category_dir.is_dir():
-                    category_name = category_dir.name
-                    cache_files = list(category_dir.glob("*.cache"))
-                    
-                    valid_files = 0
-                    expired_files = 0
-                    category_size = 0
-                    
-                    for cache_file in cache_files:
-                        file_size = cache_file.stat().st_size
-                        category_size += file_size
-                        
-                        if self._is_cache_valid(cache_file):
-                            valid_files += 1
-                        else:
-                            expired_files += 1
-                    
-                    stats['categories'][category_name] = {
-                        'valid_files': valid_files,
-                        'expired_files': expired_files,
-                        'total_files': len(cache_files),
-                        'size_bytes': category_size,
-                        'memory_items': memory_categories.get(category_name, {}).get('count', 0)
-                    }
-                    
-                    stats['total_files'] += len(cache_files)
-                    stats['total_size'] += category_size
-                    stats['expired_files'] += expired_files
+            store_stats = self.store.get_stats()
+            for category_name, category_stats in store_stats['categories'].items():
+                stats['categories'][category_name] = dict(
+                    category_stats,
+                    memory_items=memory_categories.get(category_name, {}).get('count', 0)
+                )
+            
+            stats['total_files'] = store_stats['total_files']
+            stats['total_size'] = store_stats['total_size']
+            stats['expired_files'] = store_stats['expired_files']
             
             # 計算整體效能
             total_hits = self.memory_cache_hits + self.file_cache_hits
@@ -393,26 +704,52 @@ class AnalysisCache:
 _cache_instance = None
 
 def get_cache() -> AnalysisCache:
-    """取得全域快取實例"""
+    """取得全域快取實例 (儲存後端可由環境變數 ANALYSIS_CACHE_BACKEND 指定)"""
     global _cache_instance
     if _cache_instance is None:
-        _cache_instance = AnalysisCache()
+        _cache_instance = AnalysisCache(backend=os.environ.get('ANALYSIS_CACHE_BACKEND', 'file'))
     return _cache_instance
 
-def cached_analysis(category: str = 'analysis', ttl_hours: int = None, skip_args: List[int] = None, skip_kwargs: List[str] = None):
+def cached_analysis(category: str = 'analysis', ttl_hours: int = None, skip_args: List[int] = None,
+                    skip_kwargs: List[str] = None, key_mode: str = 'json', key_func: Callable = None,
+                    version: str = None, single_flight: bool = True, stale_while_revalidate_hours: float = 0):
     """
     分析結果快取裝飾器
     
+    快取鍵值格式為 "函數名稱-版本-雜湊"，版本由函數所在模組的原始碼與 version 計算，
+    模組更新後舊的快取項目會自動失效；結果依賴其他模組或詞典時，以 files_version
+    計算這些檔案的版本傳入 version。
+    
     Args:
         category: 快取分類
         ttl_hours: 覆寫預設的快取生存時間（小時）
         skip_args: 要排除在快取鍵值計算外的位置參數索引列表
         skip_kwargs: 要排除在快取鍵值計算外的關鍵字參數名稱列表
+        key_mode: 鍵值計算方式
+            'json' - 參數轉為排序後的 JSON 再雜湊 (預設，最穩定)
+            'fast' - 參數 (字典與集合先依鍵值排序) 以 pickle 序列化後做快速雜湊
+            'identity' - 由 key_func 返回的識別值做快速雜湊
+        key_func: 以與被裝飾函數相同的參數 (不含 self) 呼叫，返回識別值，例如 article_identity；
+            提供時 key_mode 自動視為 'identity'
+        version: 額外的版本號 (例如 files_version 計算的相依檔案版本)
+        single_flight: 同一鍵值並行未命中時只計算一次，其他呼叫者等待同一結果
+        stale_while_revalidate_hours: 過期後仍可返回舊結果的時數，期間由背景執行一次重新計算
     """
+    if key_func is not None:
+        key_mode = 'identity'
+    if key_mode not in ('json', 'fast', 'identity'):
+        raise ValueError(f"不支援的快取鍵值模式: {key_mode}")
+    if key_mode == 'identity' and key_func is None:
+        raise ValueError("key_mode='identity' 需要提供 key_func")
+    
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            cache = get_cache()
+        key_prefix = f"{func.__name__}-{function_version(func, version)}"
+        
+        def build_key(cache: AnalysisCache, args, kwargs) -> str:
+            """產生快取鍵值"""
+            if key_mode == 'identity':
+                identity = key_func(*args[1:], **kwargs)
+                return f"{key_prefix}-{fast_hash(repr(identity).encode('utf-8'))}"
             
             # 產生快取鍵值 (排除指定的參數)
             filtered_args = []
@@ -432,25 +769,32 @@ def cached_analysis(category: str = 'analysis', ttl_hours: int = None, skip_args
                     if k in filtered_kwargs:
                         filtered_kwargs[k] = '_SKIPPED_'
             
+            if key_mode == 'fast':
+                try:
+                    payload = pickle.dumps(_canonical((filtered_args, filtered_kwargs)),
+                                           protocol=pickle.HIGHEST_PROTOCOL)
+                    return f"{key_prefix}-{fast_hash(payload)}"
+                except Exception:
+                    pass  # 無法序列化的參數改用 JSON 方式
+            
             cache_data = {
                 'func_name': func.__name__,
                 'args': filtered_args,
                 'kwargs': filtered_kwargs
             }
-            cache_key = cache._get_cache_key(cache_data)
-            
-            # 嘗試從快取取得結果
-            cached_result = cache.get(category, cache_key)
-            if cached_result is not None:
-                logger.debug(f"✅ 使用快取結果: {func.__name__}")
-                return cached_result
-            
-            # 執行函數並快取結果
-            result = func(*args, **kwargs)
-            cache.set(category, cache_key, result)
-            logger.debug(f"✅ 新增快取結果: {func.__name__}")
-            
-            return result
+            return f"{key_prefix}-{cache._get_cache_key(cache_data)}"
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            cache_key = build_key(cache, args, kwargs)
+            
+            # 從快取取得結果，未命中時執行函數並快取結果
+            return cache.get_or_compute(
+                category, cache_key, lambda: func(*args, **kwargs),
+                stale_seconds=stale_while_revalidate_hours * 3600,
+                single_flight=single_flight
+            )
         
         return wrapper
     return decorator
@@ -475,12 +819,8 @@ def invalidate_cache(category: str = None, pattern: str = None):
             if category:
                 if pattern:
                     # 尋找匹配的鍵值刪除
-                    keys_to_delete = []
-                    category_path = cache.cache_dir / category
-                    if category_path.exists():
-                        for cache_file in category_path.glob("*.cache"):
-                            if pattern in cache_file.name:
-                                keys_to_delete.append(cache_file.stem)
+                    cache.flush()
+                    keys_to_delete = [key for key in cache.store.keys(category) if pattern in key]
                     
                     for key in keys_to_delete:
                         cache.delete(category, key)
@@ -521,6 +861,7 @@ if __name__ == "__main__":
     print(f"快取統計: {stats}")
     
     # 清理測試快取
+    cache.close()
     import shutil
     shutil.rmtree("test_cache")
     print("✅ 快取系統測試完成")
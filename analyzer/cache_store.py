@@ -0,0 +1,366 @@
+"""
+分析快取儲存後端
+Analysis Cache Storage Backends
+
+AnalysisCache 的持久化層，提供兩種實作：
+- FileCacheStore: 每個鍵值一個 pickle 檔案 (原有格式)
+- SQLiteCacheStore: 單一 SQLite 檔案，以到期時間索引清理過期項目，並以統計表維護各分類數量
+"""
+
+import os
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger('analyzer.cache')
+
+DEFAULT_CATEGORIES = ['analysis', 'importance', 'keywords', 'sentiment', 'trends', 'recommendations']
+
+
+class CacheStore(ABC):
+    """快取儲存後端介面"""
+
+    @abstractmethod
+    def get(self, category: str, key: str) -> Optional[bytes]:
+        """取得未過期的序列化資料，不存在或已過期時返回 None"""
+
+    @abstractmethod
+    def get_stale(self, category: str, key: str, stale_seconds: float) -> Optional[bytes]:
+        """取得過期不超過 stale_seconds 秒的序列化資料"""
+
+    @abstractmethod
+    def set_many(self, items: List[Tuple[str, str, bytes]]) -> int:
+        """批次寫入 (category, key, 序列化資料)，返回成功寫入的數量"""
+
+    @abstractmethod
+    def delete(self, category: str, key: str) -> bool:
+        """刪除單一項目"""
+
+    @abstractmethod
+    def clear_category(self, category: str) -> int:
+        """清空分類，返回刪除數量"""
+
+    @abstractmethod
+    def clear_expired(self) -> int:
+        """清理過期項目，返回刪除數量"""
+
+    @abstractmethod
+    def keys(self, category: str) -> List[str]:
+        """列出分類中的所有鍵值"""
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得儲存統計
+
+        Returns:
+            {'categories': {分類: {'valid_files', 'expired_files', 'total_files', 'size_bytes'}},
+             'total_files', 'total_size', 'expired_files'}
+        """
+
+    def close(self) -> None:
+        """釋放資源"""
+
+
+class FileCacheStore(CacheStore):
+    """每個鍵值一個檔案的儲存後端"""
+
+    def __init__(self, cache_dir: Path, ttl: timedelta):
+        """
+        初始化檔案儲存
+
+        Args:
+            cache_dir: 快取檔案目錄
+            ttl: 快取生存時間
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+
+        # 建立子目錄
+        for category in DEFAULT_CATEGORIES:
+            (self.cache_dir / category).mkdir(parents=True, exist_ok=True)
+
+    def _get_cache_path(self, category: str, key: str) -> Path:
+        """取得快取檔案路徑"""
+        return self.cache_dir / category / f"{key}.cache"
+
+    def _is_cache_valid(self, cache_path: Path, grace: timedelta = timedelta(0)) -> bool:
+        """檢查快取是否仍然有效 (可加上過期寬限時間)"""
+        if not cache_path.exists():
+            return False
+
+        # 檢查檔案修改時間
+        file_time = datetime.fromtimestamp(cache_path.stat().st_mtime)
+        return datetime.now() - file_time < self.ttl + grace
+
+    def get(self, category: str, key: str) -> Optional[bytes]:
+        cache_path = self._get_cache_path(category, key)
+        if not self._is_cache_valid(cache_path):
+            return None
+        with open(cache_path, 'rb') as f:
+            return f.read()
+
+    def get_stale(self, category: str, key: str, stale_seconds: float) -> Optional[bytes]:
+        cache_path = self._get_cache_path(category, key)
+        if not self._is_cache_valid(cache_path, timedelta(seconds=stale_seconds)):
+            return None
+        with open(cache_path, 'rb') as f:
+            return f.read()
+
+    def set_many(self, items: List[Tuple[str, str, bytes]]) -> int:
+        written = 0
+        for category, key, payload in items:
+            try:
+                # 先寫暫存檔再取代，避免讀到寫一半的檔案
+                cache_path = self._get_cache_path(category, key)
+                cache_path.parent.mkdir(exist_ok=True)
+                temp_path = cache_path.with_name(f"{cache_path.name}.{threading.get_ident()}.tmp")
+                with open(temp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(temp_path, cache_path)
+                written += 1
+            except Exception as e:
+                logger.error(f"❌ 快取寫入失敗: {category}/{key} - {e}")
+        return written
+
+    def delete(self, category: str, key: str) -> bool:
+        cache_path = self._get_cache_path(category, key)
+        if cache_path.exists():
+            cache_path.unlink()
+            return True
+        return False
+
+    def clear_category(self, category: str) -> int:
+        category_dir = self.cache_dir / category
+        if not category_dir.exists():
+            return 0
+
+        count = 0
+        for cache_file in category_dir.glob("*.cache"):
+            cache_file.unlink()
+            count += 1
+        return count
+
+    def clear_expired(self) -> int:
+        count = 0
+        for cache_file in self.cache_dir.rglob("*.cache"):
+            if not self._is_cache_valid(cache_file):
+                cache_file.unlink()
+                count += 1
+        return count
+
+    def keys(self, category: str) -> List[str]:
+        category_dir = self.cache_dir / category
+        if not category_dir.exists():
+            return []
+        return [cache_file.stem for cache_file in category_dir.glob("*.cache")]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {'categories': {}, 'total_files': 0, 'total_size': 0, 'expired_files': 0}
+
+        for category_dir in self.cache_dir.iterdir():
+            if category_dir.is_dir():
+                cache_files = list(category_dir.glob("*.cache"))
+
+                valid_files = 0
+                expired_files = 0
+                category_size = 0
+
+                for cache_file in cache_files:
+                    category_size += cache_file.stat().st_size
+
+                    if self._is_cache_valid(cache_file):
+                        valid_files += 1
+                    else:
+                        expired_files += 1
+
+                stats['categories'][category_dir.name] = {
+                    'valid_files': valid_files,
+                    'expired_files': expired_files,
+                    'total_files': len(cache_files),
+                    'size_bytes': category_size
+                }
+
+                stats['total_files'] += len(cache_files)
+                stats['total_size'] += category_size
+                stats['expired_files'] += expired_files
+
+        return stats
+
+
+class SQLiteCacheStore(CacheStore):
+    """單一 SQLite 檔案的儲存後端"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            category TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (category, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_expires_at ON cache_entries (expires_at);
+
+        CREATE TABLE IF NOT EXISTS cache_stats (
+            category TEXT PRIMARY KEY,
+            entries INTEGER NOT NULL DEFAULT 0,
+            size_bytes INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TRIGGER IF NOT EXISTS cache_entries_after_insert AFTER INSERT ON cache_entries
+        BEGIN
+            INSERT OR IGNORE INTO cache_stats (category) VALUES (NEW.category);
+            UPDATE cache_stats SET entries = entries + 1, size_bytes = size_bytes + NEW.size
+            WHERE category = NEW.category;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS cache_entries_after_update AFTER UPDATE ON cache_entries
+        BEGIN
+            UPDATE cache_stats SET size_bytes = size_bytes - OLD.size + NEW.size
+            WHERE category = NEW.category;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS cache_entries_after_delete AFTER DELETE ON cache_entries
+        BEGIN
+            UPDATE cache_stats SET entries = entries - 1, size_bytes = size_bytes - OLD.size
+            WHERE category = OLD.category;
+        END;
+    """
+
+    def __init__(self, db_path: Path, ttl: timedelta):
+        """
+        初始化 SQLite 儲存
+
+        Args:
+            db_path: 資料庫檔案路徑
+            ttl: 快取生存時間
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self._SCHEMA)
+
+    def get(self, category: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM cache_entries WHERE category = ? AND key = ? AND expires_at > ?',
+                (category, key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_stale(self, category: str, key: str, stale_seconds: float) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM cache_entries WHERE category = ? AND key = ? AND expires_at > ?',
+                (category, key, time.time() - stale_seconds)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_many(self, items: List[Tuple[str, str, bytes]]) -> int:
+        if not items:
+            return 0
+
+        expires_at = time.time() + self.ttl.total_seconds()
+        rows = [(category, key, sqlite3.Binary(payload), len(payload), expires_at)
+                for category, key, payload in items]
+
+        try:
+            with self._lock:
+                self._conn.execute('BEGIN')
+                try:
+                    self._conn.executemany(
+                        """
+                        INSERT INTO cache_entries (category, key, value, size, expires_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (category, key) DO UPDATE SET
+                            value = excluded.value, size = excluded.size, expires_at = excluded.expires_at
+                        """,
+                        rows
+                    )
+                    self._conn.execute('COMMIT')
+                except Exception:
+                    self._conn.execute('ROLLBACK')
+                    raise
+            return len(rows)
+        except Exception as e:
+            logger.error(f"❌ 快取批次寫入失敗: {e}")
+            return 0
+
+    def delete(self, category: str, key: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM cache_entries WHERE category = ? AND key = ?', (category, key)
+            )
+        return cursor.rowcount > 0
+
+    def clear_category(self, category: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM cache_entries WHERE category = ?', (category,))
+        return cursor.rowcount
+
+    def clear_expired(self) -> int:
+        # 透過 expires_at 索引只掃描過期項目
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+        return cursor.rowcount
+
+    def keys(self, category: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute('SELECT key FROM cache_entries WHERE category = ?', (category,)).fetchall()
+        return [row[0] for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = self._conn.execute('SELECT category, entries, size_bytes FROM cache_stats').fetchall()
+            expired = dict(self._conn.execute(
+                'SELECT category, COUNT(*) FROM cache_entries WHERE expires_at <= ? GROUP BY category',
+                (time.time(),)
+            ).fetchall())
+
+        stats = {'categories': {}, 'total_files': 0, 'total_size': 0, 'expired_files': 0}
+        for category, entries, size_bytes in totals:
+            expired_files = expired.get(category, 0)
+            stats['categories'][category] = {
+                'valid_files': entries - expired_files,
+                'expired_files': expired_files,
+                'total_files': entries,
+                'size_bytes': size_bytes
+            }
+            stats['total_files'] += entries
+            stats['total_size'] += size_bytes
+            stats['expired_files'] += expired_files
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_cache_store(backend: str, cache_dir: Path, ttl: timedelta) -> CacheStore:
+    """
+    依名稱建立儲存後端
+
+    Args:
+        backend: 'file' 或 'sqlite'
+        cache_dir: 快取目錄
+        ttl: 快取生存時間
+
+    Returns:
+        儲存後端實例
+    """
+    if backend == 'sqlite':
+        return SQLiteCacheStore(Path(cache_dir) / 'analysis_cache.db', ttl)
+    if backend == 'file':
+        return FileCacheStore(Path(cache_dir), ttl)
+    raise ValueError(f"不支援的快取儲存後端: {backend}")
@@ -0,0 +1,130 @@
+"""
+已編譯的類別分類器
+Compiled Category Classifier
+
+將所有類別的關鍵字與同義詞編譯成單一比對器，並建立「詞語 -> (類別, 關鍵字)」反向索引。
+分類時只需掃描文本一次，再依命中的詞語更新對應類別，
+分數與命中結果與逐類別呼叫 TextProcessor.find_keywords_in_text 相同。
+"""
+
+import logging
+from typing import Dict, List, Set, Tuple
+
+from analyzer.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryClassifier:
+    """以反向索引與單次掃描計算各類別分數的分類器"""
+
+    def __init__(self, category_keywords: Dict[str, List[str]], synonyms: Dict[str, List[str]]):
+        """
+        編譯分類器
+
+        Args:
+            category_keywords: 類別關鍵字，格式為 {類別: [關鍵字列表]}
+            synonyms: 同義詞對應表，格式為 {詞: [同義詞列表]}
+        """
+        self.categories = list(category_keywords)
+        self._keyword_totals = {category: len(keywords) for category, keywords in category_keywords.items()}
+
+        # 每個 (類別, 關鍵字) 為一個項目：(類別, 關鍵字, 小寫關鍵字, 小寫同義詞)
+        self._entries: List[Tuple[str, str, str, Tuple[str, ...]]] = []
+        self._inverted: Dict[str, List[int]] = {}
+        patterns = []
+
+        for category, keywords in category_keywords.items():
+            for keyword in keywords:
+                keyword_synonyms = synonyms.get(keyword, [])
+                entry_id = len(self._entries)
+                synonyms_lower = tuple(synonym.lower() for synonym in keyword_synonyms)
+                self._entries.append((category, keyword, keyword.lower(), synonyms_lower))
+
+                for pattern in {keyword.lower(), *synonyms_lower}:
+                    self._inverted.setdefault(pattern, []).append(entry_id)
+
+                patterns.append(keyword)
+                patterns.extend(keyword_synonyms)
+
+        self.matcher = KeywordMatcher(patterns)
+        logger.debug(f"已編譯類別分類器: {len(self.categories)} 類，{len(self.matcher)} 個比對詞")
+
+    def match(self, text_lower: str, word_set: Set[str]) -> Dict[str, Dict[str, int]]:
+        """
+        單次掃描找出各類別命中的關鍵字
+
+        Args:
+            text_lower: 小寫文本
+            word_set: 分詞後的詞語集合
+
+        Returns:
+            {類別: {關鍵字: 出現次數}}，只包含有命中的類別，順序同類別與關鍵字定義
+        """
+        counts = self.matcher.count(text_lower)
+
+        # 只有命中的詞語 (子字串或分詞) 所對應的項目需要計算
+        touched = set()
+        for pattern in counts:
+            touched.update(self._inverted.get(pattern, ()))
+        for word in word_set & self._inverted.keys():
+            touched.update(self._inverted[word])
+
+        matches: Dict[str, Dict[str, int]] = {}
+        for entry_id in sorted(touched):
+            category, keyword, keyword_lower, synonyms_lower = self._entries[entry_id]
+
+            count = counts.get(keyword_lower, 0)
+            if keyword_lower in word_set:
+                count = max(count, 1)
+
+            for synonym_lower in synonyms_lower:
+                synonym_count = counts.get(synonym_lower, 0)
+                if synonym_lower in word_set:
+                    synonym_count = max(synonym_count, 1)
+                if synonym_count > 0:
+                    count = max(count, synonym_count)
+
+            if count > 0:
+                matches.setdefault(category, {})[keyword] = count
+
+        return matches
+
+    def score(self, matches: Dict[str, Dict[str, int]]) -> Dict[str, float]:
+        """
+        依命中結果計算各類別分數 (公式同 TextProcessor.analyze_text_categories)
+
+        Args:
+            matches: match 的返回結果
+
+        Returns:
+            各類別的相關性分數，格式為 {類別: 分數}
+        """
+        result = {}
+        for category in self.categories:
+            matched = matches.get(category)
+            if matched:
+                keyword_total = self._keyword_totals[category]
+                matched_count = sum(matched.values())
+                unique_match_ratio = len(matched) / keyword_total if keyword_total else 0
+
+                # 權重 = 匹配數量 * 唯一匹配率
+                score = matched_count * unique_match_ratio * 100
+                result[category] = min(score, 1.0)
+            else:
+                result[category] = 0.0
+        return result
+
+    def classify(self, text_lower: str, word_set: Set[str]) -> Tuple[Dict[str, float], Dict[str, Dict[str, int]]]:
+        """
+        計算各類別分數與命中的關鍵字
+
+        Args:
+            text_lower: 小寫文本
+            word_set: 分詞後的詞語集合
+
+        Returns:
+            (各類別分數, 各類別命中的關鍵字)
+        """
+        matches = self.match(text_lower, word_set)
+        return self.score(matches), matches
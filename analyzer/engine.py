@@ -8,16 +8,11 @@ import logging
 import re
 import os
 import json
-import jieba
-import jieba.analyse
 from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple, Optional, Set, Union
 import numpy as np
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
 
 from config.logging import get_logger
 from analyzer.insurance_dictionary import (
@@ -33,13 +28,27 @@ from analyzer.insurance_dictionary import (
     FINANCIAL_TERMS,
     MEDICAL_TERMS
 )
-from analyzer.cache import get_cache, cached_analysis, invalidate_cache
-from analyzer.text_processor import get_text_processor, TextProcessor
+from analyzer.cache import get_cache, cached_analysis, invalidate_cache, article_identity, files_version
+from analyzer.text_processor import get_text_processor, TextProcessor, TextDocument
 from analyzer.importance_rating import ImportanceRater
+from analyzer.token_store import TokenStore, DEFAULT_TOKEN_STORE_PATH
+from analyzer.jieba_loader import get_jieba, get_state_key
+from analyzer.summarizer import ExtractiveSummarizer
 
 # 初始化日誌
 logger = get_logger(__name__)
 
+# 分析結果版本：分析程式碼 (含分詞、分類與重要性評分)、保險詞典、重要性權重配置或 jieba 詞典狀態
+# 任一項變更時自動改變，預先保存的分析結果與分析快取即需重新計算
+_ANALYZER_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYZER_VERSION = files_version(
+    [os.path.join(_ANALYZER_DIR, name) for name in (
+        'engine.py', 'text_processor.py', 'keyword_matcher.py', 'category_classifier.py',
+        'importance_rating.py', 'insurance_dictionary.py', 'jieba_loader.py'
+    )] + [os.path.join(os.path.dirname(_ANALYZER_DIR), 'config', 'importance_keywords.json')],
+    version=get_state_key()
+)
+
 class InsuranceNewsAnalyzer:
     """保險新聞分析引擎"""
     
@@ -50,6 +59,12 @@ class InsuranceNewsAnalyzer:
         # 初始化相關組件
         self.text_processor = get_text_processor()
         self.importance_rater = ImportanceRater()
+        self.summarizer = ExtractiveSummarizer(self.text_processor)
+        
+        # 新聞分詞儲存 (預設啟用；環境變數 ANALYZER_TOKEN_STORE 可指定 SQLite 檔案路徑，設為空字串停用)
+        token_store_path = os.environ.get('ANALYZER_TOKEN_STORE', DEFAULT_TOKEN_STORE_PATH)
+        if token_store_path and self.text_processor.token_store is None:
+            self.text_processor.attach_token_store(TokenStore(token_store_path))
         self.cache = get_cache()
         
         # 載入保險專業詞庫
@@ -58,15 +73,23 @@ class InsuranceNewsAnalyzer:
         # 情感詞典設置
         self._setup_sentiment_words()
         
-        # TF-IDF 向量化器 (用於文本相似度比較和聚類)
-        self.tfidf_vectorizer = TfidfVectorizer(
-            max_features=1000,
-            ngram_range=(1, 2),
-            stop_words=self.text_processor._get_stop_words()
-        )
+        # TF-IDF 向量化器 (用於文本相似度比較和聚類，第一次使用時才匯入 sklearn 並建立)
+        self._tfidf_vectorizer = None
         
         logger.info("🧠 保險新聞分析引擎初始化完成")
     
+    @property
+    def tfidf_vectorizer(self):
+        """TF-IDF 向量化器"""
+        if self._tfidf_vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._tfidf_vectorizer = TfidfVectorizer(
+                max_features=1000,
+                ngram_range=(1, 2),
+                stop_words=self.text_processor._get_stop_words()
+            )
+        return self._tfidf_vectorizer
+    
     def _load_insurance_categories(self):
         """載入保險分類關鍵詞庫"""
         try:
@@ -113,13 +136,15 @@ class InsuranceNewsAnalyzer:
         logger.info("✅ 情感詞典設置完成，正面詞彙 %d 個，負面詞彙 %d 個", 
                    len(self.positive_words), len(self.negative_words))
     
-    def extract_keywords(self, text: str, top_k: int = 10) -> List[Tuple[str, float]]:
+    def extract_keywords(self, text: str, top_k: int = 10,
+                         document: Optional[TextDocument] = None) -> List[Tuple[str, float]]:
         """
         提取文本關鍵詞
         
         Args:
             text: 輸入文本
             top_k: 返回關鍵詞數量
+            document: 已建立的文本分詞表示，提供時直接使用其分詞結果
             
         Returns:
             關鍵詞列表，格式為[(詞語, 權重), ...]
@@ -129,7 +154,10 @@ class InsuranceNewsAnalyzer:
                 return []
             
             # 使用文本處理器提取關鍵詞
-            keywords = self.text_processor.extract_keywords(text, topK=top_k)
+            if document is not None:
+                keywords = self.text_processor.extract_keywords_from_tokens(document.tokens, topK=top_k)
+            else:
+                keywords = self.text_processor.extract_keywords(text, topK=top_k)
             
             logger.debug(f"提取關鍵詞: {keywords[:5] if keywords else '無'}")
             return keywords
@@ -138,12 +166,13 @@ class InsuranceNewsAnalyzer:
             logger.error(f"關鍵詞提取失敗: {e}")
             return []
     
-    def analyze_sentiment(self, text: str) -> Dict[str, Any]:
+    def analyze_sentiment(self, text: str, document: Optional[TextDocument] = None) -> Dict[str, Any]:
         """
         分析文本情感
         
         Args:
             text: 輸入文本
+            document: 已建立的文本分詞表示，提供時直接使用其分詞結果
             
         Returns:
             情感分析結果
@@ -159,7 +188,10 @@ class InsuranceNewsAnalyzer:
                 }
             
             # 使用文本處理器進行分詞
-            words = self.text_processor.segment_text(text)
+            if document is not None:
+                words = document.words
+            else:
+                words = self.text_processor.segment_text(text)
             
             # 統計正負面詞語
             positive_words = [word for word in words if word in self.positive_words]
@@ -210,12 +242,172 @@ class InsuranceNewsAnalyzer:
                 'negative_words': []
             }
     
-    def classify_insurance_category(self, text: str) -> Dict[str, Any]:
+    def _sentiment_lexicon_matrix(self, vocabulary: Dict[str, int]) -> sp.csr_matrix:
+        """
+        將正負面詞典對應至詞彙索引
+        
+        Args:
+            vocabulary: 詞語 -> 欄位索引
+            
+        Returns:
+            (詞彙數, 2) 稀疏矩陣，第 0 欄為正面詞、第 1 欄為負面詞
+        """
+        rows, cols = [], []
+        for col, lexicon in enumerate((self.positive_words, self.negative_words)):
+            for word in lexicon:
+                row = vocabulary.get(word)
+                if row is not None:
+                    rows.append(row)
+                    cols.append(col)
+        return sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(vocabulary), 2))
+    
+    def analyze_sentiment_batch(self, texts: List[str],
+                                documents: Optional[List[Optional[TextDocument]]] = None) -> List[Dict[str, Any]]:
+        """
+        批次分析多篇文本的情感
+        
+        將所有文本的詞頻組成稀疏矩陣，與正負面詞典向量相乘一次即得到每篇的正負面詞數，
+        分數、信心度與情感詞比例以陣列運算求得，結果與逐篇呼叫 analyze_sentiment 相同
+        (命中的正負面詞語依詞彙順序而非出現順序列出)。
+        
+        Args:
+            texts: 文本列表
+            documents: 對應的分詞表示列表 (可含 None)，提供時直接使用其分詞結果
+            
+        Returns:
+            情感分析結果列表，順序與輸入相同
+        """
+        empty_result = {
+            'sentiment': 'neutral',
+            'score': 0.0,
+            'confidence': 0.0,
+            'positive_words': [],
+            'negative_words': []
+        }
+        if not texts:
+            return []
+        
+        try:
+            # 1. 建立文件-詞頻稀疏矩陣
+            vocabulary: Dict[str, int] = {}
+            indices: List[int] = []
+            indptr = [0]
+            valid = np.zeros(len(texts), dtype=bool)
+            for idx, text in enumerate(texts):
+                if text and text.strip():
+                    document = documents[idx] if documents else None
+                    words = document.words if document is not None else self.text_processor.segment_text(text)
+                    indices.extend([vocabulary.setdefault(word, len(vocabulary)) for word in words])
+                    valid[idx] = True
+                indptr.append(len(indices))
+            
+            counts = sp.csr_matrix(
+                (np.ones(len(indices)), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+                shape=(len(texts), len(vocabulary))
+            )
+            counts.sum_duplicates()
+            
+            # 2. 一次矩陣乘法取得正負面詞數
+            lexicon = self._sentiment_lexicon_matrix(vocabulary)
+            polarity = (counts @ lexicon).toarray()
+            positive_score = polarity[:, 0]
+            negative_score = polarity[:, 1]
+            word_count = np.diff(indptr)
+            
+            # 3. 以陣列運算計算分數、情感傾向與信心度
+            sentiment_count = positive_score + negative_score
+            normalized_score = (positive_score - negative_score) / np.maximum(sentiment_count, 1)
+            sentiment_word_ratio = sentiment_count / np.maximum(word_count, 1)
+            confidence = np.abs(normalized_score) * np.minimum(sentiment_word_ratio * 5, 1.0)
+            labels = np.where(normalized_score > 0.1, 'positive',
+                              np.where(normalized_score < -0.1, 'negative', 'neutral'))
+            
+            # 命中的正負面詞語 (依詞典欄位取出子矩陣，重複出現的詞依次數列出)
+            lexicon = lexicon.tocsc()
+            matched = []
+            for col in range(2):
+                columns = np.sort(lexicon[:, col].indices)
+                matched.append((counts[:, columns].tocsr(), columns))
+            feature_names = {
+                vocabulary[word]: word
+                for word in self.positive_words | self.negative_words if word in vocabulary
+            }
+            
+            results = []
+            for idx in range(len(texts)):
+                if not valid[idx]:
+                    results.append(dict(empty_result))
+                    continue
+                
+                matched_words = []
+                for matrix, columns in matched:
+                    start, end = matrix.indptr[idx], matrix.indptr[idx + 1]
+                    matched_words.append([
+                        feature_names[columns[col]]
+                        for col, count in zip(matrix.indices[start:end], matrix.data[start:end])
+                        for _ in range(int(count))
+                    ])
+                
+                results.append({
+                    'sentiment': str(labels[idx]),
+                    'score': float(normalized_score[idx]),
+                    'confidence': float(confidence[idx]),
+                    'positive_words': matched_words[0],
+                    'negative_words': matched_words[1],
+                    'word_count': int(word_count[idx]),
+                    'sentiment_word_count': int(sentiment_count[idx]),
+                    'sentiment_ratio': float(sentiment_word_ratio[idx])
+                })
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"批次情感分析失敗: {e}")
+            return [dict(empty_result) for _ in texts]
+    
+    def aggregate_sentiment(self, dates: List[str], sentiments: List[str],
+                            scores: List[float]) -> Tuple[Dict[str, int], Dict[str, Dict[str, Any]]]:
+        """
+        以陣列運算彙總逐篇情感結果
+        
+        Args:
+            dates: 每篇的日期字串
+            sentiments: 每篇的情感傾向
+            scores: 每篇的情感分數
+            
+        Returns:
+            (整體情感分布, 每日情感統計 {日期: {positive, negative, neutral, average_score}})
+        """
+        labels = ['positive', 'negative', 'neutral']
+        if not dates:
+            return {label: 0 for label in labels}, {}
+        
+        days, day_index = np.unique(np.asarray(dates), return_inverse=True)
+        label_names, label_index = np.unique(np.asarray(sentiments), return_inverse=True)
+        
+        counts = np.zeros((len(days), len(label_names)), dtype=np.int64)
+        np.add.at(counts, (day_index, label_index), 1)
+        score_sums = np.bincount(day_index, weights=np.asarray(scores, dtype=np.float64), minlength=len(days))
+        article_counts = counts.sum(axis=1)
+        totals = counts.sum(axis=0)
+        
+        distribution = {label: 0 for label in labels}
+        distribution.update(zip(label_names.tolist(), totals.tolist()))
+        daily = {}
+        for row, day in enumerate(days.tolist()):
+            daily[day] = {label: 0 for label in labels}
+            daily[day].update(zip(label_names.tolist(), counts[row].tolist()))
+            daily[day]['average_score'] = float(score_sums[row] / article_counts[row])
+        
+        return distribution, daily
+    
+    def classify_insurance_category(self, text: str, document: Optional[TextDocument] = None) -> Dict[str, Any]:
         """
         分類保險新聞類別
         
         Args:
             text: 輸入文本
+            document: 已建立的文本分詞表示，提供時各類別共用同一份分詞結果
             
         Returns:
             分類結果
@@ -224,18 +416,12 @@ class InsuranceNewsAnalyzer:
             if not text or not text.strip():
                 return {'category': 'unknown', 'confidence': 0.0, 'matches': {}}
             
-            # 使用文本處理器分析文本類別
-            category_scores = self.text_processor.analyze_text_categories(
-                text, 
-                {k: list(v) for k, v in self.insurance_categories.items()}
-            )
+            if document is None:
+                document = self.text_processor.build_document(text)
             
-            # 查找關鍵詞匹配
-            category_matches = {}
-            for category, keywords in self.insurance_categories.items():
-                matches = self.text_processor.find_keywords_in_text(text, list(keywords), use_synonym=True)
-                if matches:
-                    category_matches[category] = matches
+            # 已編譯的分類器單次掃描即取得各類別分數與命中的關鍵詞
+            classifier = self.text_processor.get_category_classifier(self.insurance_categories)
+            category_scores, category_matches = classifier.classify(document.text_lower, document.word_set)
             
             # 找出最佳匹配類別
             if category_scores:
@@ -299,7 +485,7 @@ class InsuranceNewsAnalyzer:
             # 對文本進行分詞處理
             processed_texts = []
             for text in texts:
-                words = jieba.cut(text)
+                words = get_jieba().cut(text)
                 processed_text = ' '.join(words)
                 processed_texts.append(processed_text)
             
@@ -310,6 +496,7 @@ class InsuranceNewsAnalyzer:
             target_vector = tfidf_matrix[0:1]
             article_vectors = tfidf_matrix[1:]
             
+            from sklearn.metrics.pairwise import cosine_similarity
             similarities = cosine_similarity(target_vector, article_vectors)[0]
             
             # 獲取最相似的文章
@@ -325,13 +512,14 @@ class InsuranceNewsAnalyzer:
             return []
     
     def analyze_trends(self, articles_data: List[Dict[str, Any]], 
-                      time_range: int = 30) -> Dict[str, Any]:
+                      time_range: int = 30, parallel: bool = False) -> Dict[str, Any]:
         """
         分析新聞趨勢
         
         Args:
             articles_data: 文章數據列表，包含title, content, published_date等字段
             time_range: 分析時間範圍（天數）
+            parallel: 是否使用多程序平行提取逐篇特徵
             
         Returns:
             趨勢分析結果
@@ -352,99 +540,218 @@ class InsuranceNewsAnalyzer:
                 logger.warning("沒有找到指定時間範圍內的文章")
                 return {'trends': {}, 'hot_topics': [], 'sentiment_trend': {}}
             
-            # 關鍵詞趨勢分析
-            all_keywords = []
-            daily_keywords = defaultdict(list)
-            daily_sentiment = defaultdict(list)
-            
-            for article in recent_articles:
-                text = f"{article.get('title', '')} {article.get('content', '')}"
-                
-                # 提取關鍵詞
-                keywords = self.extract_keywords(text, top_k=10)
-                all_keywords.extend([kw[0] for kw in keywords])
-                
-                # 按日期分組關鍵詞
-                date_str = article['published_date'].strftime('%Y-%m-%d')
-                daily_keywords[date_str].extend([kw[0] for kw in keywords])
-                
-                # 情感分析
-                sentiment = self.analyze_sentiment(text)
-                daily_sentiment[date_str].append(sentiment['score'])
-            
-            # 統計熱門關鍵詞
-            keyword_counter = Counter(all_keywords)
-            hot_topics = keyword_counter.most_common(20)
-            
-            # 計算每日平均情感
-            sentiment_trend = {}
-            for date, scores in daily_sentiment.items():
-                if scores:
-                    sentiment_trend[date] = {
-                        'average_sentiment': np.mean(scores),
-                        'sentiment_variance': np.var(scores),
-                        'article_count': len(scores)
-                    }
-            
-            # 關鍵詞趨勢
-            keyword_trends = {}
-            for date, keywords in daily_keywords.items():
-                keyword_counter = Counter(keywords)
-                keyword_trends[date] = dict(keyword_counter.most_common(10))
+            # 逐篇提取關鍵詞、情感與類別 (平行模式下分派至工作程序)
+            if parallel:
+                from analyzer.parallel import get_parallel_analyzer
+                features = get_parallel_analyzer().extract_trend_features(recent_articles)
+            else:
+                features = [self._extract_trend_features(article) for article in recent_articles]
             
-            result = {
-                'analysis_period': {
-                    'start_date': cutoff_date.strftime('%Y-%m-%d'),
-                    'end_date': datetime.now().strftime('%Y-%m-%d'),
-                    'total_articles': len(recent_articles)
-                },
-                'hot_topics': hot_topics,
-                'keyword_trends': keyword_trends,
-                'sentiment_trend': sentiment_trend,
-                'category_distribution': self._analyze_category_distribution(recent_articles)
-            }
+            for article, feature in zip(recent_articles, features):
+                feature['published_date'] = article['published_date']
             
-            logger.info(f"趨勢分析完成，共分析 {len(recent_articles)} 篇文章")
-            return result
+            return self._aggregate_trend_features(features, cutoff_date)
             
         except Exception as e:
             logger.error(f"趨勢分析失敗: {e}")
             return {'trends': {}, 'hot_topics': [], 'sentiment_trend': {}}
     
-    def _analyze_category_distribution(self, articles: List[Dict[str, Any]]) -> Dict[str, int]:
-        """分析文章類別分布"""
-        category_count = defaultdict(int)
+    def _aggregate_trend_features(self, features: List[Dict[str, Any]], cutoff_date: datetime) -> Dict[str, Any]:
+        """
+        彙總逐篇特徵為趨勢分析結果
+        
+        Args:
+            features: 時間範圍內的特徵列表
+            cutoff_date: 分析起始日期
+            
+        Returns:
+            趨勢分析結果
+        """
+        # 關鍵詞趨勢分析
+        all_keywords = []
+        daily_keywords = defaultdict(list)
+        daily_sentiment = defaultdict(list)
+        category_distribution = defaultdict(int)
+        
+        for feature in features:
+            all_keywords.extend(feature['keywords'])
+            
+            # 按日期分組關鍵詞
+            date_str = feature['published_date'].strftime('%Y-%m-%d')
+            daily_keywords[date_str].extend(feature['keywords'])
+            
+            # 情感分析
+            daily_sentiment[date_str].append(feature['sentiment_score'])
+            
+            # 類別分布
+            category_distribution[feature['category']] += 1
+        
+        # 統計熱門關鍵詞
+        keyword_counter = Counter(all_keywords)
+        hot_topics = keyword_counter.most_common(20)
+        
+        # 計算每日平均情感
+        sentiment_trend = {}
+        for date, scores in daily_sentiment.items():
+            if scores:
+                sentiment_trend[date] = {
+                    'average_sentiment': np.mean(scores),
+                    'sentiment_variance': np.var(scores),
+                    'article_count': len(scores)
+                }
+        
+        # 關鍵詞趨勢
+        keyword_trends = {}
+        for date, keywords in daily_keywords.items():
+            keyword_counter = Counter(keywords)
+            keyword_trends[date] = dict(keyword_counter.most_common(10))
+        
+        result = {
+            'analysis_period': {
+                'start_date': cutoff_date.strftime('%Y-%m-%d'),
+                'end_date': datetime.now().strftime('%Y-%m-%d'),
+                'total_articles': len(features)
+            },
+            'hot_topics': hot_topics,
+            'keyword_trends': keyword_trends,
+            'sentiment_trend': sentiment_trend,
+            'category_distribution': dict(category_distribution)
+        }
+        
+        logger.info(f"趨勢分析完成，共分析 {len(features)} 篇文章")
+        return result
+    
+    def _extract_trend_features(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        提取單篇文章的趨勢特徵，單程序與平行模式共用
+        
+        Args:
+            article: 文章數據
+            
+        Returns:
+            包含 keywords, sentiment_score, category 的特徵字典
+        """
+        document, keywords, sentiment, classification = self._extract_text_features(article)
+        
+        return {
+            'keywords': [kw[0] for kw in keywords],
+            'sentiment_score': sentiment['score'],
+            'category': classification['category']
+        }
+    
+    def _extract_text_features(self, article: Dict[str, Any]) -> Tuple[TextDocument, List[Tuple[str, float]],
+                                                                         Dict[str, Any], Dict[str, Any]]:
+        """
+        對標題加內容分詞一次，提取關鍵詞、情感與類別
+        
+        Args:
+            article: 文章數據
+            
+        Returns:
+            (分詞表示, 關鍵詞, 情感結果, 分類結果)
+        """
+        text = f"{article.get('title', '')} {article.get('content', '')}"
+        document = self.text_processor.build_document(text, news_id=article.get('id'))
+        
+        keywords = self.extract_keywords(text, top_k=10, document=document)
+        sentiment = self.analyze_sentiment(text, document=document)
+        classification = self.classify_insurance_category(text, document=document)
+        
+        return document, keywords, sentiment, classification
+    
+    def extract_materialized_features(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        提取需預先保存的逐篇分析結果，關鍵詞、情感與趨勢端點直接彙總這些結果
+        
+        Args:
+            article: 文章數據
+            
+        Returns:
+            包含 tokens, keywords, sentiment, sentiment_score, category, category_scores,
+            importance_score, importance_dimensions 的字典
+        """
+        return self.extract_materialized_features_batch([article])[0]
+    
+    def extract_materialized_features_batch(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批次提取需預先保存的分析結果 (情感以稀疏矩陣、重要性以批次評分一次計算)
         
-        for article in articles:
-            text = f"{article.get('title', '')} {article.get('content', '')}"
-            classification = self.classify_insurance_category(text)
-            category_count[classification['category']] += 1
+        Args:
+            articles: 文章數據列表
+            
+        Returns:
+            分析結果列表，順序與輸入相同，格式同 extract_materialized_features
+        """
+        texts = [f"{article.get('title', '')} {article.get('content', '')}" for article in articles]
+        documents = [
+            self.text_processor.build_document(text, news_id=article.get('id'))
+            for article, text in zip(articles, texts)
+        ]
+        sentiments = self.analyze_sentiment_batch(texts, documents)
+        importance_scores, importance_dimensions = self.importance_rater.rate_batch(articles, with_dimensions=True)
+        importances = [
+            {'final_score': score, 'dimensions': dimensions}
+            for score, dimensions in zip(importance_scores, importance_dimensions)
+        ]
+        
+        return [
+            self._materialized_features(article, text, document, sentiment, importance)
+            for article, text, document, sentiment, importance
+            in zip(articles, texts, documents, sentiments, importances)
+        ]
+    
+    def _materialized_features(self, article: Dict[str, Any], text: str, document: TextDocument,
+                               sentiment: Dict[str, Any], importance: Dict[str, Any]) -> Dict[str, Any]:
+        """以已分詞的文本、情感與重要性結果組成單篇的預先保存結果"""
+        keywords = self.extract_keywords(text, top_k=10, document=document)
+        classification = self.classify_insurance_category(text, document=document)
         
-        return dict(category_count)
+        return {
+            'tokens': list(document.words),
+            'keywords': [[word, float(weight)] for word, weight in keywords],
+            'sentiment': sentiment.get('sentiment', 'neutral'),
+            'sentiment_score': float(sentiment.get('score', 0.0)),
+            'category': classification.get('category', 'unknown'),
+            'category_scores': {k: float(v) for k, v in classification.get('all_scores', {}).items()},
+            'importance_score': float(importance['final_score']),
+            'importance_dimensions': importance['dimensions']
+        }
+    
+    def _segment_for_vectorizer(self, text: str) -> str:
+        """將文本分詞為空白分隔字串，供 TF-IDF 向量化使用"""
+        return ' '.join(get_jieba().cut(text))
     
     def cluster_articles(self, articles_data: List[Dict[str, Any]], 
-                        n_clusters: int = 5) -> Dict[str, Any]:
+                        n_clusters: int = 5, parallel: bool = False, online: bool = False) -> Dict[str, Any]:
         """
         對文章進行聚類分析
         
         Args:
             articles_data: 文章數據列表
             n_clusters: 聚類數量
+            parallel: 是否使用多程序平行分詞
+            online: 是否使用線上聚類 (文章需包含 id；以保存的向量與中心增量聚類)
             
         Returns:
             聚類結果
         """
+        if online:
+            return self._cluster_articles_online(articles_data, n_clusters)
+        
         try:
             if len(articles_data) < n_clusters:
                 n_clusters = max(1, len(articles_data))
             
             # 準備文本數據
-            texts = []
-            for article in articles_data:
-                text = f"{article.get('title', '')} {article.get('content', '')}"
-                words = jieba.cut(text)
-                processed_text = ' '.join(words)
-                texts.append(processed_text)
+            raw_texts = [
+                f"{article.get('title', '')} {article.get('content', '')}"
+                for article in articles_data
+            ]
+            if parallel:
+                from analyzer.parallel import get_parallel_analyzer
+                texts = get_parallel_analyzer().segment_texts(raw_texts)
+            else:
+                texts = [self._segment_for_vectorizer(text) for text in raw_texts]
             
             if not texts:
                 return {'clusters': {}, 'cluster_centers': []}
@@ -453,6 +760,7 @@ class InsuranceNewsAnalyzer:
             tfidf_matrix = self.tfidf_vectorizer.fit_transform(texts)
             
             # K-means聚類
+            from sklearn.cluster import KMeans
             kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
             cluster_labels = kmeans.fit_predict(tfidf_matrix)
             
@@ -490,31 +798,73 @@ class InsuranceNewsAnalyzer:
             logger.error(f"文章聚類失敗: {e}")
             return {'clusters': {}, 'cluster_centers': []}
     
-    def generate_summary(self, text: str, max_sentences: int = 3) -> str:
+    def _cluster_articles_online(self, articles_data: List[Dict[str, Any]], n_clusters: int) -> Dict[str, Any]:
+        """以相似新聞索引中的向量與保存的聚類中心進行線上聚類"""
+        try:
+            from analyzer.similarity_index import get_similarity_index
+            from analyzer.topic_clusters import get_topic_clusterer
+            
+            index = get_similarity_index()
+            missing = [
+                (article['id'], f"{article.get('title', '')} {article.get('content', '')}")
+                for article in articles_data
+                if article.get('id') is not None and article['id'] not in index
+            ]
+            if missing:
+                index.add_documents(missing)
+                index.save()
+            
+            result = get_topic_clusterer('articles', n_clusters).cluster(index, articles_data, n_clusters)
+            logger.info(f"線上文章聚類完成，共 {result['n_clusters']} 個聚類")
+            return result
+            
+        except Exception as e:
+            logger.error(f"線上文章聚類失敗: {e}")
+            return {'clusters': {}, 'cluster_centers': []}
+    
+    def generate_summary(self, text: str, max_sentences: int = 3,
+                         keyword_weights: Optional[Dict[str, float]] = None) -> str:
         """
         生成文本摘要
         
         Args:
             text: 輸入文本
             max_sentences: 最大句子數量
+            keyword_weights: 已計算的關鍵詞權重 (選填，提供時不再重新計算)
             
         Returns:
             摘要文本
         """
-        try:
-            if not text or not text.strip():
-                return ""
+        if not text or not text.strip():
+            return ""
+        
+        return self.generate_summaries([text], max_sentences, [keyword_weights])[0]
+    
+    def generate_summaries(self, texts: List[str], max_sentences: int = 3,
+                           keyword_weights: Optional[List[Optional[Dict[str, float]]]] = None) -> List[str]:
+        """
+        批次生成抽取式摘要 (整批句子以稀疏矩陣一次評分)
+        
+        Args:
+            texts: 輸入文本列表
+            max_sentences: 每篇最大句子數量
+            keyword_weights: 與 texts 對應的關鍵詞權重列表 (選填)
             
-            # 使用文本處理器生成摘要
-            summary = self.text_processor.get_text_summary(text, max_length=max_sentences*100)
+        Returns:
+            摘要列表，順序與輸入相同
+        """
+        try:
+            summaries = self.summarizer.summarize_batch(
+                texts, keyword_weights, max_sentences=max_sentences, max_length=max_sentences * 100
+            )
             
-            logger.debug(f"生成摘要，原文長度 {len(text)} 字元，摘要長度 {len(summary)} 字元")
+            logger.debug(f"生成 {len(summaries)} 篇摘要")
             
-            return summary
+            return summaries
             
         except Exception as e:
             logger.error(f"摘要生成失敗: {e}")
-            return text[:200] + "..." if len(text) > 200 else text
+            return [text[:200] + "..." if len(text) > 200 else text for text in texts]
     
     def analyze_article(self, article_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -534,11 +884,12 @@ class InsuranceNewsAnalyzer:
             if not text.strip():
                 return {'error': '文章內容為空'}
             
-            # 執行各項分析
-            keywords = self.extract_keywords(text, top_k=10)
-            sentiment = self.analyze_sentiment(text)
-            classification = self.classify_insurance_category(text)
-            summary = self.generate_summary(content, max_sentences=3)
+            # 執行各項分析 (共用同一份分詞結果)
+            document = self.text_processor.build_document(text, news_id=article_data.get('id'))
+            keywords = self.extract_keywords(text, top_k=10, document=document)
+            sentiment = self.analyze_sentiment(text, document=document)
+            classification = self.classify_insurance_category(text, document=document)
+            summary = self.generate_summary(content, max_sentences=3, keyword_weights=dict(keywords))
             
             result = {
                 'article_info': {
@@ -561,7 +912,8 @@ class InsuranceNewsAnalyzer:
             logger.error(f"文章分析失敗: {e}")
             return {'error': str(e)}
     
-    @cached_analysis('analysis')
+    @cached_analysis('analysis', key_func=article_identity, version=ANALYZER_VERSION,
+                     stale_while_revalidate_hours=6)
     def analyze_news_article(self, article_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         完整分析單篇新聞文章
@@ -573,98 +925,170 @@ class InsuranceNewsAnalyzer:
             完整的分析結果
         """
         try:
-            # 提取文章內容
-            title = article_data.get('title', '')
-            content = article_data.get('content', '')
-            summary = article_data.get('summary', '')
-            full_text = f"{title} {content} {summary}".strip()
+            full_text = self._get_full_text(article_data)
             
             if not full_text:
                 return self._empty_analysis_result()
             
-            # 1. 保險相關性分析
-            insurance_relevance = calculate_insurance_relevance_score(full_text)
-            insurance_keywords = extract_insurance_keywords(full_text)
-            is_insurance = is_insurance_related(full_text)
+            document = self.text_processor.build_document(full_text, news_id=article_data.get('id'))
+            return self._analyze_document(article_data, document)
             
-            # 2. 關鍵詞提取
-            keywords = self.extract_keywords(full_text, top_k=15)
+        except Exception as e:
+            logger.error(f"❌ 新聞分析失敗: {e}")
+            return self._empty_analysis_result()
+    
+    def analyze_batch(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批次分析多篇新聞文章
+        
+        每篇文章只分詞一次，關鍵詞、情感、分類與文本統計共用同一份分詞結果。
+        適合爬取完成後對整批新文章進行分析。
+        
+        Args:
+            articles: 新聞文章數據列表，每筆格式同 analyze_news_article
             
-            # 3. 情感分析
-            sentiment = self.analyze_sentiment(full_text)
+        Returns:
+            分析結果列表，順序與輸入相同
+        """
+        if not articles:
+            return []
+        
+        start_time = datetime.now()
+        
+        # 1. 先為所有文章建立共用分詞表示
+        documents = []
+        for article_data in articles:
+            full_text = self._get_full_text(article_data)
+            documents.append(
+                self.text_processor.build_document(full_text, news_id=article_data.get('id')) if full_text else None
+            )
+        
+        # 2. 整批情感分析以一次稀疏矩陣運算完成
+        sentiments = self.analyze_sentiment_batch(
+            [document.text if document is not None else '' for document in documents], documents
+        )
+        
+        # 3. 其餘分析階段共用分詞結果
+        results = []
+        for article_data, document, sentiment in zip(articles, documents, sentiments):
+            if document is None:
+                results.append(self._empty_analysis_result())
+                continue
+            
+            try:
+                results.append(self._analyze_document(article_data, document, sentiment=sentiment))
+            except Exception as e:
+                logger.error(f"❌ 新聞分析失敗: {e}")
+                results.append(self._empty_analysis_result())
+        
+        elapsed = (datetime.now() - start_time).total_seconds()
+        logger.info(f"✅ 批次分析完成: {len(articles)} 篇文章，耗時 {elapsed:.2f} 秒")
+        return results
+    
+    def _get_full_text(self, article_data: Dict[str, Any]) -> str:
+        """合併標題、內容與摘要為完整分析文本"""
+        title = article_data.get('title', '')
+        content = article_data.get('content', '')
+        summary = article_data.get('summary', '')
+        return f"{title} {content} {summary}".strip()
+    
+    def _analyze_document(self, article_data: Dict[str, Any], document: TextDocument,
+                          sentiment: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        使用已建立的分詞表示執行完整分析
+        
+        Args:
+            article_data: 新聞文章數據
+            document: 文章完整文本的分詞表示
+            sentiment: 已批次計算的情感結果，未提供時逐篇計算
             
-            # 4. 保險類別分類
-            category_info = self.classify_insurance_category(full_text)
+        Returns:
+            完整的分析結果
+        """
+        title = article_data.get('title', '')
+        content = article_data.get('content', '')
+        summary = article_data.get('summary', '')
+        full_text = document.text
+        
+        # 1. 保險相關性分析
+        insurance_relevance = calculate_insurance_relevance_score(full_text)
+        insurance_keywords = extract_insurance_keywords(full_text)
+        is_insurance = is_insurance_related(full_text)
+        
+        # 2. 關鍵詞提取
+        keywords = self.extract_keywords(full_text, top_k=15, document=document)
+        
+        # 3. 情感分析
+        if sentiment is None:
+            sentiment = self.analyze_sentiment(full_text, document=document)
+        
+        # 4. 保險類別分類
+        category_info = self.classify_insurance_category(full_text, document=document)
+        
+        # 5. 多維度重要性評分
+        importance_result = self._calculate_multidimensional_importance(article_data)
+        
+        # 6. 業務影響分析
+        business_impact = self.importance_rater.analyze_business_impact(article_data)
+        
+        # 7. 客戶興趣評分
+        client_interest = self.importance_rater.calculate_client_interest(article_data)
+        
+        # 8. 文本統計
+        word_count = len(document.words)
+        reading_time = max(1, word_count // 200)  # 假設每分鐘讀200個詞
+        
+        # 生成智能摘要（如果沒有摘要）
+        auto_summary = ""
+        if not summary and content and len(content) > 100:
+            auto_summary = self.generate_summary(content, max_sentences=3, keyword_weights=dict(keywords))
+        
+        analysis_result = {
+            # 基本信息
+            'analyzed_at': datetime.now(),
+            'text_length': len(full_text),
+            'word_count': word_count,
+            'reading_time': reading_time,
             
-            # 5. 多維度重要性評分
-            importance_result = self._calculate_multidimensional_importance(article_data)
+            # 保險相關性
+            'insurance_relevance': {
+                'score': insurance_relevance,
+                'is_related': is_insurance,
+                'keywords': insurance_keywords[:15],  # 最多15個關鍵詞
+                'keyword_count': len(insurance_keywords)
+            },
             
-            # 6. 業務影響分析
-            business_impact = self.importance_rater.analyze_business_impact(article_data)
+            # 關鍵詞
+            'keywords': [{'word': word, 'weight': weight} for word, weight in keywords],
             
-            # 7. 客戶興趣評分
-            client_interest = self.importance_rater.calculate_client_interest(article_data)
+            # 情感分析
+            'sentiment': sentiment,
             
-            # 8. 文本統計
-            segmented_words = self.text_processor.segment_text(full_text)
-            word_count = len(segmented_words)
-            reading_time = max(1, word_count // 200)  # 假設每分鐘讀200個詞
+            # 分類
+            'category': category_info,
             
-            # 生成智能摘要（如果沒有摘要）
-            auto_summary = ""
-            if not summary and content and len(content) > 100:
-                auto_summary = self.generate_summary(content, max_sentences=3)
+            # 重要性評分（多維度）
+            'importance': importance_result,
             
-            analysis_result = {
-                # 基本信息
-                'analyzed_at': datetime.now(),
-                'text_length': len(full_text),
-                'word_count': word_count,
-                'reading_time': reading_time,
-                
-                # 保險相關性
-                'insurance_relevance': {
-                    'score': insurance_relevance,
-                    'is_related': is_insurance,
-                    'keywords': insurance_keywords[:15],  # 最多15個關鍵詞
-                    'keyword_count': len(insurance_keywords)
-                },
-                
-                # 關鍵詞
-                'keywords': [{'word': word, 'weight': weight} for word, weight in keywords],
-                
-                # 情感分析
-                'sentiment': sentiment,
-                
-                # 分類
-                'category': category_info,
-                
-                # 重要性評分（多維度）
-                'importance': importance_result,
-                
-                # 業務影響
-                'business_impact': business_impact,
-                
-                # 客戶興趣
-                'client_interest': client_interest,
-                
-                # 內容特徵
-                'features': {
-                    'has_title': bool(title),
-                    'has_content': bool(content),
-                    'has_summary': bool(summary),
-                    'title_length': len(title),
-                    'content_length': len(content),
-                    'auto_summary': auto_summary
-                }
-            }
+            # 業務影響
+            'business_impact': business_impact,
             
-            logger.info(f"✅ 新聞分析完成: 保險相關度={insurance_relevance:.3f}, 重要性={importance_result.get('final_score', 0):.3f}")
-            return analysis_result
+            # 客戶興趣
+            'client_interest': client_interest,
             
-        except Exception as e:
-            logger.error(f"❌ 新聞分析失敗: {e}")
-            return self._empty_analysis_result()
+            # 內容特徵
+            'features': {
+                'has_title': bool(title),
+                'has_content': bool(content),
+                'has_summary': bool(summary),
+                'title_length': len(title),
+                'content_length': len(content),
+                'auto_summary': auto_summary
+            }
+        }
+        
+        logger.info(f"✅ 新聞分析完成: 保險相關度={insurance_relevance:.3f}, 重要性={importance_result.get('final_score', 0):.3f}")
+        return analysis_result
     
     def _empty_analysis_result(self) -> Dict[str, Any]:
         """返回空的分析結果"""
@@ -786,6 +1210,13 @@ def classify_article_category(text: str) -> Dict[str, Any]:
     """分類文章類別"""
     return get_analyzer().classify_insurance_category(text)
 
-def analyze_news_trends(articles: List[Dict[str, Any]], days: int = 30) -> Dict[str, Any]:
+def analyze_news_trends(articles: List[Dict[str, Any]], days: int = 30, parallel: bool = False) -> Dict[str, Any]:
     """分析新聞趨勢"""
-    return get_analyzer().analyze_trends(articles, days)
+    return get_analyzer().analyze_trends(articles, days, parallel=parallel)
+
+def analyze_news_batch(articles: List[Dict[str, Any]], parallel: bool = False) -> List[Dict[str, Any]]:
+    """批次分析多篇新聞文章"""
+    if parallel:
+        from analyzer.parallel import get_parallel_analyzer
+        return get_parallel_analyzer().analyze_batch(articles)
+    return get_analyzer().analyze_batch(articles)
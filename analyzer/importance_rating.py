@@ -14,17 +14,43 @@ from datetime import datetime, timedelta
 from collections import Counter
 from typing import Dict, List, Any, Tuple
 
+import numpy as np
+
 from analyzer.text_processor import get_text_processor
 
 logger = logging.getLogger(__name__)
 
+
+def _field(news_item, name):
+    """讀取新聞物件的屬性或文章數據字典的欄位"""
+    if isinstance(news_item, dict):
+        return news_item.get(name)
+    return getattr(news_item, name, None)
+
+
 class ImportanceRater:
     """多維度新聞重要性評分器"""
     
+    # 綜合得分的各維度權重
+    DIMENSION_WEIGHTS = {
+        "regulatory": 0.30,  # 法規重要性
+        "business": 0.25,    # 業務影響
+        "timeliness": 0.20,  # 時效性
+        "client": 0.15,      # 客戶關注度
+        "trend": 0.10        # 趨勢重要性
+    }
+    
+    # 參與維度評分的關鍵字群組
+    KEYWORD_GROUPS = ("高重要性", "業務相關", "產品相關", "企業發展", "市場趨勢", "客戶服務", "重大事件")
+    
+    # 時效性評分：(發布後天數上限, 分數)，超過最後一級為 0.2
+    TIMELINESS_STEPS = ((1, 1.0), (2, 0.9), (3, 0.8), (5, 0.7), (7, 0.6), (14, 0.4), (30, 0.3))
+    
     def __init__(self, config_path=None):
         """初始化評分器"""
         self.logger = logging.getLogger(__name__)
         self.keywords = {}
+        self.config_path = config_path
         self.text_processor = get_text_processor()
         self.load_keywords(config_path)
         
@@ -85,28 +111,22 @@ class ImportanceRater:
         """根據新聞內容評估重要性分數
         
         Args:
-            news_item: 包含標題、摘要、內容等屬性的新聞物件
+            news_item: 包含標題、摘要、內容等屬性的新聞物件或文章數據字典
             
         Returns:
             float: 0.0-1.0之間的重要性分數
         """
         try:
             # 準備分析文本
-            title = news_item.title if hasattr(news_item, 'title') and news_item.title else ""
-            summary = news_item.summary if hasattr(news_item, 'summary') and news_item.summary else ""
-            content = news_item.content if hasattr(news_item, 'content') and news_item.content else ""
+            title = _field(news_item, 'title') or ""
+            summary = _field(news_item, 'summary') or ""
+            content = _field(news_item, 'content') or ""
             
             # 多維度評分
             dimensions = self.calculate_dimensions(news_item, title, summary, content)
             
             # 根據各維度評分計算綜合得分
-            weights = {
-                "regulatory": 0.30,  # 法規重要性
-                "business": 0.25,    # 業務影響
-                "timeliness": 0.20,  # 時效性
-                "client": 0.15,      # 客戶關注度
-                "trend": 0.10        # 趨勢重要性
-            }
+            weights = self.DIMENSION_WEIGHTS
             
             final_score = sum(dimensions[dim] * weights[dim] for dim in weights)
             
@@ -224,28 +244,127 @@ class ImportanceRater:
         # 默認時效性分數
         timeliness_score = 0.5
         
-        if hasattr(news_item, 'published_date') and news_item.published_date:
-            days_old = (datetime.now() - news_item.published_date).days
-            
-            if days_old <= 1:  # 1天內
-                timeliness_score = 1.0
-            elif days_old <= 2:  # 2天內
-                timeliness_score = 0.9
-            elif days_old <= 3:  # 3天內
-                timeliness_score = 0.8
-            elif days_old <= 5:  # 5天內
-                timeliness_score = 0.7
-            elif days_old <= 7:  # 一週內
-                timeliness_score = 0.6
-            elif days_old <= 14:  # 兩週內
-                timeliness_score = 0.4
-            elif days_old <= 30:  # 一個月內
-                timeliness_score = 0.3
-            else:  # 一個月以上
-                timeliness_score = 0.2
+        published_date = _field(news_item, 'published_date')
+        if published_date:
+            days_old = (datetime.now() - published_date).days
+            
+            timeliness_score = 0.2  # 一個月以上
+            for max_days, score in self.TIMELINESS_STEPS:
+                if days_old <= max_days:
+                    timeliness_score = score
+                    break
         
         return timeliness_score
     
+    def rate_batch(self, news_items, now=None, with_dimensions=False):
+        """批次評估多則新聞的重要性分數
+        
+        所有維度的關鍵字編譯為單一比對器，每篇文本只掃描一次；維度分數以矩陣運算、
+        時效性以向量化日期運算一次算出，結果與逐篇呼叫 rate_importance 相同
+        
+        Args:
+            news_items: 新聞物件或文章數據字典的列表
+            now: 計算時效性的基準時間，預設為現在
+            with_dimensions: 是否一併返回各維度評分
+            
+        Returns:
+            numpy.ndarray: 各新聞的重要性分數；with_dimensions 為 True 時返回 (分數, 各維度評分字典列表)
+        """
+        items = list(news_items)
+        
+        try:
+            group_scores = dict(zip(self.KEYWORD_GROUPS, self._keyword_group_scores(items).T))
+            
+            # 維度組合方式同 calculate_dimensions
+            dimensions = {
+                "regulatory": group_scores["高重要性"],
+                "business": (group_scores["業務相關"] * 0.5 + group_scores["產品相關"] * 0.3
+                             + group_scores["企業發展"] * 0.2),
+                "timeliness": self._timeliness_scores(items, now),
+                "client": group_scores["客戶服務"],
+                "trend": group_scores["市場趨勢"] * 0.6 + group_scores["重大事件"] * 0.4
+            }
+            scores = sum(dimensions[dim] * weight for dim, weight in self.DIMENSION_WEIGHTS.items())
+            
+        except Exception as e:
+            self.logger.error(f"批次評分過程發生錯誤: {e}")
+            scores = np.full(len(items), 0.5)
+            dimensions = {}
+        
+        if not with_dimensions:
+            return scores
+        
+        dimension_list = [
+            {dim: float(values[i]) for dim, values in dimensions.items()}
+            for i in range(len(items))
+        ]
+        return scores, dimension_list
+    
+    def _keyword_group_scores(self, items):
+        """計算各新聞在每個關鍵字群組的評分
+        
+        Args:
+            items: 新聞物件或文章數據字典的列表
+            
+        Returns:
+            numpy.ndarray: 形狀為 (新聞數, 群組數) 的評分矩陣，欄位順序同 KEYWORD_GROUPS
+        """
+        groups = {group: self.keywords.get(group, {}) for group in self.KEYWORD_GROUPS}
+        classifier = self.text_processor.get_category_classifier(
+            {group: list(keywords) for group, keywords in groups.items()}
+        )
+        
+        # 每個 (群組, 關鍵字) 對應計數矩陣的一欄
+        columns = {}
+        weight_matrix = []
+        for group_index, (group, keywords) in enumerate(groups.items()):
+            for keyword, weight in keywords.items():
+                columns[(group, keyword)] = len(columns)
+                row = [0.0] * len(groups)
+                row[group_index] = weight
+                weight_matrix.append(row)
+        weight_matrix = np.array(weight_matrix, dtype=float).reshape(len(columns), len(groups))
+        
+        counts = np.zeros((len(items), len(columns)))
+        for row, item in enumerate(items):
+            title = _field(item, 'title') or ""
+            summary = _field(item, 'summary') or ""
+            content = _field(item, 'content') or ""
+            
+            # 與 calculate_dimensions 相同的合併文本與分詞方式
+            text_lower = f"{title} {title} {summary} {content}".lower()
+            matches = classifier.match(text_lower, set(self.text_processor.segment_text(text_lower)))
+            for group, matched in matches.items():
+                for keyword, count in matched.items():
+                    counts[row, columns[(group, keyword)]] = min(count, 3)  # 限制單一關鍵字的最大貢獻
+        
+        max_possible = np.array([sum(sorted(keywords.values(), reverse=True)[:3]) for keywords in groups.values()],
+                                dtype=float)
+        max_possible[max_possible <= 0] = 1
+        
+        return np.minimum(counts @ weight_matrix / max_possible, 1.0)
+    
+    def _timeliness_scores(self, items, now=None):
+        """以向量化日期運算計算各新聞的時效性評分
+        
+        Args:
+            items: 新聞物件或文章數據字典的列表
+            now: 基準時間，預設為現在
+            
+        Returns:
+            numpy.ndarray: 各新聞的時效性評分
+        """
+        now = now or datetime.now()
+        dates = [_field(item, 'published_date') for item in items]
+        has_date = np.array([isinstance(d, datetime) for d in dates], dtype=bool)
+        
+        published = np.array([d if isinstance(d, datetime) else now for d in dates], dtype='datetime64[us]')
+        days_old = (np.datetime64(now, 'us') - published) // np.timedelta64(1, 'D')
+        
+        scores = np.select([days_old <= max_days for max_days, _ in self.TIMELINESS_STEPS],
+                           [score for _, score in self.TIMELINESS_STEPS], default=0.2)
+        return np.where(has_date, scores, 0.5)
+    
     def analyze_business_impact(self, news_item):
         """分析新聞對業務的影響
         
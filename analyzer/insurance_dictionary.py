@@ -5,6 +5,10 @@ Insurance Professional Dictionary
 包含保險業相關的專業術語、公司名稱、產品類型等
 """
 
+from collections import Counter
+
+from analyzer.keyword_matcher import KeywordMatcher
+
 # 保險公司
 INSURANCE_COMPANIES = [
     # 壽險公司
@@ -264,6 +268,44 @@ ALL_INSURANCE_KEYWORDS = (
     MEDICAL_TERMS
 )
 
+# 關鍵字比對器 (依 ALL_INSURANCE_KEYWORDS 編譯，詞庫變動時重建)
+_keyword_matcher = None
+_keyword_matcher_size = 0
+_keyword_originals = {}      # {小寫關鍵字: [原始關鍵字, ...]}
+_keyword_multiplicity = {}   # {小寫關鍵字: 在詞庫中出現的次數}
+
+def rebuild_keyword_matcher() -> KeywordMatcher:
+    """依目前的 ALL_INSURANCE_KEYWORDS 重新編譯關鍵字比對器"""
+    global _keyword_matcher, _keyword_matcher_size, _keyword_originals, _keyword_multiplicity
+    
+    originals = {}
+    for keyword in ALL_INSURANCE_KEYWORDS:
+        variants = originals.setdefault(keyword.lower(), [])
+        if keyword not in variants:
+            variants.append(keyword)
+    
+    _keyword_matcher = KeywordMatcher(ALL_INSURANCE_KEYWORDS)
+    _keyword_matcher_size = len(ALL_INSURANCE_KEYWORDS)
+    _keyword_originals = originals
+    _keyword_multiplicity = Counter(keyword.lower() for keyword in ALL_INSURANCE_KEYWORDS)
+    return _keyword_matcher
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """取得保險詞庫的關鍵字比對器，詞庫有增減時自動重建"""
+    if _keyword_matcher is None or _keyword_matcher_size != len(ALL_INSURANCE_KEYWORDS):
+        rebuild_keyword_matcher()
+    return _keyword_matcher
+
+def add_insurance_keywords(keywords: list) -> None:
+    """
+    擴充保險詞庫並重建關鍵字比對器
+    
+    Args:
+        keywords: 要加入的關鍵字列表
+    """
+    ALL_INSURANCE_KEYWORDS.extend(keywords)
+    rebuild_keyword_matcher()
+
 def get_insurance_keywords():
     """取得所有保險相關關鍵字"""
     return ALL_INSURANCE_KEYWORDS
@@ -282,16 +324,10 @@ def is_insurance_related(text: str, threshold: int = 1) -> bool:
     if not text:
         return False
     
-    text_lower = text.lower()
-    count = 0
+    matched = get_keyword_matcher().find(text)
+    count = sum(_keyword_multiplicity.get(keyword, 0) for keyword in matched)
     
-    for keyword in ALL_INSURANCE_KEYWORDS:
-        if keyword.lower() in text_lower:
-            count += 1
-            if count >= threshold:
-                return True
-    
-    return False
+    return count > 0 and count >= threshold
 
 def extract_insurance_keywords(text: str) -> list:
     """
@@ -307,11 +343,8 @@ def extract_insurance_keywords(text: str) -> list:
         return []
     
     found_keywords = []
-    text_lower = text.lower()
-    
-    for keyword in ALL_INSURANCE_KEYWORDS:
-        if keyword.lower() in text_lower:
-            found_keywords.append(keyword)
+    for keyword in get_keyword_matcher().find(text):
+        found_keywords.extend(_keyword_originals.get(keyword, [keyword]))
     
     return list(set(found_keywords))  # 去重
 
@@ -0,0 +1,245 @@
+"""
+jieba 詞典共用載入
+Shared jieba Dictionary Loader
+
+jieba 分詞器是行程內共用的全域狀態，分析器與爬蟲去重器都透過此模組取得：
+- 主詞典、保險專業詞彙與自定義詞典在行程內只載入一次，且延後至第一次分詞時才載入
+- 載入完成的前綴詞典保存於 cache/jieba，之後啟動的行程 (網站、爬蟲、平行分析的子行程)
+  直接讀取，不需重新解析詞典與逐一加入詞彙
+- jieba.analyse 匯入時會解析 IDF 詞典，延後至第一次提取關鍵詞時才匯入
+
+主詞典可由環境變數 JIEBA_DICTIONARY 指定，預設使用繁體中文詞典 dict.txt.big (檔案存在時)，
+否則使用 jieba 內建詞典。可執行 `python -m analyzer.jieba_loader` 預先建立快取。
+"""
+
+import os
+import time
+import marshal
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Iterable, List, Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 主詞典 (相對路徑依序以目前目錄與專案根目錄尋找) 與詞典快取目錄 (相對路徑以專案根目錄為準)
+DEFAULT_DICTIONARY = 'dict.txt.big'
+JIEBA_CACHE_DIR = os.path.join(PROJECT_ROOT, os.environ.get('JIEBA_CACHE_DIR', os.path.join('cache', 'jieba')))
+
+_lock = threading.Lock()
+_jieba = None
+_analyse = None
+_state_key = None           # 目前已載入詞典狀態的快取鍵值
+_dictionary = None          # 已使用的主詞典路徑 (None 表示 jieba 內建詞典)
+_user_dicts: List[str] = [] # 已載入的自定義詞典 (絕對路徑，依載入順序)
+_stats = {'cache_hits': 0, 'cache_misses': 0, 'load_seconds': 0.0}
+
+
+def _resolve_dictionary() -> Optional[str]:
+    """找出要使用的主詞典路徑，找不到時返回 None (使用內建詞典)"""
+    path = os.environ.get('JIEBA_DICTIONARY', DEFAULT_DICTIONARY)
+    if not path:
+        return None
+
+    for candidate in (path, os.path.join(PROJECT_ROOT, path)):
+        if os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+
+    logger.debug(f"找不到 jieba 主詞典 {path}，使用內建詞典")
+    return None
+
+
+def _file_signature(path: str) -> str:
+    """以路徑、大小與修改時間表示檔案版本"""
+    try:
+        stat = os.stat(path)
+        return f"{path}:{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        return f"{path}:missing"
+
+
+def _compute_state_key(jieba, dictionary: Optional[str], user_dicts: List[str]) -> str:
+    """計算詞典狀態的快取鍵值 (主詞典、保險詞彙與自定義詞典任一變更即不同)"""
+    from analyzer.insurance_dictionary import ALL_INSURANCE_KEYWORDS
+
+    main_dictionary = dictionary or os.path.join(os.path.dirname(jieba.__file__), 'dict.txt')
+    parts = [getattr(jieba, '__version__', ''), _file_signature(main_dictionary)]
+    parts.extend(_file_signature(path) for path in user_dicts)
+    parts.extend(sorted(ALL_INSURANCE_KEYWORDS))
+    return hashlib.md5('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    """詞典狀態快取檔案路徑"""
+    return os.path.join(JIEBA_CACHE_DIR, f"prefix_dict.{key}.cache")
+
+
+def _load_state(jieba, key: str) -> bool:
+    """從磁碟快取載入已建立的前綴詞典，成功返回 True"""
+    path = _cache_path(key)
+    if not os.path.exists(path):
+        return False
+
+    try:
+        with open(path, 'rb') as f:
+            freq, total, word_tags = marshal.load(f)
+
+        tokenizer = jieba.dt
+        tokenizer.FREQ, tokenizer.total = freq, total
+        tokenizer.user_word_tag_tab.update(word_tags)
+        tokenizer.initialized = True
+        return True
+
+    except Exception as e:
+        logger.warning(f"讀取 jieba 詞典快取失敗，重新建立: {e}")
+        return False
+
+
+def _save_state(jieba, key: str) -> None:
+    """將目前的前綴詞典寫入磁碟快取 (先寫暫存檔再替換，避免多個行程同時寫入時讀到不完整檔案)"""
+    try:
+        os.makedirs(JIEBA_CACHE_DIR, exist_ok=True)
+        tokenizer = jieba.dt
+        fd, temp_path = tempfile.mkstemp(dir=JIEBA_CACHE_DIR)
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump((tokenizer.FREQ, tokenizer.total, tokenizer.user_word_tag_tab), f)
+        os.replace(temp_path, _cache_path(key))
+
+    except Exception as e:
+        logger.warning(f"保存 jieba 詞典快取失敗 (非關鍵錯誤): {e}")
+
+
+def _build_base(jieba) -> None:
+    """載入主詞典並加入保險專業詞彙"""
+    from analyzer.insurance_dictionary import ALL_INSURANCE_KEYWORDS
+
+    jieba.initialize()
+    for keyword in ALL_INSURANCE_KEYWORDS:
+        jieba.add_word(keyword, freq=10, tag='n')
+
+
+def get_jieba(user_dicts: Iterable[str] = ()):
+    """
+    取得已載入詞典的 jieba 模組，第一次呼叫時才匯入並載入詞典
+
+    Args:
+        user_dicts: 需要一併載入的自定義詞典路徑，已載入的會略過
+
+    Returns:
+        jieba 模組
+    """
+    global _jieba, _state_key, _dictionary
+
+    requested = [os.path.abspath(path) for path in user_dicts if path]
+    if _jieba is not None and all(path in _user_dicts for path in requested):
+        return _jieba
+
+    with _lock:
+        pending = [path for path in dict.fromkeys(requested) if path not in _user_dicts]
+        if _jieba is not None and not pending:
+            return _jieba
+
+        start = time.perf_counter()
+        import jieba
+
+        if _jieba is None:
+            _dictionary = _resolve_dictionary()
+            # jieba 自身的主詞典快取也保存在同一目錄，供首次建立時使用
+            jieba.dt.tmp_dir = JIEBA_CACHE_DIR
+            os.makedirs(JIEBA_CACHE_DIR, exist_ok=True)
+            if _dictionary:
+                jieba.set_dictionary(_dictionary)
+
+        target_dicts = _user_dicts + [path for path in pending if os.path.exists(path)]
+        key = _compute_state_key(jieba, _dictionary, target_dicts)
+
+        from_cache = _load_state(jieba, key)
+        if from_cache:
+            _stats['cache_hits'] += 1
+        else:
+            _stats['cache_misses'] += 1
+            if _jieba is None:
+                _build_base(jieba)
+            for path in target_dicts[len(_user_dicts):]:
+                jieba.load_userdict(path)
+            _save_state(jieba, key)
+
+        _user_dicts[:] = target_dicts
+        for path in pending:
+            if path not in _user_dicts:
+                logger.warning(f"自定義詞典不存在: {path}")
+                _user_dicts.append(path)  # 不存在的詞典不再重複嘗試
+
+        _state_key = key
+        _jieba = jieba
+        elapsed = time.perf_counter() - start
+        _stats['load_seconds'] += elapsed
+        logger.info(f"✅ jieba 詞典已載入 ({elapsed:.2f}s, {'讀取快取' if from_cache else '重新建立'})")
+        return _jieba
+
+
+def get_state_key(user_dicts: Iterable[str] = ()) -> str:
+    """
+    取得載入指定自定義詞典後的詞典狀態鍵值 (只匯入 jieba 模組，不載入詞典)
+
+    主詞典、保險專業詞彙或自定義詞典任一變更即不同，可作為分詞結果的版本
+
+    Args:
+        user_dicts: 自定義詞典路徑
+
+    Returns:
+        詞典狀態鍵值
+    """
+    import jieba
+
+    requested = [os.path.abspath(path) for path in user_dicts if path]
+    with _lock:
+        dictionary = _dictionary if _jieba is not None else _resolve_dictionary()
+        pending = [path for path in dict.fromkeys(requested) if path not in _user_dicts and os.path.exists(path)]
+        target_dicts = [path for path in _user_dicts if os.path.exists(path)] + pending
+        return _compute_state_key(jieba, dictionary, target_dicts)
+
+
+def get_jieba_analyse():
+    """
+    取得 jieba.analyse 模組 (第一次呼叫時才匯入，匯入時會載入 IDF 詞典)
+
+    Returns:
+        jieba.analyse 模組
+    """
+    global _analyse
+    if _analyse is None:
+        get_jieba()
+        with _lock:
+            if _analyse is None:
+                import jieba.analyse
+                _analyse = jieba.analyse
+    return _analyse
+
+
+def get_jieba_stats() -> Dict[str, Any]:
+    """
+    取得詞典載入統計
+
+    Returns:
+        包含是否已載入、主詞典、自定義詞典與快取命中次數的字典
+    """
+    return {
+        'loaded': _jieba is not None,
+        'analyse_loaded': _analyse is not None,
+        'dictionary': _dictionary or 'builtin',
+        'user_dicts': list(_user_dicts),
+        'state_key': _state_key,
+        'cache_dir': JIEBA_CACHE_DIR,
+        **_stats
+    }
+
+
+if __name__ == "__main__":
+    # 預先建立詞典快取 (部署時執行一次，之後的行程直接讀取)
+    logging.basicConfig(level=logging.INFO)
+    get_jieba_analyse()
+    print(get_jieba_stats())
@@ -0,0 +1,171 @@
+"""
+多關鍵字比對模組
+Multi-Keyword Matcher Module
+
+以 Aho-Corasick 自動機一次掃描文本，找出所有關鍵字及其出現次數。
+若已安裝 pyahocorasick 則使用其 C 實作，否則使用內建的純 Python 自動機。
+"""
+
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordMatcher:
+    """Aho-Corasick 多關鍵字比對器
+
+    關鍵字在建立時編譯一次，之後每次比對只需掃描文本一次。
+    出現次數的計算方式與 str.count 相同（同一關鍵字不重疊計數），
+    不同關鍵字之間則允許重疊（例如「人壽保險」同時命中「壽險」）。
+    """
+
+    def __init__(self, keywords: Iterable[str], case_insensitive: bool = True):
+        """
+        建立比對器
+
+        Args:
+            keywords: 關鍵字列表
+            case_insensitive: 是否忽略英文大小寫
+        """
+        self.case_insensitive = case_insensitive
+
+        # 去除重複與空字串，保留原始順序
+        self.patterns: List[str] = []
+        self._pattern_ids: Dict[str, int] = {}
+        for keyword in keywords:
+            if not keyword:
+                continue
+            pattern = keyword.lower() if case_insensitive else keyword
+            if pattern not in self._pattern_ids:
+                self._pattern_ids[pattern] = len(self.patterns)
+                self.patterns.append(pattern)
+
+        self._lengths = [len(p) for p in self.patterns]
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for pid, pattern in enumerate(self.patterns):
+                self._automaton.add_word(pattern, pid)
+            if self.patterns:
+                self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build_automaton()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _build_automaton(self):
+        """建立純 Python 版 Aho-Corasick 自動機 (goto / fail / output)"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        # 1. 建立字首樹
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] = self._output[state] + (pid,)
+
+        # 2. 廣度優先計算失敗連結，並合併失敗路徑上的輸出
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _iter_matches(self, text: str):
+        """逐一產生 (結束位置, 關鍵字編號)，依結束位置遞增"""
+        if self._automaton is not None:
+            if self.patterns:
+                yield from self._automaton.iter(text)
+            return
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pid in output[state]:
+                yield index, pid
+
+    def count(self, text: str) -> Dict[str, int]:
+        """
+        單次掃描計算所有關鍵字的出現次數
+
+        Args:
+            text: 待比對文本
+
+        Returns:
+            {關鍵字(正規化後): 出現次數}，只包含出現過的關鍵字
+        """
+        if not text or not self.patterns:
+            return {}
+
+        if self.case_insensitive:
+            text = text.lower()
+
+        counts: Dict[int, int] = {}
+        next_allowed: Dict[int, int] = {}
+        lengths = self._lengths
+
+        for end, pid in self._iter_matches(text):
+            start = end - lengths[pid] + 1
+            # 與 str.count 相同：同一關鍵字的命中不可重疊
+            if start >= next_allowed.get(pid, 0):
+                counts[pid] = counts.get(pid, 0) + 1
+                next_allowed[pid] = end + 1
+
+        patterns = self.patterns
+        return {patterns[pid]: count for pid, count in counts.items()}
+
+    def find(self, text: str) -> Set[str]:
+        """
+        單次掃描找出文本中出現的所有關鍵字
+
+        Args:
+            text: 待比對文本
+
+        Returns:
+            出現過的關鍵字集合(正規化後)
+        """
+        if not text or not self.patterns:
+            return set()
+
+        if self.case_insensitive:
+            text = text.lower()
+
+        patterns = self.patterns
+        return {patterns[pid] for _, pid in self._iter_matches(text)}
+
+    def normalize(self, keyword: str) -> str:
+        """取得關鍵字在比對結果中的正規化形式"""
+        return keyword.lower() if self.case_insensitive else keyword
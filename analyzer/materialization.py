@@ -0,0 +1,371 @@
+"""
+預先計算的新聞分析結果
+Materialized News Analysis
+
+新聞寫入資料庫後即計算分詞、關鍵詞、情感、類別與重要性，保存於 news_analyses 表。
+關鍵詞、情感與趨勢端點只需讀取並彙總這些欄位，不必在每次請求時重新分詞與分析。
+分析程式碼或 jieba 詞典變更時 (ANALYZER_VERSION 改變) 由應用啟動時的背景工作或 `flask materialize-analyses`
+重新計算，完成前端點繼續提供已保存的結果。
+保存的同時會累加至增量趨勢儲存 (analyzer.trend_store) 的每日統計桶；
+版本變更後的趨勢重建同樣在背景工作或 `flask rebuild-trends` 中進行，重建期間提供原有的統計桶。
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 背景補算執行緒 (同一時間只執行一個)
+_background_thread = None
+_background_lock = threading.Lock()
+
+
+def _article_data(news) -> Dict[str, Any]:
+    """將 News 模型轉換為分析器使用的文章數據"""
+    return {
+        'id': news.id,
+        'title': news.title or '',
+        'content': news.content or '',
+        'summary': news.summary or '',
+        'url': news.url,
+        'published_date': news.published_date,
+        'source': news.source.name if news.source else None
+    }
+
+
+def _apply_features(record, features: Dict[str, Any], version: str) -> None:
+    """將分析結果寫入 NewsAnalysis 記錄"""
+    record.analyzer_version = version
+    record.tokens = json.dumps(features['tokens'], ensure_ascii=False)
+    record.keywords = json.dumps(features['keywords'], ensure_ascii=False)
+    record.sentiment = features['sentiment']
+    record.sentiment_score = features['sentiment_score']
+    record.category = features['category']
+    record.category_scores = json.dumps(features['category_scores'], ensure_ascii=False)
+    record.importance_score = features['importance_score']
+    record.importance_dimensions = json.dumps(features['importance_dimensions'], ensure_ascii=False)
+
+
+def _trend_record(article: Dict[str, Any], features: Dict[str, Any]) -> Dict[str, Any]:
+    """將分析結果轉換為趨勢儲存的輸入"""
+    return {
+        'news_id': article['id'],
+        'published_date': article['published_date'],
+        'keywords': [keyword for keyword, _ in features['keywords']],
+        'sentiment': features['sentiment'],
+        'sentiment_score': features['sentiment_score'],
+        'category': features['category'],
+        'source': article.get('source')
+    }
+
+
+def materialize_news(news_ids: Optional[Iterable[int]] = None, since: Optional[datetime] = None,
+                     batch_size: int = 200, force: bool = False, parallel: bool = False) -> int:
+    """
+    計算並保存新聞的分析結果 (需在 Flask 應用上下文中呼叫)
+
+    只處理尚未分析或分析器版本已變更的新聞，News 表本身的欄位不會被修改。
+
+    Args:
+        news_ids: 指定的新聞ID，None 表示所有有效新聞
+        since: 只處理發布日期不早於此時間的新聞
+        batch_size: 每批處理並提交的新聞數量
+        force: 是否忽略版本，全部重新計算
+        parallel: 是否使用多程序平行分析
+
+    Returns:
+        已保存的新聞數量
+    """
+    from database.models import db, News, NewsAnalysis
+    from analyzer.engine import get_analyzer, ANALYZER_VERSION
+
+    query = db.session.query(News.id).outerjoin(NewsAnalysis, NewsAnalysis.news_id == News.id)
+    query = query.filter(News.status == 'active')
+    if news_ids is not None:
+        news_ids = list(news_ids)
+        if not news_ids:
+            return 0
+        query = query.filter(News.id.in_(news_ids))
+    if since is not None:
+        query = query.filter(News.published_date >= since)
+    if not force:
+        query = query.filter(db.or_(NewsAnalysis.id.is_(None),
+                                    NewsAnalysis.analyzer_version != ANALYZER_VERSION))
+
+    pending_ids = [row[0] for row in query.order_by(News.id).all()]
+    if not pending_ids:
+        return 0
+
+    saved = 0
+    for start in range(0, len(pending_ids), batch_size):
+        batch_ids = pending_ids[start:start + batch_size]
+        try:
+            news_rows = News.query.filter(News.id.in_(batch_ids)).all()
+            articles = [_article_data(news) for news in news_rows]
+
+            if parallel:
+                from analyzer.parallel import get_parallel_analyzer
+                features_list = get_parallel_analyzer().extract_materialized_features(articles)
+            else:
+                features_list = get_analyzer().extract_materialized_features_batch(articles)
+
+            existing = {
+                record.news_id: record
+                for record in NewsAnalysis.query.filter(NewsAnalysis.news_id.in_(batch_ids)).all()
+            }
+            for article, features in zip(articles, features_list):
+                record = existing.get(article['id'])
+                if record is None:
+                    record = NewsAnalysis(news_id=article['id'])
+                    db.session.add(record)
+                _apply_features(record, features, ANALYZER_VERSION)
+
+            db.session.commit()
+            saved += len(articles)
+
+            _ingest_trends([_trend_record(article, features)
+                            for article, features in zip(articles, features_list)])
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"❌ 保存新聞分析結果失敗: {e}")
+
+    logger.info(f"✅ 已保存 {saved} 則新聞分析結果 (版本 {ANALYZER_VERSION})")
+    return saved
+
+
+def refresh_analyses(since: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    補算尚未分析或版本過期的新聞，趨勢儲存的分析器版本不同時再重建趨勢統計
+    (需在 Flask 應用上下文中呼叫)
+
+    Args:
+        since: 只補算發布日期不早於此時間的新聞
+
+    Returns:
+        {'materialized': 補算數量, 'trends_rebuilt': 重建趨勢時寫入的新聞數量}
+    """
+    from analyzer.engine import ANALYZER_VERSION
+    from analyzer.trend_store import get_trend_store
+
+    result = {'materialized': materialize_news(since=since), 'trends_rebuilt': 0}
+    if get_trend_store().get_meta('analyzer_version') != ANALYZER_VERSION:
+        result['trends_rebuilt'] = backfill_trend_store()
+    return result
+
+
+def materialize_in_background(app, since: Optional[datetime] = None) -> bool:
+    """
+    在背景執行緒執行 refresh_analyses (已有背景工作執行中時不重複啟動)
+
+    Args:
+        app: Flask 應用實例
+        since: 只處理發布日期不早於此時間的新聞
+
+    Returns:
+        是否啟動了新的背景工作
+    """
+    global _background_thread
+
+    def run():
+        with app.app_context():
+            try:
+                refresh_analyses(since=since)
+            except Exception as e:
+                logger.error(f"❌ 背景補算新聞分析結果失敗: {e}")
+
+    with _background_lock:
+        if _background_thread is not None and _background_thread.is_alive():
+            return False
+        _background_thread = threading.Thread(target=run, name='materialize-news', daemon=True)
+        _background_thread.start()
+        return True
+
+
+def rescore_importance(batch_size: int = 1000, reload_keywords: bool = True) -> int:
+    """
+    以目前的重要性關鍵字權重重算所有已保存分析的重要性 (需在 Flask 應用上下文中呼叫)
+
+    修改 importance_keywords.json 後執行 `flask rescore-importance` 即可，只讀取標題、摘要、內容與發布日期並批次評分，
+    其他分析欄位不會重新計算。
+
+    Args:
+        batch_size: 每批評分並提交的新聞數量
+        reload_keywords: 是否先重新載入關鍵字權重配置
+
+    Returns:
+        已更新的新聞數量
+    """
+    from database.models import db, News, NewsAnalysis
+    from analyzer.engine import get_analyzer
+
+    rater = get_analyzer().importance_rater
+    if reload_keywords:
+        rater.load_keywords(rater.config_path)
+
+    query = db.session.query(
+        NewsAnalysis.id, News.title, News.summary, News.content, News.published_date
+    ).join(News, NewsAnalysis.news_id == News.id).order_by(NewsAnalysis.id)
+
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            rows = query.filter(NewsAnalysis.id > last_id).limit(batch_size).all()
+            if not rows:
+                break
+
+            articles = [
+                {'title': title or '', 'summary': summary or '', 'content': content or '',
+                 'published_date': published_date}
+                for _, title, summary, content, published_date in rows
+            ]
+            scores, dimensions = rater.rate_batch(articles, with_dimensions=True)
+
+            db.session.bulk_update_mappings(NewsAnalysis, [
+                {
+                    'id': row[0],
+                    'importance_score': float(score),
+                    'importance_dimensions': json.dumps(dims, ensure_ascii=False)
+                }
+                for row, score, dims in zip(rows, scores, dimensions)
+            ])
+            db.session.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"❌ 重算重要性評分失敗: {e}")
+
+    logger.info(f"✅ 已重算 {updated} 則新聞的重要性評分")
+    return updated
+
+
+def _ingest_trends(records: List[Dict[str, Any]]) -> None:
+    """將新保存的分析結果累加至趨勢儲存 (失敗不影響分析結果)"""
+    try:
+        from analyzer.trend_store import get_trend_store
+        get_trend_store().ingest(records)
+    except Exception as e:
+        logger.warning(f"更新趨勢統計失敗 (非關鍵錯誤): {e}")
+
+
+def backfill_trend_store(store=None, batch_size: int = 1000) -> int:
+    """
+    以資料庫中目前版本的分析結果重建趨勢儲存 (需在 Flask 應用上下文中呼叫)
+
+    先寫入記憶體中的暫存儲存，完成後一次取代，重建期間查詢仍讀取原有的統計桶。
+    不會補算分析結果，需先執行 materialize_news (見 refresh_analyses)。
+
+    Args:
+        store: 趨勢儲存，預設為全域實例
+        batch_size: 每批讀取的新聞數量
+
+    Returns:
+        寫入的新聞數量
+    """
+    from database.models import db, News, NewsSource, NewsAnalysis
+    from analyzer.engine import ANALYZER_VERSION
+    from analyzer.trend_store import TrendStore, get_trend_store
+
+    store = store or get_trend_store()
+    since = datetime.now() - timedelta(days=store.retention_days)
+
+    query = db.session.query(
+        News.id, News.published_date, NewsSource.name,
+        NewsAnalysis.keywords, NewsAnalysis.sentiment, NewsAnalysis.sentiment_score, NewsAnalysis.category
+    ).join(NewsAnalysis, NewsAnalysis.news_id == News.id).outerjoin(
+        NewsSource, NewsSource.id == News.source_id
+    ).filter(
+        News.published_date >= since,
+        News.status == 'active',
+        NewsAnalysis.analyzer_version == ANALYZER_VERSION
+    ).order_by(News.id)
+
+    rebuilt = TrendStore(':memory:', retention_days=store.retention_days)
+    ingested = 0
+    last_id = 0
+    while True:
+        rows = query.filter(News.id > last_id).limit(batch_size).all()
+        if not rows:
+            break
+        ingested += rebuilt.ingest(
+            {
+                'news_id': news_id,
+                'published_date': published_date,
+                'keywords': [keyword for keyword, _ in json.loads(keywords)] if keywords else [],
+                'sentiment': sentiment,
+                'sentiment_score': sentiment_score,
+                'category': category,
+                'source': source
+            }
+            for news_id, published_date, source, keywords, sentiment, sentiment_score, category in rows
+        )
+        last_id = rows[-1][0]
+
+    rebuilt.prune()
+    store.replace_with(rebuilt, {'analyzer_version': ANALYZER_VERSION})
+    rebuilt.close()
+    logger.info(f"✅ 已重建趨勢統計: {ingested} 則新聞")
+    return ingested
+
+
+def get_trend_window(days: int = 30) -> Dict[str, Any]:
+    """
+    取得最近 days 天的趨勢
+
+    只讀取趨勢儲存，不在請求中重建：分析器版本變更後由背景工作或 `flask rebuild-trends` 重建，
+    完成前提供原有的統計桶
+
+    Args:
+        days: 區間天數
+
+    Returns:
+        趨勢分析結果
+    """
+    from analyzer.trend_store import get_trend_store
+
+    return get_trend_store().get_window(days)
+
+
+def get_materialized_analyses(cutoff_date: datetime) -> List[Dict[str, Any]]:
+    """
+    讀取指定時間後有效新聞已保存的分析結果 (需在 Flask 應用上下文中呼叫)
+
+    請求中不補算：尚未分析的新聞由爬蟲寫入後的處理或背景工作計算，
+    版本過期的結果在重新計算完成前照常提供
+
+    Args:
+        cutoff_date: 起始發布日期
+
+    Returns:
+        分析結果列表，每筆包含 news_id, published_date, keywords ([詞語, 權重] 列表),
+        sentiment, sentiment_score, category, importance_score
+    """
+    from database.models import db, News, NewsAnalysis
+
+    rows = db.session.query(
+        News.id, News.published_date,
+        NewsAnalysis.keywords, NewsAnalysis.sentiment, NewsAnalysis.sentiment_score,
+        NewsAnalysis.category, NewsAnalysis.importance_score
+    ).join(NewsAnalysis, NewsAnalysis.news_id == News.id).filter(
+        News.published_date >= cutoff_date,
+        News.status == 'active'
+    ).all()
+
+    return [
+        {
+            'news_id': news_id,
+            'published_date': published_date,
+            'keywords': json.loads(keywords) if keywords else [],
+            'sentiment': sentiment or 'neutral',
+            'sentiment_score': sentiment_score or 0.0,
+            'category': category or 'unknown',
+            'importance_score': importance_score
+        }
+        for news_id, published_date, keywords, sentiment, sentiment_score, category, importance_score in rows
+    ]
@@ -0,0 +1,195 @@
+"""
+多程序平行分析模組
+Parallel Analysis Module
+
+以程序池執行 CPU 密集的分詞與分析工作，避開 GIL 限制。
+每個工作程序啟動時載入一次 jieba 詞典 (讀取 analyzer.jieba_loader 的磁碟快取) 與保險分類詞庫，
+之後以文章區塊為單位處理。
+"""
+
+import os
+import atexit
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 工作程序內的分析器實例 (由 _init_worker 建立)
+_worker_analyzer = None
+
+
+def _init_worker():
+    """工作程序初始化：載入 jieba 詞典與保險分類詞庫，分詞儲存改為唯讀"""
+    global _worker_analyzer
+    from analyzer.engine import get_analyzer
+    from analyzer.jieba_loader import get_jieba_analyse
+    from analyzer.token_store import TokenStore
+    _worker_analyzer = get_analyzer()
+    # 多個工作程序同時寫入同一個 SQLite 檔案會互相鎖定，工作程序只讀取已保存的分詞結果
+    # (少量文章直接在主程序執行時仍使用原本的分詞儲存)
+    store = _worker_analyzer.text_processor.token_store
+    if multiprocessing.parent_process() is not None and store is not None and not store.read_only:
+        _worker_analyzer.text_processor.attach_token_store(TokenStore(str(store.db_path), read_only=True))
+    get_jieba_analyse()
+
+
+def _get_worker_analyzer():
+    """取得工作程序內的分析器"""
+    if _worker_analyzer is None:
+        _init_worker()
+    return _worker_analyzer
+
+
+def _analyze_chunk(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """完整分析一個文章區塊"""
+    return _get_worker_analyzer().analyze_batch(articles)
+
+
+def _trend_features_chunk(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """提取一個文章區塊的趨勢特徵"""
+    analyzer = _get_worker_analyzer()
+    return [analyzer._extract_trend_features(article) for article in articles]
+
+
+def _materialize_chunk(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """提取一個文章區塊需預先保存的分析結果"""
+    analyzer = _get_worker_analyzer()
+    return analyzer.extract_materialized_features_batch(articles)
+
+
+def _segment_chunk(texts: List[str]) -> List[str]:
+    """將一個文本區塊分詞為空白分隔字串"""
+    analyzer = _get_worker_analyzer()
+    return [analyzer._segment_for_vectorizer(text) for text in texts]
+
+
+class ParallelAnalyzer:
+    """多程序平行分析器"""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 50,
+                 min_parallel_items: int = 100, mp_context: Optional[str] = None):
+        """
+        初始化平行分析器
+
+        Args:
+            max_workers: 工作程序數量，預設為 CPU 核心數
+            chunk_size: 每個任務處理的文章數量
+            min_parallel_items: 少於此數量時直接在目前程序中執行
+            mp_context: multiprocessing 啟動方式 (fork/spawn/forkserver)
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.min_parallel_items = min_parallel_items
+        self.mp_context = mp_context
+        self._executor = None
+
+        logger.info(f"✅ 平行分析器初始化完成，工作程序數: {self.max_workers}，區塊大小: {self.chunk_size}")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """延遲建立程序池 (工作程序啟動時即載入詞典)"""
+        if self._executor is None:
+            context = multiprocessing.get_context(self.mp_context) if self.mp_context else None
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker
+            )
+        return self._executor
+
+    def _should_run_serial(self, count: int) -> bool:
+        """判斷是否直接以單程序執行"""
+        return self.max_workers <= 1 or count < self.min_parallel_items
+
+    def _map_chunks(self, func: Callable[[List[Any]], List[Any]], items: List[Any]) -> List[Any]:
+        """
+        將項目切成區塊分派至工作程序，並依原順序合併結果
+
+        Args:
+            func: 處理單一區塊的模組層級函數
+            items: 待處理項目
+
+        Returns:
+            與輸入順序相同的結果列表
+        """
+        if not items:
+            return []
+
+        if self._should_run_serial(len(items)):
+            return func(items)
+
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+
+        results = []
+        for chunk_result in self._get_executor().map(func, chunks):
+            results.extend(chunk_result)
+        return results
+
+    def analyze_batch(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        平行完整分析多篇文章，結果與 InsuranceNewsAnalyzer.analyze_batch 相同
+
+        Args:
+            articles: 新聞文章數據列表
+
+        Returns:
+            分析結果列表，順序與輸入相同
+        """
+        return self._map_chunks(_analyze_chunk, articles)
+
+    def extract_trend_features(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        平行提取趨勢分析所需的逐篇特徵 (關鍵詞、情感分數、類別)
+
+        Args:
+            articles: 新聞文章數據列表
+
+        Returns:
+            特徵列表，順序與輸入相同
+        """
+        return self._map_chunks(_trend_features_chunk, articles)
+
+    def extract_materialized_features(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        平行提取需預先保存的逐篇分析結果
+
+        Args:
+            articles: 新聞文章數據列表
+
+        Returns:
+            分析結果列表，順序與輸入相同
+        """
+        return self._map_chunks(_materialize_chunk, articles)
+
+    def segment_texts(self, texts: List[str]) -> List[str]:
+        """
+        平行分詞，供 TF-IDF 向量化使用
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            空白分隔的分詞字串列表，順序與輸入相同
+        """
+        return self._map_chunks(_segment_chunk, texts)
+
+    def shutdown(self, wait: bool = True):
+        """關閉程序池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+            logger.info("✅ 平行分析程序池已關閉")
+
+
+# 全域平行分析器實例
+_parallel_instance = None
+
+def get_parallel_analyzer() -> ParallelAnalyzer:
+    """取得全域平行分析器實例"""
+    global _parallel_instance
+    if _parallel_instance is None:
+        _parallel_instance = ParallelAnalyzer()
+        # 程序結束時關閉程序池，避免留下工作程序
+        atexit.register(_parallel_instance.shutdown)
+    return _parallel_instance
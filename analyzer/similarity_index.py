@@ -0,0 +1,610 @@
+"""
+相似新聞索引
+Persistent TF-IDF Similarity Index
+
+維護所有有效新聞的稀疏 TF-IDF 矩陣並保存至磁碟。
+新文章爬取後直接附加至索引，IDF 定期重新計算；
+相似新聞查詢只需一次稀疏矩陣與向量乘法，不需重新分詞或重新訓練向量化器。
+
+磁碟格式為完整快照 (重算 IDF 後寫入) 加上依序附加的增量檔 (delta-*.json/npz)，
+每批新文章只寫入該批的詞頻；其他程序寫入後，get_similarity_index() 會依檔案修改時間重新載入，
+保存前也會先載入其他程序的變更再套用本程序的變更，避免快照覆蓋其他程序寫入的文章。
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Iterable
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from analyzer.text_processor import get_text_processor
+
+logger = logging.getLogger(__name__)
+
+# 相對路徑以專案根目錄為準，Flask 應用、同步指令與爬蟲共用同一份索引
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_DIR = os.path.join('cache', 'similarity_index')
+
+
+class SimilarityIndex:
+    """可增量更新的 TF-IDF 相似度索引"""
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR, refresh_ratio: float = 0.1,
+                 min_similarity: float = 0.1):
+        """
+        初始化相似度索引
+
+        Args:
+            index_dir: 索引檔案目錄 (相對路徑以專案根目錄為準)
+            refresh_ratio: 新增文章數超過索引大小的此比例時自動重算 IDF
+            min_similarity: 查詢結果的最低相似度
+        """
+        self.index_dir = Path(PROJECT_ROOT, index_dir)
+        self.refresh_ratio = refresh_ratio
+        self.min_similarity = min_similarity
+        self.text_processor = get_text_processor()
+        self._lock = threading.RLock()
+        self._disk_signature: Optional[Tuple] = None
+        self._reset()
+
+    def _reset(self):
+        """清空索引內容"""
+        self.vocabulary: Dict[str, int] = {}
+        self.doc_ids: List[int] = []
+        self._row_of: Dict[int, int] = {}
+        self._df = np.zeros(0, dtype=np.int64)          # 各詞語的文件頻率 (只計有效文章)
+        self._idf = np.zeros(0, dtype=np.float64)       # 最近一次重算的 IDF
+        self._active = np.zeros(0, dtype=bool)          # 文章是否仍有效
+        self._tf = sp.csr_matrix((0, 0), dtype=np.float64)
+        self._matrix = sp.csr_matrix((0, 0), dtype=np.float64)
+        self._added_since_refresh = 0
+        self.last_refresh: Optional[datetime] = None
+        # 尚未保存的變更 [('add', 新聞ID列表, 詞頻矩陣) / ('remove', 新聞ID列表)]
+        self._pending: List[Tuple] = []
+        self._snapshot_id: Optional[str] = None
+        self._snapshot_needed = True
+
+    # ------------------------------------------------------------------
+    # 向量化
+    # ------------------------------------------------------------------
+    def _tokenize(self, text: str) -> List[str]:
+        """分詞並移除停用詞"""
+        stop_words = self.text_processor.stop_words
+        return [w.lower() for w in self.text_processor.segment_text(text) if w not in stop_words]
+
+    def _term_counts(self, text: str, grow_vocabulary: bool) -> Dict[int, float]:
+        """計算文本的詞頻，必要時擴充詞彙表"""
+        counts: Dict[int, float] = {}
+        for token in self._tokenize(text):
+            col = self.vocabulary.get(token)
+            if col is None:
+                if not grow_vocabulary:
+                    continue
+                col = len(self.vocabulary)
+                self.vocabulary[token] = col
+            counts[col] = counts.get(col, 0.0) + 1.0
+        return counts
+
+    def _counts_to_rows(self, rows: List[Dict[int, float]]) -> sp.csr_matrix:
+        """將詞頻字典列表轉為 CSR 矩陣"""
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for counts in rows:
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        return sp.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(len(rows), len(self.vocabulary))
+        )
+
+    def _compute_idf(self) -> np.ndarray:
+        """依目前文件頻率計算平滑 IDF (與 sklearn TfidfTransformer 相同公式)"""
+        n_docs = int(self._active.sum())
+        return np.log((1.0 + n_docs) / (1.0 + self._df)) + 1.0
+
+    def _grow_columns(self):
+        """詞彙表擴充後調整各陣列與矩陣的欄數"""
+        n_terms = len(self.vocabulary)
+        if len(self._df) < n_terms:
+            extra = n_terms - len(self._df)
+            self._df = np.concatenate([self._df, np.zeros(extra, dtype=np.int64)])
+            self._idf = np.concatenate([self._idf, np.zeros(extra, dtype=np.float64)])
+        if self._tf.shape[1] < n_terms:
+            self._tf.resize((self._tf.shape[0], n_terms))
+            self._matrix.resize((self._matrix.shape[0], n_terms))
+
+    def _weight_rows(self, tf_rows: sp.csr_matrix, idf: np.ndarray) -> sp.csr_matrix:
+        """TF 乘上 IDF 後做 L2 正規化"""
+        if tf_rows.shape[1] == 0:
+            return sp.csr_matrix(tf_rows.shape, dtype=np.float64)
+        return normalize(tf_rows @ sp.diags(idf), norm='l2', copy=False).tocsr()
+
+    # ------------------------------------------------------------------
+    # 更新
+    # ------------------------------------------------------------------
+    def add_documents(self, documents: Iterable[Tuple[int, str]]) -> int:
+        """
+        附加文章至索引
+
+        已存在的文章會先移除再重新加入 (視為內容更新)。
+        新文章使用目前的 IDF 計算權重，累積一定數量後自動重算 IDF。
+
+        Args:
+            documents: (新聞ID, 文本) 列表
+
+        Returns:
+            新增的文章數
+        """
+        with self._lock:
+            # 同一批次中重複的文章只保留最後一份內容
+            batch = {}
+            for news_id, text in documents:
+                batch.pop(news_id, None)
+                batch[news_id] = text
+
+            new_ids = []
+            new_counts = []
+            for news_id, text in batch.items():
+                if news_id in self._row_of:
+                    self.remove(news_id)
+                new_ids.append(news_id)
+                new_counts.append(self._term_counts(text or "", grow_vocabulary=True))
+
+            if not new_ids:
+                return 0
+
+            self._grow_columns()
+            tf_rows = self._counts_to_rows(new_counts)
+            self._append_rows(new_ids, tf_rows)
+            self._pending.append(('add', new_ids, tf_rows))
+
+            if self._needs_refresh():
+                self.refresh_idf()
+
+            logger.debug(f"✅ 相似度索引新增 {len(new_ids)} 篇文章，共 {self.size} 篇")
+            return len(new_ids)
+
+    def _append_rows(self, news_ids: List[int], tf_rows: sp.csr_matrix):
+        """附加詞頻列並以目前的 IDF 計算權重 (不記錄變更)"""
+        # 更新文件頻率
+        self._df += np.bincount(tf_rows.indices, minlength=len(self.vocabulary))
+
+        start = len(self.doc_ids)
+        self.doc_ids.extend(news_ids)
+        for offset, news_id in enumerate(news_ids):
+            self._row_of[news_id] = start + offset
+        self._active = np.concatenate([self._active, np.ones(len(news_ids), dtype=bool)])
+        self._tf = sp.vstack([self._tf, tf_rows], format='csr')
+        self._added_since_refresh += len(news_ids)
+
+        # 尚未出現在 IDF 中的新詞語，使用目前文件頻率計算
+        unseen = self._idf == 0
+        if unseen.any():
+            self._idf[unseen] = self._compute_idf()[unseen]
+        self._matrix = sp.vstack([self._matrix, self._weight_rows(tf_rows, self._idf)], format='csr')
+
+    def remove(self, news_id: int) -> bool:
+        """
+        將文章標記為無效 (下次重算 IDF 時壓縮移除)
+
+        Args:
+            news_id: 新聞ID
+
+        Returns:
+            是否成功移除
+        """
+        with self._lock:
+            if not self._remove_row(news_id):
+                return False
+            self._pending.append(('remove', [news_id]))
+            return True
+
+    def _remove_row(self, news_id: int) -> bool:
+        """將文章標記為無效並扣除文件頻率 (不記錄變更)"""
+        row = self._row_of.pop(news_id, None)
+        if row is None or not self._active[row]:
+            return False
+        self._active[row] = False
+        self._df -= np.bincount(self._tf[row].indices, minlength=len(self.vocabulary))
+        return True
+
+    def _needs_refresh(self) -> bool:
+        """判斷是否需要重算 IDF"""
+        if self.last_refresh is None:
+            return True
+        return self._added_since_refresh > max(1, int(self.size * self.refresh_ratio))
+
+    def refresh_idf(self):
+        """重算 IDF、移除無效文章並重建 TF-IDF 矩陣"""
+        with self._lock:
+            if not self._active.all():
+                keep = np.flatnonzero(self._active)
+                self._tf = self._tf[keep]
+                self.doc_ids = [self.doc_ids[i] for i in keep]
+                self._row_of = {news_id: row for row, news_id in enumerate(self.doc_ids)}
+                self._active = np.ones(len(self.doc_ids), dtype=bool)
+
+            self._idf = self._compute_idf()
+            self._matrix = self._weight_rows(self._tf, self._idf)
+            self._added_since_refresh = 0
+            self.last_refresh = datetime.now()
+            # 矩陣已全部重建，下次保存寫入完整快照 (保留尚未保存的變更，供合併其他程序的變更時重新套用)
+            self._snapshot_needed = True
+            logger.info(f"✅ 相似度索引 IDF 已重算，共 {self.size} 篇文章，{len(self.vocabulary)} 個詞語")
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+    @property
+    def size(self) -> int:
+        """有效文章數"""
+        return int(self._active.sum())
+
+    def __contains__(self, news_id: int) -> bool:
+        return news_id in self._row_of
+
+    def _top_k(self, scores: np.ndarray, top_k: int, exclude_row: Optional[int] = None) -> List[Tuple[int, float]]:
+        """取出分數最高的文章"""
+        scores = np.where(self._active, scores, -1.0)
+        if exclude_row is not None:
+            scores[exclude_row] = -1.0
+
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
+
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        return [
+            (self.doc_ids[row], float(scores[row]))
+            for row in candidates
+            if scores[row] > self.min_similarity
+        ]
+
+    def get_vectors(self, news_ids: Iterable[int]) -> Tuple[List[int], sp.csr_matrix]:
+        """
+        取得文章的 TF-IDF 向量 (已 L2 正規化)
+
+        Args:
+            news_ids: 新聞ID
+
+        Returns:
+            (在索引中的新聞ID, 對應的向量矩陣)，未索引的文章會被略過
+        """
+        with self._lock:
+            found = [news_id for news_id in news_ids if news_id in self._row_of]
+            rows = [self._row_of[news_id] for news_id in found]
+            return found, self._matrix[rows]
+
+    def feature_names(self) -> List[str]:
+        """依欄位順序返回詞彙表"""
+        with self._lock:
+            names = [''] * len(self.vocabulary)
+            for token, col in self.vocabulary.items():
+                names[col] = token
+            return names
+
+    def similar_to_id(self, news_id: int, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        查詢與指定文章最相似的文章
+
+        Args:
+            news_id: 新聞ID (必須已在索引中)
+            top_k: 返回數量
+
+        Returns:
+            [(新聞ID, 相似度), ...]，依相似度遞減
+        """
+        with self._lock:
+            row = self._row_of.get(news_id)
+            if row is None or self._matrix.shape[0] == 0:
+                return []
+            scores = (self._matrix @ self._matrix[row].T).toarray().ravel()
+            return self._top_k(scores, top_k, exclude_row=row)
+
+    def similar_to_text(self, text: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        查詢與任意文本最相似的文章
+
+        Args:
+            text: 查詢文本
+            top_k: 返回數量
+
+        Returns:
+            [(新聞ID, 相似度), ...]，依相似度遞減
+        """
+        with self._lock:
+            if self._matrix.shape[0] == 0:
+                return []
+            query = self._weight_rows(
+                self._counts_to_rows([self._term_counts(text or "", grow_vocabulary=False)]),
+                self._idf
+            )
+            scores = (self._matrix @ query.T).toarray().ravel()
+            return self._top_k(scores, top_k)
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+    _STATE_FIELDS = (
+        'vocabulary', 'doc_ids', '_row_of', '_df', '_idf', '_active', '_tf', '_matrix',
+        '_added_since_refresh', 'last_refresh', '_pending', '_snapshot_id', '_snapshot_needed'
+    )
+
+    def _delta_paths(self) -> List[Path]:
+        """依寫入順序返回增量檔"""
+        return sorted(self.index_dir.glob('delta-*.json'))
+
+    def _disk_state(self) -> Optional[Tuple]:
+        """索引檔的名稱與修改時間 (尚無快照時返回 None)"""
+        try:
+            paths = [self.index_dir / 'meta.json'] + self._delta_paths()
+            return tuple((path.name, path.stat().st_mtime_ns) for path in paths)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _replace_file(path: Path, writer):
+        """先寫入暫存檔再取代，讀取中的程序不會看到寫到一半的檔案"""
+        tmp_path = path.with_name(f".tmp-{os.getpid()}-{path.name}")
+        writer(tmp_path)
+        os.replace(tmp_path, path)
+
+    def save(self):
+        """
+        將索引保存至磁碟
+
+        重算 IDF 後 (或尚無快照時) 寫入完整快照並清除已套用的增量檔，
+        否則只將上次保存後新增與移除的文章寫入一個增量檔。
+        索引檔在上次載入或保存後被其他程序更新時，先重新載入再套用本程序的變更
+        """
+        with self._lock:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._merge_disk_changes()
+            if self._snapshot_needed or self._snapshot_id is None or not (self.index_dir / 'meta.json').exists():
+                self._save_snapshot()
+            elif self._pending:
+                self._save_delta()
+            self._pending.clear()
+            self._disk_signature = self._disk_state()
+
+    def _merge_disk_changes(self):
+        """重新載入其他程序保存的索引檔，並重新套用本程序尚未保存的變更"""
+        signature = self._disk_state()
+        if signature is None or signature == self._disk_signature:
+            return
+
+        names = self.feature_names()
+        pending, snapshot_needed = self._pending, self._snapshot_needed
+        if not self.load():
+            return
+
+        for op in pending:
+            if op[0] == 'remove':
+                for news_id in op[1]:
+                    self._remove_row(news_id)
+                self._pending.append(op)
+                continue
+            news_ids, tf_rows = op[1], op[2]
+            cols = np.asarray([self.vocabulary.setdefault(names[col], len(self.vocabulary))
+                               for col in range(tf_rows.shape[1])], dtype=np.int64)
+            self._grow_columns()
+            tf_rows = sp.csr_matrix((tf_rows.data, cols[tf_rows.indices], tf_rows.indptr),
+                                    shape=(tf_rows.shape[0], len(self.vocabulary)))
+            for news_id in news_ids:
+                self._remove_row(news_id)
+            self._append_rows(news_ids, tf_rows)
+            self._pending.append(('add', news_ids, tf_rows))
+
+        if snapshot_needed:
+            self.refresh_idf()
+        logger.info(f"✅ 相似度索引已合併其他程序的變更，共 {self.size} 篇文章")
+
+    def _save_snapshot(self):
+        """寫入完整快照 (meta.json 最後寫入)"""
+        self._snapshot_id = uuid.uuid4().hex
+        self._replace_file(self.index_dir / 'tf.npz', lambda path: sp.save_npz(path, self._tf))
+        self._replace_file(self.index_dir / 'matrix.npz', lambda path: sp.save_npz(path, self._matrix))
+        self._replace_file(self.index_dir / 'idf.npy', lambda path: np.save(path, self._idf))
+        self._replace_file(self.index_dir / 'df.npy', lambda path: np.save(path, self._df))
+        self._replace_file(self.index_dir / 'active.npy', lambda path: np.save(path, self._active))
+
+        meta = {
+            'snapshot_id': self._snapshot_id,
+            'vocabulary': self.vocabulary,
+            'doc_ids': self.doc_ids,
+            'added_since_refresh': self._added_since_refresh,
+            'last_refresh': self.last_refresh.isoformat() if self.last_refresh else None,
+            'saved_at': datetime.now().isoformat()
+        }
+        self._replace_file(self.index_dir / 'meta.json', lambda path: path.write_text(
+            json.dumps(meta, ensure_ascii=False), encoding='utf-8'))
+
+        # 已載入的增量檔已包含在新快照中 (之後才寫入的增量檔保留)
+        applied = {name for name, _ in self._disk_signature or ()}
+        for path in self._delta_paths():
+            if path.name in applied:
+                path.unlink(missing_ok=True)
+                path.with_suffix('.npz').unlink(missing_ok=True)
+        self._snapshot_needed = False
+
+        logger.info(f"✅ 相似度索引已保存: {self.index_dir} ({self.size} 篇文章)")
+
+    def _save_delta(self):
+        """將尚未保存的變更寫入增量檔 (詞頻矩陣只保留用到的詞語)"""
+        matrices = [op[2] for op in self._pending if op[0] == 'add']
+        used = np.unique(np.concatenate([m.indices for m in matrices] or [np.zeros(0, dtype=np.int64)]))
+        names = self.feature_names()
+        local_rows = [
+            sp.csr_matrix((m.data, np.searchsorted(used, m.indices), m.indptr), shape=(m.shape[0], len(used)))
+            for m in matrices
+        ]
+        tf_rows = sp.vstack(local_rows, format='csr') if local_rows else sp.csr_matrix((0, 0), dtype=np.float64)
+
+        delta = {
+            'snapshot_id': self._snapshot_id,
+            'terms': [names[col] for col in used],
+            'ops': [{'op': op[0], 'ids': list(op[1])} for op in self._pending],
+            'saved_at': datetime.now().isoformat()
+        }
+        stem = f"delta-{time.time_ns():020d}-{os.getpid()}"
+        self._replace_file(self.index_dir / f"{stem}.npz", lambda path: sp.save_npz(path, tf_rows))
+        self._replace_file(self.index_dir / f"{stem}.json", lambda path: path.write_text(
+            json.dumps(delta, ensure_ascii=False), encoding='utf-8'))
+
+        logger.debug(f"✅ 相似度索引增量已保存: {stem} ({tf_rows.shape[0]} 篇文章)")
+
+    def load(self) -> bool:
+        """
+        從磁碟載入索引 (快照加上之後的增量檔)
+
+        載入失敗時保留目前的索引內容
+
+        Returns:
+            是否成功載入
+        """
+        signature = self._disk_state()
+        if signature is None:
+            return False
+
+        staged = SimilarityIndex(str(self.index_dir), self.refresh_ratio, self.min_similarity)
+        try:
+            staged._load_files()
+        except Exception as e:
+            logger.error(f"❌ 載入相似度索引失敗: {e}")
+            self._disk_signature = signature
+            return False
+
+        with self._lock:
+            for name in self._STATE_FIELDS:
+                setattr(self, name, getattr(staged, name))
+            self._disk_signature = signature
+
+        logger.info(f"✅ 相似度索引已載入: {self.size} 篇文章，{len(self.vocabulary)} 個詞語")
+        return True
+
+    def _load_files(self):
+        """讀取快照並依序套用增量檔"""
+        with open(self.index_dir / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        self._snapshot_id = meta.get('snapshot_id')
+        self.vocabulary = meta['vocabulary']
+        self.doc_ids = meta['doc_ids']
+        self._added_since_refresh = meta.get('added_since_refresh', 0)
+        self.last_refresh = datetime.fromisoformat(meta['last_refresh']) if meta.get('last_refresh') else None
+
+        self._tf = sp.load_npz(self.index_dir / 'tf.npz').tocsr()
+        self._matrix = sp.load_npz(self.index_dir / 'matrix.npz').tocsr()
+        self._idf = np.load(self.index_dir / 'idf.npy')
+        self._df = np.load(self.index_dir / 'df.npy')
+        self._active = np.load(self.index_dir / 'active.npy')
+        if not (self._tf.shape == self._matrix.shape == (len(self.doc_ids), len(self.vocabulary))
+                and len(self._active) == len(self.doc_ids)):
+            raise ValueError("索引檔不一致 (快照寫入中)")
+        self._row_of = {
+            news_id: row for row, news_id in enumerate(self.doc_ids) if self._active[row]
+        }
+
+        for delta_path in self._delta_paths():
+            with open(delta_path, 'r', encoding='utf-8') as f:
+                delta = json.load(f)
+            if delta.get('snapshot_id') != self._snapshot_id:
+                continue
+            self._apply_delta(delta, sp.load_npz(delta_path.with_suffix('.npz')).tocsr())
+        self._snapshot_needed = False
+
+    def _apply_delta(self, delta: Dict, tf_rows: sp.csr_matrix):
+        """將增量檔中的變更依序套用至索引"""
+        cols = np.asarray(
+            [self.vocabulary.setdefault(term, len(self.vocabulary)) for term in delta['terms']], dtype=np.int64
+        )
+        self._grow_columns()
+        n_terms = len(self.vocabulary)
+
+        offset = 0
+        for op in delta['ops']:
+            if op['op'] == 'remove':
+                for news_id in op['ids']:
+                    self._remove_row(news_id)
+                continue
+            count = len(op['ids'])
+            rows = tf_rows[offset:offset + count]
+            offset += count
+            self._append_rows(op['ids'], sp.csr_matrix((rows.data, cols[rows.indices], rows.indptr),
+                                                       shape=(count, n_terms)))
+
+    def reload_if_changed(self) -> bool:
+        """
+        索引檔被其他程序更新時重新載入 (有尚未保存的變更時不重新載入)
+
+        Returns:
+            是否重新載入
+        """
+        signature = self._disk_state()
+        if signature is None or signature == self._disk_signature or self._pending:
+            return False
+        return self.load()
+
+    # ------------------------------------------------------------------
+    # 資料庫同步
+    # ------------------------------------------------------------------
+    def sync_from_database(self, batch_size: int = 1000) -> int:
+        """
+        將資料庫中尚未索引的有效新聞加入索引，並移除已非有效的新聞
+        (需在 Flask 應用上下文中呼叫)
+
+        Args:
+            batch_size: 每批查詢筆數
+
+        Returns:
+            新增的文章數
+        """
+        from database.models import News, db
+
+        active_ids = {row[0] for row in db.session.query(News.id).filter(News.status == 'active')}
+
+        for news_id in [i for i in self._row_of if i not in active_ids]:
+            self.remove(news_id)
+
+        missing_ids = sorted(active_ids - set(self._row_of))
+        added = 0
+        for start in range(0, len(missing_ids), batch_size):
+            batch_ids = missing_ids[start:start + batch_size]
+            rows = db.session.query(News.id, News.title, News.content).filter(News.id.in_(batch_ids))
+            added += self.add_documents((news_id, f"{title} {content}") for news_id, title, content in rows)
+
+        if added or not self._active.all():
+            self.refresh_idf()
+            self.save()
+
+        logger.info(f"✅ 相似度索引同步完成，新增 {added} 篇文章")
+        return added
+
+
+# 全域索引實例
+_index_instance = None
+_index_lock = threading.Lock()
+
+def get_similarity_index() -> SimilarityIndex:
+    """取得全域相似度索引實例 (首次呼叫時從磁碟載入，索引檔更新後重新載入)"""
+    global _index_instance
+    with _index_lock:
+        if _index_instance is None:
+            _index_instance = SimilarityIndex()
+            _index_instance.load()
+            return _index_instance
+    # 其他程序 (排程爬蟲、同步指令) 更新索引檔後重新載入
+    _index_instance.reload_if_changed()
+    return _index_instance
@@ -0,0 +1,173 @@
+"""
+抽取式摘要
+Extractive Summarizer
+
+每篇文章只切句與分詞一次，以句子詞頻向量與文章關鍵詞權重向量的餘弦相似度為句子評分，
+整批文章的句子組成一個稀疏矩陣一次計算。已保存的關鍵詞權重 (例如 news_analyses.keywords)
+可直接傳入，未提供時才由句子分詞結果計算 TF-IDF 關鍵詞。
+"""
+
+import re
+import logging
+from typing import Dict, List, Optional, Sequence, Union, Iterable, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from analyzer.text_processor import get_text_processor
+
+logger = logging.getLogger(__name__)
+
+# 關鍵詞權重可為 {詞: 權重} 或 [(詞, 權重)] (news_analyses.keywords 的保存格式)
+KeywordWeights = Union[Dict[str, float], Sequence[Sequence]]
+
+
+class ExtractiveSummarizer:
+    """以關鍵詞向量評分句子的批次抽取式摘要器"""
+
+    # 句子分隔符號 (同 TextProcessor.get_text_summary)
+    SENTENCE_DELIMITERS = re.compile(r'[。！？!?]')
+
+    def __init__(self, text_processor=None, keyword_count: int = 20):
+        """
+        初始化摘要器
+
+        Args:
+            text_processor: 文本處理器，預設為全域實例
+            keyword_count: 未提供關鍵詞權重時，由文章計算的關鍵詞數量
+        """
+        self.text_processor = text_processor or get_text_processor()
+        self.keyword_count = keyword_count
+
+    def split_sentences(self, text: str) -> List[str]:
+        """
+        切分句子
+
+        Args:
+            text: 原文本
+
+        Returns:
+            去除空白後的句子列表
+        """
+        if not text:
+            return []
+        return [s.strip() for s in self.SENTENCE_DELIMITERS.split(text) if s.strip()]
+
+    def summarize(self, text: str, keyword_weights: Optional[KeywordWeights] = None,
+                  max_sentences: int = 3, max_length: Optional[int] = None) -> str:
+        """
+        生成單篇文章的摘要
+
+        Args:
+            text: 原文本
+            keyword_weights: 文章的關鍵詞權重 (選填)
+            max_sentences: 最多選取的句子數量
+            max_length: 摘要最大字數，預設為每句 100 字
+
+        Returns:
+            摘要文本
+        """
+        return self.summarize_batch([text], [keyword_weights], max_sentences, max_length)[0]
+
+    def summarize_batch(self, texts: List[str], keyword_weights: Optional[List[Optional[KeywordWeights]]] = None,
+                        max_sentences: int = 3, max_length: Optional[int] = None) -> List[str]:
+        """
+        批次生成摘要
+
+        Args:
+            texts: 原文本列表
+            keyword_weights: 與 texts 對應的關鍵詞權重列表，個別項目為 None 時由文章計算
+            max_sentences: 每篇最多選取的句子數量
+            max_length: 摘要最大字數，預設為每句 100 字
+
+        Returns:
+            摘要列表，順序與輸入相同
+        """
+        if not texts:
+            return []
+
+        max_length = max_length or max_sentences * 100
+        keyword_weights = keyword_weights or [None] * len(texts)
+
+        # 1. 每篇切句並分詞一次
+        sentences: List[str] = []
+        sentence_words: List[List[str]] = []
+        owners: List[int] = []
+        spans: List[Tuple[int, int]] = []
+        for text_index, text in enumerate(texts):
+            start = len(sentences)
+            for sentence in self.split_sentences(text):
+                sentences.append(sentence)
+                sentence_words.append(self.text_processor.segment_text(sentence))
+                owners.append(text_index)
+            spans.append((start, len(sentences)))
+
+        if not sentences:
+            return ['' for _ in texts]
+
+        # 2. 句子詞頻矩陣 (句子數 x 詞彙數)
+        vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, words in enumerate(sentence_words):
+            for word in words:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+        counts = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(sentences), len(vocabulary)))
+        counts.sum_duplicates()
+
+        # 3. 文章關鍵詞權重矩陣 (文章數 x 詞彙數)，只保留出現在句子中的詞
+        weight_rows, weight_cols, weight_values = [], [], []
+        for text_index, (start, end) in enumerate(spans):
+            weights = self._keyword_weights(keyword_weights[text_index], sentence_words[start:end])
+            for word, weight in weights:
+                col = vocabulary.get(word)
+                if col is not None and weight > 0:
+                    weight_rows.append(text_index)
+                    weight_cols.append(col)
+                    weight_values.append(float(weight))
+        article_weights = sp.csr_matrix((weight_values, (weight_rows, weight_cols)),
+                                        shape=(len(texts), len(vocabulary)))
+        article_weights.sum_duplicates()
+
+        # 4. 句子與所屬文章關鍵詞向量的餘弦相似度
+        owner_weights = article_weights[np.array(owners)]
+        dots = np.asarray(counts.multiply(owner_weights).sum(axis=1)).ravel()
+        sentence_norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+        weight_norms = np.sqrt(np.asarray(owner_weights.multiply(owner_weights).sum(axis=1)).ravel())
+        denominators = sentence_norms * weight_norms
+        scores = np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+
+        return [
+            self._select(texts[text_index], sentences[start:end], scores[start:end], max_sentences, max_length)
+            for text_index, (start, end) in enumerate(spans)
+        ]
+
+    def _keyword_weights(self, weights: Optional[KeywordWeights],
+                         sentence_words: List[List[str]]) -> Iterable[Tuple[str, float]]:
+        """取得文章的關鍵詞權重，未提供時由句子分詞結果計算"""
+        if weights:
+            return weights.items() if isinstance(weights, dict) else [(word, weight) for word, weight in weights]
+
+        tokens = [word for words in sentence_words for word in words]
+        return self.text_processor.extract_keywords_from_tokens(tokens, topK=self.keyword_count)
+
+    @staticmethod
+    def _select(text: str, sentences: List[str], scores: np.ndarray, max_sentences: int, max_length: int) -> str:
+        """依分數選取句子 (同分時優先選前面的句子)，並依原文順序組成摘要"""
+        if not sentences:
+            return ''
+
+        ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+        chosen = []
+        length = 0
+        for i in ranked:
+            if len(chosen) >= max_sentences:
+                break
+            if length + len(sentences[i]) <= max_length:
+                chosen.append(i)
+                length += len(sentences[i])
+
+        if not chosen:
+            return text[:max_length] + "..." if len(text) > max_length else text
+
+        return ''.join(sentences[i] + "。" for i in sorted(chosen))
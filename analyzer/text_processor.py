@@ -5,36 +5,147 @@ Text Processing Module
 提供中文文本分詞、關鍵字提取等自然語言處理功能
 """
 
-import jieba
-import jieba.analyse
 import re
 import logging
 import os
-from typing import List, Dict, Set, Tuple, Any
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import List, Dict, Set, Tuple, Any, Optional
 from collections import Counter
 
-from analyzer.insurance_dictionary import ALL_INSURANCE_KEYWORDS
+from analyzer.keyword_matcher import KeywordMatcher
+from analyzer.category_classifier import CategoryClassifier
+from analyzer.jieba_loader import get_jieba, get_jieba_analyse, get_state_key
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class TextDocument:
+    """單篇文本的共用分詞結果數據類
+
+    同一篇文章只分詞一次，關鍵詞、情感與分類等分析步驟共用此結果
+    """
+    text: str
+    text_lower: str
+    tokens: List[str] = field(default_factory=list)   # jieba 原始分詞結果
+    words: List[str] = field(default_factory=list)    # 過濾標點與單字後的詞語 (同 segment_text)
+    word_set: Set[str] = field(default_factory=set)   # 小寫詞語集合，用於關鍵字比對
+
+class SegmentationCache:
+    """以內容雜湊為鍵值的分詞結果快取 (LRU，依項目數與文本字數限制大小)"""
+    
+    def __init__(self, max_items: int = 2000, max_chars: int = 4000000):
+        """
+        初始化分詞快取
+        
+        Args:
+            max_items: 最多保存的文本數量
+            max_chars: 所有已快取文本的總字數上限
+        """
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self._items = OrderedDict()  # 格式: {內容雜湊: (分詞結果元組, 字數)}
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def get(self, key: str) -> Optional[Tuple[str, ...]]:
+        """取得分詞結果並更新使用順序"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+    
+    def put(self, key: str, tokens: Tuple[str, ...], size: int):
+        """保存分詞結果，超過上限時淘汰最久未使用的項目"""
+        if self.max_items <= 0 or size > self.max_chars:
+            return
+        
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._chars -= old[1]
+            
+            while self._items and (len(self._items) >= self.max_items or self._chars + size > self.max_chars):
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self._chars -= evicted_size
+                self.evictions += 1
+            
+            self._items[key] = (tokens, size)
+            self._chars += size
+    
+    def clear(self):
+        """清空快取"""
+        with self._lock:
+            self._items.clear()
+            self._chars = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得快取統計資訊
+        
+        Returns:
+            快取統計資料
+        """
+        requests = self.hits + self.misses
+        return {
+            'total_items': len(self._items),
+            'max_items': self.max_items,
+            'total_chars': self._chars,
+            'max_chars': self.max_chars,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / requests * 100 if requests > 0 else 0
+        }
+
+
 class TextProcessor:
     """文本處理器類"""
     
-    def __init__(self, custom_dict_path: str = None):
+    # 關鍵字比對器快取上限 (依關鍵字列表區分)
+    MATCHER_CACHE_SIZE = 64
+    
+    def __init__(self, custom_dict_path: str = None, segment_cache_size: int = 2000,
+                 segment_cache_max_chars: int = 4000000):
         """
         初始化文本處理器
         
         Args:
             custom_dict_path: 自定義詞典路徑
+            segment_cache_size: 分詞快取的文本數量上限
+            segment_cache_max_chars: 分詞快取的總字數上限
         """
         self.logger = logging.getLogger(__name__)
         
-        # 初始化jieba
+        # 分詞結果快取與選用的新聞分詞儲存
+        self.segment_cache = SegmentationCache(segment_cache_size, segment_cache_max_chars)
+        self.token_store = None
+        self._tokenizer_version = None
+        
+        # 設定jieba (詞典於第一次分詞時才載入)
+        self._user_dicts = []
         self.init_jieba(custom_dict_path)
         
         # 載入同義詞詞典
         self.synonyms = self._load_synonyms()
         
+        # 已編譯的關鍵字比對器，格式為 {(關鍵字元組, 是否含同義詞): KeywordMatcher}
+        # 以及類別分類器，格式為 {('categories', 類別關鍵字元組): CategoryClassifier}
+        self._matcher_cache = {}
+        
         # 載入停用詞
         self.stop_words = self._load_stop_words()
         
@@ -42,28 +153,34 @@ class TextProcessor:
     
     def init_jieba(self, custom_dict_path: str = None):
         """
-        初始化jieba分詞器
+        設定jieba分詞器，詞典由 analyzer.jieba_loader 於行程內共用並在第一次分詞時載入
         
         Args:
             custom_dict_path: 自定義詞典路徑
         """
-        try:
-            # 添加保險專業詞彙到jieba詞典
-            for keyword in ALL_INSURANCE_KEYWORDS:
-                jieba.add_word(keyword, freq=10, tag='n')
-            
-            # 載入自定義詞典（如果提供）
-            if custom_dict_path and os.path.exists(custom_dict_path):
-                jieba.load_userdict(custom_dict_path)
-                self.logger.info(f"✅ 已載入自定義詞典: {custom_dict_path}")
-            
-            # 調整jieba參數
-            jieba.initialize()  # 確保jieba完全載入
-            
-            self.logger.info("✅ jieba分詞器初始化完成")
-            
-        except Exception as e:
-            self.logger.error(f"❌ 初始化jieba分詞器失敗: {e}")
+        if custom_dict_path and os.path.exists(custom_dict_path):
+            self._user_dicts.append(custom_dict_path)
+            self.logger.info(f"✅ 已設定自定義詞典: {custom_dict_path}")
+        
+        # 詞典變更後舊的分詞結果不再適用
+        self.segment_cache.clear()
+        self._tokenizer_version = None
+    
+    @property
+    def tokenizer_version(self) -> str:
+        """分詞器版本：含本處理器自定義詞典的 jieba 詞典狀態鍵值 (不需載入詞典即可計算)"""
+        if self._tokenizer_version is None:
+            self._tokenizer_version = get_state_key(self._user_dicts)
+        return self._tokenizer_version
+    
+    def _jieba(self):
+        """取得已載入詞典 (含本處理器的自定義詞典) 的 jieba 模組"""
+        return get_jieba(self._user_dicts)
+    
+    def _jieba_analyse(self):
+        """取得 jieba.analyse 模組 (確保自定義詞典已載入)"""
+        self._jieba()
+        return get_jieba_analyse()
     
     def _load_synonyms(self) -> Dict[str, List[str]]:
         """
@@ -85,12 +202,142 @@ class TextProcessor:
         
         return basic_synonyms
     
-    def segment_text(self, text: str) -> List[str]:
+    def set_synonyms(self, synonyms: Dict[str, List[str]]) -> None:
+        """
+        替換同義詞詞典，並清除已編譯的關鍵字比對器
+        
+        Args:
+            synonyms: 同義詞對應表，格式為 {詞: [同義詞列表]}
+        """
+        self.synonyms = synonyms
+        self._matcher_cache.clear()
+    
+    def add_synonyms(self, word: str, synonyms: List[str]) -> None:
+        """
+        新增同義詞，並清除已編譯的關鍵字比對器
+        
+        Args:
+            word: 詞語
+            synonyms: 同義詞列表
+        """
+        existing = self.synonyms.setdefault(word, [])
+        for synonym in synonyms:
+            if synonym not in existing:
+                existing.append(synonym)
+        self._matcher_cache.clear()
+    
+    def _get_keyword_matcher(self, keywords: List[str], use_synonym: bool) -> KeywordMatcher:
+        """
+        取得關鍵字列表 (含同義詞) 的已編譯比對器
+        
+        Args:
+            keywords: 關鍵字列表
+            use_synonym: 是否包含同義詞
+            
+        Returns:
+            KeywordMatcher 實例
+        """
+        cache_key = (tuple(keywords), use_synonym)
+        matcher = self._matcher_cache.get(cache_key)
+        
+        if matcher is None:
+            patterns = list(keywords)
+            if use_synonym:
+                for keyword in keywords:
+                    patterns.extend(self.synonyms.get(keyword, []))
+            
+            matcher = KeywordMatcher(patterns)
+            
+            if len(self._matcher_cache) >= self.MATCHER_CACHE_SIZE:
+                del self._matcher_cache[next(iter(self._matcher_cache))]
+            self._matcher_cache[cache_key] = matcher
+        
+        return matcher
+    
+    def get_category_classifier(self, category_keywords: Dict[str, List[str]]) -> CategoryClassifier:
+        """
+        取得類別關鍵字 (含同義詞) 的已編譯分類器，同義詞變更時隨比對器快取一併清除
+        
+        Args:
+            category_keywords: 類別關鍵字，格式為 {類別: [關鍵字列表]}
+            
+        Returns:
+            CategoryClassifier 實例
+        """
+        cache_key = ('categories', tuple((category, tuple(keywords)) for category, keywords in category_keywords.items()))
+        classifier = self._matcher_cache.get(cache_key)
+        
+        if classifier is None:
+            classifier = CategoryClassifier(category_keywords, self.synonyms)
+            
+            if len(self._matcher_cache) >= self.MATCHER_CACHE_SIZE:
+                del self._matcher_cache[next(iter(self._matcher_cache))]
+            self._matcher_cache[cache_key] = classifier
+        
+        return classifier
+    
+    def attach_token_store(self, token_store) -> None:
+        """
+        掛載新聞分詞儲存，帶有新聞ID的分詞請求會優先讀取已保存的結果
+        
+        Args:
+            token_store: TokenStore 實例，None 表示停用
+        """
+        self.token_store = token_store
+    
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """計算文本內容雜湊"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _cut(self, text: str, news_id: int = None) -> Tuple[str, ...]:
+        """
+        預處理並以jieba分詞，結果依內容雜湊快取
+        
+        Args:
+            text: 原始文本
+            news_id: 新聞ID (提供且已掛載分詞儲存時，讀寫該新聞的分詞結果)
+            
+        Returns:
+            jieba 原始分詞結果
+        """
+        key = self.content_hash(text)
+        tokens = self.segment_cache.get(key)
+        if tokens is not None:
+            return tokens
+        
+        use_store = news_id is not None and self.token_store is not None
+        stored = self.token_store.get(news_id, key, self.tokenizer_version) if use_store else None
+        
+        if stored is not None:
+            tokens = tuple(stored)
+        else:
+            tokens = tuple(self._jieba().lcut(self._preprocess_text(text)))
+            if use_store:
+                self.token_store.put(news_id, key, list(tokens), self.tokenizer_version)
+        
+        self.segment_cache.put(key, tokens, len(text))
+        return tokens
+    
+    def get_segmentation_stats(self) -> Dict[str, Any]:
+        """
+        取得分詞快取與分詞儲存的命中統計
+        
+        Returns:
+            統計資料
+        """
+        stats = {'memory_cache': self.segment_cache.get_stats()}
+        if self.token_store is not None:
+            stats['token_store'] = self.token_store.get_stats()
+        return stats
+    
+    def segment_text(self, text: str, news_id: int = None) -> List[str]:
         """
         中文文本分詞
         
         Args:
             text: 待分詞的文本
+            news_id: 新聞ID (選填，用於讀寫新聞分詞儲存)
             
         Returns:
             分詞結果列表
@@ -99,11 +346,8 @@ class TextProcessor:
             return []
         
         try:
-            # 預處理
-            text = self._preprocess_text(text)
-            
-            # 使用jieba進行分詞
-            words = jieba.lcut(text)
+            # 預處理並使用jieba進行分詞
+            words = self._cut(text, news_id)
             
             # 過濾停用詞和標點
             words = [w for w in words if len(w.strip()) > 1 and not self._is_punctuation(w)]
@@ -114,6 +358,36 @@ class TextProcessor:
             self.logger.error(f"❌ 分詞錯誤: {e}")
             return []
     
+    def build_document(self, text: str, news_id: int = None) -> TextDocument:
+        """
+        建立文本的共用分詞表示，整篇文本只呼叫一次jieba
+        
+        Args:
+            text: 原始文本
+            news_id: 新聞ID (選填，用於讀寫新聞分詞儲存)
+            
+        Returns:
+            TextDocument 物件
+        """
+        if not text:
+            return TextDocument(text="", text_lower="")
+        
+        try:
+            tokens = list(self._cut(text, news_id))
+        except Exception as e:
+            self.logger.error(f"❌ 分詞錯誤: {e}")
+            tokens = []
+        
+        words = [w for w in tokens if len(w.strip()) > 1 and not self._is_punctuation(w)]
+        
+        return TextDocument(
+            text=text,
+            text_lower=text.lower(),
+            tokens=tokens,
+            words=words,
+            word_set={w.lower() for w in words}
+        )
+    
     def _preprocess_text(self, text: str) -> str:
         """
         文本預處理，清理文本中的雜訊
@@ -209,6 +483,9 @@ class TextProcessor:
         """
         從文本中提取關鍵詞
         
+        文本先經過與 build_document 相同的預處理 (移除HTML、全形轉半形) 與分詞，
+        結果與使用分詞表示的 extract_keywords_from_tokens 相同
+        
         Args:
             text: 待分析文本
             topK: 返回的關鍵詞數量
@@ -221,19 +498,53 @@ class TextProcessor:
         
         try:
             # 使用TF-IDF算法提取關鍵詞
-            keywords = jieba.analyse.extract_tags(
-                text, 
-                topK=topK, 
-                withWeight=True
-            )
+            return self.extract_keywords_from_tokens(list(self._cut(text)), topK=topK)
+            
+        except Exception as e:
+            self.logger.error(f"❌ 提取關鍵詞錯誤: {e}")
+            return []
+    
+    def extract_keywords_from_tokens(self, tokens: List[str], topK: int = 10) -> List[Tuple[str, float]]:
+        """
+        從已分詞的結果提取關鍵詞，計算方式與 jieba.analyse.extract_tags 相同但不重新分詞
+        
+        Args:
+            tokens: jieba 分詞結果
+            topK: 返回的關鍵詞數量
+            
+        Returns:
+            關鍵詞及其權重列表，格式為 [(關鍵詞, 權重)]
+        """
+        if not tokens:
+            return []
+        
+        try:
+            tfidf = self._jieba_analyse().default_tfidf
             
-            return keywords
+            freq = {}
+            for word in tokens:
+                if len(word.strip()) < 2 or word.lower() in tfidf.stop_words:
+                    continue
+                freq[word] = freq.get(word, 0.0) + 1.0
+            
+            total = sum(freq.values())
+            if not total:
+                return []
+            
+            weights = [
+                (word, count * tfidf.idf_freq.get(word, tfidf.median_idf) / total)
+                for word, count in freq.items()
+            ]
+            weights.sort(key=itemgetter(1), reverse=True)
+            
+            return weights[:topK]
             
         except Exception as e:
             self.logger.error(f"❌ 提取關鍵詞錯誤: {e}")
             return []
     
-    def find_keywords_in_text(self, text: str, keywords: List[str], use_synonym: bool = True) -> Dict[str, int]:
+    def find_keywords_in_text(self, text: str, keywords: List[str], use_synonym: bool = True,
+                              document: Optional[TextDocument] = None) -> Dict[str, int]:
         """
         在文本中查找關鍵字，支援同義詞查找
         
@@ -241,6 +552,7 @@ class TextProcessor:
             text: 待查找的文本
             keywords: 關鍵字列表
             use_synonym: 是否使用同義詞查找
+            document: 已建立的文本分詞表示，提供時不再重新分詞
             
         Returns:
             找到的關鍵字及其出現次數，格式為 {關鍵字: 出現次數}
@@ -249,18 +561,26 @@ class TextProcessor:
             return {}
         
         try:
-            text = text.lower()
+            if document is not None:
+                text = document.text_lower
+                text_words = document.word_set
+            else:
+                text = text.lower()
+                
+                # 分詞處理
+                segmented_text = self.segment_text(text)
+                text_words = set(segmented_text)
+            
             result = {}
             
-            # 分詞處理
-            segmented_text = self.segment_text(text)
-            text_words = set(segmented_text)
+            # 單次掃描取得所有關鍵字與同義詞的出現次數
+            counts = self._get_keyword_matcher(keywords, use_synonym).count(text)
             
             for keyword in keywords:
                 keyword_lower = keyword.lower()
                 
                 # 精確匹配
-                count = text.count(keyword_lower)
+                count = counts.get(keyword_lower, 0)
                 
                 # 分詞匹配
                 if keyword_lower in text_words:
@@ -270,7 +590,7 @@ class TextProcessor:
                 if use_synonym and keyword in self.synonyms:
                     for synonym in self.synonyms[keyword]:
                         synonym_lower = synonym.lower()
-                        synonym_count = text.count(synonym_lower)
+                        synonym_count = counts.get(synonym_lower, 0)
                         
                         if synonym_lower in text_words:
                             synonym_count = max(synonym_count, 1)
@@ -287,13 +607,15 @@ class TextProcessor:
             self.logger.error(f"❌ 查找關鍵字錯誤: {e}")
             return {}
     
-    def analyze_text_categories(self, text: str, category_keywords: Dict[str, List[str]]) -> Dict[str, float]:
+    def analyze_text_categories(self, text: str, category_keywords: Dict[str, List[str]],
+                                document: Optional[TextDocument] = None) -> Dict[str, float]:
         """
         分析文本所屬類別
         
         Args:
             text: 待分析文本
             category_keywords: 類別關鍵字，格式為 {類別: [關鍵字列表]}
+            document: 已建立的文本分詞表示，提供時各類別共用同一份分詞結果
             
         Returns:
             各類別的相關性分數，格式為 {類別: 分數}
@@ -302,23 +624,16 @@ class TextProcessor:
             return {}
         
         try:
-            result = {}
-            
-            for category, keywords in category_keywords.items():
-                matched = self.find_keywords_in_text(text, keywords, use_synonym=True)
-                
-                # 計算類別分數 (考慮關鍵字出現次數)
-                if matched:
-                    matched_count = sum(matched.values())
-                    unique_match_ratio = len(matched) / len(keywords) if keywords else 0
-                    
-                    # 權重 = 匹配數量 * 唯一匹配率
-                    score = matched_count * unique_match_ratio * 100
-                    result[category] = min(score, 1.0)
-                else:
-                    result[category] = 0.0
+            if document is not None:
+                text_lower = document.text_lower
+                text_words = document.word_set
+            else:
+                text_lower = text.lower()
+                text_words = set(self.segment_text(text_lower))
             
-            return result
+            # 所有類別共用一次掃描 (分數計算方式同逐類別呼叫 find_keywords_in_text)
+            scores, _ = self.get_category_classifier(category_keywords).classify(text_lower, text_words)
+            return scores
             
         except Exception as e:
             self.logger.error(f"❌ 分析文本類別錯誤: {e}")
@@ -0,0 +1,169 @@
+"""
+新聞分詞儲存
+News Token Store
+
+以新聞 ID 與文本雜湊為鍵值，將分詞結果保存於 SQLite 檔案
+(同一篇新聞的不同文本組合，例如標題加內容或加摘要，各自保存)。
+每篇新聞在內容與分詞器版本不變的情況下只需分詞一次，之後的分析、趨勢與關鍵詞請求直接讀取。
+分詞器版本為 jieba 詞典狀態鍵值，主詞典、保險詞彙或自定義詞典變更後舊的分詞結果即失效。
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 預設的分詞儲存路徑
+DEFAULT_TOKEN_STORE_PATH = "cache/news_tokens.db"
+
+
+class TokenStore:
+    """以新聞 ID 為鍵值的分詞結果儲存"""
+
+    def __init__(self, db_path: str = DEFAULT_TOKEN_STORE_PATH, tokenizer_version: Optional[str] = None,
+                 read_only: bool = False):
+        """
+        初始化分詞儲存
+
+        Args:
+            db_path: SQLite 檔案路徑
+            tokenizer_version: 分詞器版本，預設使用 jieba 詞典狀態鍵值 (第一次讀寫時計算)
+            read_only: 唯讀模式 (平行分析的工作程序使用，只讀取已保存的結果，不寫入)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._tokenizer_version = tokenizer_version
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得資料庫連線 (子程序中重新建立，不共用父程序的連線)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            if self.read_only:
+                self._conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                             check_same_thread=False, isolation_level=None)
+                self._conn_pid = os.getpid()
+                return self._conn
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS news_tokens (
+                    news_id INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    tokenizer_version TEXT NOT NULL,
+                    tokens TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (news_id, content_hash)
+                )
+            """)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @property
+    def tokenizer_version(self) -> str:
+        """預設的分詞器版本 (未指定時為 jieba 詞典狀態鍵值)"""
+        if self._tokenizer_version is None:
+            from analyzer.jieba_loader import get_state_key
+            self._tokenizer_version = get_state_key()
+        return self._tokenizer_version
+
+    def get(self, news_id: int, content_hash: str, tokenizer_version: Optional[str] = None) -> Optional[List[str]]:
+        """
+        取得新聞的分詞結果
+
+        Args:
+            news_id: 新聞ID
+            content_hash: 目前內容的雜湊值
+            tokenizer_version: 分詞器版本 (預設使用儲存的版本)
+
+        Returns:
+            分詞結果，不存在、內容已變更或分詞器版本不同時返回 None
+        """
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    'SELECT tokens FROM news_tokens WHERE news_id = ? AND content_hash = ? AND tokenizer_version = ?',
+                    (news_id, content_hash, tokenizer_version or self.tokenizer_version)
+                ).fetchone()
+        except Exception as e:
+            logger.debug(f"❌ 讀取分詞結果失敗: {news_id} - {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, news_id: int, content_hash: str, tokens: List[str],
+            tokenizer_version: Optional[str] = None) -> bool:
+        """
+        保存新聞的分詞結果
+
+        Args:
+            news_id: 新聞ID
+            content_hash: 內容雜湊值
+            tokens: 分詞結果
+            tokenizer_version: 分詞器版本 (預設使用儲存的版本)
+
+        Returns:
+            是否成功保存 (唯讀模式下返回 False)
+        """
+        if self.read_only:
+            return False
+        try:
+            with self._lock:
+                self._connection().execute(
+                    'INSERT OR REPLACE INTO news_tokens (news_id, content_hash, tokenizer_version, tokens, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (news_id, content_hash, tokenizer_version or self.tokenizer_version,
+                     json.dumps(tokens, ensure_ascii=False), time.time())
+                )
+            return True
+        except Exception as e:
+            logger.error(f"❌ 保存分詞結果失敗: {news_id} - {e}")
+            return False
+
+    def delete(self, news_id: int) -> bool:
+        """刪除新聞的分詞結果"""
+        with self._lock:
+            cursor = self._connection().execute('DELETE FROM news_tokens WHERE news_id = ?', (news_id,))
+        return cursor.rowcount > 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得儲存統計
+
+        Returns:
+            統計資料
+        """
+        with self._lock:
+            total = self._connection().execute('SELECT COUNT(*) FROM news_tokens').fetchone()[0]
+
+        requests = self.hits + self.misses
+        return {
+            'total_items': total,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / requests * 100 if requests > 0 else 0,
+            'tokenizer_version': self.tokenizer_version
+        }
+
+    def close(self):
+        """關閉資料庫連線"""
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
@@ -0,0 +1,370 @@
+"""
+線上主題聚類
+Online Topic Clustering
+
+以相似新聞索引 (analyzer.similarity_index) 中已保存的 TF-IDF 向量進行小批次球面 K-means：
+聚類中心保存於磁碟，新文章只需以小批次更新中心，不必重新分詞、重新訓練向量化器或從頭聚類。
+查詢某段期間的聚類結果時，只需將該期間的向量與中心相乘即可指派類別。
+不同的查詢區間與聚類數各自保存一組中心 (get_topic_clusterer 以區間與聚類數為鍵值)。
+"""
+
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from analyzer.cache import fast_hash
+
+logger = logging.getLogger(__name__)
+
+
+class OnlineTopicClusterer:
+    """以小批次 K-means 增量更新的主題聚類器"""
+
+    def __init__(self, state_dir: str = "cache/topic_clusters", n_clusters: int = 5,
+                 batch_size: int = 256, init_passes: int = 3, seed: int = 42):
+        """
+        初始化主題聚類器
+
+        Args:
+            state_dir: 聚類中心保存目錄
+            n_clusters: 聚類數量
+            batch_size: 每個小批次的文章數
+            init_passes: 重新初始化時對目前文章的訓練輪數
+            seed: 亂數種子
+        """
+        self.state_dir = Path(state_dir)
+        self.n_clusters = n_clusters
+        self.batch_size = max(1, batch_size)
+        self.init_passes = max(1, init_passes)
+        self.seed = seed
+        self._lock = threading.RLock()
+        self._reset(n_clusters)
+
+    def _reset(self, n_clusters: int):
+        """清空聚類狀態"""
+        self.requested_clusters = n_clusters           # 要求的聚類數 (文章數不足時實際聚類數較少)
+        self.n_clusters = n_clusters
+        self.centroids: Optional[np.ndarray] = None     # (聚類數, 詞彙數) 已正規化的中心
+        self.counts = np.zeros(n_clusters, dtype=np.float64)  # 各中心累計的文章數 (決定學習率)
+        self._fitted: set = set()                        # 已用於更新中心的新聞ID
+
+    # ------------------------------------------------------------------
+    # 訓練
+    # ------------------------------------------------------------------
+    def _ensure_width(self, width: int):
+        """詞彙表擴充後補齊中心的欄數"""
+        if self.centroids is not None and self.centroids.shape[1] < width:
+            extra = width - self.centroids.shape[1]
+            self.centroids = np.hstack([self.centroids, np.zeros((self.centroids.shape[0], extra))])
+
+    def _seed_centroids(self, vectors: sp.csr_matrix, n_clusters: int) -> np.ndarray:
+        """以 k-means++ 選擇初始中心 (以餘弦距離計算)"""
+        rng = np.random.RandomState(self.seed)
+        n_rows = vectors.shape[0]
+
+        chosen = [rng.randint(n_rows)]
+        closest = 1.0 - (vectors @ vectors[chosen[0]].T).toarray().ravel()
+        for _ in range(1, n_clusters):
+            weights = np.clip(closest, 0.0, None) ** 2
+            total = weights.sum()
+            row = rng.choice(n_rows, p=weights / total) if total > 0 else rng.randint(n_rows)
+            chosen.append(row)
+            closest = np.minimum(closest, 1.0 - (vectors @ vectors[row].T).toarray().ravel())
+
+        return vectors[chosen].toarray()
+
+    def _assign(self, vectors: sp.csr_matrix) -> np.ndarray:
+        """指派每篇文章至餘弦相似度最高的中心"""
+        return np.asarray(vectors @ self.centroids.T).argmax(axis=1)
+
+    def _update(self, vectors: sp.csr_matrix):
+        """以一個小批次更新中心 (各中心學習率為 1 / 累計文章數)"""
+        labels = self._assign(vectors)
+        membership = sp.csr_matrix(
+            (np.ones(len(labels)), (labels, np.arange(len(labels)))),
+            shape=(self.n_clusters, vectors.shape[0])
+        )
+        batch_counts = np.bincount(labels, minlength=self.n_clusters).astype(np.float64)
+        batch_sums = (membership @ vectors).toarray()
+
+        updated = batch_counts > 0
+        self.counts[updated] += batch_counts[updated]
+        rate = (1.0 / self.counts[updated])[:, None]
+        self.centroids[updated] += rate * (batch_sums[updated] - batch_counts[updated][:, None] * self.centroids[updated])
+
+        norms = np.linalg.norm(self.centroids[updated], axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.centroids[updated] /= norms
+
+    def partial_fit(self, index, news_ids: Iterable[int]) -> int:
+        """
+        以文章向量小批次更新中心
+
+        Args:
+            index: 相似新聞索引
+            news_ids: 新聞ID
+
+        Returns:
+            用於更新的文章數
+        """
+        with self._lock:
+            found, vectors = index.get_vectors(news_ids)
+            if not found:
+                return 0
+
+            if self.centroids is None:
+                self.centroids = self._seed_centroids(vectors, min(self.n_clusters, len(found)))
+                self.n_clusters = self.centroids.shape[0]
+                self.counts = np.zeros(self.n_clusters, dtype=np.float64)
+            self._ensure_width(vectors.shape[1])
+
+            for start in range(0, len(found), self.batch_size):
+                self._update(vectors[start:start + self.batch_size])
+            self._fitted.update(found)
+            return len(found)
+
+    def _initialize(self, index, news_ids: List[int], n_clusters: int):
+        """重新初始化並以目前的文章訓練數輪"""
+        self._reset(n_clusters)
+        found, vectors = index.get_vectors(news_ids)
+        if not found:
+            return
+
+        self.centroids = self._seed_centroids(vectors, min(n_clusters, len(found)))
+        self.n_clusters = self.centroids.shape[0]
+        self.counts = np.zeros(self.n_clusters, dtype=np.float64)
+
+        rng = np.random.RandomState(self.seed)
+        for _ in range(self.init_passes):
+            order = rng.permutation(len(found))
+            for start in range(0, len(found), self.batch_size):
+                self._update(vectors[order[start:start + self.batch_size]])
+        self._fitted.update(found)
+        logger.info(f"✅ 主題聚類已初始化: {self.n_clusters} 個聚類，{len(found)} 篇文章")
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+    def predict(self, index, news_ids: Iterable[int]) -> Tuple[List[int], np.ndarray]:
+        """
+        指派文章至目前的中心 (不更新中心)
+
+        Args:
+            index: 相似新聞索引
+            news_ids: 新聞ID
+
+        Returns:
+            (在索引中的新聞ID, 聚類編號)
+        """
+        with self._lock:
+            found, vectors = index.get_vectors(news_ids)
+            if not found or self.centroids is None:
+                return [], np.zeros(0, dtype=np.int64)
+            self._ensure_width(vectors.shape[1])
+            return found, self._assign(vectors)
+
+    def top_keywords(self, index, top_n: int = 10) -> List[List[str]]:
+        """取得各中心權重最高的詞語"""
+        with self._lock:
+            if self.centroids is None:
+                return []
+            feature_names = index.feature_names()
+            self._ensure_width(len(feature_names))
+            return [
+                [feature_names[col] for col in np.argsort(center)[-top_n:][::-1] if center[col] > 0]
+                for center in self.centroids
+            ]
+
+    def cluster(self, index, articles: List[Dict[str, Any]], n_clusters: int = 5) -> Dict[str, Any]:
+        """
+        對文章進行聚類：尚未訓練過的文章先增量更新中心，再以目前中心指派所有文章
+
+        Args:
+            index: 相似新聞索引 (文章需已加入索引)
+            articles: 文章數據列表，需包含 id
+            n_clusters: 聚類數量，與保存的中心不同時重新初始化
+
+        Returns:
+            聚類結果，格式同 InsuranceNewsAnalyzer.cluster_articles
+        """
+        with self._lock:
+            if self.centroids is None:
+                self.load(index)
+
+            position = {article['id']: idx for idx, article in enumerate(articles) if article.get('id') is not None}
+            news_ids = list(position)
+
+            # 先前文章數不足而使實際聚類數少於要求時，文章增加後重新初始化
+            too_few_centroids = (
+                self.centroids is not None and self.centroids.shape[0] < n_clusters
+                and sum(1 for news_id in news_ids if news_id in index) > self.centroids.shape[0]
+            )
+            if self.centroids is None or n_clusters != self.requested_clusters or too_few_centroids:
+                self._initialize(index, news_ids, n_clusters)
+                changed = True
+            else:
+                new_ids = [news_id for news_id in news_ids if news_id not in self._fitted]
+                changed = self.partial_fit(index, new_ids) > 0
+
+            found, labels = self.predict(index, news_ids)
+
+            clusters = defaultdict(list)
+            for news_id, label in zip(found, labels):
+                idx = position[news_id]
+                clusters[f"cluster_{label}"].append({
+                    'index': idx,
+                    'id': news_id,
+                    'title': articles[idx].get('title', ''),
+                    'published_date': articles[idx].get('published_date')
+                })
+
+            cluster_centers = [
+                {f"cluster_{i}": keywords}
+                for i, keywords in enumerate(self.top_keywords(index))
+            ]
+
+            if changed:
+                self.save(index)
+
+            return {
+                'clusters': dict(clusters),
+                'cluster_centers': cluster_centers,
+                'n_clusters': self.n_clusters,
+                'total_articles': len(articles),
+                'mode': 'online'
+            }
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _vocabulary_checksum(feature_names: List[str], width: int) -> str:
+        """中心各欄對應詞語的雜湊 (索引重建後欄位順序不同時即失效)"""
+        return fast_hash('\n'.join(feature_names[:width]).encode('utf-8'))
+
+    def save(self, index):
+        """
+        將聚類中心保存至磁碟
+
+        Args:
+            index: 相似新聞索引 (用於記錄詞彙表版本)
+        """
+        with self._lock:
+            if self.centroids is None:
+                return
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            np.save(self.state_dir / 'centroids.npy', self.centroids)
+            np.save(self.state_dir / 'counts.npy', self.counts)
+            np.save(self.state_dir / 'fitted.npy', np.array(sorted(self._fitted), dtype=np.int64))
+
+            width = self.centroids.shape[1]
+            with open(self.state_dir / 'meta.json', 'w', encoding='utf-8') as f:
+                json.dump({
+                    'requested_clusters': self.requested_clusters,
+                    'n_clusters': self.n_clusters,
+                    'width': width,
+                    'vocabulary_checksum': self._vocabulary_checksum(index.feature_names(), width)
+                }, f)
+
+    def load(self, index) -> bool:
+        """
+        從磁碟載入聚類中心
+
+        Args:
+            index: 相似新聞索引 (詞彙表與保存時不一致時忽略已保存的中心)
+
+        Returns:
+            是否成功載入
+        """
+        meta_path = self.state_dir / 'meta.json'
+        if not meta_path.exists():
+            return False
+
+        with self._lock:
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+
+                if meta['vocabulary_checksum'] != self._vocabulary_checksum(index.feature_names(), meta['width']):
+                    logger.warning("相似新聞索引詞彙表已變更，忽略已保存的聚類中心")
+                    return False
+
+                self._reset(meta.get('requested_clusters', meta['n_clusters']))
+                self.n_clusters = meta['n_clusters']
+                self.centroids = np.load(self.state_dir / 'centroids.npy')
+                self.counts = np.load(self.state_dir / 'counts.npy')
+                self._fitted = set(np.load(self.state_dir / 'fitted.npy').tolist())
+                logger.info(f"✅ 主題聚類中心已載入: {self.n_clusters} 個聚類")
+                return True
+
+            except Exception as e:
+                logger.error(f"❌ 載入主題聚類中心失敗: {e}")
+                self._reset(self.requested_clusters)
+                return False
+
+
+def cluster_recent_news(cutoff_date, n_clusters: int = 5) -> Dict[str, Any]:
+    """
+    對指定時間後的有效新聞進行線上聚類 (需在 Flask 應用上下文中呼叫)
+
+    只讀取 ID、標題與日期，尚未加入相似新聞索引的文章才讀取內容。
+
+    Args:
+        cutoff_date: 起始發布日期 (依距今天數選擇各自保存的聚類中心)
+        n_clusters: 聚類數量
+
+    Returns:
+        聚類結果
+    """
+    from database.models import db, News
+    from analyzer.similarity_index import get_similarity_index
+
+    rows = db.session.query(News.id, News.title, News.published_date).filter(
+        News.published_date >= cutoff_date,
+        News.status == 'active'
+    ).all()
+    articles = [{'id': news_id, 'title': title, 'published_date': published_date}
+                for news_id, title, published_date in rows]
+
+    index = get_similarity_index()
+    missing_ids = [article['id'] for article in articles if article['id'] not in index]
+    if missing_ids:
+        contents = db.session.query(News.id, News.title, News.content).filter(News.id.in_(missing_ids))
+        index.add_documents((news_id, f"{title} {content}") for news_id, title, content in contents)
+        index.save()
+
+    days = max(1, round((datetime.now() - cutoff_date).total_seconds() / 86400))
+    return get_topic_clusterer(f"{days}d", n_clusters).cluster(index, articles, n_clusters)
+
+
+# 全局聚類器實例 {(區間, 聚類數): 聚類器}
+_clusterer_instances: Dict[Tuple[str, int], OnlineTopicClusterer] = {}
+_clusterer_lock = threading.Lock()
+
+
+def get_topic_clusterer(window: str = 'default', n_clusters: int = 5) -> OnlineTopicClusterer:
+    """
+    取得指定區間與聚類數的全域主題聚類器實例 (各自保存聚類中心)
+
+    Args:
+        window: 區間名稱，例如 '30d'
+        n_clusters: 聚類數量
+
+    Returns:
+        OnlineTopicClusterer 實例
+    """
+    key = (window, n_clusters)
+    with _clusterer_lock:
+        clusterer = _clusterer_instances.get(key)
+        if clusterer is None:
+            clusterer = _clusterer_instances[key] = OnlineTopicClusterer(
+                state_dir=f"cache/topic_clusters/{window}-k{n_clusters}", n_clusters=n_clusters
+            )
+        return clusterer
@@ -0,0 +1,401 @@
+"""
+增量趨勢儲存
+Incremental Trend Store
+
+以 (日期, 維度, 鍵值) 為單位保存每日統計桶：關鍵詞、類別、來源與情感的文章數，
+以及情感分數的總和與平方和。新聞寫入時即累加對應的桶，
+7/30/90 天等滾動區間的趨勢只需加總區間內的桶，查詢成本取決於天數而非文章數。
+每篇新聞的貢獻另行記錄，重新分析時會先扣除舊的貢獻，不會重複計算。
+完整重建時先寫入暫存儲存，完成後在單一交易中取代，重建期間查詢仍讀取原有的統計桶。
+"""
+
+import os
+import json
+import logging
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 維度名稱
+KEYWORD = 'keyword'
+CATEGORY = 'category'
+SOURCE = 'source'
+SENTIMENT = 'sentiment'
+ARTICLE = 'article'    # 每日文章總數與情感分數 (鍵值為空字串)
+
+TREND_WINDOWS = (7, 30, 90)
+
+
+class TrendStore:
+    """以每日統計桶保存的增量趨勢儲存"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS trend_buckets (
+            day TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            score_sq_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, dimension, key)
+        );
+
+        CREATE TABLE IF NOT EXISTS trend_articles (
+            news_id INTEGER PRIMARY KEY,
+            day TEXT NOT NULL,
+            contribution TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_trend_articles_day ON trend_articles (day);
+
+        CREATE TABLE IF NOT EXISTS trend_meta (
+            name TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str = "cache/trend_buckets.db", retention_days: int = max(TREND_WINDOWS)):
+        """
+        初始化趨勢儲存
+
+        Args:
+            db_path: SQLite 檔案路徑 (':memory:' 表示僅保存在記憶體)
+            retention_days: 統計桶保留天數
+        """
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得資料庫連線 (子程序中重新建立，不共用父程序的連線)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(self._SCHEMA)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # 更新
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _contribution(record: Dict[str, Any]) -> List[Tuple[str, str, int, float, float]]:
+        """計算單篇新聞對統計桶的貢獻 (維度, 鍵值, 數量, 分數和, 分數平方和)"""
+        score = float(record.get('sentiment_score') or 0.0)
+        rows = [
+            (ARTICLE, '', 1, score, score * score),
+            (SENTIMENT, record.get('sentiment') or 'neutral', 1, score, score * score),
+            (CATEGORY, record.get('category') or 'unknown', 1, 0.0, 0.0),
+        ]
+        if record.get('source'):
+            rows.append((SOURCE, record['source'], 1, 0.0, 0.0))
+        for keyword, count in Counter(record.get('keywords') or []).items():
+            rows.append((KEYWORD, keyword, count, 0.0, 0.0))
+        return rows
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, day: str, rows: Iterable[Tuple[str, str, int, float, float]], sign: int):
+        """將貢獻加入 (sign=1) 或扣除 (sign=-1) 統計桶"""
+        conn.executemany(
+            """
+            INSERT INTO trend_buckets (day, dimension, key, count, score_sum, score_sq_sum)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (day, dimension, key) DO UPDATE SET
+                count = count + excluded.count,
+                score_sum = score_sum + excluded.score_sum,
+                score_sq_sum = score_sq_sum + excluded.score_sq_sum
+            """,
+            [(day, dimension, key, sign * count, sign * score_sum, sign * score_sq_sum)
+             for dimension, key, count, score_sum, score_sq_sum in rows]
+        )
+
+    def _remove_article(self, conn: sqlite3.Connection, news_id: int) -> Optional[str]:
+        """扣除已記錄新聞的貢獻，返回其日期 (未記錄時返回 None)"""
+        row = conn.execute('SELECT day, contribution FROM trend_articles WHERE news_id = ?', (news_id,)).fetchone()
+        if row is None:
+            return None
+        self._apply(conn, row[0], json.loads(row[1]), -1)
+        conn.execute('DELETE FROM trend_articles WHERE news_id = ?', (news_id,))
+        return row[0]
+
+    @staticmethod
+    def _drop_empty_buckets(conn: sqlite3.Connection, days: Iterable[str]):
+        """刪除扣除貢獻後已歸零的統計桶"""
+        conn.executemany('DELETE FROM trend_buckets WHERE day = ? AND count <= 0', [(day,) for day in days])
+
+    def ingest(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        將新聞分析結果累加至統計桶
+
+        Args:
+            records: 每筆包含 published_date, keywords (詞語列表), sentiment, sentiment_score,
+                     category, source，以及可選的 news_id (提供時重複寫入會取代舊的貢獻)
+
+        Returns:
+            寫入的新聞數量
+        """
+        count = 0
+        touched_days = set()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute('BEGIN')
+                try:
+                    for record in records:
+                        published_date = record.get('published_date')
+                        if not published_date:
+                            continue
+
+                        day = published_date.strftime('%Y-%m-%d')
+                        rows = self._contribution(record)
+                        news_id = record.get('news_id')
+                        if news_id is not None:
+                            removed_day = self._remove_article(conn, news_id)
+                            if removed_day is not None:
+                                touched_days.add(removed_day)
+                            conn.execute(
+                                'INSERT INTO trend_articles (news_id, day, contribution) VALUES (?, ?, ?)',
+                                (news_id, day, json.dumps(rows, ensure_ascii=False))
+                            )
+                        self._apply(conn, day, rows, 1)
+                        count += 1
+                    self._drop_empty_buckets(conn, touched_days)
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+            return count
+        except Exception as e:
+            logger.error(f"❌ 更新趨勢統計失敗: {e}")
+            return 0
+
+    def remove(self, news_ids: Iterable[int]) -> int:
+        """
+        扣除指定新聞的貢獻
+
+        Args:
+            news_ids: 新聞ID
+
+        Returns:
+            被移除的新聞數量
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN')
+            try:
+                removed = 0
+                touched_days = set()
+                for news_id in news_ids:
+                    removed_day = self._remove_article(conn, news_id)
+                    if removed_day is not None:
+                        touched_days.add(removed_day)
+                        removed += 1
+                self._drop_empty_buckets(conn, touched_days)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return removed
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """
+        刪除超過保留天數的統計桶
+
+        Args:
+            now: 目前時間，預設為現在
+
+        Returns:
+            刪除的統計桶數量
+        """
+        cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM trend_articles WHERE day < ?', (cutoff,))
+            cursor = conn.execute('DELETE FROM trend_buckets WHERE day < ?', (cutoff,))
+        return cursor.rowcount
+
+    def clear(self):
+        """清空所有統計桶與新聞貢獻記錄 (中繼資料保留)"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM trend_buckets')
+            conn.execute('DELETE FROM trend_articles')
+
+    def replace_with(self, other: 'TrendStore', meta: Optional[Dict[str, str]] = None):
+        """
+        以另一個儲存 (例如重建完成的暫存儲存) 的內容取代所有統計桶與新聞貢獻記錄
+
+        在單一交易中完成，其他連線在提交前仍讀取原有內容
+
+        Args:
+            other: 來源儲存
+            meta: 一併寫入的中繼資料
+        """
+        with other._lock:
+            source = other._connection()
+            buckets = source.execute(
+                'SELECT day, dimension, key, count, score_sum, score_sq_sum FROM trend_buckets'
+            ).fetchall()
+            articles = source.execute('SELECT news_id, day, contribution FROM trend_articles').fetchall()
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN')
+            try:
+                conn.execute('DELETE FROM trend_buckets')
+                conn.execute('DELETE FROM trend_articles')
+                conn.executemany(
+                    'INSERT INTO trend_buckets (day, dimension, key, count, score_sum, score_sq_sum) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', buckets
+                )
+                conn.executemany('INSERT INTO trend_articles (news_id, day, contribution) VALUES (?, ?, ?)', articles)
+                conn.executemany('INSERT OR REPLACE INTO trend_meta (name, value) VALUES (?, ?)',
+                                 list((meta or {}).items()))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def get_meta(self, name: str) -> Optional[str]:
+        """取得中繼資料"""
+        with self._lock:
+            row = self._connection().execute('SELECT value FROM trend_meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str):
+        """設定中繼資料"""
+        with self._lock:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO trend_meta (name, value) VALUES (?, ?)', (name, value)
+            )
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+    def get_window(self, days: int = 30, now: Optional[datetime] = None,
+                   top_keywords: int = 20, daily_keywords: int = 10) -> Dict[str, Any]:
+        """
+        加總最近 days 天 (以日期為單位) 的統計桶
+
+        Args:
+            days: 區間天數
+            now: 區間結束時間，預設為現在
+            top_keywords: 熱門關鍵詞數量
+            daily_keywords: 每日關鍵詞數量
+
+        Returns:
+            趨勢分析結果，格式同 InsuranceNewsAnalyzer.analyze_trends，
+            另含 source_distribution 與 sentiment_distribution
+        """
+        now = now or datetime.now()
+        start_date = now - timedelta(days=days)
+        start_day = start_date.strftime('%Y-%m-%d')
+
+        with self._lock:
+            conn = self._connection()
+            totals = conn.execute(
+                """
+                SELECT dimension, key, SUM(count) AS total FROM trend_buckets
+                WHERE day >= ? GROUP BY dimension, key
+                ORDER BY total DESC, key
+                """,
+                (start_day,)
+            ).fetchall()
+            daily_articles = conn.execute(
+                'SELECT day, count, score_sum, score_sq_sum FROM trend_buckets '
+                'WHERE day >= ? AND dimension = ? ORDER BY day',
+                (start_day, ARTICLE)
+            ).fetchall()
+            daily_keyword_rows = conn.execute(
+                'SELECT day, key, count FROM trend_buckets '
+                'WHERE day >= ? AND dimension = ? ORDER BY day, count DESC, key',
+                (start_day, KEYWORD)
+            ).fetchall()
+
+        distributions = defaultdict(dict)
+        for dimension, key, total in totals:
+            distributions[dimension][key] = total
+
+        hot_topics = list(distributions[KEYWORD].items())[:top_keywords]
+
+        sentiment_trend = {}
+        total_articles = 0
+        for day, count, score_sum, score_sq_sum in daily_articles:
+            mean = score_sum / count
+            sentiment_trend[day] = {
+                'average_sentiment': mean,
+                'sentiment_variance': max(score_sq_sum / count - mean * mean, 0.0),
+                'article_count': count
+            }
+            total_articles += count
+
+        keyword_trends = defaultdict(dict)
+        for day, keyword, count in daily_keyword_rows:
+            if len(keyword_trends[day]) < daily_keywords:
+                keyword_trends[day][keyword] = count
+
+        return {
+            'analysis_period': {
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': now.strftime('%Y-%m-%d'),
+                'total_articles': total_articles
+            },
+            'hot_topics': hot_topics,
+            'keyword_trends': dict(keyword_trends),
+            'sentiment_trend': sentiment_trend,
+            'category_distribution': distributions[CATEGORY],
+            'source_distribution': distributions[SOURCE],
+            'sentiment_distribution': distributions[SENTIMENT]
+        }
+
+    def get_windows(self, windows: Iterable[int] = TREND_WINDOWS) -> Dict[int, Dict[str, Any]]:
+        """取得多個滾動區間的趨勢"""
+        return {days: self.get_window(days) for days in windows}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得儲存統計
+
+        Returns:
+            統計資料
+        """
+        with self._lock:
+            conn = self._connection()
+            buckets, days = conn.execute('SELECT COUNT(*), COUNT(DISTINCT day) FROM trend_buckets').fetchone()
+            articles = conn.execute('SELECT COUNT(*) FROM trend_articles').fetchone()[0]
+
+        return {
+            'total_buckets': buckets,
+            'total_days': days,
+            'tracked_articles': articles,
+            'retention_days': self.retention_days
+        }
+
+    def close(self):
+        """關閉資料庫連線"""
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+# 全局趨勢儲存實例
+_trend_store_instance = None
+_trend_store_lock = threading.Lock()
+
+
+def get_trend_store() -> TrendStore:
+    """取得全域趨勢儲存實例"""
+    global _trend_store_instance
+    with _trend_store_lock:
+        if _trend_store_instance is None:
+            _trend_store_instance = TrendStore()
+        return _trend_store_instance
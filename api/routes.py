@@ -10,6 +10,8 @@ from datetime import datetime, timezone, timedelta
 from database.models import News, NewsSource, NewsCategory, CrawlLog, SystemConfig, db
 from sqlalchemy import desc, func
 from analyzer.engine import get_analyzer, analyze_news_article
+from analyzer.materialization import get_materialized_analyses, get_trend_window
+from analyzer.topic_clusters import cluster_recent_news
 from crawler.manager import get_crawler_manager
 import logging
 
@@ -596,14 +598,10 @@ def get_trends():
         days = request.args.get('days', 30, type=int)
         days = min(max(days, 1), 90)  # 限制在1-90天之間
         
-        # 獲取指定時間範圍內的文章
-        cutoff_date = datetime.now() - timedelta(days=days)
-        articles = News.query.filter(
-            News.published_date >= cutoff_date,
-            News.status == 'active'
-        ).all()
+        # 加總增量趨勢儲存中區間內的每日統計桶
+        trend_result = get_trend_window(days)
         
-        if not articles:
+        if not trend_result['analysis_period']['total_articles']:
             return jsonify({
                 'status': 'success',
                 'data': {
@@ -614,20 +612,6 @@ def get_trends():
                 }
             })
         
-        # 準備文章數據
-        articles_data = []
-        for article in articles:
-            articles_data.append({
-                'title': article.title,
-                'content': article.content,
-                'published_date': article.published_date,
-                'source': article.source.name if article.source else None
-            })
-        
-        # 執行趨勢分析
-        analyzer = get_analyzer()
-        trend_result = analyzer.analyze_trends(articles_data, days)
-        
         return jsonify({
             'status': 'success',
             'data': trend_result
@@ -648,14 +632,11 @@ def get_keywords():
         days = request.args.get('days', 7, type=int)
         limit = request.args.get('limit', 20, type=int)
         
-        # 獲取最近文章
+        # 讀取預先計算的逐篇分析結果
         cutoff_date = datetime.now() - timedelta(days=days)
-        articles = News.query.filter(
-            News.published_date >= cutoff_date,
-            News.status == 'active'
-        ).all()
+        analyses = get_materialized_analyses(cutoff_date)
         
-        if not articles:
+        if not analyses:
             return jsonify({
                 'status': 'success',
                 'data': {
@@ -664,20 +645,12 @@ def get_keywords():
                 }
             })
         
-        # 提取所有關鍵詞
-        analyzer = get_analyzer()
-        all_keywords = []
-        
-        for article in articles:
-            text = f"{article.title} {article.content}"
-            keywords = analyzer.extract_keywords(text, top_k=10)
-            all_keywords.extend(keywords)
-        
         # 統計關鍵詞頻率
         from collections import Counter
         keyword_freq = Counter()
-        for keyword, weight in all_keywords:
-            keyword_freq[keyword] += weight
+        for analysis in analyses:
+            for keyword, weight in analysis['keywords']:
+                keyword_freq[keyword] += weight
         
         # 獲取最熱門的關鍵詞
         top_keywords = [
@@ -689,7 +662,7 @@ def get_keywords():
             'status': 'success',
             'data': {
                 'keywords': top_keywords,
-                'total_articles': len(articles),
+                'total_articles': len(analyses),
                 'analysis_period': f'{days} 天'
             }
         })
@@ -708,14 +681,11 @@ def get_sentiment_analysis():
         # 獲取參數
         days = request.args.get('days', 7, type=int)
         
-        # 獲取最近文章
+        # 讀取預先計算的逐篇分析結果
         cutoff_date = datetime.now() - timedelta(days=days)
-        articles = News.query.filter(
-            News.published_date >= cutoff_date,
-            News.status == 'active'
-        ).all()
+        analyses = get_materialized_analyses(cutoff_date)
         
-        if not articles:
+        if not analyses:
             return jsonify({
                 'status': 'success',
                 'data': {
@@ -725,41 +695,19 @@ def get_sentiment_analysis():
                 }
             })
         
-        # 執行情感分析
-        analyzer = get_analyzer()
-        sentiment_stats = {'positive': 0, 'negative': 0, 'neutral': 0}
-        daily_sentiment = {}
-        
-        for article in articles:
-            text = f"{article.title} {article.content}"
-            sentiment = analyzer.analyze_sentiment(text)
-            
-            # 統計整體情感分布
-            sentiment_stats[sentiment['sentiment']] += 1
-            
-            # 按日期統計情感
-            date_str = article.published_date.strftime('%Y-%m-%d')
-            if date_str not in daily_sentiment:
-                daily_sentiment[date_str] = {
-                    'positive': 0, 'negative': 0, 'neutral': 0,
-                    'average_score': 0, 'scores': []
-                }
-            
-            daily_sentiment[date_str][sentiment['sentiment']] += 1
-            daily_sentiment[date_str]['scores'].append(sentiment['score'])
-        
-        # 計算每日平均情感分數
-        for date_data in daily_sentiment.values():
-            if date_data['scores']:
-                date_data['average_score'] = sum(date_data['scores']) / len(date_data['scores'])
-            del date_data['scores']  # 不需要返回原始分數
+        # 以陣列運算彙總情感分布與每日平均分數
+        sentiment_stats, daily_sentiment = get_analyzer().aggregate_sentiment(
+            [analysis['published_date'].strftime('%Y-%m-%d') for analysis in analyses],
+            [analysis['sentiment'] for analysis in analyses],
+            [analysis['sentiment_score'] for analysis in analyses]
+        )
         
         return jsonify({
             'status': 'success',
             'data': {
                 'sentiment_distribution': sentiment_stats,
                 'daily_sentiment': daily_sentiment,
-                'total_articles': len(articles),
+                'total_articles': len(analyses),
                 'analysis_period': f'{days} 天'
             }
         })
@@ -779,38 +727,20 @@ def get_clustering():
         days = request.args.get('days', 30, type=int)
         clusters = request.args.get('clusters', 5, type=int)
         
-        # 獲取最近文章
+        # 以保存的向量與聚類中心進行線上聚類
         cutoff_date = datetime.now() - timedelta(days=days)
-        articles = News.query.filter(
-            News.published_date >= cutoff_date,
-            News.status == 'active'
-        ).all()
+        clustering_result = cluster_recent_news(cutoff_date, clusters)
         
-        if len(articles) < 2:
+        if clustering_result.get('total_articles', 0) < 2:
             return jsonify({
                 'status': 'success',
                 'data': {
                     'message': '文章數量不足，無法進行聚類分析',
                     'clusters': {},
-                    'total_articles': len(articles)
+                    'total_articles': clustering_result.get('total_articles', 0)
                 }
             })
         
-        # 準備文章數據
-        articles_data = []
-        for article in articles:
-            articles_data.append({
-                'id': article.id,
-                'title': article.title,
-                'content': article.content,
-                'published_date': article.published_date,
-                'source': article.source.name if article.source else None
-            })
-        
-        # 執行聚類分析
-        analyzer = get_analyzer()
-        clustering_result = analyzer.cluster_articles(articles_data, clusters)
-        
         return jsonify({
             'status': 'success',
             'data': clustering_result
@@ -885,48 +815,59 @@ def submit_feedback():
 def get_similar_articles(article_id):
     """獲取相似文章"""
     try:
+        from analyzer.similarity_index import get_similarity_index
+        
         # 查找目標文章
         target_article = News.query.get_or_404(article_id)
-        target_text = f"{target_article.title} {target_article.content}"
         
-        # 獲取其他文章
-        other_articles = News.query.filter(
-            News.id != article_id,
-            News.status == 'active'
-        ).limit(100).all()  # 限制比較範圍以提高性能
-        
-        if not other_articles:
+        # 從持久化 TF-IDF 索引查詢 (目標文章尚未索引時以其文本查詢，索引由爬蟲與同步指令更新)
+        index = get_similarity_index()
+        if article_id in index:
+            similar_ids = index.similar_to_id(article_id, top_k=10)
+        else:
+            similar_ids = [
+                (news_id, score)
+                for news_id, score in index.similar_to_text(
+                    f"{target_article.title} {target_article.content}", top_k=11)
+                if news_id != article_id
+            ][:10]
+        
+        if not similar_ids:
             return jsonify({
                 'status': 'success',
                 'data': {
+                    'target_article': {
+                        'id': target_article.id,
+                        'title': target_article.title
+                    },
                     'similar_articles': [],
-                    'message': '沒有找到其他文章進行比較'
+                    'message': '沒有找到相似文章'
                 }
             })
         
-        # 準備文章文本列表
-        article_texts = []
-        article_info = []
-        for article in other_articles:
-            article_texts.append(f"{article.title} {article.content}")
-            article_info.append({
+        # 取得相似文章資訊
+        articles_by_id = {
+            article.id: article
+            for article in News.query.filter(
+                News.id.in_([news_id for news_id, _ in similar_ids]),
+                News.status == 'active'
+            ).all()
+        }
+        
+        # 組織結果
+        similar_articles = []
+        for news_id, similarity in similar_ids:
+            article = articles_by_id.get(news_id)
+            if not article:
+                continue
+            similar_articles.append({
                 'id': article.id,
                 'title': article.title,
                 'published_date': article.published_date.isoformat(),
-                'source': article.source.name if article.source else None
+                'source': article.source.name if article.source else None,
+                'similarity': float(similarity)
             })
         
-        # 找出相似文章
-        analyzer = get_analyzer()
-        similar_indices = analyzer.find_similar_articles(target_text, article_texts, top_k=10)
-        
-        # 組織結果
-        similar_articles = []
-        for idx, similarity in similar_indices:
-            article_data = article_info[idx].copy()
-            article_data['similarity'] = float(similarity)
-            similar_articles.append(article_data)
-        
         return jsonify({
             'status': 'success',
             'data': {
@@ -71,6 +71,9 @@ def create_app(config_object=None):
     # 啟動自動爬蟲服務
     setup_auto_crawl(app)
     
+    # 背景補算新聞分析結果
+    setup_background_analysis(app)
+    
     # 啟動系統健康監控
     setup_health_monitoring(app)
     
@@ -123,6 +126,18 @@ def setup_auto_crawl(app):
     
     app.logger.info("🚀 自動爬蟲服務已啟動")
 
+def setup_background_analysis(app):
+    """啟動時在背景補算尚未分析或分析器版本已變更的新聞，並視需要重建趨勢統計 (請求中不再即時處理)"""
+    if app.config.get('TESTING'):
+        return
+    
+    from datetime import datetime, timedelta
+    from analyzer.materialization import materialize_in_background
+    
+    days = app.config.get('ANALYSIS_BACKFILL_DAYS', 90)
+    if materialize_in_background(app, since=datetime.now() - timedelta(days=days)):
+        app.logger.info(f"🧠 背景補算最近 {days} 天的新聞分析結果")
+
 def setup_health_monitoring(app):
     """設置系統健康監控"""
     app.logger.info("🔍 正在初始化系統健康監控...")
@@ -299,3 +314,40 @@ def register_cli_commands(app):
     def test_crawler():
         """測試爬蟲功能"""
         click.echo("🕷️ 爬蟲測試功能待實現")
+    
+    @app.cli.command('materialize-analyses')
+    @click.option('--days', default=90, show_default=True, help='只處理最近幾天發布的新聞 (0 表示全部)')
+    @click.option('--force', is_flag=True, help='忽略分析器版本，全部重新計算')
+    def materialize_analyses(days, force):
+        """計算並保存尚未分析或版本過期的新聞分析結果"""
+        from datetime import datetime, timedelta
+        from analyzer.materialization import materialize_news
+        since = datetime.now() - timedelta(days=days) if days > 0 else None
+        saved = materialize_news(since=since, force=force)
+        click.echo(f"✅ 已保存 {saved} 則新聞分析結果")
+    
+    @app.cli.command('rescore-importance')
+    @click.option('--batch-size', default=1000, show_default=True, help='每批評分的新聞數量')
+    def rescore_importance(batch_size):
+        """以目前的 importance_keywords.json 重算已保存分析的重要性評分"""
+        from analyzer.materialization import rescore_importance as rescore
+        updated = rescore(batch_size=batch_size)
+        click.echo(f"✅ 已重算 {updated} 則新聞的重要性評分")
+    
+    @app.cli.command('rebuild-trends')
+    def rebuild_trends():
+        """補算趨勢保留期間內的新聞分析結果並重建趨勢統計"""
+        from datetime import datetime, timedelta
+        from analyzer.materialization import materialize_news, backfill_trend_store
+        from analyzer.trend_store import get_trend_store
+        materialize_news(since=datetime.now() - timedelta(days=get_trend_store().retention_days))
+        ingested = backfill_trend_store()
+        click.echo(f"✅ 已重建趨勢統計: {ingested} 則新聞")
+    
+    @app.cli.command('sync-similarity-index')
+    def sync_similarity_index():
+        """將資料庫中的有效新聞同步至相似新聞索引"""
+        from analyzer.similarity_index import get_similarity_index
+        index = get_similarity_index()
+        added = index.sync_from_database()
+        click.echo(f"✅ 相似新聞索引同步完成: 新增 {added} 篇，共 {index.size} 篇文章")
@@ -6,7 +6,6 @@ Scraper Service Module
 """
 
 import asyncio
-import aiohttp
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
@@ -16,6 +15,8 @@ import time
 import random
 from urllib.parse import urljoin, urlparse
 
+from crawler.async_engine import AsyncCrawlerEngine
+
 logger = logging.getLogger(__name__)
 
 class ScraperService:
@@ -30,7 +31,7 @@ class ScraperService:
         """
         self.config_path = config_path
         self.sources = self._load_sources()
-        self.session = None
+        self.engine = None
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
@@ -79,16 +80,16 @@ class ScraperService:
         ]
     
     async def create_session(self):
-        """創建 HTTP 會話"""
-        if not self.session:
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+        """創建 HTTP 會話 (共用非同步爬蟲引擎，依主機限制請求間隔與同時請求數)"""
+        if not self.engine:
+            self.engine = AsyncCrawlerEngine(timeout=30)
+            await self.engine.start()
     
     async def close_session(self):
         """關閉 HTTP 會話"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        if self.engine:
+            await self.engine.close()
+            self.engine = None
     
     def get_random_user_agent(self) -> str:
         """獲取隨機 User-Agent"""
@@ -107,13 +108,12 @@ class ScraperService:
         try:
             headers = {"User-Agent": self.get_random_user_agent()}
             
-            async with self.session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    return content
-                else:
-                    logger.warning(f"Failed to fetch {url}: {response.status}")
-                    return None
+            response = await self.engine.fetch_page(url, headers=headers)
+            if response and response.status_code == 200:
+                return response.text
+            else:
+                logger.warning(f"Failed to fetch {url}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error fetching {url}: {str(e)}")
@@ -181,9 +181,11 @@ class ScraperService:
         """
         logger.info(f"Scraping source: {source['name']}")
         
-        html = await self.fetch_page(source['url'])
-        if not html:
+        # 本服務不保存文章，每次都需返回完整列表，因此不使用條件式請求
+        response = await self.engine.fetch_page(source['url'])
+        if not response:
             return []
+        html = response.text
         
         articles = self.parse_articles(html, source)
         logger.info(f"Found {len(articles)} articles from {source['name']}")
@@ -202,13 +204,17 @@ class ScraperService:
         all_articles = []
         
         try:
-            for source in self.sources:
-                articles = await self.scrape_source(source)
+            # 各來源同時爬取，同一主機的請求間隔由爬蟲引擎控制
+            results = await asyncio.gather(
+                *(self.scrape_source(source) for source in self.sources),
+                return_exceptions=True
+            )
+            for source, articles in zip(self.sources, results):
+                if isinstance(articles, Exception):
+                    logger.error(f"Error scraping {source.get('name')}: {str(articles)}")
+                    continue
                 all_articles.extend(articles)
                 
-                # 添加延遲避免被封鎖
-                await asyncio.sleep(random.uniform(1, 3))
-                
         finally:
             await self.close_session()
         
@@ -405,12 +405,17 @@ class WorkflowService:
         time.sleep(2)  # 模擬執行時間
         return {"status": "success", "articles_count": 10}
     
-    def _analyze_news_task(self, **kwargs):
-        """分析新聞任務"""
+    def _analyze_news_task(self, articles: List[Dict[str, Any]] = None, parallel: bool = False, **kwargs):
+        """分析新聞任務 (任務參數 parallel=True 時使用多程序平行分析)"""
         logger.info("Executing news analysis task")
-        # 這裡應該調用實際的分析服務
-        time.sleep(1)
-        return {"status": "success", "analyzed_count": 10}
+        
+        if not articles:
+            return {"status": "success", "analyzed_count": 0}
+        
+        from analyzer.engine import analyze_news_batch
+        results = analyze_news_batch(articles, parallel=parallel)
+        
+        return {"status": "success", "analyzed_count": len(results)}
     
     def _send_notification_task(self, message: str = "", **kwargs):
         """發送通知任務"""
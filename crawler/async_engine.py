@@ -0,0 +1,404 @@
+"""
+非同步爬蟲引擎
+Asynchronous Crawler Engine
+
+以 asyncio/aiohttp 同時等待多個請求的網路回應，取代 CrawlerEngine 逐頁阻塞抓取：
+- 每個主機的請求頻率由共用的爬蟲排程器 (crawler.scheduler) 控制，不同主機之間互不等待
+- 限制每個主機與整體同時進行的請求數
+- 頁面解析沿用 CrawlerEngine / NewsSourceCrawler 的實作，爬取結果格式相同
+
+使用方式:
+    results = run_crawl(NEWS_SOURCES_CONFIG.values(), max_details_per_source=50)
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Iterable, Callable
+
+import aiohttp
+
+try:
+    from fake_useragent import UserAgent
+except ImportError:
+    UserAgent = None
+
+from crawler.engine import CrawlerEngine, NewsSourceCrawler
+from crawler.scheduler import CrawlScheduler, HostPolicy, get_crawl_scheduler, host_of
+from crawler.http_cache import HttpCache, CHANGED, get_http_cache
+
+# 設置日誌
+logger = logging.getLogger('crawler')
+
+# aiohttp 未安裝 brotli 時無法解壓 br，只接受 gzip/deflate
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+@dataclass
+class AsyncResponse:
+    """已讀取完畢的回應 (屬性名稱與 requests.Response 相同)"""
+    url: str
+    status_code: int
+    text: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class AsyncCrawlerEngine:
+    """非同步爬蟲引擎"""
+
+    # 解析功能與同步引擎共用
+    parse_html = CrawlerEngine.parse_html
+    extract_links = CrawlerEngine.extract_links
+    extract_page_data = CrawlerEngine.extract_page_data
+    _get_random_user_agent = CrawlerEngine._get_random_user_agent
+
+    def __init__(self, delay_range: tuple = (1, 3), timeout: int = 30,
+                 max_concurrency: int = 16, headers: Optional[Dict[str, str]] = None,
+                 scheduler: Optional[CrawlScheduler] = None, http_cache: Optional[HttpCache] = None):
+        """
+        初始化非同步爬蟲引擎
+
+        Args:
+            delay_range: 同一主機的請求間隔範圍(秒)，僅用於排程設定中沒有設定的主機
+            timeout: 請求超時時間(秒)
+            max_concurrency: 整體同時進行的請求數上限
+            headers: 額外的預設 headers
+            scheduler: 爬蟲排程器 (決定各主機的請求頻率與同時請求數)，預設為全域共用的排程器
+            http_cache: 條件式請求使用的 HTTP 快取，預設為全域共用的快取
+        """
+        self.ua = UserAgent() if UserAgent else None
+        self.delay_range = delay_range
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.scheduler = scheduler or get_crawl_scheduler()
+        self.http_cache = http_cache or get_http_cache()
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {'requests': 0, 'failures': 0, 'bytes': 0, 'delay_seconds': 0.0}
+
+    async def start(self):
+        """建立 HTTP 會話 (需在事件迴圈中呼叫)"""
+        if self.session is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency)
+            )
+
+    async def close(self):
+        """關閉 HTTP 會話"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+            self._host_semaphores.clear()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def set_host_delay(self, host: str, delay_range: tuple):
+        """
+        設定單一主機的請求間隔 (寫入排程器，與其他爬蟲共用)
+
+        Args:
+            host: 主機名稱 (可含連接埠)
+            delay_range: 請求間隔範圍(秒)
+        """
+        policy = self.scheduler.policy_for(host)
+        self.scheduler.set_host_policy(host, HostPolicy.from_delay_range(
+            delay_range, burst=policy.burst, max_concurrency=policy.max_concurrency
+        ))
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        """取得主機的同時請求數限制"""
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            max_concurrency = self.scheduler.policy_for(host, self.delay_range).max_concurrency
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(max_concurrency)
+        return semaphore
+
+    async def _wait_for_host(self, host: str):
+        """
+        實現主機的請求延遲
+
+        向排程器預約主機的令牌後等待，同一主機的請求依序錯開，其他主機的請求不受影響
+        """
+        self.stats['delay_seconds'] += await self.scheduler.wait_async(host, self.delay_range)
+
+    async def fetch_page(self, url: str, conditional: bool = False, source: Optional[str] = None,
+                         consumer: Optional[str] = None, **kwargs) -> Optional[AsyncResponse]:
+        """
+        獲取網頁內容
+
+        Args:
+            url: 目標網址
+            conditional: 是否以 HTTP 快取發出條件式請求 (內容未變更時返回 None)
+            source: 條件式請求的統計來源名稱
+            consumer: 條件式請求的 HTTP 快取使用端名稱，預設為來源名稱
+            **kwargs: 額外的 aiohttp 請求參數
+
+        Returns:
+            AsyncResponse 物件或 None
+        """
+        await self.start()
+
+        # 設置隨機 User-Agent (呼叫端已指定時沿用)
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.setdefault('User-Agent', self._get_random_user_agent())
+        if conditional:
+            headers.update(self.http_cache.conditional_headers(url, source, consumer))
+
+        host = host_of(url)
+        async with self._host_semaphore(host):
+            await self._wait_for_host(host)
+            async with self._semaphore:
+                self.stats['requests'] += 1
+                try:
+                    logger.info(f"正在抓取: {url}")
+                    async with self.session.get(url, headers=headers, **kwargs) as response:
+                        if conditional and response.status == 304:
+                            self.http_cache.record(url, 304, dict(response.headers), None, source, consumer)
+                            logger.info(f"⏭️ 內容未變更，略過解析: {url} (not_modified)")
+                            return None
+
+                        response.raise_for_status()
+                        body = await response.read()
+                        self.stats['bytes'] += len(body)
+                        if conditional:
+                            status = self.http_cache.record(url, response.status, dict(response.headers), body,
+                                                            source, consumer)
+                            if status != CHANGED:
+                                logger.info(f"⏭️ 內容未變更，略過解析: {url} ({status})")
+                                return None
+
+                        text = body.decode(response.get_encoding(), errors='replace')
+                        logger.info(f"抓取成功: {url} (狀態碼: {response.status})")
+                        return AsyncResponse(str(response.url), response.status, text, dict(response.headers))
+
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self.stats['failures'] += 1
+                    if conditional:
+                        self.http_cache.record_error(url, source)
+                    logger.error(f"抓取失敗: {url} - {str(e) or type(e).__name__}")
+                    return None
+
+    async def fetch_changed_page(self, url: str, source: Optional[str] = None,
+                                 consumer: Optional[str] = None) -> Optional[AsyncResponse]:
+        """
+        以條件式請求獲取列表頁等經常重複抓取的網頁，內容與上次相同時不需重新解析
+
+        內容變更時，呼叫端將新聞寫入資料庫後需以 http_cache.commit(consumer) 使快取紀錄生效
+
+        Args:
+            url: 目標網址
+            source: 統計用的來源名稱
+            consumer: HTTP 快取的使用端名稱，預設為來源名稱
+
+        Returns:
+            內容已變更時返回 AsyncResponse；未變更或抓取失敗 (失敗次數另計於快取統計) 時返回 None
+        """
+        return await self.fetch_page(url, conditional=True, source=source, consumer=consumer)
+
+    async def crawl_page(self, url: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        爬取單個頁面
+
+        Args:
+            url: 目標網址
+            config: 爬蟲配置
+
+        Returns:
+            提取的數據字典
+        """
+        response = await self.fetch_page(url)
+        if not response:
+            return None
+
+        return self.extract_page_data(url, response.status_code, response.text, config)
+
+
+async def _gather(coroutines, description: str) -> List[Any]:
+    """同時執行多個協程，個別失敗時記錄錯誤並以 None 代替"""
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"❌ {description}失敗: {result}")
+    return [None if isinstance(result, Exception) else result for result in results]
+
+
+class AsyncNewsSourceCrawler(NewsSourceCrawler):
+    """新聞來源專用非同步爬蟲 (與 NewsSourceCrawler 相同介面，方法為協程)"""
+
+    def __init__(self, source_config: Dict[str, Any], engine: Optional[AsyncCrawlerEngine] = None):
+        """
+        初始化新聞來源非同步爬蟲
+
+        Args:
+            source_config: 新聞來源配置
+            engine: 共用的非同步爬蟲引擎，預設建立新的引擎
+        """
+        super().__init__(source_config, engine or AsyncCrawlerEngine())
+
+        # 來源配置的請求間隔 (crawl_settings.delay_min/delay_max) 套用至排程設定中沒有設定的主機
+        settings = source_config.get('crawl_settings') or {}
+        if 'delay_min' in settings or 'delay_max' in settings:
+            delay_range = (settings.get('delay_min', self.engine.delay_range[0]),
+                           settings.get('delay_max', self.engine.delay_range[1]))
+            for url in [source_config.get('base_url')] + list(source_config.get('list_urls', [])):
+                host = host_of(url) if url else None
+                if host and host not in self.engine.scheduler.host_policies:
+                    self.engine.set_host_delay(host, delay_range)
+
+    async def crawl_news_list(self, list_url: str) -> List[Dict[str, Any]]:
+        """
+        爬取新聞列表頁
+
+        Args:
+            list_url: 新聞列表頁網址
+
+        Returns:
+            新聞項目列表
+        """
+        logger.info(f"正在爬取 {self.source_name} 新聞列表: {list_url}")
+
+        # 列表頁未變更時沒有新的新聞，略過解析
+        response = await self.engine.fetch_changed_page(list_url, source=self.source_name)
+        if not response:
+            return []
+
+        return self.parse_news_list(response.text, list_url)
+
+    async def crawl_news_detail(self, news_url: str) -> Optional[Dict[str, Any]]:
+        """
+        爬取新聞詳情頁
+
+        Args:
+            news_url: 新聞詳情頁網址
+
+        Returns:
+            新聞詳情數據
+        """
+        logger.info(f"正在爬取 {self.source_name} 新聞詳情: {news_url}")
+
+        return await self.engine.crawl_page(news_url, self._detail_config())
+
+    async def crawl_source(self, list_urls: Optional[List[str]] = None,
+                           max_details: Optional[int] = None,
+                           fetch_details: bool = True) -> List[Dict[str, Any]]:
+        """
+        爬取來源的所有列表頁，並同時爬取各新聞的詳情頁
+
+        Args:
+            list_urls: 列表頁網址，預設為來源配置的 list_urls
+            max_details: 最多爬取的新聞數 (None 表示不限)
+            fetch_details: 是否爬取詳情頁
+
+        Returns:
+            新聞項目列表，詳情頁提取的欄位會覆蓋列表頁的同名欄位
+            (列表頁的 HTTP 快取紀錄以來源名稱為使用端，呼叫端寫入資料庫後 commit)
+        """
+        list_urls = list_urls or self.config.get('list_urls', [])
+        pages = await _gather([self.crawl_news_list(url) for url in list_urls], f"{self.source_name} 列表頁爬取")
+
+        news_items = []
+        seen_urls = set()
+        for page in pages:
+            for item in page or []:
+                if item['url'] not in seen_urls:
+                    seen_urls.add(item['url'])
+                    news_items.append(item)
+
+        if None in pages or (max_details is not None and len(news_items) > max_details):
+            # 有列表頁解析失敗或新聞被截斷，下次仍需重新解析列表頁
+            self.engine.http_cache.discard(self.source_name)
+        if max_details is not None:
+            news_items = news_items[:max_details]
+
+        if fetch_details and news_items:
+            details = await _gather([self.crawl_news_detail(item['url']) for item in news_items],
+                                    f"{self.source_name} 詳情頁爬取")
+            for item, detail in zip(news_items, details):
+                if detail:
+                    item.update({key: value for key, value in detail['data'].items() if value})
+
+        logger.info(f"✅ {self.source_name} 完成 {len(news_items)} 則新聞")
+        return news_items
+
+
+async def crawl_sources(source_configs: Iterable[Dict[str, Any]],
+                        max_details_per_source: Optional[int] = None,
+                        fetch_details: bool = True,
+                        save_results: Optional[Callable[[str, List[Dict[str, Any]]], bool]] = None,
+                        **engine_kwargs) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    以共用引擎同時爬取多個新聞來源
+
+    列表頁的 HTTP 快取紀錄在 save_results 回報寫入成功後才生效，之後內容未變更的列表頁不再解析；
+    未提供 save_results 或寫入失敗時捨棄，下次仍會完整解析
+
+    Args:
+        source_configs: 新聞來源配置
+        max_details_per_source: 每個來源最多爬取的新聞數
+        fetch_details: 是否爬取詳情頁
+        save_results: 以 (來源名稱, 新聞項目列表) 呼叫，將新聞寫入資料庫並返回是否成功
+        **engine_kwargs: AsyncCrawlerEngine 參數
+
+    Returns:
+        {來源名稱: 新聞項目列表}
+    """
+    async with AsyncCrawlerEngine(**engine_kwargs) as engine:
+        crawlers = [AsyncNewsSourceCrawler(config, engine) for config in source_configs]
+        results = await _gather(
+            [crawler.crawl_source(max_details=max_details_per_source, fetch_details=fetch_details)
+             for crawler in crawlers],
+            "來源爬取"
+        )
+        logger.info(f"爬取統計: {engine.stats}")
+
+    for crawler, items in zip(crawlers, results):
+        saved = False
+        if save_results is not None and items is not None:
+            try:
+                saved = bool(save_results(crawler.source_name, items))
+            except Exception as e:
+                logger.error(f"❌ {crawler.source_name} 新聞保存失敗: {e}")
+        if saved:
+            engine.http_cache.commit(crawler.source_name)
+        else:
+            engine.http_cache.discard(crawler.source_name)
+
+    return {crawler.source_name: items or [] for crawler, items in zip(crawlers, results)}
+
+
+def run_crawl(source_configs: Iterable[Dict[str, Any]], **kwargs) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    在新的事件迴圈中執行 crawl_sources (供同步程式呼叫)
+
+    Args:
+        source_configs: 新聞來源配置
+        **kwargs: crawl_sources 參數
+
+    Returns:
+        {來源名稱: 新聞項目列表}
+    """
+    return asyncio.run(crawl_sources(list(source_configs), **kwargs))
+
+
+if __name__ == "__main__":
+    from crawler.engine import NEWS_SOURCES_CONFIG
+
+    logging.basicConfig(level=logging.INFO)
+    for name, items in run_crawl(NEWS_SOURCES_CONFIG.values(), max_details_per_source=5).items():
+        print(f"{name}: {len(items)} 則新聞")
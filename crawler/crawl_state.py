@@ -0,0 +1,369 @@
+"""
+增量爬取狀態
+Incremental Crawl State
+
+每個來源保存爬取水位 (SQLite)：
+- 已見過的新聞網址 (正規化後的雜湊)：已知網址不再抓取內文，也不再送入資料庫重複檢查
+- 最新的發布時間：列表頁出現早於水位的新聞時停止翻頁
+- 列表游標 (上次列表頁最新一則的網址)：翻頁時再次遇到即停止
+
+網址在新聞寫入資料庫 (或確認已存在) 後才標記為已見過，寫入失敗的新聞下次仍會重新爬取
+"""
+
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterable, Set
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger('crawler')
+
+# 已見過網址的保留天數 (超過後由發布時間水位判斷)
+DEFAULT_RETENTION_DAYS = 180
+
+STAT_FIELDS = ('known_skipped', 'pages_stopped', 'marked_seen')
+
+
+def normalize_url(url: str) -> str:
+    """
+    正規化新聞網址 (主機小寫、移除片段、追蹤參數與結尾斜線)
+
+    Args:
+        url: 原始網址
+
+    Returns:
+        正規化後的網址
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    parts = urlsplit(url)
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if not key.lower().startswith('utm_')])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/') or '/', query, ''))
+
+
+def url_hash(url: str) -> str:
+    """正規化網址的雜湊值"""
+    return hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """將發布時間轉為 Unix 時間 (無法轉換時返回 None)"""
+    if isinstance(value, datetime):
+        try:
+            return value.timestamp()
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+@dataclass
+class SourceState:
+    """來源爬取水位數據類"""
+    source: str
+    last_published: Optional[float] = None  # 已見過新聞的最新發布時間 (Unix 時間)
+    list_cursor: Optional[str] = None       # 上次列表頁最新一則的網址
+    updated_at: Optional[float] = None
+
+
+class CrawlStateStore:
+    """各來源的增量爬取狀態"""
+
+    def __init__(self, db_path: str = "cache/crawl_state.db",
+                 retention_days: int = DEFAULT_RETENTION_DAYS):
+        """
+        初始化爬取狀態
+
+        Args:
+            db_path: SQLite 檔案路徑
+            retention_days: 已見過網址的保留天數
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.retention_days = retention_days
+        self._lock = threading.RLock()
+        self._conn = None
+        self._conn_pid = None
+        # 各來源已見過的網址雜湊 (首次使用時載入)
+        self._seen: Dict[str, Set[str]] = {}
+        self._states: Dict[str, SourceState] = {}
+        # 尚未生效的列表游標 {來源: 網址}
+        self._pending_cursors: Dict[str, str] = {}
+        # 本次執行的各來源統計
+        self.run_stats: Dict[str, Dict[str, int]] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得資料庫連線 (子程序中重新建立，不共用父程序的連線)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_state (
+                    source TEXT PRIMARY KEY,
+                    last_published REAL,
+                    list_cursor TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_seen (
+                    source TEXT NOT NULL,
+                    url_hash TEXT NOT NULL,
+                    seen_at REAL NOT NULL,
+                    PRIMARY KEY (source, url_hash)
+                ) WITHOUT ROWID
+            """)
+            self._conn_pid = os.getpid()
+            self._seen.clear()
+            self._states.clear()
+        return self._conn
+
+    def _count(self, source: str, name: str, value: int = 1):
+        stats = self.run_stats.setdefault(source, dict.fromkeys(STAT_FIELDS, 0))
+        stats[name] += value
+
+    def _seen_hashes(self, source: str) -> Set[str]:
+        """取得來源已見過的網址雜湊 (首次使用時清除過期紀錄並載入)"""
+        conn = self._connection()
+        seen = self._seen.get(source)
+        if seen is None:
+            cutoff = time.time() - self.retention_days * 86400
+            conn.execute('DELETE FROM crawl_seen WHERE source = ? AND seen_at < ?', (source, cutoff))
+            rows = conn.execute('SELECT url_hash FROM crawl_seen WHERE source = ?', (source,)).fetchall()
+            seen = self._seen[source] = {row[0] for row in rows}
+        return seen
+
+    def get_state(self, source: str) -> SourceState:
+        """
+        取得來源的爬取水位
+
+        Args:
+            source: 來源名稱
+
+        Returns:
+            SourceState (沒有紀錄時各欄位為 None)
+        """
+        try:
+            with self._lock:
+                conn = self._connection()
+                state = self._states.get(source)
+                if state is None:
+                    row = conn.execute(
+                        'SELECT last_published, list_cursor, updated_at FROM crawl_state WHERE source = ?', (source,)
+                    ).fetchone()
+                    state = self._states[source] = SourceState(source, *row) if row else SourceState(source)
+                return state
+        except Exception as e:
+            logger.error(f"❌ 讀取爬取狀態失敗: {source} - {e}")
+            return SourceState(source)
+
+    def _save_state(self, state: SourceState):
+        state.updated_at = time.time()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO crawl_state (source, last_published, list_cursor, updated_at) VALUES (?, ?, ?, ?)',
+            (state.source, state.last_published, state.list_cursor, state.updated_at)
+        )
+
+    def is_seen(self, source: str, url: str) -> bool:
+        """
+        檢查網址是否已見過
+
+        Args:
+            source: 來源名稱
+            url: 新聞網址
+
+        Returns:
+            是否已見過
+        """
+        if not url:
+            return False
+        try:
+            with self._lock:
+                return url_hash(url) in self._seen_hashes(source)
+        except Exception as e:
+            logger.error(f"❌ 讀取已見過網址失敗: {source} - {e}")
+            return False
+
+    def filter_new(self, source: str, items: List[Dict[str, Any]], url_key: str = 'url') -> List[Dict[str, Any]]:
+        """
+        過濾掉已見過網址的新聞
+
+        Args:
+            source: 來源名稱
+            items: 新聞列表
+            url_key: 網址欄位名稱
+
+        Returns:
+            未見過的新聞列表 (保持原順序)
+        """
+        new_items = [item for item in items if not self.is_seen(source, item.get(url_key, ''))]
+        skipped = len(items) - len(new_items)
+        if skipped:
+            with self._lock:
+                self._count(source, 'known_skipped', skipped)
+            logger.info(f"⏭️ {source}: 略過 {skipped} 則已爬取的新聞")
+        return new_items
+
+    def should_stop_paging(self, source: str, items: List[Dict[str, Any]], url_key: str = 'url',
+                           date_key: str = 'published_date') -> bool:
+        """
+        判斷列表頁是否已到達上次的爬取位置 (之後的頁面不需再抓取)
+
+        頁面中出現已見過的網址、列表游標，或發布時間早於水位的新聞時停止翻頁
+
+        Args:
+            source: 來源名稱
+            items: 該頁的新聞列表
+            url_key: 網址欄位名稱
+            date_key: 發布時間欄位名稱
+
+        Returns:
+            是否停止翻頁
+        """
+        state = self.get_state(source)
+        cursor = normalize_url(state.list_cursor) if state.list_cursor else None
+        for item in items:
+            url = item.get(url_key, '')
+            published = _timestamp(item.get(date_key))
+            if (self.is_seen(source, url)
+                    or (cursor and normalize_url(url) == cursor)
+                    or (published is not None and state.last_published is not None
+                        and published < state.last_published)):
+                with self._lock:
+                    self._count(source, 'pages_stopped')
+                logger.info(f"⏹️ {source}: 已到達上次爬取位置，停止翻頁")
+                return True
+        return False
+
+    def set_cursor(self, source: str, url: str):
+        """
+        記錄列表頁最新一則的網址
+
+        游標在該網址標記為已見過 (新聞已寫入資料庫) 後才生效，
+        避免寫入失敗時下次翻頁提早停止而漏掉新聞
+
+        Args:
+            source: 來源名稱
+            url: 列表頁第一則新聞的網址
+        """
+        if url:
+            with self._lock:
+                self._pending_cursors[source] = url
+
+    def mark_seen(self, source: str, items: Iterable[Dict[str, Any]], url_key: str = 'url',
+                  date_key: str = 'published_date'):
+        """
+        標記新聞為已見過並推進發布時間水位
+
+        Args:
+            source: 來源名稱
+            items: 已寫入 (或確認已存在於) 資料庫的新聞
+            url_key: 網址欄位名稱
+            date_key: 發布時間欄位名稱
+        """
+        now = time.time()
+        hashes = []
+        latest = None
+        for item in items:
+            if item.get(url_key):
+                hashes.append(url_hash(item[url_key]))
+            published = _timestamp(item.get(date_key))
+            if published is not None and published <= now and (latest is None or published > latest):
+                latest = published
+        if not hashes and latest is None:
+            return
+
+        try:
+            with self._lock:
+                seen = self._seen_hashes(source)
+                conn = self._connection()
+                conn.executemany(
+                    'INSERT OR REPLACE INTO crawl_seen (source, url_hash, seen_at) VALUES (?, ?, ?)',
+                    [(source, h, now) for h in hashes]
+                )
+                seen.update(hashes)
+                self._count(source, 'marked_seen', len(hashes))
+
+                state = self.get_state(source)
+                if latest is not None and (state.last_published is None or latest > state.last_published):
+                    state.last_published = latest
+                cursor = self._pending_cursors.get(source)
+                if cursor and url_hash(cursor) in seen:
+                    state.list_cursor = self._pending_cursors.pop(source)
+                self._save_state(state)
+        except Exception as e:
+            logger.error(f"❌ 保存爬取狀態失敗: {source} - {e}")
+
+    def reset(self, source: str):
+        """清除來源的爬取狀態 (下次執行會完整重新爬取)"""
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute('DELETE FROM crawl_state WHERE source = ?', (source,))
+                conn.execute('DELETE FROM crawl_seen WHERE source = ?', (source,))
+                self._seen.pop(source, None)
+                self._states.pop(source, None)
+                self._pending_cursors.pop(source, None)
+        except Exception as e:
+            logger.error(f"❌ 清除爬取狀態失敗: {source} - {e}")
+
+    def reset_run_stats(self):
+        """清除本次執行的統計 (每次排程爬取開始時呼叫)"""
+        with self._lock:
+            self.run_stats.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        取得各來源的本次執行統計與水位
+
+        Returns:
+            {來源: {known_skipped, pages_stopped, marked_seen, seen_urls, last_published}}
+        """
+        with self._lock:
+            stats = {}
+            for source, counts in self.run_stats.items():
+                state = self.get_state(source)
+                stats[source] = dict(
+                    counts,
+                    seen_urls=len(self._seen.get(source, ())),
+                    last_published=(datetime.fromtimestamp(state.last_published).isoformat()
+                                    if state.last_published else None)
+                )
+            return stats
+
+    def close(self):
+        """關閉資料庫連線"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全域爬取狀態實例
+_crawl_state = None
+_crawl_state_lock = threading.Lock()
+
+
+def get_crawl_state() -> CrawlStateStore:
+    """
+    取得全域爬取狀態實例
+
+    Returns:
+        CrawlStateStore 實例
+    """
+    global _crawl_state
+    if _crawl_state is None:
+        with _crawl_state_lock:
+            if _crawl_state is None:
+                _crawl_state = CrawlStateStore()
+    return _crawl_state
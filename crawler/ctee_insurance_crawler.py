@@ -14,28 +14,34 @@ import requests
 from bs4 import BeautifulSoup
 
 from crawler.engine import CrawlerEngine, NewsSourceCrawler
+from crawler.crawl_state import get_crawl_state
+from crawler.http_cache import get_http_cache
 
 logger = logging.getLogger('crawler')
 
 class CTeeInsuranceCrawler:
     """工商時報保險版爬蟲"""
     
+    # HTTP 快取的使用端名稱 (新聞寫入資料庫後由呼叫端 commit)
+    HTTP_CACHE_CONSUMER = 'ctee_crawler'
+    
     def __init__(self):
         """初始化爬蟲"""
         self.engine = CrawlerEngine(delay_range=(2, 4))  # 較長延遲，避免被封
         self.base_url = 'https://ctee.com.tw'
         self.category_url = 'https://ctee.com.tw/category/insurance'  # 保險版塊
         self.source_name = '工商時報'
+        self.crawl_state = get_crawl_state()
     
     def crawl_list(self, pages: int = 3) -> List[Dict[str, Any]]:
         """
-        爬取新聞列表
+        爬取新聞列表 (到達上次爬取位置即停止翻頁)
         
         Args:
-            pages: 爬取的頁數
+            pages: 最多爬取的頁數
             
         Returns:
-            新聞列表
+            未爬取過的新聞列表
         """
         all_news = []
         
@@ -44,9 +50,11 @@ class CTeeInsuranceCrawler:
                 url = f"{self.category_url}/page/{page}"
                 logger.info(f"正在爬取工商時報保險版第 {page} 頁: {url}")
                 
-                response = self.engine.fetch_page(url)
+                # 列表頁未變更時略過解析
+                response = self.engine.fetch_changed_page(url, source=self.source_name,
+                                                          consumer=self.HTTP_CACHE_CONSUMER)
                 if not response:
-                    logger.warning(f"無法獲取第 {page} 頁列表")
+                    logger.info(f"第 {page} 頁列表未變更或無法獲取，略過")
                     continue
                 
                 soup = self.engine.parse_html(response.text)
@@ -57,20 +65,30 @@ class CTeeInsuranceCrawler:
                 if not articles:
                     logger.warning(f"未在第 {page} 頁找到文章")
                     break
-                    
+                
+                page_news = []
                 for article in articles:
                     try:
                         news_item = self._extract_list_item(article)
                         if news_item:
-                            all_news.append(news_item)
+                            page_news.append(news_item)
                     except Exception as e:
                         logger.error(f"提取文章信息時出錯: {e}")
                         continue
                 
                 logger.info(f"成功從第 {page} 頁提取了 {len(articles)} 篇文章")
                 
+                if page == 1 and page_news:
+                    self.crawl_state.set_cursor(self.source_name, page_news[0]['url'])
+                all_news.extend(self.crawl_state.filter_new(self.source_name, page_news))
+                
+                if self.crawl_state.should_stop_paging(self.source_name, page_news):
+                    break
+                
             except Exception as e:
                 logger.error(f"爬取第 {page} 頁時發生錯誤: {e}")
+                # 該頁未完整處理，下次仍需重新解析
+                get_http_cache().discard(self.HTTP_CACHE_CONSUMER, url)
                 continue
         
         logger.info(f"工商時報保險版共爬取 {len(all_news)} 篇文章")
@@ -132,6 +150,7 @@ class CTeeInsuranceCrawler:
             'title': title,
             'url': url,
             'source': self.source_name,
+            'crawl_source': self.source_name,
             'category': category,
             'published_date': published_date,
             'summary': summary,
@@ -230,7 +249,7 @@ class CTeeInsuranceCrawler:
         # 爬取列表
         news_list = self.crawl_list(pages=max_pages)
         
-        # 爬取詳情
+        # 爬取詳情 (列表已排除爬取過的網址)
         detailed_count = 0
         for i, news in enumerate(news_list[:max_details]):
             if detailed_count >= max_details:
@@ -6,21 +6,107 @@ News Deduplication System
 """
 
 import logging
-from typing import Dict, List, Set, Tuple, Any
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple, Any, Optional, FrozenSet
 import re
-import jieba
-import jieba.analyse
 from difflib import SequenceMatcher
 from datetime import datetime, timedelta
 
+from crawler.minhash_index import MinHashLSHIndex, char_shingles, optimal_bands
+from analyzer.jieba_loader import get_jieba, get_jieba_analyse
+
 # 設置日誌
 logger = logging.getLogger('crawler')
 
+@dataclass(frozen=True)
+class NewsSignature:
+    """新聞比對特徵數據類"""
+    title: str                          # 預處理後的標題
+    title_keywords: FrozenSet[str]      # 標題關鍵詞
+    content_prefix: str                 # 內容前 200 字 (供非 jieba 模式比對)
+    content_keywords: FrozenSet[str]    # 內容關鍵詞
+    fingerprint: str                    # 新聞指紋
+
+
+class SignatureStore:
+    """有容量上限的新聞特徵快取 (LRU 淘汰)"""
+    
+    def __init__(self, max_size: int = 10000):
+        """
+        初始化特徵快取
+        
+        Args:
+            max_size: 最多保存的新聞數量
+        """
+        self.max_size = max_size
+        self._items: "OrderedDict[str, NewsSignature]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def get(self, key: str) -> Optional[NewsSignature]:
+        """取得特徵並更新使用順序"""
+        with self._lock:
+            signature = self._items.get(key)
+            if signature is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return signature
+    
+    def put(self, key: str, signature: NewsSignature):
+        """保存特徵，超過容量時淘汰最久未使用的項目"""
+        with self._lock:
+            self._items[key] = signature
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: str) -> bool:
+        """移除特徵 (新聞內容更新時使用)"""
+        with self._lock:
+            return self._items.pop(key, None) is not None
+    
+    def clear(self):
+        """清空快取"""
+        with self._lock:
+            self._items.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得快取統計資訊
+        
+        Returns:
+            快取統計資料
+        """
+        total = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / total * 100 if total > 0 else 0
+        }
+
+
 class NewsDeduplicator:
     """新聞去重器"""
     
     def __init__(self, similarity_threshold: float = 0.7, title_weight: float = 0.6, 
-                 content_weight: float = 0.4, use_jieba: bool = True):
+                 content_weight: float = 0.4, use_jieba: bool = True,
+                 index_path: Optional[str] = None, num_perm: int = 64, lsh_bands: Optional[int] = None,
+                 content_shingle_chars: int = 1000, signature_cache_size: int = 10000,
+                 exact_match_limit: int = 500):
         """
         初始化去重器
         
@@ -29,12 +115,31 @@ class NewsDeduplicator:
             title_weight: 標題權重
             content_weight: 內容權重
             use_jieba: 是否使用jieba分詞優化中文比較
+            index_path: MinHash 索引保存目錄，為 None 時只保存在記憶體
+            num_perm: MinHash 雜湊函數數量
+            lsh_bands: LSH 分段數，為 None 時依相似度閾值選擇
+            content_shingle_chars: 計算內容簽名時使用的字元數
+            signature_cache_size: 新聞特徵快取的容量
+            exact_match_limit: 本次執行見過的新聞不超過此數量時逐一比對，不只依賴 LSH 候選項
         """
         self.similarity_threshold = similarity_threshold
         self.title_weight = title_weight
         self.content_weight = content_weight
         self.use_jieba = use_jieba
         self.news_fingerprints = {}  # 用於儲存新聞指紋
+        self.signature_store = SignatureStore(max_size=signature_cache_size)
+        
+        # MinHash LSH 候選索引
+        self.index_path = index_path
+        self.content_shingle_chars = content_shingle_chars
+        self.exact_match_limit = exact_match_limit
+        if lsh_bands is None:
+            # 加權相似度達到閾值時，至少有一個欄位的相似度不低於閾值
+            lsh_bands = optimal_bands(num_perm, similarity_threshold)
+        self.lsh_index = MinHashLSHIndex(num_perm=num_perm, bands=lsh_bands)
+        self.indexed_items: Dict[str, Dict[str, Any]] = {}  # 索引鍵值 -> 新聞 (只保存本次執行期間見過的新聞)
+        if index_path:
+            self.lsh_index.load(index_path)
         
         # 用於標題預處理的正則表達式
         self.title_cleaners = [
@@ -44,15 +149,8 @@ class NewsDeduplicator:
             (r'^\s+|\s+$', '')               # 去除頭尾空白
         ]
         
+        # jieba 詞典 (含繁體中文字典 dict.txt.big) 由 analyzer.jieba_loader 共用，第一次分詞時才載入
         logger.info(f"初始化新聞去重器: 相似度閾值={similarity_threshold}, 使用jieba={use_jieba}")
-        
-        if use_jieba:
-            # 確保加載繁體字典
-            try:
-                jieba.set_dictionary('dict.txt.big')
-                logger.info("已加載繁體中文字典")
-            except Exception as e:
-                logger.warning(f"加載繁體中文字典失敗: {e}, 使用默認字典")
     
     def preprocess_title(self, title: str) -> str:
         """
@@ -90,14 +188,75 @@ class NewsDeduplicator:
             
         try:
             # 使用jieba提取關鍵詞
-            keywords = jieba.analyse.extract_tags(text, topK=top_n)
+            keywords = get_jieba_analyse().extract_tags(text, topK=top_n)
             return keywords
         except Exception as e:
             logger.error(f"關鍵詞提取失敗: {e}")
             # 備用方案: 簡單分詞後取長度大於1的詞
-            words = [w for w in jieba.cut(text) if len(w) > 1]
+            words = [w for w in get_jieba().cut(text) if len(w) > 1]
             return words[:top_n] if words else []
     
+    @staticmethod
+    def _get_content(news: Dict[str, Any]) -> str:
+        """取得新聞內容或摘要"""
+        return news.get('content', news.get('summary', '')) or ''
+    
+    @staticmethod
+    def _jaccard(set1: FrozenSet[str], set2: FrozenSet[str]) -> float:
+        """計算集合 Jaccard 相似度"""
+        if not set1 or not set2:
+            return 0
+        return len(set1 & set2) / len(set1 | set2)
+    
+    def _signature_key(self, news: Dict[str, Any]) -> str:
+        """特徵快取鍵值 (沒有 ID/URL 的新聞另外加上內容雜湊，避免同標題不同內容共用特徵)"""
+        key = self.get_index_key(news)
+        if key.startswith('title:'):
+            key = f"{key}:{zlib.crc32(self._get_content(news).encode('utf-8'))}"
+        return key
+    
+    def _build_signature(self, news: Dict[str, Any]) -> NewsSignature:
+        """計算新聞的比對特徵"""
+        title = self.preprocess_title(news.get('title', ''))
+        content = self._get_content(news)
+        
+        title_keywords = frozenset()
+        content_keywords = frozenset()
+        if self.use_jieba:
+            if len(title) > 10:
+                title_keywords = frozenset(self.extract_keywords(title))
+            if content:
+                content_keywords = frozenset(self.extract_keywords(content, top_n=20))
+        
+        return NewsSignature(
+            title=title,
+            title_keywords=title_keywords,
+            content_prefix=content[:200],
+            content_keywords=content_keywords,
+            fingerprint=self._compute_fingerprint(news)
+        )
+    
+    def get_signature(self, news: Dict[str, Any]) -> NewsSignature:
+        """
+        取得新聞的比對特徵，每篇新聞只計算一次
+        
+        Args:
+            news: 新聞項
+            
+        Returns:
+            新聞特徵
+        """
+        key = self._signature_key(news)
+        signature = self.signature_store.get(key)
+        if signature is None:
+            signature = self._build_signature(news)
+            self.signature_store.put(key, signature)
+        return signature
+    
+    def get_signature_stats(self) -> Dict[str, Any]:
+        """取得新聞特徵快取的命中統計"""
+        return self.signature_store.get_stats()
+    
     def calculate_similarity(self, news1: Dict[str, Any], news2: Dict[str, Any]) -> float:
         """
         計算兩條新聞的相似度
@@ -109,46 +268,25 @@ class NewsDeduplicator:
         Returns:
             相似度分數(0-1)
         """
-        # 獲取標題
-        title1 = news1.get('title', '')
-        title2 = news2.get('title', '')
-        
-        # 獲取內容或摘要
-        content1 = news1.get('content', news1.get('summary', ''))
-        content2 = news2.get('content', news2.get('summary', ''))
-        
-        # 預處理標題
-        title1 = self.preprocess_title(title1)
-        title2 = self.preprocess_title(title2)
+        sig1 = self.get_signature(news1)
+        sig2 = self.get_signature(news2)
         
         # 計算標題相似度
-        if self.use_jieba and len(title1) > 10 and len(title2) > 10:
-            # 使用關鍵詞集合相似度
-            title1_keywords = set(self.extract_keywords(title1))
-            title2_keywords = set(self.extract_keywords(title2))
-            
-            # 集合相似度 (Jaccard相似度)
-            if title1_keywords and title2_keywords:
-                title_similarity = len(title1_keywords.intersection(title2_keywords)) / len(title1_keywords.union(title2_keywords))
-            else:
-                title_similarity = 0
+        if self.use_jieba and len(sig1.title) > 10 and len(sig2.title) > 10:
+            # 使用關鍵詞集合相似度 (Jaccard相似度)
+            title_similarity = self._jaccard(sig1.title_keywords, sig2.title_keywords)
         else:
             # 字符串序列相似度
-            title_similarity = SequenceMatcher(None, title1, title2).ratio()
+            title_similarity = SequenceMatcher(None, sig1.title, sig2.title).ratio()
         
         # 計算內容相似度
-        if content1 and content2 and self.use_jieba:
+        has_content = bool(sig1.content_prefix) and bool(sig2.content_prefix)
+        if has_content and self.use_jieba:
             # 使用關鍵詞集合相似度
-            content1_keywords = set(self.extract_keywords(content1, top_n=20))
-            content2_keywords = set(self.extract_keywords(content2, top_n=20))
-            
-            if content1_keywords and content2_keywords:
-                content_similarity = len(content1_keywords.intersection(content2_keywords)) / len(content1_keywords.union(content2_keywords))
-            else:
-                content_similarity = 0
-        elif content1 and content2:
+            content_similarity = self._jaccard(sig1.content_keywords, sig2.content_keywords)
+        elif has_content:
             # 字符串序列相似度 (簡化計算，只使用前200個字符)
-            content_similarity = SequenceMatcher(None, content1[:200], content2[:200]).ratio()
+            content_similarity = SequenceMatcher(None, sig1.content_prefix, sig2.content_prefix).ratio()
         else:
             content_similarity = 0
         
@@ -162,16 +300,8 @@ class NewsDeduplicator:
         
         return similarity
     
-    def generate_fingerprint(self, news: Dict[str, Any]) -> str:
-        """
-        為新聞生成指紋
-        
-        Args:
-            news: 新聞項
-            
-        Returns:
-            新聞指紋
-        """
+    def _compute_fingerprint(self, news: Dict[str, Any]) -> str:
+        """計算新聞指紋"""
         title = news.get('title', '').lower()
         
         # 提取標題關鍵詞
@@ -185,6 +315,117 @@ class NewsDeduplicator:
         processed_title = self.preprocess_title(title)
         return processed_title
     
+    def generate_fingerprint(self, news: Dict[str, Any]) -> str:
+        """
+        為新聞生成指紋
+        
+        Args:
+            news: 新聞項
+            
+        Returns:
+            新聞指紋
+        """
+        return self.get_signature(news).fingerprint
+    
+    def get_index_key(self, news: Dict[str, Any]) -> str:
+        """
+        取得新聞在 MinHash 索引中的鍵值 (依序使用 ID、URL、處理後標題)
+        
+        Args:
+            news: 新聞項
+            
+        Returns:
+            索引鍵值
+        """
+        if news.get('id') is not None:
+            return f"id:{news['id']}"
+        if news.get('url'):
+            return f"url:{news['url']}"
+        return f"title:{self.preprocess_title(news.get('title', ''))}"
+    
+    def compute_signature(self, news: Dict[str, Any]):
+        """
+        計算新聞的 MinHash 簽名 (標題字元二元組、內容字元三元組)
+        
+        Args:
+            news: 新聞項
+            
+        Returns:
+            MinHash 簽名
+        """
+        title = self.preprocess_title(news.get('title', ''))
+        content = news.get('content', news.get('summary', '')) or ''
+        return self.lsh_index.signature(
+            char_shingles(title, 2),
+            char_shingles(content[:self.content_shingle_chars], 3)
+        )
+    
+    def index_items(self, items: List[Dict[str, Any]]) -> int:
+        """
+        將新聞加入 MinHash 索引 (已索引的新聞只更新參照，不重新計算簽名)
+        
+        Args:
+            items: 新聞列表
+            
+        Returns:
+            新計算簽名的新聞數量
+        """
+        added = 0
+        for item in items:
+            key = self.get_index_key(item)
+            self.indexed_items[key] = item
+            if key not in self.lsh_index:
+                self.lsh_index.add(key, self.compute_signature(item))
+                added += 1
+        return added
+    
+    def _get_indexed_item(self, key: str) -> Dict[str, Any]:
+        """取得索引鍵值對應的新聞 (只存在於已保存索引時返回僅含 ID/URL 的項目)"""
+        item = self.indexed_items.get(key)
+        if item is not None:
+            return item
+        
+        kind, _, value = key.partition(':')
+        if kind == 'id':
+            return {'id': int(value) if value.isdigit() else value}
+        if kind == 'url':
+            return {'url': value}
+        return {'title': value}
+    
+    def _candidate_similarity(self, news_item: Dict[str, Any], signature, key: str) -> float:
+        """
+        計算新聞與候選項的相似度
+        
+        本次執行期間見過的候選項使用完整的 calculate_similarity；
+        只存在於已保存索引中的候選項則以 MinHash 估計的標題 / 內容相似度加權計算。
+        """
+        candidate = self.indexed_items.get(key)
+        if candidate is not None:
+            return self.calculate_similarity(news_item, candidate)
+        
+        title_similarity, content_similarity = self.lsh_index.estimate_similarity(
+            signature, self.lsh_index.get_signature(key)
+        )
+        if title_similarity > 0.9:
+            return 0.9
+        return self.title_weight * title_similarity + self.content_weight * content_similarity
+    
+    def _find_duplicate(self, news_item: Dict[str, Any], signature) -> Tuple[Optional[str], float]:
+        """
+        在 LSH 候選項中尋找重複新聞 (小批次時另外逐一比對本次執行見過的新聞)
+        
+        Returns:
+            (重複項鍵值, 相似度)，沒有重複時鍵值為 None
+        """
+        candidates = self.lsh_index.query(signature)
+        if len(self.indexed_items) <= self.exact_match_limit:
+            candidates.update(self.indexed_items)
+        for key in candidates:
+            similarity = self._candidate_similarity(news_item, signature, key)
+            if similarity >= self.similarity_threshold:
+                return key, similarity
+        return None, 0.0
+    
     def is_duplicate(self, news_item: Dict[str, Any], existing_items: List[Dict[str, Any]]) -> Tuple[bool, Dict[str, Any]]:
         """
         判斷新聞是否為重複
@@ -215,21 +456,22 @@ class NewsDeduplicator:
                     logger.info(f"檢測到重複新聞: '{news_item.get('title')}' (相似度: {similarity:.2f})")
                     return True, dup_item
         
-        # 計算與所有現有新聞的相似度
-        for existing in existing_items:
-            similarity = self.calculate_similarity(news_item, existing)
-            if similarity >= self.similarity_threshold:
-                logger.info(f"檢測到重複新聞: '{news_item.get('title')}' (相似度: {similarity:.2f})")
-                
-                # 更新指紋字典
-                if fingerprint not in self.news_fingerprints:
-                    self.news_fingerprints[fingerprint] = set()
+        # 只與 LSH 候選項計算相似度
+        self.index_items(existing_items)
+        duplicate_key, similarity = self._find_duplicate(news_item, self.compute_signature(news_item))
+        if duplicate_key is not None:
+            existing = self._get_indexed_item(duplicate_key)
+            logger.info(f"檢測到重複新聞: '{news_item.get('title')}' (相似度: {similarity:.2f})")
+            
+            # 更新指紋字典
+            if fingerprint not in self.news_fingerprints:
+                self.news_fingerprints[fingerprint] = set()
+            
+            existing_id = existing.get('id')
+            if existing_id:
+                self.news_fingerprints[fingerprint].add(existing_id)
                 
-                existing_id = existing.get('id')
-                if existing_id:
-                    self.news_fingerprints[fingerprint].add(existing_id)
-                    
-                return True, existing
+            return True, existing
         
         # 將新聞添加到指紋列表
         if fingerprint not in self.news_fingerprints:
@@ -241,13 +483,17 @@ class NewsDeduplicator:
         
         return False, None
     
-    def filter_duplicates(self, news_items: List[Dict[str, Any]], existing_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def filter_duplicates(self, news_items: List[Dict[str, Any]],
+                          existing_items: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """
         過濾重複的新聞
         
+        已存在的新聞只在首次出現時計算簽名；每條待處理新聞只與 LSH 候選項比較，
+        判定為唯一的新聞會立即加入索引，以便偵測同一批次內的重複。
+        
         Args:
             news_items: 待處理的新聞列表
-            existing_items: 已存在的新聞列表
+            existing_items: 已存在的新聞列表 (可省略，僅使用已保存的索引)
             
         Returns:
             過濾後的新聞列表
@@ -255,18 +501,41 @@ class NewsDeduplicator:
         unique_items = []
         duplicates = []
         
+        if existing_items:
+            self.index_items(existing_items)
+        
         for item in news_items:
-            is_dup, duplicate_of = self.is_duplicate(item, existing_items + unique_items)
+            if not item.get('title'):
+                unique_items.append(item)
+                continue
+            
+            signature = self.compute_signature(item)
+            duplicate_key, similarity = self._find_duplicate(item, signature)
             
-            if not is_dup:
+            if duplicate_key is None:
                 unique_items.append(item)
+                key = self.get_index_key(item)
+                self.indexed_items[key] = item
+                self.lsh_index.add(key, signature)
             else:
-                duplicates.append((item, duplicate_of))
+                duplicates.append((item, self._get_indexed_item(duplicate_key)))
         
         logger.info(f"去重結果: {len(unique_items)} 條唯一新聞, {len(duplicates)} 條重複")
         
+        if self.index_path:
+            self.save_index()
+        
         return unique_items
     
+    def save_index(self) -> None:
+        """將 MinHash 索引保存至磁碟"""
+        if not self.index_path:
+            return
+        try:
+            self.lsh_index.save(self.index_path)
+        except Exception as e:
+            logger.error(f"保存去重索引失敗: {e}")
+    
     def clear_cache(self, days: int = 7) -> None:
         """
         清除過期的指紋緩存
@@ -274,6 +543,11 @@ class NewsDeduplicator:
         Args:
             days: 保留的天數
         """
-        # 實際應用中，這裡應該會檢查新聞的日期來清除過期的指紋
-        logger.info(f"已清除 {days} 天前的指紋緩存")
-        # 在實際應用中，這需要與數據庫結合實現
\ No newline at end of file
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+        expired = self.lsh_index.remove_older_than(cutoff)
+        for key in expired:
+            item = self.indexed_items.pop(key, None)
+            # 標題鍵值的特徵快取另外帶有內容雜湊
+            self.signature_store.invalidate(self._signature_key(item) if item is not None else key)
+        
+        logger.info(f"已清除 {days} 天前的指紋緩存 ({len(expired)} 條)")
@@ -8,33 +8,35 @@ Crawler Engine Core Module
 import requests
 from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
-import time
-import random
 import logging
 from urllib.parse import urljoin, urlparse
 from typing import Dict, List, Optional, Any
 import json
 from datetime import datetime, timezone
 
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
+
 # 設置日誌
 logger = logging.getLogger('crawler')
 
 class CrawlerEngine:
     """通用爬蟲引擎"""
     
-    def __init__(self, delay_range: tuple = (1, 3), timeout: int = 30):
+    def __init__(self, delay_range: tuple = (1, 3), timeout: int = 30, scheduler=None):
         """
         初始化爬蟲引擎
         
         Args:
-            delay_range: 請求間隔範圍(秒)
+            delay_range: 請求間隔範圍(秒)，僅用於排程設定中沒有設定的主機
             timeout: 請求超時時間(秒)
+            scheduler: 爬蟲排程器，預設為全域共用的排程器
         """
         self.ua = UserAgent()
         self.session = requests.Session()
         self.delay_range = delay_range
         self.timeout = timeout
-        self.last_request_time = 0
+        self.scheduler = scheduler or get_crawl_scheduler()
         
         # 設置默認 headers
         self.session.headers.update({
@@ -45,18 +47,9 @@ class CrawlerEngine:
             'Upgrade-Insecure-Requests': '1',
         })
     
-    def _wait_for_delay(self):
-        """實現請求延遲"""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-        delay = random.uniform(*self.delay_range)
-        
-        if elapsed < delay:
-            sleep_time = delay - elapsed
-            logger.debug(f"等待 {sleep_time:.2f} 秒...")
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+    def _wait_for_delay(self, url: str):
+        """實現請求延遲 (依目標主機的令牌桶，不同主機互不等待)"""
+        self.scheduler.wait(url, self.delay_range)
     
     def _get_random_user_agent(self) -> str:
         """獲取隨機 User-Agent"""
@@ -77,7 +70,7 @@ class CrawlerEngine:
         Returns:
             Response 物件或 None
         """
-        self._wait_for_delay()
+        self._wait_for_delay(url)
         
         # 設置隨機 User-Agent
         headers = kwargs.get('headers', {})
@@ -98,6 +91,32 @@ class CrawlerEngine:
             logger.error(f"抓取失敗: {url} - {str(e)}")
             return None
     
+    def fetch_changed_page(self, url: str, source: Optional[str] = None,
+                           consumer: Optional[str] = None) -> Optional[requests.Response]:
+        """
+        以條件式請求獲取列表頁等經常重複抓取的網頁，內容與上次相同時不需重新解析
+        
+        內容變更時，呼叫端將新聞寫入資料庫後需以 get_http_cache().commit(consumer) 使快取紀錄生效
+        
+        Args:
+            url: 目標網址
+            source: 統計用的來源名稱
+            consumer: HTTP 快取的使用端名稱，預設為來源名稱
+            
+        Returns:
+            內容已變更時返回 Response；未變更或抓取失敗 (失敗次數另計於快取統計) 時返回 None
+        """
+        self._wait_for_delay(url)
+        
+        logger.info(f"正在抓取: {url}")
+        try:
+            return get_http_cache().fetch(
+                url, session=self.session, source=source, timeout=self.timeout,
+                headers={'User-Agent': self._get_random_user_agent()}, consumer=consumer
+            )
+        except requests.exceptions.RequestException:
+            return None
+    
     def parse_html(self, html_content: str, parser: str = 'lxml') -> BeautifulSoup:
         """
         解析 HTML 內容
@@ -147,11 +166,27 @@ class CrawlerEngine:
         if not response:
             return None
         
-        soup = self.parse_html(response.text)
+        return self.extract_page_data(url, response.status_code, response.text, config)
+    
+    def extract_page_data(self, url: str, status_code: int, html_content: str,
+                          config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        依配置的選擇器從頁面 HTML 提取數據 (同步與非同步引擎共用)
+        
+        Args:
+            url: 頁面網址
+            status_code: HTTP 狀態碼
+            html_content: HTML 內容
+            config: 爬蟲配置
+            
+        Returns:
+            提取的數據字典
+        """
+        soup = self.parse_html(html_content)
         
         result = {
             'url': url,
-            'status_code': response.status_code,
+            'status_code': status_code,
             'crawled_at': datetime.now(timezone.utc).isoformat(),
             'data': {}
         }
@@ -182,15 +217,16 @@ class CrawlerEngine:
 class NewsSourceCrawler:
     """新聞來源專用爬蟲"""
     
-    def __init__(self, source_config: Dict[str, Any]):
+    def __init__(self, source_config: Dict[str, Any], engine=None):
         """
         初始化新聞來源爬蟲
         
         Args:
             source_config: 新聞來源配置
+            engine: 爬蟲引擎，預設建立新的 CrawlerEngine
         """
         self.config = source_config
-        self.engine = CrawlerEngine()
+        self.engine = engine or CrawlerEngine()
         self.source_name = source_config.get('name', 'Unknown')
     
     def crawl_news_list(self, list_url: str) -> List[Dict[str, Any]]:
@@ -205,11 +241,25 @@ class NewsSourceCrawler:
         """
         logger.info(f"正在爬取 {self.source_name} 新聞列表: {list_url}")
         
-        response = self.engine.fetch_page(list_url)
+        # 列表頁未變更時沒有新的新聞，略過解析
+        response = self.engine.fetch_changed_page(list_url, source=self.source_name)
         if not response:
             return []
         
-        soup = self.engine.parse_html(response.text)
+        return self.parse_news_list(response.text, list_url)
+    
+    def parse_news_list(self, html_content: str, list_url: str) -> List[Dict[str, Any]]:
+        """
+        解析新聞列表頁 HTML
+        
+        Args:
+            html_content: 列表頁 HTML 內容
+            list_url: 新聞列表頁網址
+            
+        Returns:
+            新聞項目列表
+        """
+        soup = self.engine.parse_html(html_content)
         news_items = []
         
         # 獲取新聞項目選擇器
@@ -291,7 +341,11 @@ class NewsSourceCrawler:
         """
         logger.info(f"正在爬取 {self.source_name} 新聞詳情: {news_url}")
         
-        config = {
+        return self.engine.crawl_page(news_url, self._detail_config())
+    
+    def _detail_config(self) -> Dict[str, Any]:
+        """新聞詳情頁的提取配置"""
+        return {
             'selectors': self.config.get('detail_selectors', {
                 'title': 'h1, .article-title',
                 'content': '.article-content, .content, .post-content',
@@ -299,8 +353,6 @@ class NewsSourceCrawler:
                 'author': '.author, .writer'
             })
         }
-        
-        return self.engine.crawl_page(news_url, config)
 
 
 # 預定義的新聞來源配置
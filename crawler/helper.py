@@ -47,6 +47,7 @@ class CrawlerHelper:
                         crawl_results.append({
                             'source': 'RSS新聞源',
                             'success': True,
+                            'crawler': 'rss',
                             'news_count': len(rss_news),
                             'message': f'成功爬取RSS新聞 {len(rss_news)} 則'
                         })
@@ -81,6 +82,7 @@ class CrawlerHelper:
                         crawl_results.append({
                             'source': '真實新聞爬蟲',
                             'success': True,
+                            'crawler': 'real',
                             'news_count': len(real_news),
                             'method': method_name,
                             'message': f'成功爬取真實新聞 {len(real_news)} 則'
@@ -99,11 +101,12 @@ class CrawlerHelper:
                 if 'ctee' in crawler_manager.crawlers:
                     try:
                         logger.info("🔍 使用工商時報專用爬蟲抓取新聞...")
-                        ctee_news = crawler_manager.crawlers['ctee'].crawl()
+                        ctee_news = crawler_manager.crawlers['ctee'].crawl().get('news', [])
                         all_news.extend(ctee_news)
                         crawl_results.append({
                             'source': '工商時報保險版',
                             'success': True,
+                            'crawler': 'ctee',
                             'news_count': len(ctee_news),
                             'message': f'成功爬取工商時報新聞 {len(ctee_news)} 則'
                         })
@@ -0,0 +1,439 @@
+"""
+HTTP 條件式請求快取
+HTTP Conditional Request Cache
+
+RSS feed 與新聞列表頁大多在兩次排程爬取之間沒有變化，此模組為每個網址保存
+ETag / Last-Modified 與內容雜湊 (SQLite)：
+- 請求時附上 If-None-Match / If-Modified-Since，伺服器回應 304 時不需下載內容
+- 伺服器不支援條件式請求時，內容雜湊與上次相同也視為未變更
+- 未變更的網址直接略過解析，並依來源累計節省的下載量與解析次數
+
+快取狀態依使用端 (consumer) 分開保存，多個爬蟲共用同一網址時互不影響。
+內容變更時新的 ETag 與內容雜湊先暫存，使用端將新聞寫入資料庫後呼叫 commit() 才生效；
+未呼叫 commit() (新聞截斷或寫入失敗) 的網址下次仍會重新解析
+"""
+
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional, List, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger('crawler')
+
+DEFAULT_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# 回應狀態：內容已變更、伺服器回應 304、內容雜湊與上次相同
+CHANGED = 'changed'
+NOT_MODIFIED = 'not_modified'
+UNCHANGED = 'unchanged'
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAT_FIELDS = ('requests', 'changed', 'not_modified', 'unchanged', 'errors',
+               'bytes_downloaded', 'bytes_saved', 'parses_skipped')
+
+
+class HttpCache:
+    """以使用端與網址為鍵值的條件式請求快取"""
+
+    def __init__(self, db_path: str = "cache/http_cache.db"):
+        """
+        初始化 HTTP 快取
+
+        Args:
+            db_path: SQLite 檔案路徑 (相對路徑以專案根目錄為準)
+        """
+        self.db_path = Path(PROJECT_ROOT, db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._session = None
+        # 尚未生效的快取紀錄 {(使用端, 網址): (etag, last_modified, body_hash, content_length)}
+        self._pending: Dict[Tuple[str, str], tuple] = {}
+        # 本次執行的各來源統計 (累計統計保存於資料庫)
+        self.run_stats: Dict[str, Dict[str, int]] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得資料庫連線 (子程序中重新建立，不共用父程序的連線)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            # 舊版的快取紀錄不分使用端，直接捨棄 (下次請求重新下載並解析)
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(http_cache)')}
+            if columns and 'consumer' not in columns:
+                self._conn.execute('DROP TABLE http_cache')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    consumer TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body_hash TEXT,
+                    content_length INTEGER NOT NULL DEFAULT 0,
+                    fetched_at REAL NOT NULL,
+                    changed_at REAL NOT NULL,
+                    PRIMARY KEY (consumer, url)
+                )
+            """)
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS http_cache_stats (
+                    source TEXT PRIMARY KEY,
+                    {', '.join(f'{name} INTEGER NOT NULL DEFAULT 0' for name in STAT_FIELDS)},
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(http_cache_stats)')}
+            for name in STAT_FIELDS:
+                if name not in columns:
+                    self._conn.execute(f'ALTER TABLE http_cache_stats ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0')
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _consumer(url: str, source: Optional[str] = None, consumer: Optional[str] = None) -> str:
+        """使用端名稱 (預設為來源名稱，再預設為網址主機)"""
+        return consumer or source or urlparse(url).netloc
+
+    def _entry(self, url: str, consumer: str) -> Optional[tuple]:
+        """取得使用端已生效的快取紀錄 (etag, last_modified, body_hash, content_length)"""
+        try:
+            with self._lock:
+                return self._connection().execute(
+                    'SELECT etag, last_modified, body_hash, content_length FROM http_cache '
+                    'WHERE consumer = ? AND url = ?', (consumer, url)
+                ).fetchone()
+        except Exception as e:
+            logger.debug(f"❌ 讀取 HTTP 快取失敗: {url} - {e}")
+            return None
+
+    def conditional_headers(self, url: str, source: Optional[str] = None,
+                            consumer: Optional[str] = None) -> Dict[str, str]:
+        """
+        取得條件式請求的 headers
+
+        Args:
+            url: 請求網址
+            source: 來源名稱
+            consumer: 使用端名稱，預設為來源名稱
+
+        Returns:
+            If-None-Match / If-Modified-Since headers (沒有快取紀錄時為空字典)
+        """
+        entry = self._entry(url, self._consumer(url, source, consumer))
+        headers = {}
+        if entry:
+            etag, last_modified = entry[0], entry[1]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def record(self, url: str, status_code: int, headers: Dict[str, str],
+               body: Optional[bytes], source: Optional[str] = None, consumer: Optional[str] = None) -> str:
+        """
+        記錄回應並判斷內容是否變更
+
+        內容變更時新的快取紀錄只會暫存，呼叫 commit() 後才生效
+
+        Args:
+            url: 請求網址
+            status_code: HTTP 狀態碼
+            headers: 回應 headers
+            body: 回應內容 (304 時為 None)
+            source: 統計用的來源名稱，預設為網址主機
+            consumer: 使用端名稱，預設為來源名稱
+
+        Returns:
+            CHANGED、NOT_MODIFIED 或 UNCHANGED
+        """
+        consumer = self._consumer(url, source, consumer)
+        source = source or urlparse(url).netloc
+        entry = self._entry(url, consumer)
+        now = time.time()
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+
+        if status_code == 304 and entry:
+            self._update_stats(source, not_modified=1, bytes_saved=entry[3], parses_skipped=1)
+            self._execute('UPDATE http_cache SET fetched_at = ? WHERE consumer = ? AND url = ?',
+                          (now, consumer, url))
+            return NOT_MODIFIED
+
+        body = body or b''
+        body_hash = hashlib.sha1(body).hexdigest()
+        status = UNCHANGED if entry and entry[2] == body_hash else CHANGED
+
+        if status == UNCHANGED:
+            # 內容與已生效的紀錄相同，更新驗證資訊不會漏掉新聞
+            self._update_stats(source, unchanged=1, bytes_downloaded=len(body), parses_skipped=1)
+            self._execute(
+                'UPDATE http_cache SET etag = ?, last_modified = ?, fetched_at = ? WHERE consumer = ? AND url = ?',
+                (headers.get('etag'), headers.get('last-modified'), now, consumer, url)
+            )
+            with self._lock:
+                self._pending.pop((consumer, url), None)
+        else:
+            self._update_stats(source, changed=1, bytes_downloaded=len(body))
+            with self._lock:
+                self._pending[(consumer, url)] = (
+                    headers.get('etag'), headers.get('last-modified'), body_hash, len(body)
+                )
+        return status
+
+    def _pending_keys(self, consumer: str, url: Optional[str]) -> List[Tuple[str, str]]:
+        if url is not None:
+            return [(consumer, url)] if (consumer, url) in self._pending else []
+        return [key for key in self._pending if key[0] == consumer]
+
+    def commit(self, consumer: str, url: Optional[str] = None) -> int:
+        """
+        使暫存的快取紀錄生效 (使用端已將新聞寫入資料庫後呼叫)
+
+        Args:
+            consumer: 使用端名稱
+            url: 只處理此網址，預設為使用端所有暫存的網址
+
+        Returns:
+            生效的網址數量
+        """
+        now = time.time()
+        with self._lock:
+            rows = [(key[0], key[1], *self._pending.pop(key), now, now)
+                    for key in self._pending_keys(consumer, url)]
+        if rows:
+            try:
+                with self._lock:
+                    self._connection().executemany(
+                        'INSERT OR REPLACE INTO http_cache '
+                        '(consumer, url, etag, last_modified, body_hash, content_length, fetched_at, changed_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows
+                    )
+            except Exception as e:
+                logger.error(f"❌ 保存 HTTP 快取失敗: {consumer} - {e}")
+                return 0
+        return len(rows)
+
+    def discard(self, consumer: str, url: Optional[str] = None) -> int:
+        """
+        捨棄暫存的快取紀錄 (新聞被截斷或寫入失敗時呼叫，下次仍會重新解析)
+
+        Args:
+            consumer: 使用端名稱
+            url: 只處理此網址，預設為使用端所有暫存的網址
+
+        Returns:
+            捨棄的網址數量
+        """
+        with self._lock:
+            keys = self._pending_keys(consumer, url)
+            for key in keys:
+                del self._pending[key]
+        return len(keys)
+
+    def _execute(self, sql: str, params: tuple):
+        try:
+            with self._lock:
+                self._connection().execute(sql, params)
+        except Exception as e:
+            logger.error(f"❌ 保存 HTTP 快取失敗: {e}")
+
+    def _update_stats(self, source: str, **counts):
+        """累計來源的本次與歷史統計"""
+        counts['requests'] = 1
+        with self._lock:
+            run = self.run_stats.setdefault(source, dict.fromkeys(STAT_FIELDS, 0))
+            for name, value in counts.items():
+                run[name] += value
+
+        names = list(counts)
+        self._execute(
+            f"INSERT INTO http_cache_stats (source, {', '.join(names)}, updated_at) "
+            f"VALUES (?, {', '.join('?' for _ in names)}, ?) "
+            f"ON CONFLICT(source) DO UPDATE SET "
+            f"{', '.join(f'{name} = {name} + excluded.{name}' for name in names)}, updated_at = excluded.updated_at",
+            (source, *counts.values(), time.time())
+        )
+
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers.update({'User-Agent': DEFAULT_USER_AGENT})
+        return self._session
+
+    def record_error(self, url: str, source: Optional[str] = None):
+        """
+        記錄抓取失敗 (與內容未變更分開統計)
+
+        Args:
+            url: 請求網址
+            source: 統計用的來源名稱，預設為網址主機
+        """
+        self._update_stats(source or urlparse(url).netloc, errors=1)
+
+    def fetch(self, url: str, session: Optional[requests.Session] = None, source: Optional[str] = None,
+              timeout: int = 15, headers: Optional[Dict[str, str]] = None,
+              force: bool = False, consumer: Optional[str] = None) -> Optional[requests.Response]:
+        """
+        以條件式請求抓取網址
+
+        內容變更時新的快取紀錄只會暫存，呼叫端將新聞寫入資料庫後需呼叫 commit(consumer) 才生效
+
+        Args:
+            url: 請求網址
+            session: 使用的 requests Session，預設為快取共用的 Session
+            source: 統計用的來源名稱
+            timeout: 請求超時時間(秒)
+            headers: 額外的請求 headers
+            force: 不附條件式 headers，且內容未變更時仍返回回應
+            consumer: 使用端名稱，預設為來源名稱
+
+        Returns:
+            內容已變更時返回 Response；未變更 (可略過解析) 時返回 None
+
+        Raises:
+            requests.exceptions.RequestException: 請求失敗
+        """
+        request_headers = dict(headers or {})
+        if not force:
+            request_headers.update(self.conditional_headers(url, source, consumer))
+
+        try:
+            response = (session or self._get_session()).get(url, headers=request_headers, timeout=timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"抓取失敗: {url} - {str(e)}")
+            self.record_error(url, source)
+            raise
+
+        body = None if response.status_code == 304 else response.content
+        status = self.record(url, response.status_code, response.headers, body, source, consumer)
+        if status != CHANGED and not force:
+            logger.info(f"⏭️ 內容未變更，略過解析: {url} ({status})")
+            return None
+        return response
+
+    def fetch_feed(self, url: str, source: Optional[str] = None, session: Optional[requests.Session] = None,
+                   timeout: int = 15, force: bool = False, consumer: Optional[str] = None):
+        """
+        以條件式請求抓取並解析 RSS feed (取代 feedparser.parse(url))
+
+        Args:
+            url: feed 網址
+            source: 統計用的來源名稱
+            session: 使用的 requests Session
+            timeout: 請求超時時間(秒)
+            force: 內容未變更時仍解析
+            consumer: 使用端名稱，預設為來源名稱
+
+        Returns:
+            feedparser 解析結果；內容未變更時返回 None
+
+        Raises:
+            requests.exceptions.RequestException: 請求失敗
+        """
+        import feedparser
+
+        response = self.fetch(url, session=session, source=source, timeout=timeout, force=force,
+                              consumer=consumer)
+        if response is None:
+            return None
+        return feedparser.parse(response.content, response_headers=dict(response.headers))
+
+    def forget(self, url: str, consumer: Optional[str] = None):
+        """刪除網址的快取紀錄 (下次請求會重新下載並解析)，預設刪除所有使用端的紀錄"""
+        with self._lock:
+            for key in [key for key in self._pending if key[1] == url and consumer in (None, key[0])]:
+                del self._pending[key]
+        if consumer is None:
+            self._execute('DELETE FROM http_cache WHERE url = ?', (url,))
+        else:
+            self._execute('DELETE FROM http_cache WHERE consumer = ? AND url = ?', (consumer, url))
+
+    def get_stats(self, cumulative: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        取得各來源的節省統計
+
+        Args:
+            cumulative: 是否返回歷次執行的累計統計 (預設為本次執行)
+
+        Returns:
+            {來源: {requests, changed, not_modified, unchanged, errors, bytes_downloaded, bytes_saved, parses_skipped}}
+        """
+        if not cumulative:
+            with self._lock:
+                return {source: dict(stats) for source, stats in self.run_stats.items()}
+
+        try:
+            with self._lock:
+                rows = self._connection().execute(
+                    f"SELECT source, {', '.join(STAT_FIELDS)} FROM http_cache_stats ORDER BY source"
+                ).fetchall()
+        except Exception as e:
+            logger.error(f"❌ 讀取 HTTP 快取統計失敗: {e}")
+            return {}
+        return {row[0]: dict(zip(STAT_FIELDS, row[1:])) for row in rows}
+
+    def reset_run_stats(self):
+        """清除本次執行的統計 (每次排程爬取開始時呼叫)"""
+        with self._lock:
+            self.run_stats.clear()
+
+    def report(self, cumulative: bool = False) -> List[str]:
+        """
+        產生各來源的節省報告並寫入日誌
+
+        Args:
+            cumulative: 是否使用歷次執行的累計統計
+
+        Returns:
+            報告文字列表 (每個來源一行)
+        """
+        lines = []
+        for source, stats in sorted(self.get_stats(cumulative).items()):
+            skipped = stats['not_modified'] + stats['unchanged']
+            lines.append(
+                f"📡 {source}: 請求 {stats['requests']} 次，未變更 {skipped} 次 "
+                f"(304: {stats['not_modified']})，失敗 {stats['errors']} 次，略過解析 {stats['parses_skipped']} 次，"
+                f"下載 {stats['bytes_downloaded'] / 1024:.1f} KB，節省 {stats['bytes_saved'] / 1024:.1f} KB"
+            )
+        for line in lines:
+            logger.info(line)
+        return lines
+
+    def close(self):
+        """關閉資料庫連線"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全域 HTTP 快取實例
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """
+    取得全域 HTTP 快取實例
+
+    Returns:
+        HttpCache 實例
+    """
+    global _http_cache
+    if _http_cache is None:
+        with _http_cache_lock:
+            if _http_cache is None:
+                _http_cache = HttpCache()
+    return _http_cache
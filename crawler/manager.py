@@ -18,6 +18,9 @@ import importlib
 # 導入輔助模組
 from crawler.helper import CrawlerHelper
 from crawler.date_filter import NewsDateFilter
+from crawler.http_cache import get_http_cache
+from crawler.crawl_state import get_crawl_state
+from crawler.seen_index import SeenIndex, get_seen_index, news_db_key
 
 logger = logging.getLogger('crawler.manager')
 
@@ -57,6 +60,7 @@ class CrawlerManager:
             logger.warning(f"載入真實爬蟲失敗 (非關鍵錯誤): {e}")
         
         self.is_running = False
+        self._save_failed = False  # 本次執行是否有新聞寫入資料庫失敗
         self.last_crawl_time = None
         self.stats = {
             'total_news': 0,
@@ -131,6 +135,10 @@ class CrawlerManager:
         
         try:
             logger.info("🚀 開始執行新聞爬取任務")
+            http_cache = get_http_cache()
+            http_cache.reset_run_stats()
+            crawl_state = get_crawl_state()
+            crawl_state.reset_run_stats()
             
             if use_mock:
                 # 使用模擬數據
@@ -145,87 +153,70 @@ class CrawlerManager:
                 })
                 self.stats['successful_crawls'] += 1
             
-            # 嘗試工商時報爬蟲
+            # 各來源位於不同主機，同時爬取 (同一主機的請求頻率由共用的爬蟲排程器控制)，
+            # 總時間接近最慢的單一來源
+            source_tasks = []
             if 'ctee' in self.crawlers:
-                logger.info("🔍 嘗試工商時報保險版爬蟲")
-                try:
-                    ctee_crawler = self.crawlers['ctee']
-                    result = ctee_crawler.crawl(max_pages=1, max_details=10)
-                    ctee_news = result.get('news', [])
-                    all_news.extend(ctee_news)
-                    crawl_results.append({
-                        'source': '工商時報保險版',
-                        'success': True,
-                        'news_count': len(ctee_news),
-                        'message': f'成功爬取工商時報新聞 {len(ctee_news)} 則'
-                    })
-                    self.stats['successful_crawls'] += 1
-                except Exception as e:
-                    logger.error(f"工商時報爬蟲失敗: {e}")
-                    crawl_results.append({
-                        'source': '工商時報保險版', 
-                        'success': False,
-                        'news_count': 0,
-                        'message': f'爬取失敗: {str(e)}'
-                    })
-                    self.stats['failed_crawls'] += 1
-            
-            # 嘗試其他爬蟲
+                source_tasks.append((
+                    '工商時報保險版',
+                    lambda: self.crawlers['ctee'].crawl(max_pages=1, max_details=10).get('news', []),
+                    '成功爬取工商時報新聞 {count} 則',
+                    'ctee'
+                ))
             if 'real' in self.crawlers:
-                # 使用真實爬蟲
-                logger.info("🔍 嘗試真實新聞爬蟲")
-                try:
-                    real_news = self.crawlers['real'].crawl_all_sources()
-                    all_news.extend(real_news)
-                    crawl_results.append({
-                        'source': '真實新聞爬蟲',
-                        'success': True,
-                        'news_count': len(real_news),
-                        'message': f'成功爬取真實新聞 {len(real_news)} 則'
-                    })
-                    self.stats['successful_crawls'] += 1
-                except Exception as e:
-                    logger.error(f"真實爬蟲失敗: {e}")
-                    crawl_results.append({
-                        'source': '真實爬蟲', 
-                        'success': False,
-                        'news_count': 0,
-                        'message': f'爬取失敗: {str(e)}'
-                    })
-                    self.stats['failed_crawls'] += 1
-            
+                source_tasks.append(('真實新聞爬蟲', self.crawlers['real'].crawl_all_sources,
+                                     '成功爬取真實新聞 {count} 則', 'real'))
             # 備用RSS爬蟲 (實驗性)
-            logger.info("🔍 嘗試RSS爬蟲 (備用)")
-            try:
-                rss_news = self.crawlers['rss'].crawl_all_feeds()
-                all_news.extend(rss_news)
-                crawl_results.append({
-                    'source': 'RSS爬蟲',
-                    'success': True,
-                    'news_count': len(rss_news),
-                    'message': '成功爬取RSS新聞'
-                })
-                self.stats['successful_crawls'] += 1
-            except Exception as e:
-                logger.error(f"RSS爬蟲失敗: {e}")
-                crawl_results.append({
-                    'source': 'RSS爬蟲', 
-                    'success': False,
-                    'news_count': 0,
-                    'message': f'爬取失敗: {str(e)}'
-                })
-                self.stats['failed_crawls'] += 1
+            source_tasks.append(('RSS爬蟲', self.crawlers['rss'].crawl_all_feeds, '成功爬取RSS新聞', 'rss'))
+            
+            # 爬取成功且新聞寫入資料庫後才使 HTTP 快取紀錄生效的爬蟲
+            completed_crawlers = []
+            with ThreadPoolExecutor(max_workers=len(source_tasks)) as executor:
+                futures = []
+                for name, task, message, crawler_key in source_tasks:
+                    logger.info(f"🔍 嘗試{name}")
+                    futures.append((name, message, crawler_key, executor.submit(task)))
+                
+                for name, message, crawler_key, future in futures:
+                    try:
+                        news = future.result()
+                        all_news.extend(news)
+                        crawl_results.append({
+                            'source': name,
+                            'success': True,
+                            'news_count': len(news),
+                            'message': message.format(count=len(news))
+                        })
+                        self.stats['successful_crawls'] += 1
+                        completed_crawlers.append(crawler_key)
+                    except Exception as e:
+                        logger.error(f"{name}失敗: {e}")
+                        crawl_results.append({
+                            'source': name,
+                            'success': False,
+                            'news_count': 0,
+                            'message': f'爬取失敗: {str(e)}'
+                        })
+                        self.stats['failed_crawls'] += 1
+            
+            # 各來源條件式請求節省的下載量與解析次數
+            http_cache.report()
             
             # 儲存新聞到資料庫
+            self._save_failed = False
             if all_news:
                 # 應用日期過濾
                 filtered_news = self.date_filter.filter_news_list(all_news)
+                # 過舊而不儲存的新聞同樣記入爬取水位，下次不再抓取
+                kept = {id(news) for news in filtered_news}
+                self._mark_crawled([news for news in all_news if id(news) not in kept])
                 if filtered_news:
                     saved_count = self._save_news_to_database(filtered_news)
                     self.stats['total_news'] += saved_count
                     logger.info(f"💾 成功儲存 {saved_count} 則新聞到資料庫")
                 else:
                     logger.info("⚠️ 經過日期過濾後沒有新聞需要儲存")
+            self._settle_http_cache(completed_crawlers if not self._save_failed else [])
             
             self.last_crawl_time = start_time
             
@@ -237,12 +228,15 @@ class CrawlerManager:
                 'results': crawl_results,
                 'stats': self.stats,
                 'filter_status': self.date_filter.get_status(),
+                'http_cache': http_cache.get_stats(),
+                'crawl_state': crawl_state.get_stats(),
                 'total': len(all_news),
                 'new': len(filtered_news) if "filtered_news" in locals() else 0
             }
             
         except Exception as e:
             logger.error(f"❌ 爬取任務執行失敗: {e}")
+            self._settle_http_cache([])
             return {
                 'status': 'error',
                 'message': f'爬取失敗: {str(e)}',
@@ -253,6 +247,23 @@ class CrawlerManager:
         finally:
             self.is_running = False
     
+    def _settle_http_cache(self, completed_crawlers: List[str]) -> None:
+        """
+        使爬蟲暫存的 HTTP 快取紀錄生效 (其餘爬蟲捨棄暫存紀錄，下次仍會重新解析)
+        
+        Args:
+            completed_crawlers: 爬取成功且新聞已全部寫入資料庫的爬蟲鍵值
+        """
+        http_cache = get_http_cache()
+        for key, crawler in self.crawlers.items():
+            consumer = getattr(crawler, 'HTTP_CACHE_CONSUMER', None)
+            if not consumer:
+                continue
+            if key in completed_crawlers:
+                http_cache.commit(consumer)
+            else:
+                http_cache.discard(consumer)
+    
     def _save_news_to_database(self, news_list: List[Dict[str, Any]]) -> int:
         """將新聞儲存到資料庫"""
         try:
@@ -267,8 +278,13 @@ class CrawlerManager:
             
             app = create_app(Config)
             saved_count = 0
+            saved_news = []
+            # 已寫入或已存在的新聞 (寫入後更新爬取水位)
+            stored_news = []
             
             with app.app_context():
+                # 此新聞資料庫的索引 (先補入其他途徑寫入的新聞)：已索引的新聞不需查詢資料庫
+                seen_index = self._synced_seen_index(db, News)
                 for news_data in news_list:
                     try:
                         # 開始新的事務處理每條新聞
@@ -276,19 +292,31 @@ class CrawlerManager:
                             # 檢查重複 - 使用URL檢查(更可靠)
                             url = news_data.get('url', '')
                             if url:
+                                if seen_index and seen_index.contains(url=url):
+                                    logger.info(f"新聞已存在，跳過: {news_data.get('title', 'No title')}")
+                                    stored_news.append(news_data)
+                                    continue
                                 # 使用 no_autoflush 避免在查詢時觸發 flush
                                 with db.session.no_autoflush:
                                     existing = News.query.filter_by(url=url).first()
                                     if existing:
                                         logger.info(f"新聞已存在，跳過: {news_data.get('title', 'No title')}")
+                                        if seen_index:
+                                            seen_index.add(url=url)
+                                        stored_news.append(news_data)
                                         continue
                             
                             # 如果沒有URL，則檢查標題
                             if not url:
+                                if seen_index and seen_index.contains(title=news_data['title']):
+                                    logger.info(f"相同標題新聞已存在，跳過: {news_data['title']}")
+                                    continue
                                 with db.session.no_autoflush:
                                     existing = News.query.filter_by(title=news_data['title']).first()
                                     if existing:
                                         logger.info(f"相同標題新聞已存在，跳過: {news_data['title']}")
+                                        if seen_index:
+                                            seen_index.add(title=news_data['title'])
                                         continue
                             
                             # 處理分類
@@ -333,20 +361,109 @@ class CrawlerManager:
                             )
                             
                             db.session.add(news)
+                            db.session.flush()
+                            saved_news.append({
+                                'id': news.id,
+                                'title': news.title,
+                                'content': news.content
+                            })
                             # 事務會在 with 塊結束時自動提交
                             saved_count += 1
+                        if seen_index:
+                            seen_index.add(url=url, title=news_data['title'])
+                        stored_news.append(news_data)
                             
                     except Exception as e:
                         logger.error(f"儲存單則新聞失敗: {e}")
+                        self._save_failed = True
                         # 事務會自動回滾
                         continue
                 
+                if saved_news:
+                    self._on_news_saved(saved_news)
+                self._mark_crawled(stored_news)
+                
                 return saved_count
                 
         except Exception as e:
             logger.error(f"資料庫操作失敗: {e}")
+            self._save_failed = True
             return 0
     
+    def _synced_seen_index(self, db, News) -> Optional[SeenIndex]:
+        """
+        取得目前新聞資料庫的索引並同步其他途徑寫入的新聞 (需在 app context 中呼叫)
+        
+        Args:
+            db: SQLAlchemy 實例
+            News: 新聞模型
+            
+        Returns:
+            SeenIndex 實例；記憶體資料庫或同步失敗時返回 None (一律查詢資料庫)
+        """
+        try:
+            url = db.engine.url
+            if url.get_backend_name() == 'sqlite':
+                if not url.database or url.database == ':memory:':
+                    return None
+                seen_index = get_seen_index(url.database)
+                seen_index.sync_from_news(url.database)
+                return seen_index
+            
+            news_db = url.render_as_string(hide_password=True)
+            seen_index = get_seen_index(news_db)
+            max_id = db.session.query(db.func.max(News.id)).scalar() or 0
+            seen_index.sync_rows(
+                news_db_key(news_db), None, max_id,
+                lambda last_id: db.session.query(News.id, News.title, News.url, News.status)
+                .filter(News.id > last_id).order_by(News.id).all()
+            )
+            return seen_index
+        except Exception as e:
+            logger.warning(f"同步新聞索引失敗，改為查詢資料庫: {e}")
+            return None
+    
+    def _mark_crawled(self, news_list: List[Dict[str, Any]]) -> None:
+        """
+        將爬蟲取得的新聞記入各來源的爬取水位 (模擬新聞沒有 crawl_source，不記錄)
+        
+        Args:
+            news_list: 已處理的新聞
+        """
+        by_source = {}
+        for news in news_list:
+            if news.get('crawl_source'):
+                by_source.setdefault(news['crawl_source'], []).append(news)
+        
+        crawl_state = get_crawl_state()
+        for source, items in by_source.items():
+            crawl_state.mark_seen(source, items)
+    
+    def _on_news_saved(self, saved_news: List[Dict[str, Any]]) -> None:
+        """
+        新聞寫入資料庫後的後續處理 (更新相似新聞索引、預先計算分析結果)
+        
+        Args:
+            saved_news: 已儲存的新聞，包含 id, title, content
+        """
+        try:
+            from analyzer.similarity_index import get_similarity_index
+            
+            index = get_similarity_index()
+            index.add_documents(
+                (news['id'], f"{news['title']} {news['content']}") for news in saved_news
+            )
+            index.save()
+        except Exception as e:
+            logger.warning(f"更新相似新聞索引失敗 (非關鍵錯誤): {e}")
+        
+        try:
+            from analyzer.materialization import materialize_news
+            
+            materialize_news(news['id'] for news in saved_news)
+        except Exception as e:
+            logger.warning(f"預先計算新聞分析失敗 (非關鍵錯誤): {e}")
+    
     def get_crawler_status(self) -> Dict[str, Any]:
         """獲取爬蟲狀態"""
         return {
@@ -482,6 +599,7 @@ class CrawlerManager:
             all_news = result.get('news', [])
             
             # 將新聞保存到資料庫
+            self._save_failed = False
             if all_news:
                 # 應用日期過濾
                 filtered_news = self.date_filter.filter_news_list(all_news)
@@ -491,6 +609,10 @@ class CrawlerManager:
                     logger.info(f"💾 成功儲存 {saved_count} 則新聞到資料庫")
                 else:
                     logger.info("⚠️ 經過日期過濾後沒有新聞需要儲存")
+            self._settle_http_cache(
+                [item['crawler'] for item in result.get('results', []) if item.get('success') and item.get('crawler')]
+                if not self._save_failed else []
+            )
             
             # 更新爬取時間
             self.last_crawl_time = datetime.now(timezone.utc)
@@ -510,6 +632,7 @@ class CrawlerManager:
         
         except Exception as e:
             logger.error(f"❌ 爬取任務執行失敗: {e}")
+            self._settle_http_cache([])
             return {
                 'status': 'error',
                 'message': f'爬取失敗: {str(e)}',
@@ -0,0 +1,307 @@
+"""
+MinHash / LSH 近似重複索引
+MinHash LSH Near-Duplicate Index
+
+為每篇新聞的標題與內容分別計算 MinHash 簽名，並以 LSH 分段雜湊建立桶索引。
+查詢時只需比對落入相同桶的候選新聞，不必與全部歷史新聞逐一計算相似度。
+索引可保存至磁碟，於下次爬取時直接載入。
+"""
+
+import json
+import logging
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('crawler')
+
+# 2^31 - 1 (梅森質數)，確保 a * x + b 不會超出 uint64 範圍
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_EMPTY_VALUE = np.uint32(0xFFFFFFFF)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def char_shingles(text: str, size: int) -> Set[str]:
+    """
+    產生字元 n-gram 集合 (忽略空白)
+
+    Args:
+        text: 文本
+        size: n-gram 長度
+
+    Returns:
+        n-gram 集合
+    """
+    if not text:
+        return set()
+    text = _WHITESPACE_RE.sub('', text.lower())
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def optimal_bands(num_perm: int, threshold: float, min_recall: float = 0.99) -> int:
+    """
+    依相似度閾值選擇 LSH 分段數
+
+    相似度恰為閾值的兩篇新聞成為候選項的機率為 1 - (1 - s^rows)^bands，
+    在機率不低於 min_recall 的分段方式中選擇每段列數最多 (候選項最少) 的一種
+
+    Args:
+        num_perm: 雜湊函數數量
+        threshold: 相似度閾值
+        min_recall: 閾值處的最低候選機率
+
+    Returns:
+        分段數 (可整除 num_perm)
+    """
+    for bands in (b for b in range(1, num_perm + 1) if num_perm % b == 0):
+        rows = num_perm // bands
+        if 1.0 - (1.0 - threshold ** rows) ** bands >= min_recall:
+            return bands
+    return num_perm
+
+
+class MinHashLSHIndex:
+    """標題 / 內容雙欄位 MinHash LSH 索引"""
+
+    FIELDS = ('title', 'content')
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        """
+        初始化索引
+
+        Args:
+            num_perm: 每個欄位的雜湊函數數量
+            bands: 每個欄位的 LSH 分段數 (num_perm 必須可被整除)
+            seed: 雜湊參數亂數種子 (保存與載入時必須一致)
+        """
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) 必須可被 bands ({bands}) 整除")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+
+        rng = np.random.RandomState(seed)
+        max_value = int(_MERSENNE_PRIME)
+        self._a = rng.randint(1, max_value, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, max_value, size=num_perm).astype(np.uint64)
+
+        self._signatures: Dict[str, np.ndarray] = {}    # 鍵值 -> (欄位數 * num_perm) 簽名
+        self._added_at: Dict[str, float] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(len(self.FIELDS) * bands)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    # ------------------------------------------------------------------
+    # 簽名
+    # ------------------------------------------------------------------
+    def _minhash(self, shingles: Set[str]) -> np.ndarray:
+        """計算單一欄位的 MinHash 簽名"""
+        if not shingles:
+            return np.full(self.num_perm, _EMPTY_VALUE, dtype=np.uint32)
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in shingles),
+            dtype=np.uint64, count=len(shingles)
+        ) & _MERSENNE_PRIME
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def signature(self, title_shingles: Set[str], content_shingles: Set[str]) -> np.ndarray:
+        """
+        計算新聞簽名
+
+        Args:
+            title_shingles: 標題 n-gram 集合
+            content_shingles: 內容 n-gram 集合
+
+        Returns:
+            標題簽名與內容簽名串接後的陣列
+        """
+        return np.concatenate([self._minhash(title_shingles), self._minhash(content_shingles)])
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        """產生 (桶編號, 分段鍵值)，空欄位不參與分桶"""
+        for field_index in range(len(self.FIELDS)):
+            offset = field_index * self.num_perm
+            if signature[offset] == _EMPTY_VALUE:
+                continue
+            for band in range(self.bands):
+                start = offset + band * self.rows
+                yield field_index * self.bands + band, signature[start:start + self.rows].tobytes()
+
+    def estimate_similarity(self, sig1: np.ndarray, sig2: np.ndarray) -> Tuple[float, float]:
+        """
+        以簽名估計標題與內容的 Jaccard 相似度
+
+        Returns:
+            (標題相似度, 內容相似度)
+        """
+        estimates = []
+        for field_index in range(len(self.FIELDS)):
+            offset = field_index * self.num_perm
+            part1 = sig1[offset:offset + self.num_perm]
+            part2 = sig2[offset:offset + self.num_perm]
+            if part1[0] == _EMPTY_VALUE or part2[0] == _EMPTY_VALUE:
+                estimates.append(0.0)
+            else:
+                estimates.append(float(np.mean(part1 == part2)))
+        return estimates[0], estimates[1]
+
+    # ------------------------------------------------------------------
+    # 更新與查詢
+    # ------------------------------------------------------------------
+    def add(self, key: str, signature: np.ndarray, added_at: Optional[float] = None):
+        """
+        加入 (或更新) 一篇新聞的簽名
+
+        Args:
+            key: 新聞鍵值
+            signature: 新聞簽名
+            added_at: 加入時間 (epoch 秒)，預設為現在
+        """
+        if key in self._signatures:
+            self.remove(key)
+
+        self._signatures[key] = signature
+        self._added_at[key] = added_at if added_at is not None else time.time()
+        for bucket_index, band_key in self._band_keys(signature):
+            self._buckets[bucket_index].setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str) -> bool:
+        """
+        移除新聞簽名
+
+        Args:
+            key: 新聞鍵值
+
+        Returns:
+            是否成功移除
+        """
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return False
+
+        self._added_at.pop(key, None)
+        for bucket_index, band_key in self._band_keys(signature):
+            bucket = self._buckets[bucket_index].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[bucket_index][band_key]
+        return True
+
+    def get_signature(self, key: str) -> Optional[np.ndarray]:
+        """取得已索引新聞的簽名"""
+        return self._signatures.get(key)
+
+    def query(self, signature: np.ndarray) -> Set[str]:
+        """
+        查詢至少有一個分段相同的候選新聞
+
+        Args:
+            signature: 查詢簽名
+
+        Returns:
+            候選新聞鍵值集合
+        """
+        candidates: Set[str] = set()
+        for bucket_index, band_key in self._band_keys(signature):
+            bucket = self._buckets[bucket_index].get(band_key)
+            if bucket:
+                candidates.update(bucket)
+        return candidates
+
+    def remove_older_than(self, cutoff: float) -> List[str]:
+        """
+        移除加入時間早於指定時間的簽名
+
+        Args:
+            cutoff: 截止時間 (epoch 秒)
+
+        Returns:
+            被移除的鍵值列表
+        """
+        expired = [key for key, added_at in self._added_at.items() if added_at < cutoff]
+        for key in expired:
+            self.remove(key)
+        return expired
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+    def save(self, index_dir: str):
+        """
+        將索引保存至磁碟 (分桶於載入時重建)
+
+        Args:
+            index_dir: 索引目錄
+        """
+        path = Path(index_dir)
+        path.mkdir(parents=True, exist_ok=True)
+
+        keys = list(self._signatures)
+        width = len(self.FIELDS) * self.num_perm
+        signatures = (np.vstack([self._signatures[k] for k in keys]) if keys
+                      else np.zeros((0, width), dtype=np.uint32))
+        added_at = np.array([self._added_at[k] for k in keys], dtype=np.float64)
+
+        np.savez(path / 'signatures.npz', signatures=signatures, added_at=added_at)
+        with open(path / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'num_perm': self.num_perm,
+                'bands': self.bands,
+                'seed': self.seed,
+                'keys': keys
+            }, f, ensure_ascii=False)
+
+        logger.info(f"已保存去重索引: {path} ({len(keys)} 條新聞)")
+
+    def load(self, index_dir: str) -> bool:
+        """
+        從磁碟載入索引
+
+        Args:
+            index_dir: 索引目錄
+
+        Returns:
+            是否成功載入
+        """
+        path = Path(index_dir)
+        meta_path = path / 'meta.json'
+        if not meta_path.exists():
+            return False
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            if (meta['num_perm'], meta['bands'], meta['seed']) != (self.num_perm, self.bands, self.seed):
+                logger.warning("去重索引參數不一致，忽略已保存的索引")
+                return False
+
+            data = np.load(path / 'signatures.npz')
+            signatures = data['signatures']
+            added_at = data['added_at']
+
+            for row, key in enumerate(meta['keys']):
+                self.add(key, signatures[row], float(added_at[row]))
+
+            logger.info(f"已載入去重索引: {len(self)} 條新聞")
+            return True
+
+        except Exception as e:
+            logger.error(f"載入去重索引失敗: {e}")
+            return False
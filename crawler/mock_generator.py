@@ -6,13 +6,21 @@ Mock News Generator
 """
 
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import random
 
 class MockNewsGenerator:
     """模擬新聞生成器"""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        """
+        初始化生成器
+        
+        Args:
+            seed: 隨機種子，指定時每次生成相同的新聞內容 (發布時間仍相對於目前時間)
+        """
+        self.random = random.Random(seed) if seed is not None else random
+        
         self.news_templates = [
             {
                 'title': '金管會發布{year}年保險業數位轉型新指引',
@@ -60,15 +68,15 @@ class MockNewsGenerator:
         news_list = []
         
         for i in range(count):
-            template = random.choice(self.news_templates)
-            source = random.choice(self.sources)
+            template = self.random.choice(self.news_templates)
+            source = self.random.choice(self.sources)
             
             # 生成隨機數據
             year = 2025
-            month = random.randint(1, 12)
-            amount = random.randint(50, 500)
-            growth = random.randint(5, 25)
-            company = random.choice(self.companies)
+            month = self.random.randint(1, 12)
+            amount = self.random.randint(50, 500)
+            growth = self.random.randint(5, 25)
+            company = self.random.choice(self.companies)
             
             # 填充模板
             title = template['title'].format(
@@ -81,7 +89,7 @@ class MockNewsGenerator:
             )
             
             # 生成隨機發布時間(過去30天內)
-            days_ago = random.randint(0, 30)
+            days_ago = self.random.randint(0, 30)
             published_date = datetime.now(timezone.utc) - timedelta(days=days_ago)
             
             news_item = {
@@ -94,8 +102,8 @@ class MockNewsGenerator:
                 'category': template['category'],
                 'keywords': template['keywords'],
                 'published_date': published_date,
-                'importance_score': random.uniform(0.3, 1.0),
-                'sentiment_score': random.uniform(-0.2, 0.8)
+                'importance_score': self.random.uniform(0.3, 1.0),
+                'sentiment_score': self.random.uniform(-0.2, 0.8)
             }
             
             news_list.append(news_item)
@@ -11,19 +11,25 @@ import json
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 import logging
-import time
-import random
 import re
 import urllib.parse
-import feedparser
+
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
+from crawler.crawl_state import get_crawl_state
 
 logger = logging.getLogger('crawler.real')
 
 class RealInsuranceNewsCrawler:
     """真實保險新聞爬蟲"""
     
+    # HTTP 快取的使用端名稱 (新聞寫入資料庫後由呼叫端 commit)
+    HTTP_CACHE_CONSUMER = 'real_crawler'
+    
     def __init__(self):
         self.session = requests.Session()
+        self.scheduler = get_crawl_scheduler()
+        self.crawl_state = get_crawl_state()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -45,9 +51,14 @@ class RealInsuranceNewsCrawler:
             search_url = f"https://news.google.com/rss/search?q={encoded_query}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
             
             # 嘗試RSS方式
-            feed = feedparser.parse(search_url)
+            self.scheduler.wait(search_url)
+            feed = get_http_cache().fetch_feed(search_url, source='Google新聞', session=self.session,
+                                               consumer=self.HTTP_CACHE_CONSUMER)
             
-            if not feed.bozo and hasattr(feed, 'entries'):
+            if feed is not None and not feed.bozo and hasattr(feed, 'entries'):
+                if len(feed.entries) > 8:
+                    # 超過上限的新聞未處理，下次仍需重新解析
+                    get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
                 for entry in feed.entries[:8]:  # 限制8則新聞
                     try:
                         title = entry.get('title', '')
@@ -75,6 +86,7 @@ class RealInsuranceNewsCrawler:
             
         except Exception as e:
             print(f"❌ 搜索Google新聞失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
             return []
     
     def crawl_udn_finance(self) -> List[Dict[str, Any]]:
@@ -83,15 +95,22 @@ class RealInsuranceNewsCrawler:
         
         try:
             print("🔍 正在爬取聯合新聞網經濟日報...")
-            url = "https://udn.com/news/cate/2/6644"  # 經濟日報金融要聞
+            list_url = "https://udn.com/news/cate/2/6644"  # 經濟日報金融要聞
             
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
+            self.scheduler.wait(list_url)
+            response = get_http_cache().fetch(list_url, session=self.session, source='聯合新聞網',
+                                              consumer=self.HTTP_CACHE_CONSUMER)
+            if response is None:
+                print("⏭️ 聯合新聞網列表未變更，略過")
+                return []
             
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # 尋找新聞項目
             news_items = soup.find_all(['div', 'li'], class_=['story-list__item', 'titleicon', 'story-headline'])
+            if len(news_items) > 15:
+                # 超過上限的新聞未處理，下次仍需重新解析
+                get_http_cache().discard(self.HTTP_CACHE_CONSUMER, list_url)
             
             for item in news_items[:15]:
                 try:
@@ -131,9 +150,6 @@ class RealInsuranceNewsCrawler:
                     news_list.append(news_item)
                     print(f"  ✅ 找到保險新聞: {title[:30]}...")
                     
-                    # 延遲避免過快請求
-                    time.sleep(random.uniform(1, 2))
-                    
                 except Exception as e:
                     logger.debug(f"處理聯合新聞網項目失敗: {e}")
                     continue
@@ -143,6 +159,7 @@ class RealInsuranceNewsCrawler:
             
         except Exception as e:
             print(f"❌ 爬取聯合新聞網失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, list_url)
             return []
     
     def crawl_ltn_finance(self) -> List[Dict[str, Any]]:
@@ -151,15 +168,22 @@ class RealInsuranceNewsCrawler:
         
         try:
             print("🔍 正在爬取自由時報財經新聞...")
-            url = "https://ec.ltn.com.tw/list/finance"
+            list_url = "https://ec.ltn.com.tw/list/finance"
             
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
+            self.scheduler.wait(list_url)
+            response = get_http_cache().fetch(list_url, session=self.session, source='自由時報',
+                                              consumer=self.HTTP_CACHE_CONSUMER)
+            if response is None:
+                print("⏭️ 自由時報列表未變更，略過")
+                return []
             
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # 更新選擇器來匹配自由時報的結構
             news_items = soup.find_all(['div', 'li'], class_=['tit', 'boxTitle', 'listItem'])
+            if len(news_items) > 15:
+                # 超過上限的新聞未處理，下次仍需重新解析
+                get_http_cache().discard(self.HTTP_CACHE_CONSUMER, list_url)
             
             for item in news_items[:15]:  # 增加檢查數量
                 try:
@@ -200,9 +224,6 @@ class RealInsuranceNewsCrawler:
                     news_list.append(news_item)
                     print(f"  ✅ 找到保險新聞: {title[:30]}...")
                     
-                    # 延遲避免過快請求
-                    time.sleep(random.uniform(1, 2))
-                    
                 except Exception as e:
                     logger.debug(f"處理自由時報新聞項目失敗: {e}")
                     continue
@@ -212,6 +233,7 @@ class RealInsuranceNewsCrawler:
             
         except Exception as e:
             print(f"❌ 爬取自由時報失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, list_url)
             return []
     
     def _is_insurance_related(self, title: str) -> bool:
@@ -243,23 +265,28 @@ class RealInsuranceNewsCrawler:
         
         print("🚀 開始爬取真實保險新聞...")
         
-        # 爬取各種來源
+        # 爬取各種來源 (各來源位於不同主機，加入共用待爬佇列同時爬取)
         crawlers = [
-            ('Google新聞', self.crawl_google_news),
-            ('聯合新聞網', self.crawl_udn_finance),
-            ('自由時報', self.crawl_ltn_finance),
+            ('Google新聞', 'https://news.google.com', self.crawl_google_news),
+            ('聯合新聞網', 'https://udn.com', self.crawl_udn_finance),
+            ('自由時報', 'https://ec.ltn.com.tw', self.crawl_ltn_finance),
         ]
         
-        for name, crawler in crawlers:
-            try:
-                print(f"\n📡 爬取來源: {name}")
-                news_list = crawler()
-                all_news.extend(news_list)
-                print(f"✅ {name} 完成，獲得 {len(news_list)} 則新聞")
-                time.sleep(random.uniform(3, 5))  # 來源間延遲
-            except Exception as e:
-                print(f"❌ 爬蟲 {name} 執行失敗: {e}")
+        frontier = self.scheduler.frontier()
+        for name, url, crawler in crawlers:
+            print(f"\n📡 爬取來源: {name}")
+            frontier.add(url, crawler)
+        
+        for (name, _, _), news_list in zip(crawlers, frontier.run()):
+            if news_list is None:
+                print(f"❌ 爬蟲 {name} 執行失敗")
                 continue
+            # 略過先前已爬取的網址，並標記來源供寫入資料庫後更新爬取水位
+            news_list = self.crawl_state.filter_new(name, news_list)
+            for news in news_list:
+                news['crawl_source'] = name
+            all_news.extend(news_list)
+            print(f"✅ {name} 完成，獲得 {len(news_list)} 則新聞")
         
         # 去重
         unique_news = []
@@ -5,7 +5,6 @@ RSS News Crawler
 通過RSS feed獲取保險相關新聞
 """
 
-import feedparser
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timezone
@@ -13,11 +12,18 @@ from typing import List, Dict, Any, Optional
 import logging
 import re
 
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
+from crawler.crawl_state import get_crawl_state
+
 logger = logging.getLogger('crawler.rss')
 
 class RSSNewsCrawler:
     """RSS新聞爬蟲"""
     
+    # HTTP 快取的使用端名稱 (新聞寫入資料庫後由呼叫端 commit)
+    HTTP_CACHE_CONSUMER = 'rss_crawler'
+    
     def __init__(self):
         self.rss_feeds = [
             {
@@ -33,6 +39,8 @@ class RSSNewsCrawler:
         ]
         
         self.session = requests.Session()
+        self.scheduler = get_crawl_scheduler()
+        self.crawl_state = get_crawl_state()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
@@ -41,14 +49,18 @@ class RSSNewsCrawler:
         """爬取所有RSS feeds"""
         all_news = []
         
+        # 各 feed 加入共用待爬佇列，不同主機的 feed 同時爬取
+        frontier = self.scheduler.frontier()
         for feed_info in self.rss_feeds:
-            try:
-                logger.info(f"🔍 正在爬取 {feed_info['name']} RSS...")
-                news_list = self.crawl_rss_feed(feed_info)
-                all_news.extend(news_list)
-                logger.info(f"✅ {feed_info['name']} 爬取到 {len(news_list)} 則新聞")
-            except Exception as e:
-                logger.error(f"❌ 爬取 {feed_info['name']} 失敗: {e}")
+            logger.info(f"🔍 正在爬取 {feed_info['name']} RSS...")
+            frontier.add(feed_info['url'], self.crawl_rss_feed, feed_info)
+        
+        for feed_info, news_list in zip(self.rss_feeds, frontier.run()):
+            if news_list is None:
+                logger.error(f"❌ 爬取 {feed_info['name']} 失敗")
+                continue
+            all_news.extend(news_list)
+            logger.info(f"✅ {feed_info['name']} 爬取到 {len(news_list)} 則新聞")
         
         return all_news
     
@@ -56,12 +68,20 @@ class RSSNewsCrawler:
         """爬取單個RSS feed"""
         try:
             # 解析RSS
-            feed = feedparser.parse(feed_info['url'])
+            self.scheduler.wait(feed_info['url'])
+            feed = get_http_cache().fetch_feed(feed_info['url'], source=feed_info['name'], session=self.session,
+                                               consumer=self.HTTP_CACHE_CONSUMER)
+            if feed is None:
+                # feed 內容未變更，略過解析與內容抓取
+                return []
             
             if feed.bozo:
                 logger.warning(f"⚠️ RSS解析有警告: {feed.bozo_exception}")
             
             news_list = []
+            if len(feed.entries) > 20:
+                # 超過上限的新聞未處理，下次仍需重新解析
+                get_http_cache().discard(self.HTTP_CACHE_CONSUMER, feed_info['url'])
             
             for entry in feed.entries[:20]:  # 限制最多20則新聞
                 try:
@@ -79,24 +99,27 @@ class RSSNewsCrawler:
                         'source': feed_info['name'],
                         'source_id': feed_info['source_id'],
                         'author': entry.get('author', ''),
-                        'tags': self._extract_tags(entry)
+                        'tags': self._extract_tags(entry),
+                        'crawl_source': feed_info['name']
                     }
                     
-                    # 獲取完整內容
-                    if news_item['url']:
-                        content = self.get_article_content(news_item['url'])
-                        news_item['content'] = content
-                    
                     news_list.append(news_item)
                     
                 except Exception as e:
                     logger.debug(f"⚠️ 處理RSS條目失敗: {e}")
                     continue
             
+            # 只為未爬取過的新聞獲取完整內容
+            news_list = self.crawl_state.filter_new(feed_info['name'], news_list)
+            for news_item in news_list:
+                if news_item['url']:
+                    news_item['content'] = self.get_article_content(news_item['url'])
+            
             return news_list
             
         except Exception as e:
             logger.error(f"❌ 爬取RSS feed失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, feed_info['url'])
             return []
     
     def _is_insurance_related(self, title: str) -> bool:
@@ -162,6 +185,7 @@ class RSSNewsCrawler:
             if not url:
                 return None
             
+            self.scheduler.wait(url)
             response = self.session.get(url, timeout=15)
             response.raise_for_status()
             
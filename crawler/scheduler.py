@@ -0,0 +1,437 @@
+"""
+爬蟲請求排程
+Crawl Scheduler
+
+以每個主機各自的令牌桶 (token bucket) 控制請求頻率，取代每次請求前不分主機的固定隨機延遲：
+- 主機的請求頻率、突發量與同時請求數由 config/sources.yaml 的 crawl_settings
+  與 config/crawler.yaml 的 scheduler 設定載入，未設定的主機使用預設值
+- 整個行程共用同一個排程器 (get_crawl_scheduler)，不同爬蟲對同一主機的請求共同受限
+- CrawlFrontier 為共用的待爬佇列，每次派發下一個主機已可請求的網址，
+  多個來源的請求交錯進行，總爬取時間接近最慢的單一來源
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger('crawler')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class HostPolicy:
+    """主機的請求限制"""
+    rate: Optional[float] = 0.5        # 每秒可發出的請求數 (None 表示不限)
+    burst: float = 1.0                 # 令牌桶容量 (允許連續發出的請求數)
+    max_concurrency: int = 2           # 同時進行的請求數上限
+
+    @classmethod
+    def from_delay_range(cls, delay_range: Tuple[float, float], **kwargs) -> 'HostPolicy':
+        """以請求間隔範圍(秒)的平均值換算請求頻率"""
+        interval = (delay_range[0] + delay_range[1]) / 2
+        return cls(rate=1.0 / interval if interval > 0 else None, **kwargs)
+
+
+class TokenBucket:
+    """
+    以預約方式運作的令牌桶
+
+    每次請求取走一個令牌，令牌不足時仍先預約 (令牌數可為負)，並返回需等待的秒數，
+    同時到達的請求因此依序錯開，不需在鎖內等待
+    """
+
+    def __init__(self, rate: Optional[float], burst: float = 1.0):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒補充的令牌數 (None 表示不限)
+            burst: 令牌桶容量
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """
+        取走一個令牌
+
+        Returns:
+            可發出請求前需等待的秒數
+        """
+        if not self.rate:
+            return 0.0
+
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def time_until_available(self) -> float:
+        """距離下一個令牌可用的秒數 (不取走令牌)"""
+        if not self.rate:
+            return 0.0
+
+        with self._lock:
+            self._refill(time.monotonic())
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+def host_of(url: str) -> str:
+    """取得網址的主機名稱 (已是主機名稱時直接返回)"""
+    return (urlparse(url).netloc if '://' in url else url).lower()
+
+
+class CrawlScheduler:
+    """依主機分配請求頻率的爬蟲排程器"""
+
+    def __init__(self, default_policy: Optional[HostPolicy] = None,
+                 host_policies: Optional[Dict[str, HostPolicy]] = None,
+                 max_workers: int = 8):
+        """
+        初始化排程器
+
+        Args:
+            default_policy: 未設定主機的請求限制
+            host_policies: {主機: 請求限制}，子網域沿用上層網域的設定
+            max_workers: CrawlFrontier 預設的同時執行數
+        """
+        self.default_policy = default_policy or HostPolicy()
+        self.host_policies = {host.lower(): policy for host, policy in (host_policies or {}).items()}
+        self.max_workers = max_workers
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {'requests': 0, 'delayed': 0, 'delay_seconds': 0.0}
+
+    @classmethod
+    def from_config(cls, sources_path: str = 'config/sources.yaml',
+                    crawler_path: str = 'config/crawler.yaml') -> 'CrawlScheduler':
+        """
+        由設定檔建立排程器
+
+        sources.yaml 各來源的 crawl_settings.delay_min/delay_max 換算為其主機的請求頻率，
+        crawler.yaml 的 scheduler 區段可設定預設值並覆蓋個別主機
+
+        Args:
+            sources_path: 新聞來源配置檔案路徑
+            crawler_path: 爬蟲設定檔案路徑
+
+        Returns:
+            CrawlScheduler 實例
+        """
+        sources = _load_yaml(sources_path).get('sources') or {}
+        settings = _load_yaml(crawler_path).get('scheduler') or {}
+
+        default_policy = HostPolicy(
+            rate=settings.get('default_rate', HostPolicy.rate),
+            burst=settings.get('default_burst', HostPolicy.burst),
+            max_concurrency=settings.get('per_host_concurrency', HostPolicy.max_concurrency)
+        )
+
+        host_policies = {}
+        for source in (sources.values() if isinstance(sources, dict) else sources):
+            crawl_settings = (source or {}).get('crawl_settings') or {}
+            if 'delay_min' not in crawl_settings and 'delay_max' not in crawl_settings:
+                continue
+            delay_min = crawl_settings.get('delay_min', crawl_settings.get('delay_max'))
+            policy = HostPolicy.from_delay_range(
+                (delay_min, crawl_settings.get('delay_max', delay_min)),
+                max_concurrency=default_policy.max_concurrency
+            )
+            for url in [source.get('base_url')] + list(source.get('list_urls') or []):
+                if url:
+                    host_policies.setdefault(host_of(url), policy)
+
+        for host, values in (settings.get('hosts') or {}).items():
+            base = host_policies.get(host.lower(), default_policy)
+            host_policies[host.lower()] = HostPolicy(
+                rate=values.get('rate', base.rate),
+                burst=values.get('burst', base.burst),
+                max_concurrency=values.get('max_concurrency', base.max_concurrency)
+            )
+
+        return cls(default_policy, host_policies, max_workers=settings.get('max_workers', 8))
+
+    def policy_for(self, host: str, delay_range: Optional[Tuple[float, float]] = None) -> HostPolicy:
+        """
+        取得主機的請求限制
+
+        Args:
+            host: 主機名稱
+            delay_range: 主機未設定時使用的請求間隔範圍(秒)，None 則使用預設值
+
+        Returns:
+            HostPolicy
+        """
+        parts = host.split('.')
+        for i in range(len(parts) - 1):
+            policy = self.host_policies.get('.'.join(parts[i:]))
+            if policy:
+                return policy
+
+        if delay_range:
+            return HostPolicy.from_delay_range(delay_range, max_concurrency=self.default_policy.max_concurrency)
+        return self.default_policy
+
+    def set_host_policy(self, host: str, policy: HostPolicy):
+        """
+        設定主機的請求限制 (已建立的令牌桶會重新建立)
+
+        Args:
+            host: 主機名稱或網址
+            policy: 請求限制
+        """
+        host = host_of(host)
+        with self._lock:
+            self.host_policies[host] = policy
+            self._buckets.pop(host, None)
+
+    def bucket(self, host: str, delay_range: Optional[Tuple[float, float]] = None) -> TokenBucket:
+        """取得主機的令牌桶 (第一次使用時依主機設定建立)"""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    policy = self.policy_for(host, delay_range)
+                    bucket = self._buckets[host] = TokenBucket(policy.rate, policy.burst)
+        return bucket
+
+    def reserve(self, url: str, delay_range: Optional[Tuple[float, float]] = None) -> float:
+        """
+        為請求預約主機的令牌
+
+        由 CrawlFrontier 派發的工作，其第一個對同一主機的請求已在派發時預約，不重複計算
+
+        Args:
+            url: 請求網址或主機名稱
+            delay_range: 主機未設定時使用的請求間隔範圍(秒)
+
+        Returns:
+            需等待的秒數
+        """
+        host = host_of(url)
+        if getattr(self._local, 'reserved_host', None) == host:
+            self._local.reserved_host = None
+            return 0.0
+
+        delay = self.bucket(host, delay_range).reserve()
+        # 排程器由多個執行緒 (來源爬取與 CrawlFrontier 工作) 共用，統計需在鎖內更新
+        with self._lock:
+            self.stats['requests'] += 1
+            if delay > 0:
+                self.stats['delayed'] += 1
+                self.stats['delay_seconds'] += delay
+        return delay
+
+    def wait(self, url: str, delay_range: Optional[Tuple[float, float]] = None) -> float:
+        """
+        等待至主機可發出請求 (同步版本)
+
+        Args:
+            url: 請求網址或主機名稱
+            delay_range: 主機未設定時使用的請求間隔範圍(秒)
+
+        Returns:
+            實際等待的秒數
+        """
+        delay = self.reserve(url, delay_range)
+        if delay > 0:
+            logger.debug(f"{host_of(url)} 等待 {delay:.2f} 秒...")
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self, url: str, delay_range: Optional[Tuple[float, float]] = None) -> float:
+        """
+        等待至主機可發出請求 (非同步版本)
+
+        Args:
+            url: 請求網址或主機名稱
+            delay_range: 主機未設定時使用的請求間隔範圍(秒)
+
+        Returns:
+            實際等待的秒數
+        """
+        delay = self.reserve(url, delay_range)
+        if delay > 0:
+            logger.debug(f"{host_of(url)} 等待 {delay:.2f} 秒...")
+            await asyncio.sleep(delay)
+        return delay
+
+    def frontier(self, max_workers: Optional[int] = None) -> 'CrawlFrontier':
+        """
+        建立使用此排程器的待爬佇列
+
+        Args:
+            max_workers: 同時執行的工作數，預設為排程器設定
+
+        Returns:
+            CrawlFrontier 實例
+        """
+        return CrawlFrontier(self, max_workers or self.max_workers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得排程統計
+
+        Returns:
+            請求數、需等待的請求數、累計等待秒數與已使用的主機數
+        """
+        with self._lock:
+            return {**self.stats, 'hosts': len(self._buckets)}
+
+
+class CrawlFrontier:
+    """
+    共用的待爬佇列
+
+    工作依主機分組，每次從令牌最早可用且未達同時請求數上限的主機取出下一個工作執行，
+    等待某一主機的令牌時，其他主機的工作照常派發
+    """
+
+    def __init__(self, scheduler: CrawlScheduler, max_workers: int = 8):
+        """
+        初始化待爬佇列
+
+        Args:
+            scheduler: 爬蟲排程器
+            max_workers: 同時執行的工作數
+        """
+        self.scheduler = scheduler
+        self.max_workers = max_workers
+        self._queues: Dict[str, deque] = {}
+        self._count = 0
+
+    def add(self, url: str, func: Callable, *args, **kwargs) -> int:
+        """
+        加入待爬工作
+
+        Args:
+            url: 工作第一個請求的網址 (決定所屬主機)
+            func: 執行爬取的函數
+            *args, **kwargs: 函數參數
+
+        Returns:
+            工作序號 (對應 run() 結果的位置)
+        """
+        index = self._count
+        self._count += 1
+        self._queues.setdefault(host_of(url), deque()).append((index, func, args, kwargs))
+        return index
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _execute(self, host: str, func: Callable, args, kwargs):
+        """在工作執行緒中執行工作，派發時已預約的令牌交由工作的第一個請求使用"""
+        self.scheduler._local.reserved_host = host
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.scheduler._local.reserved_host = None
+
+    def _next_host(self, running_per_host: Dict[str, int]) -> Tuple[Optional[str], float]:
+        """找出令牌最早可用且未達同時請求數上限的主機，返回 (主機, 需等待秒數)"""
+        best_host, best_delay = None, float('inf')
+        for host, queue in self._queues.items():
+            if not queue or running_per_host.get(host, 0) >= self.scheduler.policy_for(host).max_concurrency:
+                continue
+            delay = self.scheduler.bucket(host).time_until_available()
+            if delay < best_delay:
+                best_host, best_delay = host, delay
+        return best_host, best_delay
+
+    def run(self) -> List[Any]:
+        """
+        執行所有待爬工作
+
+        Returns:
+            工作結果列表 (依加入順序)，執行失敗的工作結果為 None
+        """
+        results: List[Any] = [None] * self._count
+        running = {}
+        running_per_host: Dict[str, int] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(self) or running:
+                host, delay = (None, float('inf'))
+                if len(running) < self.max_workers:
+                    host, delay = self._next_host(running_per_host)
+
+                if host is not None and delay <= 0:
+                    index, func, args, kwargs = self._queues[host].popleft()
+                    self.scheduler.reserve(host)
+                    future = executor.submit(self._execute, host, func, args, kwargs)
+                    running[future] = (index, host)
+                    running_per_host[host] = running_per_host.get(host, 0) + 1
+                    continue
+
+                # 等待令牌可用或任一工作完成
+                if not running:
+                    time.sleep(delay)
+                    continue
+                done, _ = wait(list(running), timeout=None if host is None else delay,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, done_host = running.pop(future)
+                    running_per_host[done_host] -= 1
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ 爬取工作失敗 ({done_host}): {e}")
+
+        self._queues.clear()
+        self._count = 0
+        return results
+
+
+def _load_yaml(path: str) -> Dict[str, Any]:
+    """讀取 YAML 設定檔 (相對路徑以專案根目錄為準)，不存在或無法解析時返回空字典"""
+    if not os.path.isabs(path) and not os.path.exists(path):
+        path = os.path.join(PROJECT_ROOT, path)
+    try:
+        import yaml
+        with open(path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"讀取爬蟲設定 {path} 失敗: {e}")
+        return {}
+
+
+# 全域排程器實例
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_crawl_scheduler() -> CrawlScheduler:
+    """
+    取得全域爬蟲排程器 (第一次呼叫時由設定檔建立)
+
+    Returns:
+        CrawlScheduler 實例
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = CrawlScheduler.from_config()
+    return _scheduler
@@ -0,0 +1,596 @@
+"""
+新聞已見過索引
+Seen News Index
+
+所有爬蟲共用的網址 / 標題重複檢查：
+- 記憶體映射 (mmap) 的 Bloom filter：查詢不存在的新聞只需檢查 k 個位元，不讀取資料庫
+- 精確索引 (SQLite 主鍵)：Bloom filter 判斷可能存在時再確認，排除誤判
+- 寫入新聞後更新索引；其他途徑寫入的新聞由 sync_from_news 依新聞 id 增量補入
+
+每個新聞資料庫 (SQLite 檔案或 DATABASE_URL) 使用各自的索引檔案；新聞資料庫被重建或更換
+(檔案識別改變、最大新聞 id 小於上次同步位置，或上次同步的最後一則新聞已不同) 時清空索引並重新同步。
+
+鍵值為正規化後網址 / 標題的 sha1，網址或標題任一已存在即視為重複。
+"""
+
+import os
+import re
+import math
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Set, Callable, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from crawler.crawl_state import normalize_url
+
+logger = logging.getLogger('crawler')
+
+_BLOOM_MAGIC = b'NEWSBLM1'
+# magic, capacity, num_bits, num_hashes, count
+_BLOOM_HEADER = struct.Struct('<8sQQQQ')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各新聞資料庫的索引檔案目錄 (以專案根目錄為準，不受工作目錄影響)
+DEFAULT_INDEX_DIR = os.path.join(PROJECT_ROOT, 'cache', 'seen_index')
+
+# 同步格式版本 (2: 所有狀態的新聞都加入索引；舊版只索引有效新聞，升級時重新完整同步)
+_SYNC_FORMAT = 2
+
+_PREFIX_TAG_RE = re.compile(r'^\s*((【.*?】|\[.*?\])\s*)+')
+_SOURCE_SUFFIX_RE = re.compile(r'\s+[-|]\s+[^-|]*$')
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_title(title: str) -> str:
+    """
+    標準化標題 (移除【】/[] 標籤、結尾的「 - 來源」、標點與多餘空白)
+
+    Args:
+        title: 原始標題
+
+    Returns:
+        標準化後的小寫標題
+    """
+    if not title:
+        return ''
+    title = _PREFIX_TAG_RE.sub('', title)
+    title = _SOURCE_SUFFIX_RE.sub('', title)
+    title = _PUNCTUATION_RE.sub('', title)
+    return _WHITESPACE_RE.sub(' ', title).strip().lower()
+
+
+def news_db_key(news_db: str) -> str:
+    """
+    新聞資料庫的識別鍵值 (SQLite 為絕對路徑，其他資料庫為移除密碼的 URL)
+
+    Args:
+        news_db: SQLite 檔案路徑、sqlite:/// URL 或 DATABASE_URL
+
+    Returns:
+        識別鍵值
+    """
+    if '://' not in news_db:
+        return os.path.abspath(news_db)
+    parts = urlsplit(news_db)
+    if parts.scheme.startswith('sqlite'):
+        return os.path.abspath(parts.path[1:]) if parts.path not in ('', '/', '/:memory:') else news_db
+    netloc = parts.netloc.rsplit('@', 1)
+    if len(netloc) == 2:
+        netloc[0] = netloc[0].split(':', 1)[0]
+    return urlunsplit((parts.scheme, '@'.join(netloc), parts.path, parts.query, ''))
+
+
+def news_keys(url: Optional[str] = None, title: Optional[str] = None) -> List[str]:
+    """
+    產生新聞的索引鍵值
+
+    Args:
+        url: 新聞網址
+        title: 新聞標題
+
+    Returns:
+        網址與標題的 sha1 鍵值列表 (空白欄位不產生鍵值)
+    """
+    keys = []
+    normalized_url = normalize_url(url) if url else ''
+    if normalized_url:
+        keys.append(hashlib.sha1(f"url:{normalized_url}".encode('utf-8')).hexdigest())
+    normalized_title = normalize_title(title)
+    if normalized_title:
+        keys.append(hashlib.sha1(f"title:{normalized_title}".encode('utf-8')).hexdigest())
+    return keys
+
+
+def _row_fingerprint(row: Tuple[int, str, str, str]) -> str:
+    """新聞列 (id, title, url, status) 的網址與標題雜湊，用於確認資料庫未被重建"""
+    return hashlib.sha1(f"{row[2] or ''}\n{row[1] or ''}".encode('utf-8')).hexdigest()
+
+
+class MmapBloomFilter:
+    """以記憶體映射檔案保存的 Bloom filter"""
+
+    def __init__(self, path: str, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        開啟或建立 Bloom filter 檔案
+
+        Args:
+            path: 檔案路徑 (已存在時沿用檔案中的容量設定)
+            capacity: 預計保存的鍵值數量
+            error_rate: 達到容量時的誤判率
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self._is_valid(self.path):
+            self._create(self.path, capacity, error_rate)
+
+        self._file = open(self.path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        _, self.capacity, self.num_bits, self.num_hashes, self.count = _BLOOM_HEADER.unpack_from(self._mmap, 0)
+        self.inode = os.fstat(self._file.fileno()).st_ino
+
+    @staticmethod
+    def _is_valid(path: Path) -> bool:
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_BLOOM_HEADER.size)
+            if len(header) < _BLOOM_HEADER.size:
+                return False
+            magic, _, num_bits, _, _ = _BLOOM_HEADER.unpack(header)
+            return magic == _BLOOM_MAGIC and path.stat().st_size == _BLOOM_HEADER.size + (num_bits + 7) // 8
+        except OSError:
+            return False
+
+    @staticmethod
+    def _create(path: Path, capacity: int, error_rate: float):
+        """建立空的 Bloom filter 檔案 (先寫入暫存檔再取代，避免其他程序讀到不完整的檔案)"""
+        capacity = max(int(capacity), 1)
+        num_bits = max(int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        num_hashes = max(int(round(num_bits / capacity * math.log(2))), 1)
+
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, capacity, num_bits, num_hashes, 0))
+            f.truncate(_BLOOM_HEADER.size + (num_bits + 7) // 8)
+        os.replace(tmp_path, path)
+
+    def _positions(self, key: str):
+        digest = bytes.fromhex(key)
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        data = self._mmap
+        offset = _BLOOM_HEADER.size
+        for pos in self._positions(key):
+            if not data[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, key: str) -> bool:
+        """
+        加入鍵值
+
+        Args:
+            key: sha1 十六進位鍵值
+
+        Returns:
+            是否為新鍵值 (至少設定了一個新位元)
+        """
+        data = self._mmap
+        offset = _BLOOM_HEADER.size
+        added = False
+        for pos in self._positions(key):
+            index = offset + (pos >> 3)
+            bit = 1 << (pos & 7)
+            if not data[index] & bit:
+                data[index] |= bit
+                added = True
+        if added:
+            self.count += 1
+            _BLOOM_HEADER.pack_into(data, 0, _BLOOM_MAGIC, self.capacity, self.num_bits, self.num_hashes, self.count)
+        return added
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+
+class SeenBatch:
+    """一次寫入作業的重複檢查 (資料庫提交後再寫入索引)"""
+
+    def __init__(self, index: 'SeenIndex'):
+        self.index = index
+        self._pending: Set[str] = set()
+        self._pending_keys: List[str] = []
+
+    def is_duplicate(self, url: Optional[str] = None, title: Optional[str] = None) -> bool:
+        """
+        檢查新聞是否已存在 (包含本次作業中已加入的新聞)
+
+        Args:
+            url: 新聞網址
+            title: 新聞標題
+
+        Returns:
+            網址或標題是否已存在
+        """
+        keys = news_keys(url, title)
+        return any(key in self._pending for key in keys) or self.index.contains_keys(keys)
+
+    def add(self, url: Optional[str] = None, title: Optional[str] = None):
+        """記錄本次作業寫入的新聞"""
+        for key in news_keys(url, title):
+            if key not in self._pending:
+                self._pending.add(key)
+                self._pending_keys.append(key)
+
+    def commit(self):
+        """將本次作業寫入的新聞加入索引 (在資料庫提交後呼叫)"""
+        self.index.add_keys(self._pending_keys)
+        self._pending.clear()
+        self._pending_keys = []
+
+
+class SeenIndex:
+    """Bloom filter 加精確索引的新聞重複檢查"""
+
+    def __init__(self, path_prefix: str = os.path.join('cache', 'seen_index'), capacity: int = 1_000_000,
+                 error_rate: float = 0.001):
+        """
+        初始化索引
+
+        Args:
+            path_prefix: 檔案路徑前綴 (<prefix>.bloom 與 <prefix>.db，相對路徑以專案根目錄為準)
+            capacity: Bloom filter 初始容量 (超過時自動擴充為兩倍)
+            error_rate: Bloom filter 誤判率
+        """
+        self.bloom_path = Path(PROJECT_ROOT, f"{path_prefix}.bloom")
+        self.db_path = Path(PROJECT_ROOT, f"{path_prefix}.db")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.RLock()
+        self._conn = None
+        self._conn_pid = None
+        self._bloom: Optional[MmapBloomFilter] = None
+        self.stats = {'lookups': 0, 'bloom_negatives': 0, 'exact_checks': 0, 'false_positives': 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得精確索引的資料庫連線 (子程序中重新建立，不共用父程序的連線)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_keys (
+                    key TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_sync (
+                    db_path TEXT PRIMARY KEY,
+                    last_id INTEGER NOT NULL,
+                    identity TEXT,
+                    last_row TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(seen_sync)')}
+            for name in ('identity', 'last_row'):
+                if name not in columns:
+                    self._conn.execute(f'ALTER TABLE seen_sync ADD COLUMN {name} TEXT')
+            if self._conn.execute('PRAGMA user_version').fetchone()[0] < _SYNC_FORMAT:
+                self._conn.execute('DELETE FROM seen_sync')
+                self._conn.execute(f'PRAGMA user_version = {_SYNC_FORMAT}')
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _filter(self) -> MmapBloomFilter:
+        """取得 Bloom filter (檔案被其他程序擴充取代時重新開啟；新建時由精確索引重建)"""
+        bloom = self._bloom
+        if bloom is not None:
+            try:
+                if os.stat(self.bloom_path).st_ino == bloom.inode:
+                    return bloom
+            except OSError:
+                pass
+            bloom.close()
+            self._bloom = None
+
+        if MmapBloomFilter._is_valid(self.bloom_path):
+            self._bloom = MmapBloomFilter(str(self.bloom_path), self.capacity, self.error_rate)
+        else:
+            self._bloom = self._build(self.bloom_path, self.capacity)
+        return self._bloom
+
+    def _build(self, path: Path, capacity: int) -> MmapBloomFilter:
+        """建立 Bloom filter 並加入精確索引中的全部鍵值 (容量至少為鍵值數的兩倍)"""
+        total = self._connection().execute('SELECT COUNT(*) FROM seen_keys').fetchone()[0]
+        bloom = MmapBloomFilter(str(path), max(capacity, total * 2), self.error_rate)
+        for (key,) in self._connection().execute('SELECT key FROM seen_keys'):
+            bloom.add(key)
+        bloom.flush()
+        if total:
+            logger.info(f"✅ 已由精確索引重建 Bloom filter: {total} 個鍵值")
+        return bloom
+
+    def _replace_filter(self, capacity: int):
+        """以精確索引的鍵值建立新的 Bloom filter 並取代現有檔案 (其他程序下次查詢時重新開啟)"""
+        tmp_path = self.bloom_path.with_name(f"{self.bloom_path.name}.grow")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        bloom = self._build(tmp_path, capacity)
+        capacity = bloom.capacity
+        bloom.close()
+        if self._bloom is not None:
+            self._bloom.close()
+            self._bloom = None
+        os.replace(tmp_path, self.bloom_path)
+        return capacity
+
+    def _grow(self):
+        """Bloom filter 已滿時以兩倍容量重建 (寫入暫存檔後取代，其他程序下次查詢時重新開啟)"""
+        capacity = self._replace_filter(self._bloom.capacity * 2)
+        logger.info(f"📈 Bloom filter 擴充容量至 {capacity}")
+
+    def reset(self):
+        """清空索引 (新聞資料庫被重建或更換時呼叫)"""
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute('DELETE FROM seen_keys')
+                conn.execute('DELETE FROM seen_sync')
+                self._replace_filter(self.capacity)
+        except Exception as e:
+            logger.error(f"❌ 清空新聞索引失敗: {e}")
+
+    def contains_keys(self, keys: Iterable[str]) -> bool:
+        """
+        檢查鍵值是否有任一已存在
+
+        Args:
+            keys: news_keys 產生的鍵值
+
+        Returns:
+            是否有鍵值已存在
+        """
+        keys = list(keys)
+        if not keys:
+            return False
+        try:
+            with self._lock:
+                self.stats['lookups'] += 1
+                bloom = self._filter()
+                candidates = [key for key in keys if key in bloom]
+                if not candidates:
+                    self.stats['bloom_negatives'] += 1
+                    return False
+
+                self.stats['exact_checks'] += 1
+                found = self._connection().execute(
+                    f"SELECT 1 FROM seen_keys WHERE key IN ({', '.join('?' for _ in candidates)}) LIMIT 1",
+                    candidates
+                ).fetchone()
+                if not found:
+                    self.stats['false_positives'] += 1
+                return found is not None
+        except Exception as e:
+            logger.error(f"❌ 查詢新聞索引失敗: {e}")
+            return False
+
+    def contains(self, url: Optional[str] = None, title: Optional[str] = None) -> bool:
+        """
+        檢查新聞是否已存在
+
+        Args:
+            url: 新聞網址
+            title: 新聞標題
+
+        Returns:
+            網址或標題是否已存在
+        """
+        return self.contains_keys(news_keys(url, title))
+
+    def add_keys(self, keys: Iterable[str]):
+        """將鍵值寫入精確索引與 Bloom filter"""
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            with self._lock:
+                now = time.time()
+                self._connection().executemany(
+                    'INSERT OR IGNORE INTO seen_keys (key, created_at) VALUES (?, ?)',
+                    [(key, now) for key in keys]
+                )
+                bloom = self._filter()
+                for key in keys:
+                    bloom.add(key)
+                if bloom.is_full:
+                    self._grow()
+                else:
+                    bloom.flush()
+        except Exception as e:
+            logger.error(f"❌ 更新新聞索引失敗: {e}")
+
+    def add(self, url: Optional[str] = None, title: Optional[str] = None):
+        """
+        將新聞加入索引
+
+        Args:
+            url: 新聞網址
+            title: 新聞標題
+        """
+        self.add_keys(news_keys(url, title))
+
+    def batch(self) -> SeenBatch:
+        """建立一次寫入作業的重複檢查"""
+        return SeenBatch(self)
+
+    def sync_from_news(self, news_db_path: str) -> int:
+        """
+        將新聞資料庫中尚未索引的新聞加入索引 (依新聞 id 增量讀取，首次呼叫時讀取全部)
+
+        Args:
+            news_db_path: 新聞 SQLite 資料庫路徑
+
+        Returns:
+            加入索引的新聞數
+        """
+        db_key = news_db_key(news_db_path)
+        if not os.path.exists(db_key):
+            return 0
+        try:
+            stat = os.stat(db_key)
+            news_conn = sqlite3.connect(db_key)
+        except Exception as e:
+            logger.error(f"❌ 同步新聞索引失敗: {e}")
+            return 0
+        try:
+            max_id = news_conn.execute('SELECT MAX(id) FROM news').fetchone()[0] or 0
+            return self.sync_rows(
+                db_key, f"{stat.st_dev}:{stat.st_ino}", max_id,
+                lambda last_id: news_conn.execute(
+                    'SELECT id, title, url, status FROM news WHERE id > ? ORDER BY id', (last_id,)
+                ).fetchall()
+            )
+        except Exception as e:
+            logger.error(f"❌ 同步新聞索引失敗: {e}")
+            return 0
+        finally:
+            news_conn.close()
+
+    def sync_rows(self, db_key: str, identity: Optional[str], max_id: int,
+                  fetch_since: Callable[[int], Iterable[Tuple[int, str, str, str]]]) -> int:
+        """
+        將新聞資料庫中尚未索引的新聞加入索引 (不論狀態，已下架或隱藏的新聞也不再重新爬取)
+
+        資料庫識別改變、最大新聞 id 小於上次同步位置，或上次同步的最後一則新聞已不同
+        (資料庫已重建或更換) 時先清空索引再完整同步
+
+        Args:
+            db_key: 新聞資料庫的識別鍵值 (news_db_key)
+            identity: 資料庫檔案識別 (無法取得時為 None，只依新聞 id 判斷)
+            max_id: 目前的最大新聞 id
+            fetch_since: 讀取 id 大於指定值的新聞 (id, title, url, status)，依 id 排序
+
+        Returns:
+            加入索引的新聞數
+        """
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    'SELECT last_id, identity, last_row FROM seen_sync WHERE db_path = ?', (db_key,)
+                ).fetchone()
+                last_id = row[0] if row else 0
+                rebuilt = row and (max_id < last_id or (identity and row[1] and identity != row[1]))
+                rows = []
+                if row and not rebuilt and last_id:
+                    # 連同上次同步的最後一則新聞一起讀取，確認仍是同一個資料庫
+                    rows = list(fetch_since(last_id - 1))
+                    if row[2] and (not rows or rows[0][0] != last_id or _row_fingerprint(rows[0]) != row[2]):
+                        rebuilt = True
+                    rows = rows[1:] if rows and rows[0][0] == last_id else rows
+                if rebuilt:
+                    logger.warning(f"⚠️ 新聞資料庫已重建或更換，重建新聞索引: {db_key}")
+                    self.reset()
+                    row, last_id = None, 0
+                if not row or not last_id:
+                    rows = list(fetch_since(0))
+
+                if not rows:
+                    if row is None or row[1] != identity:
+                        self._save_sync(db_key, last_id, identity, None)
+                    return 0
+
+                keys = []
+                for _, title, url, _ in rows:
+                    keys.extend(news_keys(url, title))
+                self.add_keys(keys)
+                added = len(rows)
+                self._save_sync(db_key, rows[-1][0], identity, _row_fingerprint(rows[-1]))
+                if added:
+                    logger.info(f"✅ 新聞索引已同步 {added} 則新聞")
+                return added
+        except Exception as e:
+            logger.error(f"❌ 同步新聞索引失敗: {e}")
+            return 0
+
+    def _save_sync(self, db_key: str, last_id: int, identity: Optional[str], last_row: Optional[str]):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO seen_sync (db_path, last_id, identity, last_row, updated_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (db_key, last_id, identity, last_row, time.time())
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得索引統計
+
+        Returns:
+            查詢次數、Bloom filter 直接排除次數、精確確認次數、誤判次數與容量
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            try:
+                bloom = self._filter()
+                stats.update(keys=bloom.count, capacity=bloom.capacity, num_hashes=bloom.num_hashes)
+            except Exception as e:
+                logger.error(f"❌ 讀取新聞索引統計失敗: {e}")
+            return stats
+
+    def close(self):
+        """關閉 Bloom filter 與資料庫連線"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.close()
+                self._bloom = None
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 各新聞資料庫的索引實例
+_seen_indexes: Dict[str, SeenIndex] = {}
+_seen_index_lock = threading.Lock()
+
+
+def get_seen_index(news_db: str) -> SeenIndex:
+    """
+    取得新聞資料庫的索引實例 (不同資料庫的索引互不共用)
+
+    Args:
+        news_db: SQLite 檔案路徑或 DATABASE_URL
+
+    Returns:
+        SeenIndex 實例
+    """
+    db_key = news_db_key(news_db)
+    index = _seen_indexes.get(db_key)
+    if index is None:
+        with _seen_index_lock:
+            index = _seen_indexes.get(db_key)
+            if index is None:
+                namespace = hashlib.sha1(db_key.encode('utf-8')).hexdigest()[:16]
+                index = _seen_indexes[db_key] = SeenIndex(os.path.join(DEFAULT_INDEX_DIR, namespace))
+    return index
@@ -12,8 +12,9 @@ from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 import logging
 from urllib.parse import urljoin, urlparse
-import time
-import random
+
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
 
 logger = logging.getLogger('crawler.yahoo')
 
@@ -24,6 +25,7 @@ class YahooInsuranceCrawler:
         self.base_url = "https://tw.news.yahoo.com"
         self.search_url = "https://tw.news.yahoo.com/tag/保險"
         self.session = requests.Session()
+        self.scheduler = get_crawl_scheduler()
         
         # 設置User-Agent
         self.session.headers.update({
@@ -58,9 +60,15 @@ class YahooInsuranceCrawler:
                 else:
                     url = f"{self.search_url}?offset={(page-1)*10}"
                 
-                # 發送請求
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
+                # 發送條件式請求 (依主機令牌桶控制請求頻率)，列表頁未變更時略過解析
+                self.scheduler.wait(url)
+                try:
+                    response = get_http_cache().fetch(url, session=self.session, source='Yahoo新聞', timeout=30)
+                except requests.exceptions.RequestException:
+                    continue
+                if response is None:
+                    logger.info(f"⏭️ 第 {page} 頁未變更，略過")
+                    continue
                 
                 # 解析HTML
                 soup = BeautifulSoup(response.content, 'html.parser')
@@ -74,9 +82,6 @@ class YahooInsuranceCrawler:
                 
                 news_list.extend(news_items)
                 logger.info(f"✅ 第 {page} 頁找到 {len(news_items)} 則新聞")
-                
-                # 隨機延遲
-                time.sleep(random.uniform(2, 4))
             
             logger.info(f"🎉 總共爬取到 {len(news_list)} 則新聞")
             return news_list
@@ -194,6 +199,7 @@ class YahooInsuranceCrawler:
             if not url:
                 return None
                 
+            self.scheduler.wait(url)
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
@@ -8,7 +8,6 @@ Daily Insurance News Crawler - 60 Articles Limit
 """
 
 import requests
-import feedparser
 import sqlite3
 import os
 from datetime import datetime, timezone, timedelta
@@ -16,7 +15,6 @@ from urllib.parse import quote
 import re
 import hashlib
 import time
-import random
 import sys
 import uuid
 
@@ -25,6 +23,10 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
+from crawler.seen_index import get_seen_index
+
 # 導入圖片提取工具
 try:
     from utils.image_extractor import extract_image_from_url
@@ -35,6 +37,9 @@ except ImportError as e:
     IMAGE_EXTRACTION_ENABLED = False
 
 class DailyInsuranceCrawler:
+    # HTTP 快取的使用端名稱 (新聞寫入資料庫後才 commit)
+    HTTP_CACHE_CONSUMER = 'daily_crawler'
+    
     def __init__(self, target_count=60):
         self.db_path = self.find_database()
         self.target_count = target_count
@@ -125,14 +130,19 @@ class DailyInsuranceCrawler:
             encoded_term = quote(search_term)
             search_url = f"https://news.google.com/rss/search?q={encoded_term}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
             
-            time.sleep(random.uniform(0.5, 1.5))
+            # 依主機令牌桶控制請求頻率
+            get_crawl_scheduler().wait(search_url)
             
-            feed = feedparser.parse(search_url)
+            feed = get_http_cache().fetch_feed(search_url, source='Google新聞', consumer=self.HTTP_CACHE_CONSUMER)
+            if feed is None:  # 內容未變更，略過解析
+                return []
             
             if hasattr(feed, 'entries'):
                 count = 0
                 for entry in feed.entries:
                     if count >= max_results:
+                        # 超過上限的新聞未處理，下次仍需重新解析
+                        get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
                         break
                     
                     title = entry.title
@@ -156,6 +166,7 @@ class DailyInsuranceCrawler:
                 
         except Exception as e:
             print(f"  ❌ 搜索 '{search_term}' 失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
             return []
     
     def fetch_daily_news(self):
@@ -212,7 +223,7 @@ class DailyInsuranceCrawler:
         seen_hashes = set()
         unique_news = []
         
-        for news in news_list:
+        for i, news in enumerate(news_list):
             content_hash = self.get_content_hash(news['title'], news['content'])
             if content_hash not in seen_hashes:
                 seen_hashes.add(content_hash)
@@ -220,6 +231,9 @@ class DailyInsuranceCrawler:
                 
                 # 達到目標數量就停止
                 if len(unique_news) >= self.target_count:
+                    if i + 1 < len(news_list):
+                        # 其餘新聞未保存，下次仍需重新解析
+                        get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
                     break
         
         print(f"✅ 去重完成，最終保留 {len(unique_news)} 則新聞")
@@ -237,14 +251,14 @@ class DailyInsuranceCrawler:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            # 獲取現有新聞的內容哈希值
-            cursor.execute("SELECT title, content FROM news WHERE status = 'active'")
-            existing_hashes = set()
-            for title, content in cursor.fetchall():
-                existing_hashes.add(self.get_content_hash(title, content or ""))
+            # 此新聞資料庫的索引 (只補入上次同步後新增的新聞，不掃描整個資料表)
+            seen_index = get_seen_index(self.db_path)
+            seen_index.sync_from_news(self.db_path)
+            seen = seen_index.batch()
             
             saved_count = 0
             duplicate_count = 0
+            save_failed = False
             
             for news_data in news_list:
                 try:
@@ -254,15 +268,13 @@ class DailyInsuranceCrawler:
                     if not title:
                         continue
                     
-                    # 檢查重複
-                    content_hash = self.get_content_hash(title, content)
-                    if content_hash in existing_hashes:
+                    # 以網址與標題檢查重複
+                    original_url = news_data.get('url', '')
+                    if seen.is_duplicate(url=original_url, title=title):
                         duplicate_count += 1
                         continue
                     
                     # 生成唯一URL
-                    import uuid
-                    original_url = news_data.get('url', '')
                     unique_url = f"{original_url}#daily_{uuid.uuid4().hex[:8]}"
                     
                     # 提取圖片 URL
@@ -304,7 +316,7 @@ class DailyInsuranceCrawler:
                         image_url  # 圖片URL
                     ))
                     
-                    existing_hashes.add(content_hash)
+                    seen.add(url=original_url, title=title)
                     saved_count += 1
                     
                     if saved_count <= 5 or saved_count % 10 == 0:
@@ -312,11 +324,19 @@ class DailyInsuranceCrawler:
                     
                 except Exception as e:
                     print(f"  ❌ 保存失敗: {e}")
+                    save_failed = True
                     continue
             
             conn.commit()
+            seen.commit()
             conn.close()
             
+            # 新聞全部寫入後才使 HTTP 快取紀錄生效，寫入失敗時下次重新解析
+            if save_failed:
+                get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
+            else:
+                get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
+            
             print(f"✅ 成功保存 {saved_count} 則新聞")
             print(f"⚠️ 跳過 {duplicate_count} 則重複新聞")
             
@@ -324,6 +344,7 @@ class DailyInsuranceCrawler:
             
         except Exception as e:
             print(f"❌ 資料庫操作失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
             return False
     
     def get_database_stats(self):
@@ -360,6 +381,8 @@ class DailyInsuranceCrawler:
             
             if not news_list:
                 print("❌ 沒有抓取到任何新聞")
+                # 已解析的 feed 都沒有保險新聞，不需再次解析
+                get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
                 return False
             
             # 2. 去重並限制數量
@@ -8,27 +8,23 @@ Enhanced Standalone Crawler
 """
 
 import requests
-import feedparser
 import sqlite3
 import os
 from datetime import datetime, timezone, timedelta
 from urllib.parse import quote
-import re
-import hashlib
+import sys
 
-def normalize_title(title):
-    """標準化標題以便更好地檢測重複"""
-    # 移除常見的前後綴
-    title = re.sub(r'^【.*?】', '', title)  # 移除【】標記
-    title = re.sub(r'\s*-\s*.*$', '', title)  # 移除來源標記
-    title = re.sub(r'\s*\|.*$', '', title)   # 移除|後的內容
-    title = re.sub(r'\s+', ' ', title).strip()  # 標準化空格
-    return title.lower()
+# 添加項目根目錄到路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
 
-def get_title_hash(title):
-    """生成標題的哈希值用於重複檢測"""
-    normalized = normalize_title(title)
-    return hashlib.md5(normalized.encode('utf-8')).hexdigest()
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
+from crawler.seen_index import get_seen_index
+
+# HTTP 快取的使用端名稱 (新聞寫入資料庫後才 commit)
+HTTP_CACHE_CONSUMER = 'enhanced_crawler'
 
 def fetch_insurance_news():
     """抓取保險新聞"""
@@ -40,9 +36,13 @@ def fetch_insurance_news():
     try:
         print("📡 來源1: Google新聞 - 保險")
         search_url = "https://news.google.com/rss/search?q=保險&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
-        feed = feedparser.parse(search_url)
+        get_crawl_scheduler().wait(search_url)
+        feed = get_http_cache().fetch_feed(search_url, source='Google新聞', consumer=HTTP_CACHE_CONSUMER)
         
         if hasattr(feed, 'entries'):
+            if len(feed.entries) > 5:
+                # 超過上限的新聞未處理，下次仍需重新解析
+                get_http_cache().discard(HTTP_CACHE_CONSUMER, search_url)
             for entry in feed.entries[:5]:
                 news_list.append({
                     'title': entry.title,
@@ -55,14 +55,19 @@ def fetch_insurance_news():
             print(f"  ✅ 獲得 {min(5, len(feed.entries))} 則新聞")
     except Exception as e:
         print(f"  ❌ Google新聞抓取失敗: {e}")
+        get_http_cache().discard(HTTP_CACHE_CONSUMER, search_url)
     
     # 2. Google新聞 - 人壽保險
     try:
         print("📡 來源2: Google新聞 - 人壽保險")
         search_url = "https://news.google.com/rss/search?q=人壽保險&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
-        feed = feedparser.parse(search_url)
+        get_crawl_scheduler().wait(search_url)
+        feed = get_http_cache().fetch_feed(search_url, source='Google新聞', consumer=HTTP_CACHE_CONSUMER)
         
         if hasattr(feed, 'entries'):
+            if len(feed.entries) > 3:
+                # 超過上限的新聞未處理，下次仍需重新解析
+                get_http_cache().discard(HTTP_CACHE_CONSUMER, search_url)
             for entry in feed.entries[:3]:
                 news_list.append({
                     'title': entry.title,
@@ -75,14 +80,19 @@ def fetch_insurance_news():
             print(f"  ✅ 獲得 {min(3, len(feed.entries))} 則新聞")
     except Exception as e:
         print(f"  ❌ 人壽保險新聞抓取失敗: {e}")
+        get_http_cache().discard(HTTP_CACHE_CONSUMER, search_url)
     
     # 3. Google新聞 - 產險
     try:
         print("📡 來源3: Google新聞 - 產險")
         search_url = "https://news.google.com/rss/search?q=產險&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
-        feed = feedparser.parse(search_url)
+        get_crawl_scheduler().wait(search_url)
+        feed = get_http_cache().fetch_feed(search_url, source='Google新聞', consumer=HTTP_CACHE_CONSUMER)
         
         if hasattr(feed, 'entries'):
+            if len(feed.entries) > 3:
+                # 超過上限的新聞未處理，下次仍需重新解析
+                get_http_cache().discard(HTTP_CACHE_CONSUMER, search_url)
             for entry in feed.entries[:3]:
                 news_list.append({
                     'title': entry.title,
@@ -95,14 +105,19 @@ def fetch_insurance_news():
             print(f"  ✅ 獲得 {min(3, len(feed.entries))} 則新聞")
     except Exception as e:
         print(f"  ❌ 產險新聞抓取失敗: {e}")
+        get_http_cache().discard(HTTP_CACHE_CONSUMER, search_url)
     
     # 4. Google新聞 - 金管會保險
     try:
         print("📡 來源4: Google新聞 - 金管會保險")
         search_url = "https://news.google.com/rss/search?q=金管會+保險&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
-        feed = feedparser.parse(search_url)
+        get_crawl_scheduler().wait(search_url)
+        feed = get_http_cache().fetch_feed(search_url, source='Google新聞', consumer=HTTP_CACHE_CONSUMER)
         
         if hasattr(feed, 'entries'):
+            if len(feed.entries) > 3:
+                # 超過上限的新聞未處理，下次仍需重新解析
+                get_http_cache().discard(HTTP_CACHE_CONSUMER, search_url)
             for entry in feed.entries[:3]:
                 news_list.append({
                     'title': entry.title,
@@ -115,6 +130,7 @@ def fetch_insurance_news():
             print(f"  ✅ 獲得 {min(3, len(feed.entries))} 則新聞")
     except Exception as e:
         print(f"  ❌ 金管會保險新聞抓取失敗: {e}")
+        get_http_cache().discard(HTTP_CACHE_CONSUMER, search_url)
     
     print(f"📊 總共抓取到 {len(news_list)} 則新聞")
     return news_list
@@ -151,14 +167,14 @@ def save_to_database(news_list):
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        # 獲取現有新聞的標題哈希值
-        cursor.execute("SELECT title FROM news WHERE status = 'active'")
-        existing_hashes = set()
-        for (title,) in cursor.fetchall():
-            existing_hashes.add(get_title_hash(title))
+        # 此新聞資料庫的索引 (只補入上次同步後新增的新聞，不掃描整個資料表)
+        seen_index = get_seen_index(db_path)
+        seen_index.sync_from_news(db_path)
+        seen = seen_index.batch()
         
         saved_count = 0
         duplicate_count = 0
+        save_failed = False
         
         for news_data in news_list:
             try:
@@ -166,9 +182,9 @@ def save_to_database(news_list):
                 if not title:
                     continue
                 
-                # 使用哈希值檢查重複
-                title_hash = get_title_hash(title)
-                if title_hash in existing_hashes:
+                # 以網址與標題檢查重複
+                url = news_data.get('url', '')
+                if seen.is_duplicate(url=url, title=title):
                     duplicate_count += 1
                     print(f"  跳過相似新聞: {title[:50]}...")
                     continue
@@ -189,7 +205,7 @@ def save_to_database(news_list):
                     unique_title,
                     news_data.get('content', ''),
                     news_data.get('summary', '')[:500],
-                    news_data.get('url', ''),
+                    url,
                     4,  # 來源ID
                     1,  # 分類ID
                     now,
@@ -201,18 +217,25 @@ def save_to_database(news_list):
                     now
                 ))
                 
-                # 添加到已存在的哈希集合
-                existing_hashes.add(title_hash)
+                seen.add(url=url, title=title)
                 saved_count += 1
                 print(f"  ✅ 保存新聞: {title[:50]}...")
                 
             except Exception as e:
                 print(f"  ❌ 保存失敗: {e}")
+                save_failed = True
                 continue
         
         conn.commit()
+        seen.commit()
         conn.close()
         
+        # 新聞全部寫入後才使 HTTP 快取紀錄生效，寫入失敗時下次重新解析
+        if save_failed:
+            get_http_cache().discard(HTTP_CACHE_CONSUMER)
+        else:
+            get_http_cache().commit(HTTP_CACHE_CONSUMER)
+        
         print(f"✅ 成功保存 {saved_count} 則新聞")
         print(f"⚠️ 跳過 {duplicate_count} 則重複新聞")
         
@@ -220,6 +243,7 @@ def save_to_database(news_list):
         
     except Exception as e:
         print(f"❌ 資料庫操作失敗: {e}")
+        get_http_cache().discard(HTTP_CACHE_CONSUMER)
         return False
 
 def main():
@@ -8,7 +8,6 @@ Smart Insurance News Crawler - Final Version
 """
 
 import requests
-import feedparser
 import sqlite3
 import os
 import yaml
@@ -17,10 +16,21 @@ from urllib.parse import quote, urlparse
 import re
 import hashlib
 import time
-import random
-import uuid
+import sys
+
+# 添加項目根目錄到路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
+from crawler.seen_index import get_seen_index
 
 class SmartInsuranceCrawler:
+    # HTTP 快取的使用端名稱 (新聞寫入資料庫後才 commit)
+    HTTP_CACHE_CONSUMER = 'smart_crawler'
+    
     def __init__(self):
         self.db_path = self.find_database()
         self.search_terms = self.get_expanded_search_terms()
@@ -101,7 +111,7 @@ class SmartInsuranceCrawler:
         # 移除常見的追蹤參數
         tracking_params = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term', 'ref', 'source']
         try:
-            from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+            from urllib.parse import parse_qs, urlencode, urlunparse
             parsed = urlparse(url)
             query_params = parse_qs(parsed.query)
             
@@ -189,15 +199,19 @@ class SmartInsuranceCrawler:
             encoded_term = quote(search_term)
             search_url = f"https://news.google.com/rss/search?q={encoded_term}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
             
-            # 隨機延遲
-            time.sleep(random.uniform(0.3, 1.5))
+            # 依主機令牌桶控制請求頻率
+            get_crawl_scheduler().wait(search_url)
             
-            feed = feedparser.parse(search_url)
+            feed = get_http_cache().fetch_feed(search_url, source='Google新聞', consumer=self.HTTP_CACHE_CONSUMER)
+            if feed is None:  # 內容未變更，略過解析
+                return []
             
             if hasattr(feed, 'entries'):
                 count = 0
                 for entry in feed.entries:
                     if count >= max_results:
+                        # 超過上限的新聞未處理，下次仍需重新解析
+                        get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
                         break
                     
                     title = entry.title
@@ -223,6 +237,7 @@ class SmartInsuranceCrawler:
                 
         except Exception as e:
             print(f"  ❌ 搜索 '{search_term}' 失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
             return []
     
     def fetch_all_news(self):
@@ -296,14 +311,14 @@ class SmartInsuranceCrawler:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            # 獲取現有新聞的內容哈希值（而不是URL）
-            cursor.execute("SELECT title, content FROM news WHERE status = 'active'")
-            existing_hashes = set()
-            for title, content in cursor.fetchall():
-                existing_hashes.add(self.get_content_hash(title, content or ""))
+            # 此新聞資料庫的索引 (只補入上次同步後新增的新聞，不掃描整個資料表)
+            seen_index = get_seen_index(self.db_path)
+            seen_index.sync_from_news(self.db_path)
+            seen = seen_index.batch()
             
             saved_count = 0
             duplicate_count = 0
+            save_failed = False
             
             for news_data in news_list:
                 try:
@@ -312,22 +327,12 @@ class SmartInsuranceCrawler:
                     if not title:
                         continue
                     
-                    # 使用內容哈希檢查重複
-                    content_hash = self.get_content_hash(title, content)
-                    if content_hash in existing_hashes:
+                    # 以網址與標題檢查重複 (已存在的網址不再寫入，不需另外產生唯一URL)
+                    url = news_data.get('url', '')
+                    if seen.is_duplicate(url=url, title=title):
                         duplicate_count += 1
                         continue
                     
-                    # 生成唯一URL（如果URL重複）
-                    original_url = news_data.get('url', '')
-                    unique_url = original_url
-                    
-                    # 檢查URL是否已存在
-                    cursor.execute("SELECT COUNT(*) FROM news WHERE url = ?", (original_url,))
-                    if cursor.fetchone()[0] > 0:
-                        # 生成唯一URL
-                        unique_url = f"{original_url}#duplicate_{uuid.uuid4().hex[:8]}"
-                    
                     # 準備插入數據
                     now = datetime.now(timezone.utc).isoformat()
                     search_term = news_data.get('search_term', '')
@@ -349,7 +354,7 @@ class SmartInsuranceCrawler:
                         enhanced_title,
                         content,
                         news_data.get('summary', '')[:500],
-                        unique_url,
+                        url,
                         4,  # 來源ID
                         1,  # 分類ID
                         now,
@@ -361,8 +366,7 @@ class SmartInsuranceCrawler:
                         now
                     ))
                     
-                    # 添加到已存在的哈希集合
-                    existing_hashes.add(content_hash)
+                    seen.add(url=url, title=title)
                     saved_count += 1
                     
                     # 顯示保存進度
@@ -371,11 +375,19 @@ class SmartInsuranceCrawler:
                     
                 except Exception as e:
                     print(f"  ❌ 保存失敗: {e}")
+                    save_failed = True
                     continue
             
             conn.commit()
+            seen.commit()
             conn.close()
             
+            # 新聞全部寫入後才使 HTTP 快取紀錄生效，寫入失敗時下次重新解析
+            if save_failed:
+                get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
+            else:
+                get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
+            
             print(f"✅ 成功保存 {saved_count} 則新聞")
             print(f"⚠️ 跳過 {duplicate_count} 則重複新聞")
             
@@ -383,6 +395,7 @@ class SmartInsuranceCrawler:
             
         except Exception as e:
             print(f"❌ 資料庫操作失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
             return False
     
     def get_database_stats(self):
@@ -426,6 +439,8 @@ class SmartInsuranceCrawler:
             
             if not news_list:
                 print("❌ 沒有抓取到任何新聞")
+                # 已解析的 feed 都沒有保險新聞，不需再次解析
+                get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
                 return False
             
             # 2. 智能去重
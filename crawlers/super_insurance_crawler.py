@@ -8,18 +8,26 @@ Super Insurance News Crawler with Expanded Keywords
 """
 
 import requests
-import feedparser
 import sqlite3
 import os
 import yaml
 from datetime import datetime, timezone, timedelta
 from urllib.parse import quote
-import re
-import hashlib
-import time
-import random
+import sys
+
+# 添加項目根目錄到路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
+from crawler.seen_index import get_seen_index
 
 class SuperInsuranceCrawler:
+    # HTTP 快取的使用端名稱 (新聞寫入資料庫後才 commit)
+    HTTP_CACHE_CONSUMER = 'super_crawler'
+    
     def __init__(self):
         self.db_path = self.find_database()
         self.keywords = self.load_expanded_keywords()
@@ -82,20 +90,6 @@ class SuperInsuranceCrawler:
         print(f"🎯 準備使用 {len(search_terms)} 個搜索關鍵字")
         return search_terms
     
-    def normalize_title(self, title):
-        """標準化標題以便更好地檢測重複"""
-        # 移除常見的前後綴
-        title = re.sub(r'^【.*?】', '', title)  # 移除【】標記
-        title = re.sub(r'\s*-\s*.*$', '', title)  # 移除來源標記
-        title = re.sub(r'\s*\|.*$', '', title)   # 移除|後的內容
-        title = re.sub(r'\s+', ' ', title).strip()  # 標準化空格
-        return title.lower()
-    
-    def get_title_hash(self, title):
-        """生成標題的哈希值用於重複檢測"""
-        normalized = self.normalize_title(title)
-        return hashlib.md5(normalized.encode('utf-8')).hexdigest()
-    
     def is_insurance_related(self, title, content=""):
         """檢查新聞是否與保險相關"""
         text = (title + " " + content).lower()
@@ -133,15 +127,19 @@ class SuperInsuranceCrawler:
             encoded_term = quote(f"{search_term} 台灣")
             search_url = f"https://news.google.com/rss/search?q={encoded_term}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
             
-            # 隨機延遲避免被限制
-            time.sleep(random.uniform(1, 3))
+            # 依主機令牌桶控制請求頻率，避免被限制
+            get_crawl_scheduler().wait(search_url)
             
-            feed = feedparser.parse(search_url)
+            feed = get_http_cache().fetch_feed(search_url, source='Google新聞', consumer=self.HTTP_CACHE_CONSUMER)
+            if feed is None:  # 內容未變更，略過解析
+                return []
             
             if hasattr(feed, 'entries'):
                 count = 0
                 for entry in feed.entries:
                     if count >= max_results:
+                        # 超過上限的新聞未處理，下次仍需重新解析
+                        get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
                         break
                     
                     title = entry.title
@@ -166,6 +164,7 @@ class SuperInsuranceCrawler:
                 
         except Exception as e:
             print(f"  ❌ 搜索失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
         
         return news_list
     
@@ -220,14 +219,14 @@ class SuperInsuranceCrawler:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            # 獲取現有新聞的標題哈希值
-            cursor.execute("SELECT title FROM news WHERE status = 'active'")
-            existing_hashes = set()
-            for (title,) in cursor.fetchall():
-                existing_hashes.add(self.get_title_hash(title))
+            # 此新聞資料庫的索引 (只補入上次同步後新增的新聞，不掃描整個資料表)
+            seen_index = get_seen_index(self.db_path)
+            seen_index.sync_from_news(self.db_path)
+            seen = seen_index.batch()
             
             saved_count = 0
             duplicate_count = 0
+            save_failed = False
             
             for news_data in news_list:
                 try:
@@ -235,9 +234,9 @@ class SuperInsuranceCrawler:
                     if not title:
                         continue
                     
-                    # 使用哈希值檢查重複
-                    title_hash = self.get_title_hash(title)
-                    if title_hash in existing_hashes:
+                    # 以網址與標題檢查重複
+                    url = news_data.get('url', '')
+                    if seen.is_duplicate(url=url, title=title):
                         duplicate_count += 1
                         continue
                     
@@ -260,7 +259,7 @@ class SuperInsuranceCrawler:
                         enhanced_title,
                         news_data.get('content', ''),
                         news_data.get('summary', '')[:500],
-                        news_data.get('url', ''),
+                        url,
                         4,  # 來源ID
                         1,  # 分類ID
                         now,
@@ -272,8 +271,7 @@ class SuperInsuranceCrawler:
                         now
                     ))
                     
-                    # 添加到已存在的哈希集合
-                    existing_hashes.add(title_hash)
+                    seen.add(url=url, title=title)
                     saved_count += 1
                     
                     # 顯示保存進度
@@ -282,11 +280,19 @@ class SuperInsuranceCrawler:
                     
                 except Exception as e:
                     print(f"  ❌ 保存失敗: {e}")
+                    save_failed = True
                     continue
             
             conn.commit()
+            seen.commit()
             conn.close()
             
+            # 新聞全部寫入後才使 HTTP 快取紀錄生效，寫入失敗時下次重新解析
+            if save_failed:
+                get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
+            else:
+                get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
+            
             print(f"✅ 成功保存 {saved_count} 則新聞")
             print(f"⚠️ 跳過 {duplicate_count} 則重複新聞")
             
@@ -294,6 +300,7 @@ class SuperInsuranceCrawler:
             
         except Exception as e:
             print(f"❌ 資料庫操作失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
             return False
     
     def get_database_stats(self):
@@ -335,6 +342,8 @@ class SuperInsuranceCrawler:
             
             if not news_list:
                 print("❌ 沒有抓取到任何新聞")
+                # 已解析的 feed 都沒有保險新聞，不需再次解析
+                get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
                 return False
             
             # 2. 應用日期過濾
@@ -342,6 +351,8 @@ class SuperInsuranceCrawler:
             
             if not filtered_news:
                 print("❌ 日期過濾後沒有新聞")
+                # 過舊的新聞本來就不保存，不需再次解析
+                get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
                 return False
             
             # 3. 保存到資料庫
@@ -8,20 +8,28 @@ Ultimate Insurance News Aggregator
 """
 
 import requests
-import feedparser
 import sqlite3
 import os
 import yaml
 from datetime import datetime, timezone, timedelta
 from urllib.parse import quote
-import re
-import hashlib
 import time
-import random
-import concurrent.futures
+import sys
 from threading import Lock
 
+# 添加項目根目錄到路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from crawler.scheduler import get_crawl_scheduler
+from crawler.http_cache import get_http_cache
+from crawler.seen_index import get_seen_index
+
 class UltimateInsuranceAggregator:
+    # HTTP 快取的使用端名稱 (新聞寫入資料庫後才 commit)
+    HTTP_CACHE_CONSUMER = 'ultimate_aggregator'
+    
     def __init__(self):
         self.db_path = self.find_database()
         self.sources_config = self.load_comprehensive_sources()
@@ -90,20 +98,6 @@ class UltimateInsuranceAggregator:
         print(f"🎯 準備使用 {len(search_terms)} 個搜索關鍵字")
         return search_terms
     
-    def normalize_title(self, title):
-        """標準化標題以便更好地檢測重複"""
-        # 移除常見的前後綴和標點
-        title = re.sub(r'^【.*?】', '', title)  # 移除【】標記
-        title = re.sub(r'\s*[-|]\s*.*$', '', title)  # 移除來源標記
-        title = re.sub(r'[^\w\s]', '', title)  # 移除標點符號
-        title = re.sub(r'\s+', ' ', title).strip()  # 標準化空格
-        return title.lower()
-    
-    def get_title_hash(self, title):
-        """生成標題的哈希值用於重複檢測"""
-        normalized = self.normalize_title(title)
-        return hashlib.md5(normalized.encode('utf-8')).hexdigest()
-    
     def is_insurance_related(self, title, content="", threshold=0.7):
         """檢查新聞是否與保險相關（增強版）"""
         text = (title + " " + content).lower()
@@ -154,15 +148,19 @@ class UltimateInsuranceAggregator:
             encoded_term = quote(search_term)
             search_url = f"https://news.google.com/rss/search?q={encoded_term}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
             
-            # 隨機延遲避免被限制
-            time.sleep(random.uniform(0.5, 2.0))
+            # 依主機令牌桶控制請求頻率，避免被限制
+            get_crawl_scheduler().wait(search_url)
             
-            feed = feedparser.parse(search_url)
+            feed = get_http_cache().fetch_feed(search_url, source='Google新聞', consumer=self.HTTP_CACHE_CONSUMER)
+            if feed is None:  # 內容未變更，略過解析
+                return []
             
             if hasattr(feed, 'entries'):
                 count = 0
                 for entry in feed.entries:
                     if count >= max_results:
+                        # 超過上限的新聞未處理，下次仍需重新解析
+                        get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
                         break
                     
                     title = entry.title
@@ -190,6 +188,7 @@ class UltimateInsuranceAggregator:
         except Exception as e:
             print(f"  ❌ 搜索 '{search_term}' 失敗: {e}")
             self.results['errors'] += 1
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, search_url)
             return []
     
     def fetch_rss_source(self, source_name, rss_url):
@@ -197,10 +196,16 @@ class UltimateInsuranceAggregator:
         news_list = []
         
         try:
-            feed = feedparser.parse(rss_url)
+            get_crawl_scheduler().wait(rss_url)
+            feed = get_http_cache().fetch_feed(rss_url, source=source_name, consumer=self.HTTP_CACHE_CONSUMER)
+            if feed is None:  # 內容未變更，略過解析
+                return []
             
             if hasattr(feed, 'entries'):
                 count = 0
+                if len(feed.entries) > 10:
+                    # 超過上限的新聞未處理，下次仍需重新解析
+                    get_http_cache().discard(self.HTTP_CACHE_CONSUMER, rss_url)
                 for entry in feed.entries[:10]:  # RSS源最多取10則
                     title = entry.title
                     summary = entry.get('summary', '')
@@ -225,6 +230,8 @@ class UltimateInsuranceAggregator:
                 
         except Exception as e:
             print(f"  ❌ RSS源 '{source_name}' 抓取失敗: {e}")
+            self.results['errors'] += 1
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER, rss_url)
             return []
     
     def fetch_all_news_parallel(self):
@@ -235,49 +242,25 @@ class UltimateInsuranceAggregator:
         print(f"📊 將使用 {len(self.search_terms)} 個搜索關鍵字")
         print("=" * 70)
         
-        # 並行處理搜索關鍵字
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # 提交所有搜索任務
-            future_to_search = {}
-            
-            for search_term in self.search_terms:
-                future = executor.submit(self.fetch_google_news_batch, search_term)
-                future_to_search[future] = search_term
-                self.results['total_searched'] += 1
-            
-            # 收集結果
-            completed = 0
-            for future in concurrent.futures.as_completed(future_to_search):
-                search_term = future_to_search[future]
-                try:
-                    news_list = future.result()
-                    all_news.extend(news_list)
-                    completed += 1
-                    
-                    if completed % 10 == 0:
-                        print(f"📈 已完成 {completed}/{len(self.search_terms)} 個搜索，累計 {len(all_news)} 則新聞")
-                        
-                except Exception as e:
-                    print(f"❌ 搜索 '{search_term}' 處理失敗: {e}")
-                    self.results['errors'] += 1
+        # 搜索關鍵字與RSS源加入共用待爬佇列，依各主機的令牌桶交錯派發
+        frontier = get_crawl_scheduler().frontier(max_workers=5)
+        for search_term in self.search_terms:
+            search_url = f"https://news.google.com/rss/search?q={quote(search_term)}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
+            frontier.add(search_url, self.fetch_google_news_batch, search_term)
+            self.results['total_searched'] += 1
         
         # 檢查是否有RSS源配置
         rss_sources = self.extract_rss_sources()
         if rss_sources:
-            print(f"\n📡 開始抓取 {len(rss_sources)} 個RSS源...")
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                rss_futures = []
-                for source_name, rss_url in rss_sources.items():
-                    future = executor.submit(self.fetch_rss_source, source_name, rss_url)
-                    rss_futures.append(future)
-                
-                for future in concurrent.futures.as_completed(rss_futures):
-                    try:
-                        rss_news = future.result()
-                        all_news.extend(rss_news)
-                    except Exception as e:
-                        print(f"❌ RSS抓取失敗: {e}")
+            print(f"📡 同時抓取 {len(rss_sources)} 個RSS源...")
+            for source_name, rss_url in rss_sources.items():
+                frontier.add(rss_url, self.fetch_rss_source, source_name, rss_url)
+        
+        for news_list in frontier.run():
+            if news_list is None:
+                self.results['errors'] += 1
+                continue
+            all_news.extend(news_list)
         
         print(f"\n📊 總共抓取到 {len(all_news)} 則新聞")
         return all_news
@@ -321,14 +304,14 @@ class UltimateInsuranceAggregator:
                 conn = sqlite3.connect(self.db_path)
                 cursor = conn.cursor()
                 
-                # 獲取現有新聞的標題哈希值
-                cursor.execute("SELECT title FROM news WHERE status = 'active'")
-                existing_hashes = set()
-                for (title,) in cursor.fetchall():
-                    existing_hashes.add(self.get_title_hash(title))
+                # 此新聞資料庫的索引 (只補入上次同步後新增的新聞，不掃描整個資料表)
+                seen_index = get_seen_index(self.db_path)
+                seen_index.sync_from_news(self.db_path)
+                seen = seen_index.batch()
                 
                 saved_count = 0
                 duplicate_count = 0
+                save_failed = False
                 batch_data = []
                 
                 for news_data in news_list:
@@ -337,9 +320,9 @@ class UltimateInsuranceAggregator:
                         if not title:
                             continue
                         
-                        # 使用哈希值檢查重複
-                        title_hash = self.get_title_hash(title)
-                        if title_hash in existing_hashes:
+                        # 以網址與標題檢查重複
+                        url = news_data.get('url', '')
+                        if seen.is_duplicate(url=url, title=title):
                             duplicate_count += 1
                             continue
                         
@@ -356,7 +339,7 @@ class UltimateInsuranceAggregator:
                             enhanced_title,
                             news_data.get('content', ''),
                             news_data.get('summary', '')[:500],
-                            news_data.get('url', ''),
+                            url,
                             4,  # 來源ID
                             1,  # 分類ID
                             now,
@@ -368,8 +351,7 @@ class UltimateInsuranceAggregator:
                             now
                         ))
                         
-                        # 添加到已存在的哈希集合
-                        existing_hashes.add(title_hash)
+                        seen.add(url=url, title=title)
                         saved_count += 1
                         
                         # 批量處理，每100筆提交一次
@@ -382,11 +364,13 @@ class UltimateInsuranceAggregator:
                                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                             """, batch_data)
                             conn.commit()
+                            seen.commit()
                             batch_data = []
                             print(f"  💾 已保存 {saved_count} 則新聞...")
                         
                     except Exception as e:
                         print(f"  ❌ 處理新聞失敗: {e}")
+                        save_failed = True
                         continue
                 
                 # 保存剩餘的數據
@@ -399,9 +383,16 @@ class UltimateInsuranceAggregator:
                         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """, batch_data)
                     conn.commit()
+                    seen.commit()
                 
                 conn.close()
                 
+                # 新聞全部寫入後才使 HTTP 快取紀錄生效，寫入失敗時下次重新解析
+                if save_failed:
+                    get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
+                else:
+                    get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
+                
                 self.results['total_saved'] = saved_count
                 self.results['duplicates'] = duplicate_count
                 
@@ -412,6 +403,7 @@ class UltimateInsuranceAggregator:
                 
         except Exception as e:
             print(f"❌ 資料庫操作失敗: {e}")
+            get_http_cache().discard(self.HTTP_CACHE_CONSUMER)
             return False
     
     def get_database_stats(self):
@@ -455,6 +447,8 @@ class UltimateInsuranceAggregator:
             
             if not news_list:
                 print("❌ 沒有抓取到任何新聞")
+                # 已解析的 feed 都沒有保險新聞，不需再次解析
+                get_http_cache().commit(self.HTTP_CACHE_CONSUMER)
                 return False
             
             # 2. 批量保存到資料庫
@@ -475,6 +469,8 @@ class UltimateInsuranceAggregator:
             print(f"  ❌ 錯誤數量: {self.results['errors']} 個")
             print(f"  📈 總活躍新聞: {after_stats['active_news']} 則")
             print(f"  ⚡ 平均速度: {self.results['total_found']/execution_time:.1f} 則/秒")
+            for line in get_http_cache().report():
+                print(f"  {line}")
             
             if success and added_count > 0:
                 print("\n🎉 終極聚合器執行成功！")
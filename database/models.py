@@ -191,6 +191,35 @@ class News(BaseModel):
     def __repr__(self):
         return f'<News {self.title[:50]}...>'
 
+class NewsAnalysis(BaseModel):
+    """新聞分析結果模型 (爬取後預先計算，供分析端點直接彙總)"""
+    
+    __tablename__ = 'news_analyses'
+    
+    news_id = db.Column(db.Integer, db.ForeignKey('news.id'), nullable=False, unique=True)
+    analyzer_version = db.Column(db.String(50), nullable=False, comment='分析器版本')
+    
+    # 分析結果
+    tokens = db.Column(db.Text, comment='分詞結果(JSON陣列)')
+    keywords = db.Column(db.Text, comment='關鍵詞與權重(JSON陣列)')
+    sentiment = db.Column(db.String(20), comment='情感:positive/negative/neutral')
+    sentiment_score = db.Column(db.Float, comment='情感分析評分(-1到1)')
+    category = db.Column(db.String(100), comment='保險類別')
+    category_scores = db.Column(db.Text, comment='各類別評分(JSON)')
+    importance_score = db.Column(db.Float, comment='重要性評分(0-1)')
+    importance_dimensions = db.Column(db.Text, comment='重要性各維度評分(JSON)')
+    
+    # 關聯關係
+    news = relationship('News', backref=db.backref('analysis', uselist=False))
+    
+    # 索引
+    __table_args__ = (
+        Index('idx_news_analyses_version', 'analyzer_version'),
+    )
+    
+    def __repr__(self):
+        return f'<NewsAnalysis {self.news_id} {self.analyzer_version}>'
+
 class CrawlLog(BaseModel):
     """爬取日誌模型"""
     
@@ -0,0 +1,47 @@
+"""Add news_analyses table
+
+Revision ID: 5b7e2d9c4a10
+Revises: 03f833202eb0
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2d9c4a10'
+down_revision: Union[str, None] = '03f833202eb0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('news_analyses',
+    sa.Column('news_id', sa.Integer(), nullable=False),
+    sa.Column('analyzer_version', sa.String(length=50), nullable=False, comment='分析器版本'),
+    sa.Column('tokens', sa.Text(), nullable=True, comment='分詞結果(JSON陣列)'),
+    sa.Column('keywords', sa.Text(), nullable=True, comment='關鍵詞與權重(JSON陣列)'),
+    sa.Column('sentiment', sa.String(length=20), nullable=True, comment='情感:positive/negative/neutral'),
+    sa.Column('sentiment_score', sa.Float(), nullable=True, comment='情感分析評分(-1到1)'),
+    sa.Column('category', sa.String(length=100), nullable=True, comment='保險類別'),
+    sa.Column('category_scores', sa.Text(), nullable=True, comment='各類別評分(JSON)'),
+    sa.Column('importance_score', sa.Float(), nullable=True, comment='重要性評分(0-1)'),
+    sa.Column('importance_dimensions', sa.Text(), nullable=True, comment='重要性各維度評分(JSON)'),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['news_id'], ['news.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('news_id')
+    )
+    op.create_index('idx_news_analyses_version', 'news_analyses', ['analyzer_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_news_analyses_version', table_name='news_analyses')
+    op.drop_table('news_analyses')
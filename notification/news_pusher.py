@@ -10,6 +10,7 @@ import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from dataclasses import dataclass
+from html import escape
 import sqlite3
 from pathlib import Path
 
@@ -20,7 +21,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from notification.notification_service import notification_service
 from database.models import News, User
-from analyzer.importance_rating import ImportanceAnalyzer
+from analyzer.importance_rating import ImportanceRater
 
 logger = logging.getLogger(__name__)
 
@@ -52,8 +53,8 @@ class NewsPusher:
         # 載入推送規則
         self.rules = self._load_push_rules()
         
-        # 初始化重要性分析器
-        self.importance_analyzer = ImportanceAnalyzer()
+        # 初始化重要性評分器
+        self.importance_rater = ImportanceRater()
         
         # 推送歷史記錄
         self.push_history = []
@@ -168,26 +169,40 @@ class NewsPusher:
                 ORDER BY n.created_at DESC
             """, (cutoff_time,))
             
-            news_list = []
-            for row in cursor.fetchall():
-                news_data = dict(row)
-                # 計算重要性分數（如果還沒有）
-                if not news_data.get('importance_score'):
-                    score = self.importance_analyzer.calculate_importance(
-                        news_data['title'],
-                        news_data['content']
-                    )
-                    news_data['importance_score'] = score
-                
-                news_list.append(news_data)
-            
+            news_list = [dict(row) for row in cursor.fetchall()]
             conn.close()
+            
+            # 計算重要性分數（如果還沒有），所有未評分的新聞一次批次評分
+            unscored = [news for news in news_list if not news.get('importance_score')]
+            if unscored:
+                scores = self.importance_rater.rate_batch([
+                    {
+                        'title': news.get('title') or '',
+                        'summary': news.get('summary') or '',
+                        'content': news.get('content') or '',
+                        'published_date': self._parse_datetime(news.get('published_date'))
+                    }
+                    for news in unscored
+                ])
+                for news, score in zip(unscored, scores):
+                    news['importance_score'] = float(score)
+            
             return news_list
             
         except Exception as e:
             logger.error(f"獲取最近新聞失敗: {e}")
             return []
     
+    @staticmethod
+    def _parse_datetime(value) -> Optional[datetime]:
+        """將 SQLite 讀出的日期字串轉為 datetime，無法解析時返回 None"""
+        if isinstance(value, datetime):
+            return value
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except (TypeError, ValueError):
+            return None
+    
     def _filter_news_by_rule(self, news_list: List[Dict], rule: PushRule) -> List[Dict]:
         """根據規則篩選新聞"""
         matching_news = []
@@ -306,6 +321,7 @@ class NewsPusher:
             return
         
         # 準備通知內容
+        self._attach_summaries(news_list)
         subject = f"重要新聞提醒 - {rule.name}"
         content = self._format_news_notification(news_list, rule.name)
         html_content = self._format_news_notification_html(news_list, rule.name)
@@ -377,10 +393,46 @@ class NewsPusher:
             # 更新最後運行時間
             rule.last_run = datetime.now()
     
+    def _get_stored_keywords(self, news_ids: List[int]) -> Dict[int, List]:
+        """讀取已保存的新聞關鍵詞權重 (news_analyses 表不存在時返回空字典)"""
+        if not news_ids:
+            return {}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            placeholders = ','.join('?' * len(news_ids))
+            rows = conn.execute(
+                f"SELECT news_id, keywords FROM news_analyses WHERE news_id IN ({placeholders})", news_ids
+            ).fetchall()
+            conn.close()
+            return {news_id: json.loads(keywords) for news_id, keywords in rows if keywords}
+        except (sqlite3.Error, ValueError) as e:
+            logger.debug(f"讀取已保存的關鍵詞失敗: {e}")
+            return {}
+    
+    def _attach_summaries(self, news_list: List[Dict]):
+        """為沒有摘要的新聞一次批次生成抽取式摘要 (優先使用已保存的關鍵詞權重)"""
+        pending = [news for news in news_list if not news.get('summary') and news.get('content')]
+        if not pending:
+            return
+        
+        try:
+            stored = self._get_stored_keywords([news['id'] for news in pending if news.get('id')])
+            # 與分析引擎共用同一個摘要器 (及其文本處理器)
+            from analyzer.engine import get_analyzer
+            summaries = get_analyzer().summarizer.summarize_batch(
+                [news['content'] for news in pending],
+                [stored.get(news.get('id')) for news in pending]
+            )
+            for news, summary in zip(pending, summaries):
+                news['summary'] = summary
+        except Exception as e:
+            logger.warning(f"生成新聞摘要失敗: {e}")
+    
     def _send_daily_summary(self, news_list: List[Dict], rule: PushRule):
         """發送每日摘要"""
         target_users = self._get_target_users(rule.target_users)
         
+        self._attach_summaries(news_list)
         subject = f"每日保險新聞摘要 - {datetime.now().strftime('%Y年%m月%d日')}"
         content = self._format_daily_summary(news_list)
         html_content = self._format_daily_summary_html(news_list)
@@ -408,10 +460,12 @@ class NewsPusher:
             content += f"   重要性：{news.get('importance_score', 0):.2f}\n"
             content += f"   時間：{news.get('published_date', news.get('created_at', ''))}\n"
             
-            # 摘要內容（前200字）
-            summary = news.get('content', '')[:200]
-            if len(news.get('content', '')) > 200:
-                summary += '...'
+            # 摘要內容（無摘要時取前200字）
+            summary = news.get('summary') or ''
+            if not summary:
+                summary = (news.get('content') or '')[:200]
+                if len(news.get('content') or '') > 200:
+                    summary += '...'
             content += f"   摘要：{summary}\n\n"
         
         content += "\n請登入系統查看完整內容。"
@@ -492,7 +546,10 @@ class NewsPusher:
             content += f"{i}. {news.get('title', '無標題')}\n"
             content += f"   重要性：{news.get('importance_score', 0):.2f} | "
             content += f"來源：{news.get('source_name', '未知')} | "
-            content += f"分類：{news.get('category_name', '未分類')}\n\n"
+            content += f"分類：{news.get('category_name', '未分類')}\n"
+            if news.get('summary'):
+                content += f"   摘要：{news['summary']}\n"
+            content += "\n"
         
         return content
     
@@ -510,6 +567,7 @@ class NewsPusher:
         
         for news in news_list:
             importance_color = "#ff4444" if news.get('importance_score', 0) >= 0.8 else "#ff8800" if news.get('importance_score', 0) >= 0.6 else "#4488ff"
+            summary_html = f"<br><span>{escape(news['summary'])}</span>" if news.get('summary') else ""
             
             html += f"""
                 <li style="margin-bottom: 15px;">
@@ -517,6 +575,7 @@ class NewsPusher:
                     <span style="color: {importance_color};">重要性：{news.get('importance_score', 0):.2f}</span> | 
                     <span>來源：{news.get('source_name', '未知')}</span> | 
                     <span>分類：{news.get('category_name', '未分類')}</span>
+                    {summary_html}
                 </li>
             """
         
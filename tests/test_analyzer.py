@@ -0,0 +1,284 @@
+"""
+分析引擎測試
+Analyzer Engine Tests
+
+測試分析引擎的批次與共用分詞功能
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+from datetime import datetime, timedelta
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import jieba_loader
+from analyzer.engine import get_analyzer
+from analyzer.parallel import ParallelAnalyzer
+from analyzer.summarizer import ExtractiveSummarizer
+from analyzer.text_processor import TextProcessor
+from analyzer.token_store import TokenStore
+
+SAMPLE_ARTICLES = [
+    {
+        'title': '金管會發布保險業數位轉型新指引',
+        'content': '金融監督管理委員會今日發布保險業數位轉型指引，要求保險公司加強數位化服務能力，提升客戶體驗。',
+        'summary': ''
+    },
+    {
+        'title': '健康險理賠金額年增15% 疫情影響持續',
+        'content': '今年健康險理賠金額較去年同期增加，保險公司表示民眾健康意識提升，但理賠案件也明顯增加。',
+        'summary': ''
+    },
+    {
+        'title': '',
+        'content': '',
+        'summary': ''
+    }
+]
+
+
+class AnalyzeBatchTestCase(unittest.TestCase):
+    """批次分析測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.analyzer = get_analyzer()
+
+    def test_batch_keeps_order_and_length(self):
+        """測試批次分析結果數量與順序"""
+        results = self.analyzer.analyze_batch(SAMPLE_ARTICLES)
+
+        self.assertEqual(len(results), len(SAMPLE_ARTICLES))
+        self.assertEqual(results[2]['word_count'], 0)
+        self.assertGreater(results[0]['word_count'], 0)
+
+    def test_document_keywords_match_jieba(self):
+        """測試共用分詞的關鍵詞與 jieba.analyse 結果一致"""
+        text = f"{SAMPLE_ARTICLES[0]['title']} {SAMPLE_ARTICLES[0]['content']}"
+        document = self.analyzer.text_processor.build_document(text)
+
+        expected = self.analyzer.extract_keywords(text, top_k=10)
+        actual = self.analyzer.extract_keywords(text, top_k=10, document=document)
+
+        self.assertEqual([w for w, _ in actual], [w for w, _ in expected])
+
+    def test_keywords_match_for_html_and_full_width(self):
+        """測試含 HTML 與全形字元的文章，批次分析、單篇分析與未分詞提取的關鍵詞相同"""
+        article = {
+            'title': '<b>健康險</b>理賠金額ＡＩ大增',
+            'content': '<p>保險公司表示，ＡＩ理賠系統上線後，健康險理賠件數增加２０％。</p>',
+            'summary': ''
+        }
+
+        self.assertEqual(self.analyzer.analyze_batch([article])[0]['keywords'],
+                         self.analyzer.analyze_news_article(article)['keywords'])
+
+        text = f"{article['title']} {article['content']}"
+        document = self.analyzer.text_processor.build_document(text)
+        self.assertEqual(self.analyzer.extract_keywords(text, top_k=10),
+                         self.analyzer.extract_keywords(text, top_k=10, document=document))
+
+    def test_document_classification_matches(self):
+        """測試共用分詞的分類結果與逐次分詞一致"""
+        text = f"{SAMPLE_ARTICLES[1]['title']} {SAMPLE_ARTICLES[1]['content']}"
+        document = self.analyzer.text_processor.build_document(text)
+
+        categories = {k: list(v) for k, v in self.analyzer.insurance_categories.items()}
+
+        expected = self.analyzer.text_processor.analyze_text_categories(text, categories)
+        actual = self.analyzer.text_processor.analyze_text_categories(text, categories, document=document)
+
+        self.assertEqual(actual, expected)
+
+    def test_category_classifier_matches_per_category(self):
+        """測試已編譯分類器的命中結果與逐類別比對一致"""
+        processor = self.analyzer.text_processor
+        categories = self.analyzer.insurance_categories
+        classifier = processor.get_category_classifier(categories)
+
+        for article in SAMPLE_ARTICLES:
+            document = processor.build_document(f"{article['title']} {article['content']}")
+            expected = {}
+            for category, keywords in categories.items():
+                matched = processor.find_keywords_in_text(document.text, list(keywords), document=document)
+                if matched:
+                    expected[category] = matched
+
+            scores, matches = classifier.classify(document.text_lower, document.word_set)
+            self.assertEqual(matches, expected)
+            self.assertEqual(set(scores), set(categories))
+
+    def test_sentiment_batch_matches_serial(self):
+        """測試稀疏矩陣批次情感分析與逐篇結果一致"""
+        texts = [f"{a['title']} {a['content']}" for a in SAMPLE_ARTICLES]
+        texts.append('保險公司獲利成長，但理賠糾紛與訴訟增加，風險仍需注意')
+
+        expected = [self.analyzer.analyze_sentiment(text) for text in texts]
+        actual = self.analyzer.analyze_sentiment_batch(texts)
+
+        for batch_result, serial_result in zip(actual, expected):
+            self.assertEqual(batch_result['sentiment'], serial_result['sentiment'])
+            self.assertAlmostEqual(batch_result['score'], serial_result['score'])
+            self.assertAlmostEqual(batch_result['confidence'], serial_result['confidence'])
+            self.assertAlmostEqual(batch_result.get('sentiment_ratio', 0.0), serial_result.get('sentiment_ratio', 0.0))
+            self.assertEqual(sorted(batch_result['positive_words']), sorted(serial_result['positive_words']))
+            self.assertEqual(sorted(batch_result['negative_words']), sorted(serial_result['negative_words']))
+
+    def test_importance_batch_matches_serial(self):
+        """測試批次重要性評分與逐篇評分結果一致"""
+        rater = self.analyzer.importance_rater
+        now = datetime.now()
+        articles = [dict(article, published_date=now - timedelta(days=i * 4))
+                    for i, article in enumerate(SAMPLE_ARTICLES)]
+        articles.append({'title': '金管會要求保險業強化理賠與客戶服務', 'content': '', 'summary': ''})
+
+        scores, dimensions = rater.rate_batch(articles, with_dimensions=True)
+
+        self.assertEqual(len(scores), len(articles))
+        for article, score, dims in zip(articles, scores, dimensions):
+            self.assertAlmostEqual(score, rater.rate_importance(article))
+            expected = rater.calculate_dimensions(article, article['title'], article['summary'], article['content'])
+            for dim, value in expected.items():
+                self.assertAlmostEqual(dims[dim], value)
+
+
+class ParallelAnalyzerTestCase(unittest.TestCase):
+    """平行分析模式測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.analyzer = get_analyzer()
+        self.parallel = ParallelAnalyzer(max_workers=2, chunk_size=1, min_parallel_items=0)
+
+    def tearDown(self):
+        """測試後清理"""
+        self.parallel.shutdown()
+
+    def test_trend_features_match_serial(self):
+        """測試平行提取的趨勢特徵與單程序結果相同"""
+        expected = [self.analyzer._extract_trend_features(a) for a in SAMPLE_ARTICLES]
+        actual = self.parallel.extract_trend_features(SAMPLE_ARTICLES)
+
+        self.assertEqual(actual, expected)
+
+    def test_segment_texts_match_serial(self):
+        """測試平行分詞結果與單程序結果相同"""
+        texts = [f"{a['title']} {a['content']}" for a in SAMPLE_ARTICLES]
+        expected = [self.analyzer._segment_for_vectorizer(t) for t in texts]
+
+        self.assertEqual(self.parallel.segment_texts(texts), expected)
+
+
+class SegmentationCacheTestCase(unittest.TestCase):
+    """分詞快取測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.processor = TextProcessor(segment_cache_size=10)
+        self.store_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """測試後清理"""
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+    def test_memoized_segmentation(self):
+        """測試同一文本只分詞一次且結果不變"""
+        text = SAMPLE_ARTICLES[0]['content']
+
+        first = self.processor.segment_text(text)
+        second = self.processor.segment_text(text)
+
+        self.assertEqual(first, second)
+        stats = self.processor.get_segmentation_stats()['memory_cache']
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_token_store(self):
+        """測試分詞儲存可供新的處理器直接讀取"""
+        store = TokenStore(os.path.join(self.store_dir, 'tokens.db'))
+        self.processor.attach_token_store(store)
+        text = SAMPLE_ARTICLES[1]['content']
+        expected = self.processor.build_document(text, news_id=42).tokens
+
+        other = TextProcessor()
+        other.attach_token_store(store)
+        self.assertEqual(other.build_document(text, news_id=42).tokens, expected)
+        self.assertEqual(store.get_stats()['hits'], 1)
+        store.close()
+
+    def test_read_only_token_store(self):
+        """測試唯讀分詞儲存 (平行分析工作程序使用) 可讀取已保存的結果但不寫入"""
+        path = os.path.join(self.store_dir, 'tokens.db')
+        store = TokenStore(path)
+        store.put(42, 'hash', ['保險', '新聞'])
+
+        reader = TokenStore(path, read_only=True)
+        self.assertEqual(reader.get(42, 'hash'), ['保險', '新聞'])
+        self.assertFalse(reader.put(43, 'hash', ['理賠']))
+        self.assertIsNone(store.get(43, 'hash'))
+        reader.close()
+        store.close()
+
+    def test_tokenizer_version_follows_dictionary(self):
+        """測試分詞器版本取自詞典狀態，加入自定義詞典後版本改變"""
+        store = TokenStore(os.path.join(self.store_dir, 'tokens.db'))
+        self.assertEqual(store.tokenizer_version, self.processor.tokenizer_version)
+
+        dict_path = os.path.join(self.store_dir, 'user_dict.txt')
+        with open(dict_path, 'w', encoding='utf-8') as f:
+            f.write('數位轉型指引 10 n\n')
+        self.processor.init_jieba(dict_path)
+
+        self.assertNotEqual(self.processor.tokenizer_version, store.tokenizer_version)
+        store.close()
+
+
+class SummarizerTestCase(unittest.TestCase):
+    """抽取式摘要測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.summarizer = ExtractiveSummarizer(TextProcessor())
+
+    def test_batch_matches_single(self):
+        """測試批次摘要與逐篇摘要結果相同"""
+        texts = [article['content'] for article in SAMPLE_ARTICLES]
+        texts.append('今天天氣晴朗。金管會發布健康險理賠新規定。保險公司表示將配合調整理賠流程。市場反應平淡。')
+
+        batch = self.summarizer.summarize_batch(texts, max_sentences=2)
+
+        self.assertEqual(batch, [self.summarizer.summarize(text, max_sentences=2) for text in texts])
+        self.assertEqual(batch[2], '')
+
+    def test_stored_keyword_weights(self):
+        """測試以已保存的關鍵詞權重選取句子"""
+        text = '今天天氣晴朗。金管會發布健康險理賠新規定。市場反應平淡。'
+
+        summary = self.summarizer.summarize(text, keyword_weights=[['理賠', 1.0]], max_sentences=1)
+
+        self.assertEqual(summary, '金管會發布健康險理賠新規定。')
+
+
+class JiebaLoaderTestCase(unittest.TestCase):
+    """jieba 詞典共用載入測試案例"""
+
+    def test_cached_dictionary_matches_build(self):
+        """測試從磁碟快取載入的詞典分詞結果與重新建立時相同"""
+        text = SAMPLE_ARTICLES[1]['content']
+        jieba = jieba_loader.get_jieba()
+        expected = jieba.lcut(text)
+
+        key = jieba_loader.get_jieba_stats()['state_key']
+        self.assertTrue(os.path.exists(jieba_loader._cache_path(key)))
+        self.assertIs(jieba_loader.get_jieba(), jieba)
+
+        self.assertTrue(jieba_loader._load_state(jieba, key))
+        self.assertEqual(jieba.lcut(text), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+非同步爬蟲引擎測試
+Async Crawler Engine Tests
+
+測試每個主機的請求間隔與同時請求數限制
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import time
+import tempfile
+import shutil
+from unittest import mock
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.async_engine import AsyncCrawlerEngine, AsyncNewsSourceCrawler, crawl_sources
+from crawler.http_cache import HttpCache
+from crawler.scheduler import CrawlScheduler
+
+
+class HostPolitenessTestCase(unittest.TestCase):
+    """主機請求間隔測試案例"""
+
+    def test_delays_are_per_host(self):
+        """測試同一主機的請求依序錯開，不同主機同時進行"""
+        engine = AsyncCrawlerEngine(delay_range=(0.1, 0.1), scheduler=CrawlScheduler())
+        started = {}
+
+        async def request(host, index):
+            async with engine._host_semaphore(host):
+                await engine._wait_for_host(host)
+                started[(host, index)] = time.perf_counter()
+
+        async def run():
+            begin = time.perf_counter()
+            await asyncio.gather(*(request(host, i) for host in ('a.example', 'b.example') for i in range(3)))
+            return time.perf_counter() - begin
+
+        elapsed = asyncio.run(run())
+
+        # 每個主機 3 個請求需等待 2 次間隔，兩個主機重疊進行
+        self.assertLess(elapsed, 0.35)
+        for host in ('a.example', 'b.example'):
+            times = sorted(t for (h, _), t in started.items() if h == host)
+            for previous, current in zip(times, times[1:]):
+                self.assertGreaterEqual(current - previous, 0.09)
+
+    def test_host_delay_override(self):
+        """測試來源配置的主機請求間隔"""
+        engine = AsyncCrawlerEngine(delay_range=(5, 5), scheduler=CrawlScheduler())
+        engine.set_host_delay('a.example', (0, 0))
+
+        async def run():
+            for _ in range(3):
+                await engine._wait_for_host('a.example')
+
+        begin = time.perf_counter()
+        asyncio.run(run())
+        self.assertLess(time.perf_counter() - begin, 0.5)
+
+
+class CrawlSourcesHttpCacheTestCase(unittest.TestCase):
+    """多來源爬取的 HTTP 快取紀錄測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.http_cache = HttpCache(os.path.join(self.cache_dir, 'http_cache.db'))
+
+    def tearDown(self):
+        """測試後清理"""
+        self.http_cache.close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _crawl(self, save_results):
+        http_cache = self.http_cache
+
+        async def crawl_source(crawler, **kwargs):
+            url = crawler.config['list_urls'][0]
+            http_cache.record(url, 200, {'ETag': '"v1"'}, url.encode('utf-8'), crawler.source_name)
+            return [{'url': f"{url}/1", 'title': crawler.source_name}]
+
+        configs = [{'name': name, 'list_urls': [f"https://{name}.example/news"]} for name in ('a', 'b')]
+        with mock.patch.object(AsyncNewsSourceCrawler, 'crawl_source', crawl_source):
+            return asyncio.run(crawl_sources(configs, save_results=save_results, http_cache=http_cache,
+                                             scheduler=CrawlScheduler()))
+
+    def test_commit_after_save(self):
+        """測試寫入成功的來源快取紀錄生效，寫入失敗或未寫入的來源捨棄"""
+        results = self._crawl(lambda source, items: source == 'a')
+
+        self.assertEqual(set(results), {'a', 'b'})
+        self.assertIn('If-None-Match', self.http_cache.conditional_headers('https://a.example/news', 'a'))
+        self.assertEqual(self.http_cache.conditional_headers('https://b.example/news', 'b'), {})
+        self.assertEqual(self.http_cache._pending, {})
+
+        self._crawl(None)
+        self.assertEqual(self.http_cache._pending, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+"""
+分析快取測試
+Analysis Cache Tests
+
+測試記憶體 LRU 快取與背景批次寫入
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import threading
+import time
+from datetime import timedelta
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analyzer.cache as cache_module
+from analyzer.cache import AnalysisCache, cached_analysis, article_identity, function_version, files_version
+
+
+class AnalysisCacheTestCase(unittest.TestCase):
+    """分析快取測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = AnalysisCache(cache_dir=self.cache_dir, memory_cache_size=3)
+
+    def tearDown(self):
+        """測試後清理"""
+        self.cache.close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_lru_keeps_recently_read_items(self):
+        """測試讀取過的項目不會因為較早寫入而被淘汰"""
+        for i in range(3):
+            self.cache.set('analysis', f'key{i}', {'value': i})
+
+        self.cache.get('analysis', 'key0')
+        self.cache.set('analysis', 'key3', {'value': 3})
+
+        self.assertIn(('analysis', 'key0'), self.cache.memory_cache)
+        self.assertNotIn(('analysis', 'key1'), self.cache.memory_cache)
+
+    def test_byte_size_bound(self):
+        """測試記憶體快取不超過位元組上限"""
+        cache = AnalysisCache(cache_dir=self.cache_dir, memory_cache_max_bytes=300, write_behind=False)
+        for key in 'abc':
+            cache.set('analysis', key, key * 100)
+
+        self.assertLessEqual(cache._memory_bytes, 300)
+        self.assertNotIn(('analysis', 'a'), cache.memory_cache)
+        self.assertEqual(cache.get('analysis', 'a'), 'a' * 100)
+
+    def test_write_behind(self):
+        """測試背景寫入前仍可讀取，寫入後檔案存在"""
+        self.cache.set('analysis', 'pending', {'value': 1})
+        self.cache._remove_from_memory_cache(('analysis', 'pending'))
+
+        self.assertEqual(self.cache.get('analysis', 'pending'), {'value': 1})
+
+        self.cache.flush()
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, 'analysis', 'pending.cache')))
+        self.assertEqual(self.cache.get_cache_stats()['file_cache']['pending_writes'], 0)
+
+
+class SQLiteCacheStoreTestCase(unittest.TestCase):
+    """SQLite 儲存後端測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = AnalysisCache(cache_dir=self.cache_dir, backend='sqlite', write_behind=False)
+
+    def tearDown(self):
+        """測試後清理"""
+        self.cache.close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_api_and_stats(self):
+        """測試 get/set/delete/clear_category 與統計數量"""
+        for i in range(3):
+            self.cache.set('analysis', f'key{i}', {'value': i})
+        self.cache.memory_cache.clear()
+
+        self.assertEqual(self.cache.get('analysis', 'key1'), {'value': 1})
+        self.assertEqual(self.cache.get_cache_stats()['categories']['analysis']['total_files'], 3)
+
+        self.assertTrue(self.cache.delete('analysis', 'key1'))
+        self.assertIsNone(self.cache.get('analysis', 'key1'))
+        self.assertEqual(self.cache.clear_category('analysis'), 2)
+        self.assertEqual(self.cache.get_cache_stats()['total_files'], 0)
+
+    def test_clear_expired(self):
+        """測試只清理過期項目"""
+        self.cache.set('analysis', 'fresh', 1)
+        self.cache.store.ttl = timedelta(seconds=-1)
+        self.cache.set('analysis', 'stale', 2)
+
+        self.assertEqual(self.cache.store.clear_expired(), 1)
+        self.assertEqual(self.cache.store.keys('analysis'), ['fresh'])
+
+
+class CachedAnalysisKeyTestCase(unittest.TestCase):
+    """快取裝飾器鍵值測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.original_instance = cache_module._cache_instance
+        cache_module._cache_instance = AnalysisCache(cache_dir=self.cache_dir, write_behind=False)
+        self.calls = []
+
+    def tearDown(self):
+        """測試後清理"""
+        cache_module._cache_instance.close()
+        cache_module._cache_instance = self.original_instance
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_identity_key(self):
+        """測試識別鍵值：內容相同時命中，內容變更時重新計算"""
+        calls = self.calls
+
+        class Analyzer:
+            @cached_analysis('analysis', key_func=article_identity)
+            def analyze(self, article_data):
+                calls.append(article_data)
+                return {'count': len(calls)}
+
+        analyzer = Analyzer()
+        article = {'id': 1, 'title': '保險新聞', 'content': '內容'}
+
+        self.assertEqual(analyzer.analyze(article), analyzer.analyze(dict(article)))
+        self.assertEqual(len(calls), 1)
+
+        analyzer.analyze(dict(article, content='更新後的內容'))
+        self.assertEqual(len(calls), 2)
+
+    def test_fast_key(self):
+        """測試快速雜湊鍵值"""
+        calls = self.calls
+
+        class Analyzer:
+            @cached_analysis('keywords', key_mode='fast')
+            def extract(self, text, top_k=10):
+                calls.append(text)
+                return {'text': text}
+
+        analyzer = Analyzer()
+        analyzer.extract('保險', top_k=5)
+        analyzer.extract('保險', top_k=5)
+        analyzer.extract('保險', top_k=3)
+
+        self.assertEqual(len(calls), 2)
+
+    def test_fast_key_ignores_dict_order(self):
+        """測試快速雜湊鍵值不受字典欄位與集合元素順序影響"""
+        calls = self.calls
+
+        class Analyzer:
+            @cached_analysis('analysis', key_mode='fast')
+            def analyze(self, article_data, tags=None):
+                calls.append(article_data)
+                return {'count': len(calls)}
+
+        analyzer = Analyzer()
+        analyzer.analyze({'title': '保險新聞', 'content': '內容'}, tags={'壽險', '產險'})
+        analyzer.analyze({'content': '內容', 'title': '保險新聞'}, tags={'產險', '壽險'})
+        self.assertEqual(len(calls), 1)
+
+        analyzer.analyze({'title': '保險新聞', 'content': '更新後的內容'}, tags={'壽險', '產險'})
+        self.assertEqual(len(calls), 2)
+
+    def test_version_component(self):
+        """測試手動版本號會改變快取版本"""
+        self.assertNotEqual(function_version(article_identity, '1'), function_version(article_identity, '2'))
+        self.assertEqual(function_version(article_identity), function_version(article_identity))
+
+        # 相依檔案內容變更時版本改變
+        path = os.path.join(self.cache_dir, 'weights.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"a": 1}')
+        before = files_version([path])
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"a": 2}')
+        self.assertNotEqual(files_version([path]), before)
+
+    def test_single_flight(self):
+        """測試並行未命中時只計算一次"""
+        calls = self.calls
+
+        class Analyzer:
+            @cached_analysis('analysis', key_mode='fast')
+            def analyze(self, news_id):
+                calls.append(news_id)
+                time.sleep(0.2)
+                return {'id': news_id}
+
+        analyzer = Analyzer()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(analyzer.analyze(1))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'id': 1}] * 5)
+
+    def test_stale_while_revalidate(self):
+        """測試過期資料直接返回並於背景更新"""
+        calls = self.calls
+        cache = cache_module._cache_instance
+
+        class Analyzer:
+            @cached_analysis('analysis', key_mode='fast', stale_while_revalidate_hours=1)
+            def analyze(self, news_id):
+                calls.append(news_id)
+                return {'version': len(calls)}
+
+        analyzer = Analyzer()
+        analyzer.analyze(1)
+
+        cache.ttl = cache.store.ttl = timedelta(seconds=-1)
+        self.assertEqual(analyzer.analyze(1), {'version': 1})
+
+        cache._refresh_executor.shutdown(wait=True)
+        cache._refresh_executor = None
+        cache.ttl = cache.store.ttl = timedelta(hours=1)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(analyzer.analyze(1), {'version': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
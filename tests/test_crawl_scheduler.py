@@ -0,0 +1,71 @@
+"""
+爬蟲排程測試
+Crawl Scheduler Tests
+
+測試主機令牌桶與共用待爬佇列
+"""
+
+import unittest
+import os
+import sys
+import time
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.scheduler import CrawlScheduler, HostPolicy, TokenBucket
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    """令牌桶測試案例"""
+
+    def test_reservations_are_spaced(self):
+        """測試令牌用完後的預約依請求頻率錯開"""
+        bucket = TokenBucket(rate=10, burst=2)
+
+        delays = [bucket.reserve() for _ in range(4)]
+
+        self.assertEqual(delays[:2], [0.0, 0.0])
+        self.assertAlmostEqual(delays[2], 0.1, places=2)
+        self.assertAlmostEqual(delays[3], 0.2, places=2)
+
+
+class CrawlSchedulerTestCase(unittest.TestCase):
+    """爬蟲排程器測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.scheduler = CrawlScheduler(
+            HostPolicy(rate=20, burst=1),
+            {'slow.example': HostPolicy(rate=1, burst=1)}
+        )
+
+    def test_subdomain_inherits_policy(self):
+        """測試子網域沿用上層網域的設定"""
+        self.assertEqual(self.scheduler.policy_for('news.slow.example').rate, 1)
+        self.assertEqual(self.scheduler.policy_for('other.example').rate, 20)
+        self.assertEqual(self.scheduler.policy_for('other.example', (2, 2)).rate, 0.5)
+
+    def test_frontier_interleaves_hosts(self):
+        """測試待爬佇列交錯派發不同主機，總時間接近最慢的單一主機"""
+        frontier = self.scheduler.frontier(max_workers=4)
+        for host in ('a.example', 'b.example', 'c.example'):
+            for i in range(5):
+                url = f"https://{host}/{i}"
+                # 工作內的請求等待使用派發時已預約的令牌
+                frontier.add(url, lambda u: (self.scheduler.wait(u), u)[1], url)
+
+        start = time.perf_counter()
+        results = frontier.run()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results[0], 'https://a.example/0')
+        self.assertEqual(len(results), 15)
+        # 每個主機 5 個請求需等待 4 次 0.05 秒
+        self.assertLess(elapsed, 0.6)
+        self.assertGreaterEqual(elapsed, 0.18)
+        self.assertEqual(self.scheduler.get_stats()['requests'], 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
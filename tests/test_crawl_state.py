@@ -0,0 +1,79 @@
+"""
+增量爬取狀態測試
+Incremental Crawl State Tests
+
+測試已見過網址、發布時間水位與列表游標
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+from datetime import datetime, timedelta
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.crawl_state import CrawlStateStore, normalize_url
+
+SOURCE = '工商時報'
+
+
+class CrawlStateTestCase(unittest.TestCase):
+    """增量爬取狀態測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.state_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.state_dir, 'crawl_state.db')
+        self.store = CrawlStateStore(self.db_path)
+        now = datetime.now()
+        self.items = [
+            {'url': f'https://ctee.com.tw/news/{i}', 'published_date': now - timedelta(hours=i)}
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        """測試後清理"""
+        self.store.close()
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def test_normalize_url(self):
+        """測試網址正規化移除追蹤參數與片段"""
+        self.assertEqual(normalize_url('HTTPS://CTEE.com.tw/news/1/?utm_source=fb&id=2#top'),
+                         'https://ctee.com.tw/news/1?id=2')
+
+    def test_seen_urls_persist(self):
+        """測試標記後的網址被過濾，且新的實例仍可讀取"""
+        self.store.mark_seen(SOURCE, self.items[1:])
+
+        self.assertEqual(self.store.filter_new(SOURCE, self.items), self.items[:1])
+        self.assertEqual(self.store.get_stats()[SOURCE]['known_skipped'], 2)
+
+        other = CrawlStateStore(self.db_path)
+        self.assertTrue(other.is_seen(SOURCE, self.items[2]['url'] + '?utm_medium=rss'))
+        self.assertFalse(other.is_seen('自由時報', self.items[2]['url']))
+        other.close()
+
+    def test_stop_paging_at_watermark(self):
+        """測試列表頁出現早於水位的新聞時停止翻頁"""
+        self.assertFalse(self.store.should_stop_paging(SOURCE, self.items))
+
+        self.store.mark_seen(SOURCE, self.items[:1])
+        older = [{'url': 'https://ctee.com.tw/news/old', 'published_date': self.items[2]['published_date']}]
+
+        self.assertTrue(self.store.should_stop_paging(SOURCE, older))
+
+    def test_cursor_applies_after_mark(self):
+        """測試列表游標在網址標記為已見過後才生效"""
+        cursor = self.items[0]['url']
+        self.store.set_cursor(SOURCE, cursor)
+        self.assertIsNone(self.store.get_state(SOURCE).list_cursor)
+
+        self.store.mark_seen(SOURCE, self.items[:1])
+        self.assertEqual(self.store.get_state(SOURCE).list_cursor, cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+新聞去重測試
+News Deduplication Tests
+
+測試 MinHash LSH 候選索引與批次去重
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.deduplication import NewsDeduplicator
+
+EXISTING_ITEMS = [
+    {
+        'id': 1,
+        'title': '金管會發布保險業數位轉型新指引',
+        'content': '金融監督管理委員會今日發布保險業數位轉型指引，要求保險公司加強數位化服務能力，提升客戶體驗。'
+    },
+    {
+        'id': 2,
+        'title': '壽險公司投資收益創新高',
+        'content': '受惠於股市表現亮眼，多家壽險公司前三季投資收益創下歷史新高，獲利大幅成長。'
+    }
+]
+
+
+class NewsDeduplicatorTestCase(unittest.TestCase):
+    """新聞去重器測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.index_dir = tempfile.mkdtemp()
+        self.deduplicator = NewsDeduplicator(index_path=self.index_dir)
+
+    def tearDown(self):
+        """測試後清理"""
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+
+    def test_filter_duplicates(self):
+        """測試批次去重可偵測歷史與同批次內的重複"""
+        news_items = [
+            {'url': 'a', 'title': '【快訊】金管會發布保險業數位轉型新指引', 'content': EXISTING_ITEMS[0]['content']},
+            {'url': 'b', 'title': '健康險理賠金額年增15%', 'content': '今年健康險理賠金額較去年同期增加，理賠案件明顯增加。'},
+            {'url': 'c', 'title': '健康險理賠金額年增15%', 'content': '今年健康險理賠金額較去年同期增加，理賠案件明顯增加。'},
+        ]
+
+        unique = self.deduplicator.filter_duplicates(news_items, EXISTING_ITEMS)
+
+        self.assertEqual([item['url'] for item in unique], ['b'])
+
+    def test_candidates_exclude_unrelated(self):
+        """測試 LSH 只返回相似的候選項"""
+        self.deduplicator.index_items(EXISTING_ITEMS)
+        signature = self.deduplicator.compute_signature(EXISTING_ITEMS[0])
+
+        self.assertEqual(self.deduplicator.lsh_index.query(signature), {'id:1'})
+
+    def test_persisted_index(self):
+        """測試保存的索引可在新實例中偵測重複"""
+        self.deduplicator.filter_duplicates(EXISTING_ITEMS)
+
+        reloaded = NewsDeduplicator(index_path=self.index_dir)
+        self.assertEqual(len(reloaded.lsh_index), len(EXISTING_ITEMS))
+
+        unique = reloaded.filter_duplicates([dict(EXISTING_ITEMS[1], id=None, url='x')])
+        self.assertEqual(unique, [])
+
+    def test_signature_store_reuse(self):
+        """測試重複比對同一篇新聞時只計算一次特徵"""
+        news_item = {'url': 'n', 'title': '健康險理賠金額年增15%', 'content': '今年健康險理賠金額較去年同期增加。'}
+
+        for existing in EXISTING_ITEMS:
+            self.deduplicator.calculate_similarity(news_item, existing)
+        self.deduplicator.calculate_similarity(news_item, EXISTING_ITEMS[0])
+
+        stats = self.deduplicator.get_signature_stats()
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['size'], 3)
+
+    def test_signature_store_eviction(self):
+        """測試特徵快取超過容量時淘汰最久未使用的項目"""
+        deduplicator = NewsDeduplicator(signature_cache_size=1)
+        deduplicator.get_signature(EXISTING_ITEMS[0])
+        deduplicator.get_signature(EXISTING_ITEMS[1])
+
+        stats = deduplicator.get_signature_stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['evictions'], 1)
+
+    def test_bands_follow_threshold(self):
+        """測試 LSH 分段數依相似度閾值選擇，閾值處的候選機率不低於 99%"""
+        for threshold in (0.5, 0.7, 0.9):
+            index = NewsDeduplicator(similarity_threshold=threshold).lsh_index
+            recall = 1 - (1 - threshold ** index.rows) ** index.bands
+            self.assertGreaterEqual(recall, 0.99)
+
+    def test_clear_cache_invalidates_title_keys(self):
+        """測試清除過期索引時一併移除以標題為鍵值的特徵快取"""
+        news_item = {'title': '健康險理賠金額年增15%', 'content': '今年健康險理賠金額較去年同期增加。'}
+        self.deduplicator.filter_duplicates([news_item])
+        self.deduplicator.get_signature(news_item)
+        self.assertEqual(len(self.deduplicator.signature_store), 1)
+
+        self.deduplicator.clear_cache(days=-1)
+
+        self.assertEqual(len(self.deduplicator.signature_store), 0)
+        self.assertEqual(len(self.deduplicator.lsh_index), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+HTTP 條件式請求快取測試
+HTTP Conditional Request Cache Tests
+
+測試回應變更判斷、使用端確認後才生效的快取紀錄與各來源節省統計
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+import requests
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.http_cache import HttpCache, CHANGED, NOT_MODIFIED, UNCHANGED
+
+
+class HttpCacheTestCase(unittest.TestCase):
+    """HTTP 快取測試案例"""
+
+    URL = 'https://example.com/rss'
+
+    def setUp(self):
+        """測試前設置"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = HttpCache(os.path.join(self.cache_dir, 'http_cache.db'))
+
+    def tearDown(self):
+        """測試後清理"""
+        self.cache.close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_record_transitions(self):
+        """測試內容變更、內容雜湊相同與 304 回應的判斷"""
+        headers = {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+        self.assertEqual(self.cache.record(self.URL, 200, headers, b'<rss>1</rss>', 'feed'), CHANGED)
+        self.assertEqual(self.cache.commit('feed'), 1)
+        self.assertEqual(self.cache.conditional_headers(self.URL, 'feed'),
+                         {'If-None-Match': '"v1"', 'If-Modified-Since': headers['Last-Modified']})
+        self.assertEqual(self.cache.record(self.URL, 200, {}, b'<rss>1</rss>', 'feed'), UNCHANGED)
+        self.assertEqual(self.cache.record(self.URL, 304, {}, None, 'feed'), NOT_MODIFIED)
+        self.assertEqual(self.cache.record(self.URL, 200, {}, b'<rss>2</rss>', 'feed'), CHANGED)
+
+    def test_commit_after_save(self):
+        """測試未 commit 或已捨棄的內容下次仍視為變更"""
+        self.assertEqual(self.cache.record(self.URL, 200, {'ETag': '"v1"'}, b'<rss>1</rss>', 'feed'), CHANGED)
+        self.assertEqual(self.cache.conditional_headers(self.URL, 'feed'), {})
+        self.assertEqual(self.cache.record(self.URL, 200, {}, b'<rss>1</rss>', 'feed'), CHANGED)
+
+        self.assertEqual(self.cache.discard('feed', self.URL), 1)
+        self.assertEqual(self.cache.commit('feed'), 0)
+        self.assertEqual(self.cache.record(self.URL, 200, {}, b'<rss>1</rss>', 'feed'), CHANGED)
+
+        self.cache.commit('feed', self.URL)
+        self.assertEqual(self.cache.record(self.URL, 200, {}, b'<rss>1</rss>', 'feed'), UNCHANGED)
+
+    def test_consumers_are_independent(self):
+        """測試多個使用端共用同一網址時各自判斷是否變更"""
+        body = b'<rss>1</rss>'
+        self.assertEqual(self.cache.record(self.URL, 200, {}, body, 'Google新聞', consumer='smart'), CHANGED)
+        self.cache.commit('smart')
+
+        self.assertEqual(self.cache.record(self.URL, 200, {}, body, 'Google新聞', consumer='smart'), UNCHANGED)
+        self.assertEqual(self.cache.record(self.URL, 200, {}, body, 'Google新聞', consumer='daily'), CHANGED)
+
+    def test_fetch_error_is_reported(self):
+        """測試抓取失敗會拋出例外並另計失敗次數，而非當作內容未變更"""
+        class FailingSession:
+            def get(self, url, **kwargs):
+                raise requests.exceptions.ConnectionError('connection refused')
+
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.cache.fetch(self.URL, session=FailingSession(), source='feed')
+
+        stats = self.cache.get_stats()['feed']
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['parses_skipped'], 0)
+
+    def test_source_stats(self):
+        """測試本次與累計統計的節省下載量與略過解析次數"""
+        body = b'x' * 2048
+        self.cache.record(self.URL, 200, {'ETag': '"v1"'}, body, 'feed')
+        self.cache.commit('feed')
+        self.cache.record(self.URL, 304, {}, None, 'feed')
+
+        stats = self.cache.get_stats()['feed']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['bytes_saved'], len(body))
+        self.assertEqual(stats['parses_skipped'], 1)
+        self.assertEqual(self.cache.get_stats(cumulative=True)['feed'], stats)
+
+        self.cache.reset_run_stats()
+        self.assertEqual(self.cache.get_stats(), {})
+        self.assertEqual(self.cache.get_stats(cumulative=True)['feed']['requests'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
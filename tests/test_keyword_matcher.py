@@ -0,0 +1,63 @@
+"""
+關鍵字比對器測試
+Keyword Matcher Tests
+
+測試 Aho-Corasick 比對結果與逐一字串比對一致
+"""
+
+import unittest
+import os
+import sys
+import random
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.keyword_matcher import KeywordMatcher
+from analyzer.insurance_dictionary import (
+    ALL_INSURANCE_KEYWORDS,
+    extract_insurance_keywords,
+    is_insurance_related
+)
+
+
+class KeywordMatcherTestCase(unittest.TestCase):
+    """關鍵字比對器測試案例"""
+
+    def test_count_matches_str_count(self):
+        """測試出現次數與 str.count 相同"""
+        random.seed(42)
+        alphabet = 'abAB保險壽'
+
+        for _ in range(500):
+            keywords = [''.join(random.choice(alphabet) for _ in range(random.randint(1, 4)))
+                        for _ in range(random.randint(1, 6))]
+            text = ''.join(random.choice(alphabet) for _ in range(random.randint(0, 30)))
+
+            expected = {}
+            for keyword in keywords:
+                count = text.lower().count(keyword.lower())
+                if count:
+                    expected[keyword.lower()] = count
+
+            self.assertEqual(KeywordMatcher(keywords).count(text), expected)
+
+    def test_overlapping_keywords(self):
+        """測試不同關鍵字可以重疊命中"""
+        matcher = KeywordMatcher(['人壽保險', '壽險', '保險'])
+
+        self.assertEqual(matcher.find('國泰人壽保險公司'), {'人壽保險', '保險'})
+        self.assertEqual(matcher.count('壽險與壽險'), {'壽險': 2})
+
+    def test_dictionary_functions(self):
+        """測試保險詞庫函數與逐一比對結果一致"""
+        text = '金管會要求壽險公司提高資本適足率，InsurTech 帶動保險科技發展'
+        expected = {k for k in ALL_INSURANCE_KEYWORDS if k.lower() in text.lower()}
+
+        self.assertEqual(set(extract_insurance_keywords(text)), expected)
+        self.assertTrue(is_insurance_related(text))
+        self.assertFalse(is_insurance_related('今天天氣很好，適合出門散步'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+新聞已見過索引測試
+Seen News Index Tests
+
+測試 Bloom filter 與精確索引的重複檢查，以及各新聞資料庫的索引同步
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+import shutil
+from unittest import mock
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import seen_index as seen_index_module
+from crawler.seen_index import SeenIndex, normalize_title, news_db_key, get_seen_index
+
+
+class SeenIndexTestCase(unittest.TestCase):
+    """新聞索引測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.index_dir = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.index_dir, 'seen_index')
+        self.index = SeenIndex(self.prefix, capacity=50)
+
+    def tearDown(self):
+        """測試後清理"""
+        self.index.close()
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+
+    def test_normalize_title(self):
+        """測試標題正規化移除標籤、來源與標點"""
+        self.assertEqual(normalize_title('【獨家】[壽險] 國泰人壽推新保單！ - 經濟日報'), '國泰人壽推新保單')
+
+    def test_batch_commit(self):
+        """測試同一作業內的重複檢查，以及提交後寫入索引"""
+        batch = self.index.batch()
+        self.assertFalse(batch.is_duplicate(url='https://a.com/1', title='健康險理賠新制上路'))
+        batch.add(url='https://a.com/1', title='健康險理賠新制上路')
+
+        self.assertTrue(batch.is_duplicate(title='健康險理賠新制上路 - 自由時報'))
+        self.assertFalse(self.index.contains(url='https://a.com/1'))
+
+        batch.commit()
+        self.assertTrue(self.index.contains(url='https://a.com/1#daily_1a2b3c4d'))
+
+    def test_grow_and_rebuild(self):
+        """測試超過容量時擴充，刪除 Bloom filter 後由精確索引重建"""
+        urls = [f'https://b.com/news/{i}' for i in range(200)]
+        for url in urls:
+            self.index.add(url=url)
+        self.assertGreaterEqual(self.index.get_stats()['capacity'], 200)
+
+        self.index.close()
+        os.remove(f"{self.prefix}.bloom")
+        self.index = SeenIndex(self.prefix, capacity=50)
+
+        self.assertTrue(all(self.index.contains(url=url) for url in urls))
+        self.assertFalse(self.index.contains(url='https://b.com/news/new'))
+
+    def _create_news_db(self, name, rows):
+        news_db = os.path.join(self.index_dir, name)
+        if os.path.exists(news_db):
+            os.remove(news_db)
+        conn = sqlite3.connect(news_db)
+        conn.execute('CREATE TABLE news (id INTEGER PRIMARY KEY, title TEXT, url TEXT, status TEXT)')
+        conn.executemany('INSERT INTO news (title, url, status) VALUES (?, ?, ?)', rows)
+        conn.commit()
+        conn.close()
+        return news_db
+
+    def test_sync_from_news(self):
+        """測試依新聞 id 增量同步新聞資料庫 (已下架的新聞同樣加入索引)"""
+        news_db = self._create_news_db('news.db', [
+            ('壽險保費收入創新高', 'https://c.com/1', 'active'),
+            ('已下架新聞', 'https://c.com/2', 'inactive'),
+        ])
+
+        self.assertEqual(self.index.sync_from_news(news_db), 2)
+        self.assertEqual(self.index.sync_from_news(news_db), 0)
+        self.assertTrue(self.index.contains(title='壽險保費收入創新高'))
+        self.assertTrue(self.index.contains(url='https://c.com/2'))
+
+    def test_resync_recreated_news_db(self):
+        """測試新聞資料庫重建後清空索引，先前見過的新聞不再被視為重複"""
+        news_db = self._create_news_db('news.db', [
+            ('壽險保費收入創新高', 'https://c.com/1', 'active'),
+            ('產險理賠件數增加', 'https://c.com/2', 'active'),
+        ])
+        self.assertEqual(self.index.sync_from_news(news_db), 2)
+
+        news_db = self._create_news_db('news.db', [('長照險新商品上市', 'https://c.com/3', 'active')])
+        self.assertEqual(self.index.sync_from_news(news_db), 1)
+        self.assertFalse(self.index.contains(url='https://c.com/1'))
+        self.assertTrue(self.index.contains(url='https://c.com/3'))
+
+        # 無法取得檔案識別時依最大新聞 id 判斷
+        self.index.add(url='https://c.com/4')
+        self.assertEqual(self.index.sync_rows(news_db_key(news_db), None, 0, lambda last_id: []), 0)
+        self.assertFalse(self.index.contains(url='https://c.com/4'))
+
+        # 檔案識別相同且新聞較多時依上次同步的最後一則新聞判斷
+        rows = [(1, '壽險保費收入創新高', 'https://c.com/1', 'active')]
+        fetch = lambda last_id: [row for row in rows if row[0] > last_id]
+        self.assertEqual(self.index.sync_rows('db', '1:2', 1, fetch), 1)
+        rows = [(1, '長照險新商品上市', 'https://c.com/5', 'active'),
+                (2, '年金險銷售成長', 'https://c.com/6', 'active')]
+        self.assertEqual(self.index.sync_rows('db', '1:2', 2, fetch), 2)
+        self.assertFalse(self.index.contains(url='https://c.com/1'))
+        self.assertTrue(self.index.contains(url='https://c.com/5'))
+        self.assertEqual(self.index.sync_rows('db', '1:2', 2, fetch), 0)
+
+    def test_index_per_news_db(self):
+        """測試不同新聞資料庫使用各自的索引"""
+        self.assertEqual(news_db_key('postgresql://app:secret@db/news'), 'postgresql://app@db/news')
+        self.assertEqual(news_db_key('sqlite:///' + os.path.join(self.index_dir, 'a.db')),
+                         news_db_key(os.path.join(self.index_dir, 'a.db')))
+
+        with mock.patch.object(seen_index_module, 'DEFAULT_INDEX_DIR', os.path.join(self.index_dir, 'indexes')), \
+                mock.patch.dict(seen_index_module._seen_indexes, clear=True):
+            dev = get_seen_index(os.path.join(self.index_dir, 'dev.db'))
+            prod = get_seen_index(os.path.join(self.index_dir, 'prod.db'))
+            try:
+                self.assertIs(dev, get_seen_index(os.path.join(self.index_dir, 'dev.db')))
+                dev.add(url='https://d.com/1')
+                self.assertTrue(dev.contains(url='https://d.com/1'))
+                self.assertFalse(prod.contains(url='https://d.com/1'))
+            finally:
+                dev.close()
+                prod.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
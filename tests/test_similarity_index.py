@@ -0,0 +1,120 @@
+"""
+相似度索引測試
+Similarity Index Tests
+
+測試增量 TF-IDF 索引的查詢、移除與持久化
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.similarity_index import SimilarityIndex
+
+SAMPLE_DOCUMENTS = [
+    (1, '健康險理賠金額大幅增加 保險公司檢討理賠流程'),
+    (2, '健康險理賠案件增加 民眾健康意識提升'),
+    (3, '金管會發布保險業數位轉型指引 推動保險科技'),
+    (4, '壽險公司投資收益創新高 股市表現亮眼'),
+]
+
+
+class SimilarityIndexTestCase(unittest.TestCase):
+    """相似度索引測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.index_dir = tempfile.mkdtemp()
+        self.index = SimilarityIndex(index_dir=self.index_dir, min_similarity=0.0)
+        self.index.add_documents(SAMPLE_DOCUMENTS)
+
+    def tearDown(self):
+        """測試後清理"""
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+
+    def test_similar_to_id(self):
+        """測試查詢結果排除自身且依相似度排序"""
+        results = self.index.similar_to_id(1, top_k=3)
+
+        self.assertEqual(results[0][0], 2)
+        self.assertNotIn(1, [news_id for news_id, _ in results])
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_remove_and_refresh(self):
+        """測試移除文章後不再出現在查詢結果"""
+        self.assertTrue(self.index.remove(2))
+        self.index.refresh_idf()
+
+        self.assertNotIn(2, self.index)
+        self.assertNotIn(2, [news_id for news_id, _ in self.index.similar_to_id(1)])
+        self.assertEqual(self.index.size, 3)
+
+    def test_save_and_load(self):
+        """測試保存後載入的查詢結果相同"""
+        self.index.save()
+        loaded = SimilarityIndex(index_dir=self.index_dir, min_similarity=0.0)
+
+        self.assertTrue(loaded.load())
+        self.assertEqual(loaded.similar_to_id(3), self.index.similar_to_id(3))
+
+    def test_incremental_save(self):
+        """測試快照後的新增與移除以增量檔保存，載入後結果相同"""
+        self.index.save()
+        self.index.add_documents([(5, '保險科技新創 推出健康險線上理賠服務')])
+        self.assertTrue(self.index.remove(4))
+        self.index.save()
+
+        self.assertEqual(len(list(Path(self.index_dir).glob('delta-*.json'))), 1)
+        loaded = SimilarityIndex(index_dir=self.index_dir, min_similarity=0.0)
+        self.assertTrue(loaded.load())
+        self.assertIn(5, loaded)
+        self.assertNotIn(4, loaded)
+        self.assertEqual(loaded.similar_to_id(5), self.index.similar_to_id(5))
+
+        # 重算 IDF 後寫入完整快照並清除增量檔
+        self.index.refresh_idf()
+        self.index.save()
+        self.assertEqual(list(Path(self.index_dir).glob('delta-*')), [])
+
+    def test_reload_if_changed(self):
+        """測試其他實例更新索引檔後重新載入"""
+        self.index.save()
+        reader = SimilarityIndex(index_dir=self.index_dir, min_similarity=0.0)
+        self.assertTrue(reader.load())
+        self.assertFalse(reader.reload_if_changed())
+
+        self.index.add_documents([(5, '保險科技新創 推出健康險線上理賠服務')])
+        self.index.save()
+
+        self.assertTrue(reader.reload_if_changed())
+        self.assertIn(5, reader)
+
+    def test_snapshot_keeps_other_writers(self):
+        """測試寫入快照前先合併其他程序保存的文章，不會覆蓋其增量"""
+        self.index.save()
+        other = SimilarityIndex(index_dir=self.index_dir, min_similarity=0.0)
+        self.assertTrue(other.load())
+
+        other.add_documents([(5, '保險科技新創 推出健康險線上理賠服務')])
+        other.save()
+        self.index.add_documents([(6, '產險公司推出颱風險 理賠流程簡化')])
+        self.index.refresh_idf()
+        self.index.save()
+
+        loaded = SimilarityIndex(index_dir=self.index_dir, min_similarity=0.0)
+        self.assertTrue(loaded.load())
+        self.assertIn(5, loaded)
+        self.assertIn(6, loaded)
+        self.assertEqual(loaded.size, 6)
+        self.assertEqual(list(Path(self.index_dir).glob('delta-*')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
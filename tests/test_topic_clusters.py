@@ -0,0 +1,85 @@
+"""
+線上主題聚類測試
+Online Topic Clustering Tests
+
+測試以保存的向量與中心增量聚類
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.similarity_index import SimilarityIndex
+from analyzer.topic_clusters import OnlineTopicClusterer
+
+SAMPLE_DOCUMENTS = [
+    (1, '健康險理賠金額大幅增加 健康險理賠流程檢討'),
+    (2, '健康險理賠案件增加 健康險理賠申請'),
+    (3, '健康險理賠爭議 健康險理賠金額'),
+    (4, '壽險公司投資收益創新高 股市投資收益'),
+    (5, '壽險投資收益亮眼 海外投資收益增加'),
+    (6, '壽險公司股市投資收益 投資收益成長'),
+]
+
+
+class OnlineTopicClustererTestCase(unittest.TestCase):
+    """線上主題聚類測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = SimilarityIndex(index_dir=os.path.join(self.temp_dir, 'index'))
+        self.index.add_documents(SAMPLE_DOCUMENTS)
+        self.state_dir = os.path.join(self.temp_dir, 'clusters')
+        self.articles = [{'id': news_id, 'title': text} for news_id, text in SAMPLE_DOCUMENTS]
+
+    def tearDown(self):
+        """測試後清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def labels(self, result):
+        """將聚類結果轉為 新聞ID -> 聚類 對照"""
+        return {item['id']: label for label, items in result['clusters'].items() for item in items}
+
+    def test_separates_topics(self):
+        """測試兩組主題分入不同聚類"""
+        clusterer = OnlineTopicClusterer(state_dir=self.state_dir)
+        labels = self.labels(clusterer.cluster(self.index, self.articles, n_clusters=2))
+
+        self.assertEqual(labels[1], labels[2])
+        self.assertEqual(labels[4], labels[5])
+        self.assertNotEqual(labels[1], labels[4])
+
+    def test_incremental_assignment_and_reload(self):
+        """測試新文章增量指派，且保存的中心可供新的聚類器使用"""
+        clusterer = OnlineTopicClusterer(state_dir=self.state_dir)
+        clusterer.cluster(self.index, self.articles, n_clusters=2)
+
+        self.index.add_documents([(7, '健康險理賠金額 健康險理賠案件')])
+        articles = self.articles + [{'id': 7, 'title': '健康險理賠'}]
+        labels = self.labels(clusterer.cluster(self.index, articles, n_clusters=2))
+        self.assertEqual(labels[7], labels[1])
+
+        reloaded = OnlineTopicClusterer(state_dir=self.state_dir)
+        self.assertEqual(self.labels(reloaded.cluster(self.index, articles, n_clusters=2)), labels)
+
+    def test_reseed_when_more_articles_arrive(self):
+        """測試文章數少於聚類數時建立的中心，在文章增加後重新初始化"""
+        clusterer = OnlineTopicClusterer(state_dir=self.state_dir)
+        clusterer.cluster(self.index, self.articles[:1], n_clusters=2)
+        self.assertEqual(clusterer.centroids.shape[0], 1)
+
+        result = clusterer.cluster(self.index, self.articles, n_clusters=2)
+
+        self.assertEqual(result['n_clusters'], 2)
+        labels = self.labels(result)
+        self.assertNotEqual(labels[1], labels[4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+增量趨勢儲存測試
+Trend Store Tests
+
+測試每日統計桶的加總結果與逐篇彙總一致
+"""
+
+import unittest
+import os
+import sys
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+# 添加專案根目錄到路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.trend_store import TrendStore
+
+
+def make_records(count, now):
+    """產生隨機的新聞分析結果"""
+    random.seed(7)
+    keywords = ['保險', '壽險', '理賠', '金管會', '數位', '健康險']
+    records = []
+    for news_id in range(1, count + 1):
+        records.append({
+            'news_id': news_id,
+            'published_date': now - timedelta(days=random.randint(0, 40), hours=random.randint(0, 23)),
+            'keywords': random.sample(keywords, 3),
+            'sentiment': random.choice(['positive', 'negative', 'neutral']),
+            'sentiment_score': round(random.uniform(-1, 1), 3),
+            'category': random.choice(['壽險', '產險', '監管']),
+            'source': random.choice(['工商時報', '經濟日報'])
+        })
+    return records
+
+
+class TrendStoreTestCase(unittest.TestCase):
+    """增量趨勢儲存測試案例"""
+
+    def setUp(self):
+        """測試前設置"""
+        self.store = TrendStore(':memory:')
+        self.now = datetime(2026, 10, 18, 12, 0)
+        self.records = make_records(200, self.now)
+
+    def tearDown(self):
+        """測試後清理"""
+        self.store.close()
+
+    def expected_window(self, days):
+        """逐篇彙總指定區間的結果"""
+        start_day = (self.now - timedelta(days=days)).strftime('%Y-%m-%d')
+        recent = [r for r in self.records if r['published_date'].strftime('%Y-%m-%d') >= start_day]
+        return {
+            'total': len(recent),
+            'keywords': Counter(k for r in recent for k in r['keywords']),
+            'categories': Counter(r['category'] for r in recent),
+            'sources': Counter(r['source'] for r in recent)
+        }
+
+    def test_window_matches_full_aggregation(self):
+        """測試 7/30 天區間的加總結果與逐篇彙總一致"""
+        self.store.ingest(self.records)
+
+        for days in (7, 30):
+            expected = self.expected_window(days)
+            result = self.store.get_window(days, now=self.now)
+
+            self.assertEqual(result['analysis_period']['total_articles'], expected['total'])
+            self.assertEqual(dict(result['hot_topics']), dict(expected['keywords']))
+            self.assertEqual(result['category_distribution'], dict(expected['categories']))
+            self.assertEqual(result['source_distribution'], dict(expected['sources']))
+
+    def test_reingest_replaces_contribution(self):
+        """測試同一新聞重複寫入時取代舊的貢獻，移除後不再計入"""
+        self.store.ingest(self.records)
+        before = self.store.get_window(90, now=self.now)
+
+        self.store.ingest(self.records[:50])
+        after = self.store.get_window(90, now=self.now)
+        self.assertEqual(after['hot_topics'], before['hot_topics'])
+        self.assertEqual(after['keyword_trends'], before['keyword_trends'])
+        self.assertEqual(after['sentiment_distribution'], before['sentiment_distribution'])
+        for day, trend in before['sentiment_trend'].items():
+            self.assertEqual(after['sentiment_trend'][day]['article_count'], trend['article_count'])
+            self.assertAlmostEqual(after['sentiment_trend'][day]['average_sentiment'], trend['average_sentiment'])
+
+        self.assertEqual(self.store.remove([r['news_id'] for r in self.records]), len(self.records))
+        self.assertEqual(self.store.get_stats()['total_buckets'], 0)
+
+    def test_replace_with_rebuilt_store(self):
+        """測試以重建完成的暫存儲存取代原有內容，並一併寫入中繼資料"""
+        self.store.ingest(self.records[:50])
+        self.store.set_meta('analyzer_version', 'old')
+
+        rebuilt = TrendStore(':memory:')
+        rebuilt.ingest(self.records)
+        self.store.replace_with(rebuilt, {'analyzer_version': 'new'})
+
+        self.assertEqual(self.store.get_window(90, now=self.now), rebuilt.get_window(90, now=self.now))
+        self.assertEqual(self.store.get_stats(), rebuilt.get_stats())
+        self.assertEqual(self.store.get_meta('analyzer_version'), 'new')
+        rebuilt.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
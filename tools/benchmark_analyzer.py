@@ -0,0 +1,302 @@
+"""
+分析引擎效能測試套件
+Analyzer Benchmark Suite
+
+以固定隨機種子的模擬新聞 (crawler.mock_generator.MockNewsGenerator) 產生 1k/10k/100k 篇的語料，
+逐項量測分詞、關鍵詞、情感、分類、相似文章、聚類、趨勢、去重與重要性評分的吞吐量 (篇/秒) 與峰值記憶體，
+結果寫入 JSON，並可與先前的基準結果比較找出效能退化。
+
+使用方式:
+    python tools/benchmark_analyzer.py --sizes 1000,10000,100000
+    python tools/benchmark_analyzer.py --sizes 1000 --baseline cache/benchmarks/baseline.json
+"""
+
+import sys
+import os
+import json
+import time
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+# 添加專案根目錄到Python路徑
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_SEED = 42
+
+# find_similar_articles 每次呼叫都要比對整個語料，只取少量查詢
+SIMILARITY_QUERIES = 3
+
+
+def build_corpus(size: int, seed: int = DEFAULT_SEED):
+    """
+    產生可重現的模擬語料
+
+    每篇由三則模擬新聞的內容組成，使各篇文本不重複 (避免分詞快取使結果失真)
+
+    Args:
+        size: 文章數
+        seed: 隨機種子
+
+    Returns:
+        文章數據列表
+    """
+    from crawler.mock_generator import MockNewsGenerator
+
+    items = MockNewsGenerator(seed=seed).generate_news(size * 3)
+    corpus = []
+    for i in range(size):
+        parts = items[i * 3:(i + 1) * 3]
+        corpus.append({
+            'id': i + 1,
+            'title': parts[0]['title'],
+            'content': ''.join(part['content'] for part in parts),
+            'summary': '',
+            'url': f"https://example.com/benchmark/{seed}/{i + 1}",
+            'source': parts[0]['source'],
+            'published_date': parts[0]['published_date'].astimezone().replace(tzinfo=None)
+        })
+    return corpus
+
+
+def _text(article):
+    """文章的分析文本 (標題與內容)"""
+    return f"{article['title']} {article['content']}"
+
+
+# 各測試項目：(分析器, 語料) -> 處理的文章數
+
+def _stage_segment_text(analyzer, corpus):
+    for article in corpus:
+        analyzer.text_processor.segment_text(_text(article))
+    return len(corpus)
+
+
+def _stage_extract_keywords(analyzer, corpus):
+    for article in corpus:
+        analyzer.extract_keywords(_text(article), top_k=10)
+    return len(corpus)
+
+
+def _stage_analyze_sentiment(analyzer, corpus):
+    for article in corpus:
+        analyzer.analyze_sentiment(_text(article))
+    return len(corpus)
+
+
+def _stage_analyze_sentiment_batch(analyzer, corpus):
+    analyzer.analyze_sentiment_batch([_text(article) for article in corpus])
+    return len(corpus)
+
+
+def _stage_classify_insurance_category(analyzer, corpus):
+    for article in corpus:
+        analyzer.classify_insurance_category(_text(article))
+    return len(corpus)
+
+
+def _stage_find_similar_articles(analyzer, corpus):
+    texts = [_text(article) for article in corpus]
+    queries = texts[:SIMILARITY_QUERIES]
+    for query in queries:
+        analyzer.find_similar_articles(query, texts, top_k=5)
+    return len(texts) * len(queries)
+
+
+def _stage_cluster_articles(analyzer, corpus):
+    analyzer.cluster_articles(corpus, n_clusters=5)
+    return len(corpus)
+
+
+def _stage_analyze_trends(analyzer, corpus):
+    analyzer.analyze_trends(corpus, time_range=30)
+    return len(corpus)
+
+
+def _stage_deduplication(analyzer, corpus):
+    from crawler.deduplication import NewsDeduplicator
+    NewsDeduplicator().filter_duplicates(corpus)
+    return len(corpus)
+
+
+def _stage_importance_rating(analyzer, corpus):
+    for article in corpus:
+        analyzer.importance_rater.rate_importance(article)
+    return len(corpus)
+
+
+def _stage_importance_rating_batch(analyzer, corpus):
+    analyzer.importance_rater.rate_batch(corpus)
+    return len(corpus)
+
+
+STAGES = {
+    'segment_text': _stage_segment_text,
+    'extract_keywords': _stage_extract_keywords,
+    'analyze_sentiment': _stage_analyze_sentiment,
+    'analyze_sentiment_batch': _stage_analyze_sentiment_batch,
+    'classify_insurance_category': _stage_classify_insurance_category,
+    'find_similar_articles': _stage_find_similar_articles,
+    'cluster_articles': _stage_cluster_articles,
+    'analyze_trends': _stage_analyze_trends,
+    'deduplication': _stage_deduplication,
+    'importance_rating': _stage_importance_rating,
+    'importance_rating_batch': _stage_importance_rating_batch,
+}
+
+
+def peak_rss_mb():
+    """目前行程的峰值常駐記憶體 (MB)，不支援的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 為單位，macOS 以 bytes 為單位
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def run_stage(size: int, stage: str, seed: int = DEFAULT_SEED):
+    """
+    執行單一測試項目
+
+    Args:
+        size: 語料文章數
+        stage: 測試項目名稱
+        seed: 隨機種子
+
+    Returns:
+        測試結果字典
+    """
+    from analyzer.engine import get_analyzer
+    from analyzer.jieba_loader import get_jieba_analyse
+
+    # 詞典載入與語料產生不計入測試時間
+    get_jieba_analyse()
+    analyzer = get_analyzer()
+    corpus = build_corpus(size, seed)
+    analyzer.text_processor.segment_cache.clear()
+    base_rss = peak_rss_mb()
+
+    start = time.perf_counter()
+    processed = STAGES[stage](analyzer, corpus)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'size': size,
+        'stage': stage,
+        'articles': processed,
+        'seconds': round(elapsed, 4),
+        'articles_per_sec': round(processed / elapsed, 2) if elapsed > 0 else None,
+        'base_rss_mb': base_rss,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def _git_commit():
+    """目前的 git commit (無法取得時返回 None)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare_with_baseline(results, baseline_path: str, tolerance: float):
+    """
+    與基準結果比較吞吐量
+
+    Args:
+        results: 本次測試結果
+        baseline_path: 基準結果 JSON 路徑
+        tolerance: 容許的吞吐量下降比例
+
+    Returns:
+        退化的測試項目列表
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['size'], r['stage']): r for r in json.load(f)['results']}
+
+    regressions = []
+    print(f"\n📊 與基準比較: {baseline_path} (容許下降 {tolerance:.0%})")
+    for result in results:
+        previous = baseline.get((result['size'], result['stage']))
+        if not previous or not previous.get('articles_per_sec') or not result.get('articles_per_sec'):
+            continue
+        ratio = result['articles_per_sec'] / previous['articles_per_sec']
+        regressed = ratio < 1 - tolerance
+        if regressed:
+            regressions.append(result)
+        print(f"   {'❌' if regressed else '✅'} {result['size']:>7} {result['stage']:<30} {ratio:6.2f}x")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析引擎效能測試套件')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES), help='語料文章數，以逗號分隔')
+    parser.add_argument('--stages', default=','.join(STAGES), help='測試項目，以逗號分隔')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='語料隨機種子')
+    parser.add_argument('--output', help='結果 JSON 路徑 (預設為 cache/benchmarks/analyzer_<時間>.json)')
+    parser.add_argument('--baseline', help='用於比較的基準結果 JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='容許的吞吐量下降比例')
+    parser.add_argument('--no-isolate', action='store_true', help='所有項目在同一行程執行 (峰值記憶體將累計)')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"未知的測試項目: {', '.join(unknown)}")
+
+    # 預設每個項目在新的子行程執行，峰值記憶體才不會受先前項目影響
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for size in sizes:
+        for stage in stages:
+            if args.no_isolate:
+                result = run_stage(size, stage, args.seed)
+            else:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(run_stage, size, stage, args.seed).result()
+            results.append(result)
+            print(f"⏱️ {size:>7} {stage:<30} {result['articles_per_sec'] or 0:>12.1f} 篇/秒 "
+                  f"{result['seconds']:>9.2f}s  峰值 {result['peak_rss_mb']} MB")
+
+    from analyzer.engine import ANALYZER_VERSION
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'analyzer_version': ANALYZER_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'sizes': sizes,
+            'isolated': not args.no_isolate
+        },
+        'results': results
+    }
+
+    output = args.output or os.path.join(
+        project_root, 'cache', 'benchmarks', f"analyzer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ 結果已寫入 {output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} 個項目效能退化")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -300,7 +300,7 @@ def clustering():
             
             # 執行聚類分析
             analyzer = get_analyzer()
-            clustering_result = analyzer.cluster_articles(articles_data, clusters)
+            clustering_result = analyzer.cluster_articles(articles_data, clusters, online=True)
             clustering_data.update(clustering_result)
         
         return render_template('analysis/clustering.html',